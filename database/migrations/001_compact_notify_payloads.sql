@@ -0,0 +1,123 @@
+-- ============================================================
+-- Migration 001: compact NOTIFY payloads
+-- ============================================================
+-- Replaces row_to_json(NEW) in notify_system_update() and
+-- notify_unified_event() with a compact payload:
+--   {"table", "op", "id", "changed": [columns], <whitelisted fields>}
+-- Large systems.metadata / purpose values no longer hit the 8000-byte
+-- NOTIFY limit, and UPDATEs that change nothing no longer notify.
+--
+-- Apply with:
+--   psql -U lifeos_app -d lifeos_db -f database/migrations/001_compact_notify_payloads.sql
+-- Safe to re-run.
+
+BEGIN;
+
+-- Compact NOTIFY payload: table, op, primary key, changed columns and a
+-- whitelisted field set (passed as trigger arguments). Consumers fetch full
+-- rows by id when they need them, which keeps payloads well below the
+-- 8000-byte NOTIFY limit regardless of metadata size.
+CREATE OR REPLACE FUNCTION build_notify_payload(
+    table_name TEXT,
+    op TEXT,
+    new_row JSONB,
+    old_row JSONB,
+    fields TEXT[]
+) RETURNS JSONB AS $$
+DECLARE
+    changed TEXT[];
+    payload JSONB;
+BEGIN
+    IF op = 'UPDATE' THEN
+        SELECT coalesce(array_agg(n.key ORDER BY n.key), '{}')
+        INTO changed
+        FROM jsonb_each(new_row) n
+        WHERE n.value IS DISTINCT FROM old_row -> n.key;
+    END IF;
+
+    SELECT coalesce(jsonb_object_agg(f.key, f.value), '{}'::jsonb)
+    INTO payload
+    FROM jsonb_each(new_row) f
+    WHERE f.key = ANY(fields);
+
+    payload := payload || jsonb_build_object(
+        'table', table_name,
+        'op', op,
+        'id', new_row -> 'id',
+        'changed', to_jsonb(changed)
+    );
+
+    -- Whitelisted text columns can still be long; fall back to the key alone
+    IF octet_length(payload::text) > 7500 THEN
+        payload := jsonb_build_object(
+            'table', table_name,
+            'op', op,
+            'id', new_row -> 'id',
+            'changed', to_jsonb(changed),
+            'truncated', true
+        );
+    END IF;
+
+    RETURN payload;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- System Update Trigger
+CREATE OR REPLACE FUNCTION notify_system_update()
+RETURNS trigger AS $$
+DECLARE
+    payload jsonb;
+BEGIN
+    payload := build_notify_payload(TG_TABLE_NAME, TG_OP, to_jsonb(NEW), to_jsonb(OLD), TG_ARGV);
+    -- Skip no-op updates
+    IF payload -> 'changed' = '[]'::jsonb THEN
+        RETURN NEW;
+    END IF;
+    PERFORM pg_notify('system_update', payload::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS systems_notify_trigger ON systems;
+CREATE TRIGGER systems_notify_trigger
+AFTER INSERT OR UPDATE ON systems
+FOR EACH ROW EXECUTE FUNCTION notify_system_update(
+    'name', 'category', 'current_stage', 'target_stage', 'owner_type', 'owner_id', 'created_at', 'updated_at'
+);
+
+-- Unified Event Trigger
+CREATE OR REPLACE FUNCTION notify_unified_event()
+RETURNS trigger AS $$
+DECLARE
+    payload jsonb;
+BEGIN
+    payload := build_notify_payload(TG_TABLE_NAME, TG_OP, to_jsonb(NEW), to_jsonb(OLD), TG_ARGV);
+    IF payload -> 'changed' = '[]'::jsonb THEN
+        RETURN NEW;
+    END IF;
+    PERFORM pg_notify('unified_event', payload::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS habits_notify_trigger ON habits;
+CREATE TRIGGER habits_notify_trigger
+AFTER INSERT OR UPDATE ON habits
+FOR EACH ROW EXECUTE FUNCTION notify_unified_event(
+    'character_id', 'skill_id', 'type', 'xp_value', 'hp_value', 'streak', 'last_completed'
+);
+
+-- tasks is missing on databases where projects failed to create
+DO $$
+BEGIN
+    IF to_regclass('tasks') IS NOT NULL THEN
+        DROP TRIGGER IF EXISTS tasks_notify_trigger ON tasks;
+        CREATE TRIGGER tasks_notify_trigger
+        AFTER INSERT OR UPDATE ON tasks
+        FOR EACH ROW EXECUTE FUNCTION notify_unified_event(
+            'project_id', 'completed', 'xp', 'coins', 'difficulty', 'deadline'
+        );
+    END IF;
+END $$;
+
+COMMIT;
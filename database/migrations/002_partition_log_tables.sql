@@ -0,0 +1,273 @@
+-- ============================================================
+-- Migration 002: partition system_logs and unified_logs by month
+-- ============================================================
+-- Converts both log tables to declarative range partitioning (system_logs
+-- by created_at, unified_logs by timestamp) and adds the partition
+-- maintenance functions create_log_partitions(), drop_log_partitions() and
+-- maintain_log_partitions(). Retention then drops whole partitions instead
+-- of DELETEing rows, so cleanup no longer leaves dead tuples to vacuum.
+--
+-- Existing rows are copied into monthly partitions covering their full date
+-- range and the old tables are dropped. The copy runs inside one transaction
+-- and blocks log writes while it runs; on large tables apply it during a
+-- quiet window. The primary keys become (id, created_at) and
+-- (id, timestamp), since a partitioned table's keys must include the
+-- partition column.
+--
+-- Apply with:
+--   psql -U lifeos_app -d lifeos_db -f database/migrations/002_partition_log_tables.sql
+-- Safe to re-run.
+
+BEGIN;
+
+-- Move unpartitioned tables out of the way, freeing their index and
+-- constraint names for the new tables
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass('system_logs') AND relkind = 'r') THEN
+        ALTER TABLE system_logs RENAME TO system_logs_legacy;
+        ALTER TABLE system_logs_legacy RENAME CONSTRAINT system_logs_pkey TO system_logs_legacy_pkey;
+        DROP INDEX IF EXISTS idx_system_logs_system_id, idx_system_logs_character_id,
+            idx_system_logs_event_type, idx_system_logs_log_level,
+            idx_system_logs_created_at, idx_system_logs_correlation_id;
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass('unified_logs') AND relkind = 'r') THEN
+        ALTER TABLE unified_logs RENAME TO unified_logs_legacy;
+        ALTER TABLE unified_logs_legacy RENAME CONSTRAINT unified_logs_pkey TO unified_logs_legacy_pkey;
+        DROP INDEX IF EXISTS idx_unified_logs_timestamp, idx_unified_logs_character_id;
+        -- Keep the id sequence (and its current value) for the new table
+        ALTER SEQUENCE unified_logs_id_seq OWNED BY NONE;
+    END IF;
+END $$;
+
+CREATE SEQUENCE IF NOT EXISTS unified_logs_id_seq;
+
+-- system_logs and unified_logs are range-partitioned by month so retention
+-- drops whole partitions (drop_log_partitions) instead of DELETE + VACUUM.
+-- Partitions are named <table>_yYYYYmMM; rows outside every range land in
+-- the DEFAULT partition until create_log_partitions() covers their month.
+CREATE TABLE IF NOT EXISTS system_logs (
+    id VARCHAR(50) NOT NULL,
+    system_id INT REFERENCES systems(id) ON DELETE CASCADE,
+    character_id INT REFERENCES characters(id) ON DELETE SET NULL,
+    user_id INT REFERENCES users(id) ON DELETE SET NULL,
+    event_type TEXT NOT NULL,
+    log_level TEXT DEFAULT 'info' CHECK (log_level IN ('debug', 'info', 'warning', 'error', 'critical')),
+    event_category TEXT,
+    event_details JSONB,
+    tags JSONB,
+    source TEXT DEFAULT 'system',
+    correlation_id VARCHAR(128),
+    session_id VARCHAR(128),
+    retention_until TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    
+    -- Legacy columns for backward compatibility
+    legacy_event TEXT,
+    legacy_details JSONB,
+    
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE IF NOT EXISTS unified_logs (
+    id INTEGER NOT NULL DEFAULT nextval('unified_logs_id_seq'),
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    source TEXT,
+    system_id INT REFERENCES systems(id) ON DELETE SET NULL,
+    character_id INT REFERENCES characters(id) ON DELETE SET NULL,
+    user_id INT REFERENCES users(id) ON DELETE SET NULL,
+    action TEXT,
+    detail JSONB,
+    outcome TEXT,
+    severity TEXT DEFAULT 'info',
+    
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE IF NOT EXISTS system_logs_default PARTITION OF system_logs DEFAULT;
+CREATE TABLE IF NOT EXISTS unified_logs_default PARTITION OF unified_logs DEFAULT;
+
+-- Create monthly partitions from last month (or the month of since, if
+-- earlier) through months_ahead months ahead, on UTC boundaries. Rows already
+-- sitting in the DEFAULT partition for a new month are moved into it, so a
+-- missed maintenance run never blocks partition creation. Returns the number
+-- of partitions created.
+CREATE OR REPLACE FUNCTION create_log_partitions(
+    parent REGCLASS,
+    months_ahead INTEGER DEFAULT 3,
+    since TIMESTAMPTZ DEFAULT NULL
+) RETURNS INTEGER AS $$
+DECLARE
+    parent_name TEXT := (SELECT relname FROM pg_class WHERE oid = parent);
+    key_column TEXT;
+    default_part REGCLASS;
+    month_start TIMESTAMPTZ;
+    month_end TIMESTAMPTZ;
+    last_end TIMESTAMPTZ;
+    part_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    SELECT a.attname INTO key_column
+    FROM pg_partitioned_table pt
+    JOIN pg_attribute a ON a.attrelid = pt.partrelid AND a.attnum = pt.partattrs[0]
+    WHERE pt.partrelid = parent;
+    IF key_column IS NULL THEN
+        RAISE EXCEPTION '% is not a partitioned table', parent;
+    END IF;
+
+    SELECT inhrelid::regclass INTO default_part
+    FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = parent AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT';
+
+    month_start := date_trunc('month', LEAST(now() - INTERVAL '1 month', since) AT TIME ZONE 'UTC') AT TIME ZONE 'UTC';
+    last_end := (date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => months_ahead + 1)) AT TIME ZONE 'UTC';
+
+    WHILE month_start < last_end LOOP
+        month_end := ((month_start AT TIME ZONE 'UTC') + INTERVAL '1 month') AT TIME ZONE 'UTC';
+        part_name := parent_name || to_char(month_start AT TIME ZONE 'UTC', '"_y"YYYY"m"MM');
+        IF to_regclass(part_name) IS NOT NULL THEN
+            month_start := month_end;
+            CONTINUE;
+        END IF;
+
+        EXECUTE format('CREATE TABLE %I (LIKE %s INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', part_name, parent);
+        IF default_part IS NOT NULL THEN
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM %s WHERE %I >= %L AND %I < %L RETURNING *) INSERT INTO %I SELECT * FROM moved',
+                default_part, key_column, month_start, key_column, month_end, part_name
+            );
+        END IF;
+        EXECUTE format('ALTER TABLE %s ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                       parent, part_name, month_start, month_end);
+        created := created + 1;
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drop monthly partitions whose whole range is older than retention.
+-- keep_until_column names a per-row "keep until" timestamp (system_logs.
+-- retention_until): rows still inside it are moved to the DEFAULT partition
+-- before the drop and expire from there on a later run. Returns the names of
+-- the dropped partitions.
+CREATE OR REPLACE FUNCTION drop_log_partitions(
+    parent REGCLASS,
+    retention INTERVAL,
+    keep_until_column TEXT DEFAULT NULL
+) RETURNS TEXT[] AS $$
+DECLARE
+    cutoff TIMESTAMPTZ := now() - retention;
+    key_column TEXT;
+    default_part REGCLASS;
+    part RECORD;
+    dropped TEXT[] := '{}';
+BEGIN
+    SELECT a.attname INTO key_column
+    FROM pg_partitioned_table pt
+    JOIN pg_attribute a ON a.attrelid = pt.partrelid AND a.attnum = pt.partattrs[0]
+    WHERE pt.partrelid = parent;
+    IF key_column IS NULL THEN
+        RAISE EXCEPTION '% is not a partitioned table', parent;
+    END IF;
+
+    FOR part IN
+        SELECT c.oid::regclass AS child, c.relname,
+               pg_get_expr(c.relpartbound, c.oid) AS bound
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = parent
+        ORDER BY c.relname
+    LOOP
+        IF part.bound = 'DEFAULT' THEN
+            default_part := part.child;
+            CONTINUE;
+        END IF;
+        CONTINUE WHEN substring(part.bound FROM 'TO \(''([^'']+)''\)')::timestamptz > cutoff;
+
+        EXECUTE format('ALTER TABLE %s DETACH PARTITION %s', parent, part.child);
+        IF keep_until_column IS NOT NULL THEN
+            EXECUTE format('INSERT INTO %s SELECT * FROM %s WHERE %I > now()', parent, part.child, keep_until_column);
+        END IF;
+        EXECUTE format('DROP TABLE %s', part.child);
+        dropped := dropped || part.relname::text;
+    END LOOP;
+
+    -- Rows kept past their partition, or written before their month existed
+    IF default_part IS NOT NULL THEN
+        IF keep_until_column IS NOT NULL THEN
+            EXECUTE format('DELETE FROM %s WHERE %I < %L AND (%I IS NULL OR %I <= now())',
+                           default_part, key_column, cutoff, keep_until_column, keep_until_column);
+        ELSE
+            EXECUTE format('DELETE FROM %s WHERE %I < %L', default_part, key_column, cutoff);
+        END IF;
+    END IF;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+-- One-call log maintenance for the cleanup workflow: create upcoming
+-- partitions and drop expired ones for both log tables.
+CREATE OR REPLACE FUNCTION maintain_log_partitions(
+    retention INTERVAL DEFAULT INTERVAL '90 days',
+    months_ahead INTEGER DEFAULT 3
+) RETURNS JSONB AS $$
+BEGIN
+    RETURN jsonb_build_object(
+        'partitions_created',
+            create_log_partitions('system_logs', months_ahead) + create_log_partitions('unified_logs', months_ahead),
+        'system_logs_dropped', to_jsonb(drop_log_partitions('system_logs', retention, 'retention_until')),
+        'unified_logs_dropped', to_jsonb(drop_log_partitions('unified_logs', retention))
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER SEQUENCE unified_logs_id_seq OWNED BY unified_logs.id;
+
+CREATE INDEX IF NOT EXISTS idx_system_logs_system_id ON system_logs(system_id);
+CREATE INDEX IF NOT EXISTS idx_system_logs_character_id ON system_logs(character_id);
+CREATE INDEX IF NOT EXISTS idx_system_logs_event_type ON system_logs(event_type);
+CREATE INDEX IF NOT EXISTS idx_system_logs_log_level ON system_logs(log_level);
+CREATE INDEX IF NOT EXISTS idx_system_logs_created_at ON system_logs(created_at);
+CREATE INDEX IF NOT EXISTS idx_system_logs_correlation_id ON system_logs(correlation_id);
+CREATE INDEX IF NOT EXISTS idx_unified_logs_timestamp ON unified_logs(timestamp);
+CREATE INDEX IF NOT EXISTS idx_unified_logs_character_id ON unified_logs(character_id);
+
+-- Copy legacy rows into partitions covering their whole date range
+DO $$
+DECLARE
+    oldest TIMESTAMPTZ;
+BEGIN
+    IF to_regclass('system_logs_legacy') IS NOT NULL THEN
+        SELECT min(created_at) INTO oldest FROM system_logs_legacy;
+        PERFORM create_log_partitions('system_logs', 3, oldest);
+        INSERT INTO system_logs (
+            id, system_id, character_id, user_id, event_type, log_level, event_category,
+            event_details, tags, source, correlation_id, session_id, retention_until,
+            created_at, legacy_event, legacy_details
+        )
+        SELECT id, system_id, character_id, user_id, event_type, log_level, event_category,
+               event_details, tags, source, correlation_id, session_id, retention_until,
+               COALESCE(created_at, now()), legacy_event, legacy_details
+        FROM system_logs_legacy;
+        DROP TABLE system_logs_legacy;
+    ELSE
+        PERFORM create_log_partitions('system_logs');
+    END IF;
+
+    IF to_regclass('unified_logs_legacy') IS NOT NULL THEN
+        SELECT min(timestamp) INTO oldest FROM unified_logs_legacy;
+        PERFORM create_log_partitions('unified_logs', 3, oldest);
+        INSERT INTO unified_logs (
+            id, timestamp, source, system_id, character_id, user_id, action, detail, outcome, severity
+        )
+        SELECT id, COALESCE(timestamp, now()), source, system_id, character_id, user_id,
+               action, detail, outcome, severity
+        FROM unified_logs_legacy;
+        DROP TABLE unified_logs_legacy;
+    ELSE
+        PERFORM create_log_partitions('unified_logs');
+    END IF;
+END $$;
+
+COMMIT;
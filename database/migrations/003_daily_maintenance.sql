@@ -0,0 +1,147 @@
+-- ============================================================
+-- Migration 003: set-based daily maintenance
+-- ============================================================
+-- Adds run_daily_maintenance(), which applies the midnight HP penalties,
+-- streak resets and daily random events for all active characters in one
+-- transaction. cron_manager.json calls it instead of issuing an UPDATE and
+-- an INSERT per character.
+--
+-- Apply with:
+--   psql -U lifeos_app -d lifeos_db -f database/migrations/003_daily_maintenance.sql
+-- Safe to re-run.
+
+BEGIN;
+
+-- Midnight tick for cron_manager.json: HP penalties and bonuses, streak
+-- resets and daily random events for every active character, as a handful
+-- of set-based statements in one transaction instead of one UPDATE/INSERT
+-- round trip per character.
+--
+-- Rules (per character active in the last 30 days):
+--   -2 HP per good habit not completed for 2+ days (max -20)
+--   -5 HP per overdue open task (max -25)
+--   -10% of a negative coin balance (max -15)
+--   +5 HP for level 10+ characters with no penalty
+--   HP is clamped to 0..100; one daily_maintenance event per changed character
+--
+-- A transaction-level advisory lock makes an overlapping run a no-op.
+CREATE OR REPLACE FUNCTION run_daily_maintenance(
+    run_date DATE DEFAULT CURRENT_DATE,
+    active_window INTERVAL DEFAULT INTERVAL '30 days'
+) RETURNS JSONB AS $$
+DECLARE
+    started TIMESTAMPTZ := clock_timestamp();
+    active_count INTEGER;
+    changed INTEGER;
+    hp_changed INTEGER;
+    penalized INTEGER;
+    streaks_reset INTEGER;
+    random_events INTEGER;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('run_daily_maintenance')) THEN
+        RETURN jsonb_build_object('skipped', true, 'reason', 'another run is in progress');
+    END IF;
+
+    WITH active AS (
+        SELECT id, hp, coins, level
+        FROM characters
+        WHERE last_login > now() - active_window
+    ), overdue_habits AS (
+        SELECT h.character_id, count(*) AS overdue
+        FROM habits h
+        WHERE h.type = 'good' AND h.last_completed < run_date - 2
+        GROUP BY h.character_id
+    ), overdue_tasks AS (
+        SELECT p.character_id, count(*) AS overdue
+        FROM projects p
+        JOIN tasks t ON t.project_id = p.id
+        WHERE NOT t.completed AND t.deadline < run_date
+        GROUP BY p.character_id
+    ), scored AS (
+        SELECT a.id, a.hp, a.level,
+               COALESCE(oh.overdue, 0) AS overdue_habits,
+               LEAST(COALESCE(oh.overdue, 0) * 2, 20) AS habit_penalty,
+               COALESCE(ot.overdue, 0) AS overdue_tasks,
+               LEAST(COALESCE(ot.overdue, 0) * 5, 25) AS task_penalty,
+               CASE WHEN a.coins < 0 THEN floor(LEAST(abs(a.coins) * 0.1, 15))::int ELSE 0 END AS overdraft_penalty
+        FROM active a
+        LEFT JOIN overdue_habits oh ON oh.character_id = a.id
+        LEFT JOIN overdue_tasks ot ON ot.character_id = a.id
+    ), changes AS (
+        SELECT id, hp,
+               habit_penalty + task_penalty + overdraft_penalty AS penalty,
+               CASE WHEN level >= 10 AND habit_penalty + task_penalty + overdraft_penalty = 0 THEN 5 ELSE 0 END AS bonus,
+               concat_ws(', ',
+                   CASE WHEN overdue_habits > 0 THEN format('%s overdue habits (-%s HP)', overdue_habits, habit_penalty) END,
+                   CASE WHEN overdue_tasks > 0 THEN format('%s overdue tasks (-%s HP)', overdue_tasks, task_penalty) END,
+                   CASE WHEN overdraft_penalty > 0 THEN format('Overdraft penalty (-%s HP)', overdraft_penalty) END,
+                   CASE WHEN level >= 10 AND habit_penalty + task_penalty + overdraft_penalty = 0
+                        THEN 'Daily wellness bonus (+5 HP)' END
+               ) AS reason
+        FROM scored
+        WHERE habit_penalty + task_penalty + overdraft_penalty > 0 OR level >= 10
+    ), updated AS (
+        UPDATE characters c
+        SET hp = GREATEST(0, LEAST(100, ch.hp + ch.bonus - ch.penalty)),
+            updated_at = now()
+        FROM changes ch
+        WHERE c.id = ch.id AND c.hp IS DISTINCT FROM GREATEST(0, LEAST(100, ch.hp + ch.bonus - ch.penalty))
+        RETURNING c.id
+    ), logged AS (
+        INSERT INTO events (character_id, event_type, hp_change, description)
+        SELECT id, 'daily_maintenance', bonus - penalty, reason
+        FROM changes
+        RETURNING character_id
+    )
+    SELECT (SELECT count(*) FROM active),
+           (SELECT count(*) FROM logged),
+           (SELECT count(*) FROM changes WHERE penalty > 0),
+           (SELECT count(*) FROM updated)
+    INTO active_count, changed, penalized, hp_changed;
+
+    -- Only streaks that are still running break; already-reset habits stay quiet
+    WITH broken AS (
+        UPDATE habits
+        SET streak = 0, updated_at = now()
+        WHERE type = 'good' AND last_completed < run_date - 2 AND streak > 0
+        RETURNING character_id, name
+    )
+    INSERT INTO events (character_id, event_type, description)
+    SELECT character_id, 'streak_broken', 'Streak broken for habit: ' || name
+    FROM broken;
+    GET DIAGNOSTICS streaks_reset = ROW_COUNT;
+
+    -- 1-3 random events per active character, drawn from a pool of 10
+    WITH pool AS (
+        SELECT row_number() OVER () AS slot, description
+        FROM (SELECT description FROM rng_events WHERE available ORDER BY random() LIMIT 10) picked
+    ), draws AS (
+        SELECT a.id AS character_id,
+               1 + floor(random() * (SELECT count(*) FROM pool))::int AS slot
+        FROM (
+            SELECT id, 1 + floor(random() * 3)::int AS event_count
+            FROM characters
+            WHERE last_login > now() - active_window
+        ) a
+        CROSS JOIN LATERAL generate_series(1, a.event_count)
+    )
+    INSERT INTO events (character_id, event_type, description)
+    SELECT d.character_id, 'daily_random', p.description
+    FROM draws d
+    JOIN pool p ON p.slot = d.slot;
+    GET DIAGNOSTICS random_events = ROW_COUNT;
+
+    RETURN jsonb_build_object(
+        'run_date', run_date,
+        'active_characters', active_count,
+        'characters_changed', changed,
+        'characters_penalized', penalized,
+        'hp_updated', hp_changed,
+        'streaks_reset', streaks_reset,
+        'random_events', random_events,
+        'duration_ms', round(extract(epoch FROM clock_timestamp() - started) * 1000)
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
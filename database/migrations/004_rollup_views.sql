@@ -0,0 +1,202 @@
+-- ============================================================
+-- Migration 004: leaderboard, character summary and guild XP rollups
+-- ============================================================
+-- Adds the leaderboard_mv, character_summary_mv and guild_xp_mv
+-- materialized views, the rollup_refresh_log bookkeeping table, statement
+-- triggers that mark a rollup dirty when its source tables change, and
+-- refresh_rollups(), which rollup_refresher.json runs every minute.
+--
+-- Apply with:
+--   psql -U lifeos_app -d lifeos_db -f database/migrations/004_rollup_views.sql
+-- Safe to re-run.
+
+BEGIN;
+
+-- Leaderboard, per-character totals and guild XP, precomputed for the hot
+-- read paths. refresh_rollups() (run every minute by rollup_refresher.json)
+-- refreshes a view concurrently once it has been marked dirty by a write to
+-- one of its source tables, and at least every max_age regardless. Reads may
+-- lag writes by about a minute.
+CREATE TABLE IF NOT EXISTS rollup_refresh_log (
+    view_name TEXT PRIMARY KEY,
+    refreshed_at TIMESTAMP WITH TIME ZONE,
+    refresh_ms INTEGER,
+    row_count BIGINT,
+    dirty_since TIMESTAMP WITH TIME ZONE
+);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS leaderboard_mv AS
+SELECT c.id AS character_id,
+       c.user_id,
+       u.username,
+       c.class,
+       c.level,
+       c.total_xp,
+       c.prestige_level,
+       COALESCE(w.weekly_xp, 0) AS weekly_xp,
+       rank() OVER (ORDER BY c.total_xp DESC NULLS LAST, c.level DESC NULLS LAST) AS rank,
+       rank() OVER (ORDER BY COALESCE(w.weekly_xp, 0) DESC) AS weekly_rank
+FROM characters c
+LEFT JOIN users u ON u.id::text = c.user_id::text
+LEFT JOIN (
+    SELECT character_id, sum(xp_change) AS weekly_xp
+    FROM events
+    WHERE event_date >= now() - INTERVAL '7 days'
+    GROUP BY character_id
+) w ON w.character_id = c.id;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS character_summary_mv AS
+SELECT c.id AS character_id,
+       c.level,
+       c.xp,
+       c.total_xp,
+       c.coins,
+       c.hp,
+       COALESCE(s.skill_count, 0) AS skill_count,
+       COALESCE(s.skill_xp, 0) AS skill_xp,
+       s.max_skill_level,
+       COALESCE(a.achievement_count, 0) AS achievement_count,
+       a.last_achievement_at,
+       COALESCE(e.events_30d, 0) AS events_30d,
+       COALESCE(e.xp_30d, 0) AS xp_30d,
+       COALESCE(e.coins_30d, 0) AS coins_30d,
+       e.last_event_at
+FROM characters c
+LEFT JOIN (
+    SELECT character_id, count(*) AS skill_count, sum(xp) AS skill_xp, max(level) AS max_skill_level
+    FROM skills GROUP BY character_id
+) s ON s.character_id = c.id
+LEFT JOIN (
+    SELECT character_id, count(*) AS achievement_count, max(unlocked_at) AS last_achievement_at
+    FROM achievements GROUP BY character_id
+) a ON a.character_id = c.id
+LEFT JOIN (
+    SELECT character_id, count(*) AS events_30d, sum(xp_change) AS xp_30d,
+           sum(coins_change) AS coins_30d, max(event_date) AS last_event_at
+    FROM events
+    WHERE event_date >= now() - INTERVAL '30 days'
+    GROUP BY character_id
+) e ON e.character_id = c.id;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS guild_xp_mv AS
+SELECT g.id AS guild_id,
+       g.name,
+       count(gm.user_id) AS member_count,
+       COALESCE(sum(c.total_xp), 0) AS member_xp,
+       COALESCE(sum(c.total_xp), 0) + COALESCE(g.xp_pool, 0) AS total_xp,
+       round(avg(c.level), 2) AS avg_level,
+       rank() OVER (ORDER BY COALESCE(sum(c.total_xp), 0) + COALESCE(g.xp_pool, 0) DESC) AS rank
+FROM guilds g
+LEFT JOIN guild_members gm ON gm.guild_id = g.id
+LEFT JOIN characters c ON c.user_id::text = gm.user_id::text
+GROUP BY g.id, g.name, g.xp_pool;
+
+INSERT INTO rollup_refresh_log (view_name, refreshed_at)
+VALUES ('leaderboard_mv', now()), ('character_summary_mv', now()), ('guild_xp_mv', now())
+ON CONFLICT (view_name) DO NOTHING;
+
+-- Statement-level, and a no-op once the view is already dirty, so bulk
+-- writes and busy tables cost one indexed lookup per statement
+CREATE OR REPLACE FUNCTION mark_rollups_dirty() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE rollup_refresh_log
+    SET dirty_since = now()
+    WHERE view_name = ANY(TG_ARGV) AND dirty_since IS NULL;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS characters_rollup_trigger ON characters;
+CREATE TRIGGER characters_rollup_trigger
+AFTER INSERT OR UPDATE OR DELETE ON characters
+FOR EACH STATEMENT EXECUTE FUNCTION mark_rollups_dirty('leaderboard_mv', 'character_summary_mv', 'guild_xp_mv');
+
+DROP TRIGGER IF EXISTS users_rollup_trigger ON users;
+CREATE TRIGGER users_rollup_trigger
+AFTER INSERT OR UPDATE OF username OR DELETE ON users
+FOR EACH STATEMENT EXECUTE FUNCTION mark_rollups_dirty('leaderboard_mv');
+
+DROP TRIGGER IF EXISTS skills_rollup_trigger ON skills;
+CREATE TRIGGER skills_rollup_trigger
+AFTER INSERT OR UPDATE OR DELETE ON skills
+FOR EACH STATEMENT EXECUTE FUNCTION mark_rollups_dirty('character_summary_mv');
+
+DROP TRIGGER IF EXISTS achievements_rollup_trigger ON achievements;
+CREATE TRIGGER achievements_rollup_trigger
+AFTER INSERT OR UPDATE OR DELETE ON achievements
+FOR EACH STATEMENT EXECUTE FUNCTION mark_rollups_dirty('character_summary_mv');
+
+DROP TRIGGER IF EXISTS events_rollup_trigger ON events;
+CREATE TRIGGER events_rollup_trigger
+AFTER INSERT OR UPDATE OR DELETE ON events
+FOR EACH STATEMENT EXECUTE FUNCTION mark_rollups_dirty('leaderboard_mv', 'character_summary_mv');
+
+DROP TRIGGER IF EXISTS guilds_rollup_trigger ON guilds;
+CREATE TRIGGER guilds_rollup_trigger
+AFTER INSERT OR UPDATE OR DELETE ON guilds
+FOR EACH STATEMENT EXECUTE FUNCTION mark_rollups_dirty('guild_xp_mv');
+
+DROP TRIGGER IF EXISTS guild_members_rollup_trigger ON guild_members;
+CREATE TRIGGER guild_members_rollup_trigger
+AFTER INSERT OR UPDATE OR DELETE ON guild_members
+FOR EACH STATEMENT EXECUTE FUNCTION mark_rollups_dirty('guild_xp_mv');
+
+-- Refresh every rollup that is dirty and was last refreshed more than
+-- min_interval ago, or that is older than max_age. Dirty marks written while
+-- a refresh runs can be cleared by it, which max_age bounds. Returns
+-- {view: {refresh_ms, row_count}} for the views refreshed, or skipped:true
+-- when another refresh is already running.
+CREATE OR REPLACE FUNCTION refresh_rollups(
+    min_interval INTERVAL DEFAULT INTERVAL '1 minute',
+    max_age INTERVAL DEFAULT INTERVAL '15 minutes',
+    force BOOLEAN DEFAULT FALSE
+) RETURNS JSONB AS $$
+DECLARE
+    rollup RECORD;
+    started TIMESTAMPTZ;
+    elapsed_ms INTEGER;
+    rows_now BIGINT;
+    refreshed JSONB := '{}';
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('refresh_rollups')) THEN
+        RETURN jsonb_build_object('skipped', true, 'reason', 'another refresh is in progress');
+    END IF;
+
+    FOR rollup IN
+        SELECT l.view_name, c.relispopulated
+        FROM rollup_refresh_log l
+        JOIN pg_class c ON c.oid = to_regclass(l.view_name)
+        WHERE force
+           OR l.refreshed_at IS NULL
+           OR l.refreshed_at <= now() - max_age
+           OR (l.dirty_since IS NOT NULL AND l.refreshed_at <= now() - min_interval)
+        ORDER BY l.view_name
+    LOOP
+        started := clock_timestamp();
+        -- CONCURRENTLY keeps the view readable during the refresh, but needs it populated
+        IF rollup.relispopulated THEN
+            EXECUTE format('REFRESH MATERIALIZED VIEW CONCURRENTLY %I', rollup.view_name);
+        ELSE
+            EXECUTE format('REFRESH MATERIALIZED VIEW %I', rollup.view_name);
+        END IF;
+        EXECUTE format('SELECT count(*) FROM %I', rollup.view_name) INTO rows_now;
+        elapsed_ms := round(extract(epoch FROM clock_timestamp() - started) * 1000);
+
+        UPDATE rollup_refresh_log
+        SET refreshed_at = started, refresh_ms = elapsed_ms, row_count = rows_now, dirty_since = NULL
+        WHERE view_name = rollup.view_name;
+        refreshed := refreshed || jsonb_build_object(rollup.view_name,
+            jsonb_build_object('refresh_ms', elapsed_ms, 'row_count', rows_now));
+    END LOOP;
+    RETURN refreshed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rollup indexes (a unique index is required for REFRESH ... CONCURRENTLY)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_leaderboard_mv_character_id ON leaderboard_mv(character_id);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_mv_rank ON leaderboard_mv(rank);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_mv_weekly_rank ON leaderboard_mv(weekly_rank);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_character_summary_mv_character_id ON character_summary_mv(character_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_guild_xp_mv_guild_id ON guild_xp_mv(guild_id);
+
+COMMIT;
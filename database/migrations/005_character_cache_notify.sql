@@ -0,0 +1,38 @@
+-- ============================================================
+-- Migration 005: notifications for the character cache
+-- ============================================================
+-- pg-listener caches character state (characters + user + skills) in
+-- Redis and deletes a character's key when one of these tables changes.
+-- Adds unified_event triggers on characters, skills and users; the
+-- notify_unified_event() function itself is unchanged.
+--
+-- Apply with:
+--   psql -U lifeos_app -d lifeos_db -f database/migrations/005_character_cache_notify.sql
+-- Safe to re-run.
+
+BEGIN;
+
+-- Character state changes only invalidate pg-listener's character cache
+-- (FORWARD_IGNORE_TABLES keeps them out of the n8n forwarder)
+DROP TRIGGER IF EXISTS characters_notify_trigger ON characters;
+CREATE TRIGGER characters_notify_trigger
+AFTER INSERT OR UPDATE ON characters
+FOR EACH ROW EXECUTE FUNCTION notify_unified_event(
+    'user_id', 'level', 'xp', 'hp', 'coins', 'prestige_level'
+);
+
+DROP TRIGGER IF EXISTS skills_notify_trigger ON skills;
+CREATE TRIGGER skills_notify_trigger
+AFTER INSERT OR UPDATE ON skills
+FOR EACH ROW EXECUTE FUNCTION notify_unified_event(
+    'character_id', 'level', 'xp'
+);
+
+DROP TRIGGER IF EXISTS users_notify_trigger ON users;
+CREATE TRIGGER users_notify_trigger
+AFTER UPDATE ON users
+FOR EACH ROW EXECUTE FUNCTION notify_unified_event(
+    'username'
+);
+
+COMMIT;
@@ -0,0 +1,54 @@
+-- ============================================================
+-- Migration 006: indexes for workflow query shapes
+-- ============================================================
+-- idx_characters_last_login and the low-selectivity list were generated by
+-- scripts/index_advisor.py from the SQL in n8n/**/*.json, planned against
+-- 50,000 synthetic rows per table (seed 42); the index lowered the estimated
+-- cost of the listed statements by at least 20%. The run_daily_maintenance()
+-- section was planned by hand on seeded data, as its comment describes.
+--
+-- Apply with:
+--   psql -U lifeos_app -d lifeos_db -f database/migrations/006_workflow_indexes.sql
+-- Safe to re-run.
+
+BEGIN;
+
+-- 22% cheaper (4014 -> 3122):
+--   ai_workflows/ai_missions.json :: Fetch Active Users (Subflow)
+--   ai_workflows/event_seeder.json :: Fetch Active Users for Notification
+CREATE INDEX IF NOT EXISTS idx_characters_last_login ON characters(last_login);
+
+-- Statements inside run_daily_maintenance(), which index_advisor.py now
+-- extracts from the PL/pgSQL functions. Their generic totals are dominated by
+-- the UPDATE/INSERT estimates, so these were planned by hand on a database
+-- filled by scripts/seed_data.py (5,000 characters, 21,445 habits, 6,664
+-- tasks) with run_date = CURRENT_DATE.
+--
+-- 90% cheaper (164 -> 17, 0.40 ms -> 0.03 ms): the overdue_tasks CTE
+--   (NOT t.completed AND t.deadline < run_date); open overdue tasks are rare.
+CREATE INDEX IF NOT EXISTS idx_tasks_deadline_where_not_completed ON tasks(deadline) WHERE NOT completed;
+
+-- Measured and not shipped: most good habits are 2+ days overdue in practice
+-- (12,999 of 17,155), so the overdue_habits CTE stays a sequential scan
+-- (826 -> 785, 5%) and the streak reset keeps its plan (915 -> 915) even when
+-- only one night's breaks (611 rows) remain. Worth it once habits grows well
+-- past the seed size:
+-- CREATE INDEX IF NOT EXISTS idx_habits_last_completed_where_type ON habits(last_completed) WHERE type = 'good';
+--
+-- Also measured and not shipped (under 5% on the statements they serve):
+-- CREATE INDEX IF NOT EXISTS idx_events_character_id_event_date ON events(character_id, event_date);
+--   statements.js :: character_recent_activity, mission_contexts (8.8 -> 8.5)
+-- CREATE INDEX IF NOT EXISTS idx_habits_character_id_streak_where_type ON habits(character_id, streak DESC NULLS LAST) WHERE type = 'good';
+-- CREATE INDEX IF NOT EXISTS idx_system_steps_system_id_id_where_status ON system_steps(system_id, id) WHERE status = 'pending';
+--   statements.js :: mission_contexts (no change in cost)
+
+-- Low-selectivity indexes no workflow plan used. Review before dropping:
+-- they still cost a write on every INSERT/UPDATE.
+-- DROP INDEX IF EXISTS idx_goals_status;  -- goals.status, 3 distinct values
+-- DROP INDEX IF EXISTS idx_habits_type;  -- habits.type, 2 distinct values
+-- DROP INDEX IF EXISTS idx_missions_status;  -- missions.status, 4 distinct values
+-- DROP INDEX IF EXISTS idx_system_logs_log_level;  -- system_logs.log_level, 5 distinct values
+-- DROP INDEX IF EXISTS idx_system_steps_status;  -- system_steps.status, 3 distinct values
+-- DROP INDEX IF EXISTS idx_tasks_completed;  -- tasks.completed, 2 distinct values
+
+COMMIT;
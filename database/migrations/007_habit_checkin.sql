@@ -0,0 +1,162 @@
+-- ============================================================
+-- Migration 007: single-transaction habit check-in
+-- ============================================================
+-- Adds habit_checkin(), which applies a habit check-in (streak, rewards,
+-- skill XP, character XP and level-up, events and system_logs rows) in one
+-- transaction. habit_checkin.json calls it through pg-listener's query
+-- service instead of chaining the streak update, character progression and
+-- two logging subflows, each of which committed on its own.
+--
+-- Apply with:
+--   psql -U lifeos_app -d lifeos_db -f database/migrations/007_habit_checkin.sql
+-- Safe to re-run.
+
+BEGIN;
+
+-- Habit check-in for habit_checkin.json, ported from its Calculate Rewards
+-- node and subflow-character-progression.
+--
+-- Rules:
+--   base XP is the habit's xp_value (10 when unset), base coins half of it
+--   streak multiplier x1.5 from a 7-day streak, x2 from 30, x3 from 90
+--   the habit's skill gets 40% of the habit XP and levels up at level * 100 XP
+--   character XP is scaled by xp_multiplier and +5% per prestige level
+--   level N -> N+1 costs 100 + 50 * N of total_xp; each level gained adds
+--   50 coins and 10 HP / max HP
+--   one habit_completed event, a level_up event when a level is gained, and
+--   one habit_checkin row in system_logs
+--
+-- The character row is locked before the habit, in the same order as
+-- run_daily_maintenance(), so concurrent check-ins and the midnight tick
+-- queue instead of deadlocking. A second check-in for the same date changes
+-- nothing and returns already_completed.
+CREATE OR REPLACE FUNCTION habit_checkin(
+    target_habit_id INTEGER,
+    checkin_date DATE DEFAULT CURRENT_DATE
+) RETURNS JSONB AS $$
+DECLARE
+    c RECORD;
+    h RECORD;
+    skill_name TEXT;
+    skill_level INTEGER;
+    skill_total_xp BIGINT;
+    skill_level_up BOOLEAN;
+    new_streak INTEGER;
+    multiplier NUMERIC;
+    base_xp INTEGER;
+    habit_xp INTEGER;
+    habit_coins INTEGER;
+    skill_xp INTEGER;
+    xp_gained INTEGER;
+    new_total BIGINT;
+    new_level INTEGER := 1;
+    level_floor BIGINT := 0;
+    levels_gained INTEGER;
+BEGIN
+    SELECT ch.id, ch.level, ch.total_xp, ch.coins, ch.hp, ch.max_hp, ch.xp_multiplier, ch.prestige_level
+    INTO c
+    FROM characters ch
+    WHERE ch.id = (SELECT character_id FROM habits WHERE id = target_habit_id)
+    FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('success', false, 'habit_id', target_habit_id,
+                                  'message', 'Habit or character not found');
+    END IF;
+
+    SELECT id, skill_id, name, type, xp_value, streak, last_completed
+    INTO h
+    FROM habits
+    WHERE id = target_habit_id
+    FOR UPDATE;
+    IF h.last_completed >= checkin_date THEN
+        RETURN jsonb_build_object('success', false, 'already_completed', true, 'habit_id', h.id,
+                                  'message', 'Habit already completed today');
+    END IF;
+
+    new_streak := COALESCE(h.streak, 0) + 1;
+    multiplier := CASE WHEN new_streak >= 90 THEN 3.0
+                       WHEN new_streak >= 30 THEN 2.0
+                       WHEN new_streak >= 7 THEN 1.5
+                       ELSE 1.0 END;
+    base_xp := COALESCE(NULLIF(h.xp_value, 0), 10);
+    habit_xp := floor(base_xp * multiplier);
+    habit_coins := floor(floor(base_xp * 0.5) * multiplier);
+    skill_xp := floor(habit_xp * 0.4);
+    xp_gained := floor(habit_xp * COALESCE(c.xp_multiplier, 1) * (1 + COALESCE(c.prestige_level, 0) * 0.05));
+
+    new_total := COALESCE(c.total_xp, 0) + xp_gained;
+    WHILE level_floor + 100 + new_level * 50 <= new_total LOOP
+        level_floor := level_floor + 100 + new_level * 50;
+        new_level := new_level + 1;
+    END LOOP;
+    levels_gained := GREATEST(new_level - COALESCE(c.level, 1), 0);
+
+    UPDATE habits
+    SET streak = new_streak, last_completed = checkin_date, updated_at = now()
+    WHERE id = h.id;
+
+    IF h.skill_id IS NOT NULL THEN
+        UPDATE skills s
+        SET xp = s.xp + skill_xp,
+            level = CASE WHEN s.xp + skill_xp >= s.level * 100 THEN s.level + 1 ELSE s.level END,
+            updated_at = now()
+        FROM (SELECT id, level FROM skills WHERE id = h.skill_id) old
+        WHERE s.id = old.id
+        RETURNING s.name, s.xp, s.level, s.level > old.level
+        INTO skill_name, skill_total_xp, skill_level, skill_level_up;
+    END IF;
+
+    UPDATE characters
+    SET level = GREATEST(level, new_level),  -- a level ahead of total_xp (admin override) is kept
+        xp = new_total - level_floor,
+        total_xp = new_total,
+        coins = coins + habit_coins + levels_gained * 50,
+        max_hp = max_hp + levels_gained * 10,
+        hp = LEAST(hp + levels_gained * 10, max_hp + levels_gained * 10),
+        updated_at = now()
+    WHERE id = c.id
+    RETURNING level, coins, hp, max_hp INTO c.level, c.coins, c.hp, c.max_hp;
+
+    INSERT INTO events (character_id, event_type, xp_change, coins_change, description)
+    VALUES (c.id, 'habit_completed', xp_gained, habit_coins,
+            format('Habit completed: %s (streak: %s)', h.name, new_streak));
+    IF levels_gained > 0 THEN
+        INSERT INTO events (character_id, event_type, xp_change, coins_change, hp_change, description)
+        VALUES (c.id, 'level_up', xp_gained, levels_gained * 50, levels_gained * 10,
+                format('Level up! Reached level %s (gained %s levels)', new_level, levels_gained));
+    END IF;
+
+    INSERT INTO system_logs (id, character_id, event_type, log_level, event_category, event_details, source)
+    VALUES ('habit_checkin_' || gen_random_uuid(), c.id, 'habit_checkin', 'info', 'habit',
+            jsonb_build_object('habit_id', h.id, 'streak_count', new_streak, 'xp_gained', xp_gained,
+                               'coins_gained', habit_coins, 'skill_level', skill_level),
+            'habit_checkin_workflow');
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'habit_id', h.id,
+        'habit_name', h.name,
+        'habit_type', COALESCE(h.type, 'good'),
+        'character_id', c.id,
+        'xp_earned', xp_gained,
+        'coins_earned', habit_coins,
+        'skill_xp_earned', CASE WHEN skill_name IS NOT NULL THEN skill_xp ELSE 0 END,
+        'new_streak', new_streak,
+        'streak_multiplier', multiplier,
+        'level', c.level,
+        'levels_gained', levels_gained,
+        'level_up', levels_gained > 0,
+        'xp_to_next_level', 100 + new_level * 50 - (new_total - level_floor),
+        'coins', c.coins,
+        'hp', c.hp,
+        'max_hp', c.max_hp,
+        'skill', CASE WHEN skill_name IS NOT NULL
+                      THEN jsonb_build_object('id', h.skill_id, 'name', skill_name, 'xp', skill_total_xp,
+                                              'level', skill_level, 'level_up', skill_level_up)
+                 END,
+        'prestige_eligible', levels_gained > 0 AND c.level >= 50
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
@@ -251,8 +251,12 @@ CREATE TABLE IF NOT EXISTS routine_completions (
 -- LOGGING & AUDIT - ENHANCED SYSTEM
 -- ============================================================
 
+-- system_logs and unified_logs are range-partitioned by month so retention
+-- drops whole partitions (drop_log_partitions) instead of DELETE + VACUUM.
+-- Partitions are named <table>_yYYYYmMM; rows outside every range land in
+-- the DEFAULT partition until create_log_partitions() covers their month.
 CREATE TABLE IF NOT EXISTS system_logs (
-    id VARCHAR(50) PRIMARY KEY,
+    id VARCHAR(50) NOT NULL,
     system_id INT REFERENCES systems(id) ON DELETE CASCADE,
     character_id INT REFERENCES characters(id) ON DELETE SET NULL,
     user_id INT REFERENCES users(id) ON DELETE SET NULL,
@@ -265,16 +269,18 @@ CREATE TABLE IF NOT EXISTS system_logs (
     correlation_id VARCHAR(128),
     session_id VARCHAR(128),
     retention_until TIMESTAMP WITH TIME ZONE,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
     
     -- Legacy columns for backward compatibility
     legacy_event TEXT,
-    legacy_details JSONB
-);
+    legacy_details JSONB,
+    
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
 
 CREATE TABLE IF NOT EXISTS unified_logs (
-    id SERIAL PRIMARY KEY,
-    timestamp TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    id SERIAL,
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
     source TEXT,
     system_id INT REFERENCES systems(id) ON DELETE SET NULL,
     character_id INT REFERENCES characters(id) ON DELETE SET NULL,
@@ -282,8 +288,150 @@ CREATE TABLE IF NOT EXISTS unified_logs (
     action TEXT,
     detail JSONB,
     outcome TEXT,
-    severity TEXT DEFAULT 'info'
-);
+    severity TEXT DEFAULT 'info',
+    
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE IF NOT EXISTS system_logs_default PARTITION OF system_logs DEFAULT;
+CREATE TABLE IF NOT EXISTS unified_logs_default PARTITION OF unified_logs DEFAULT;
+
+-- Create monthly partitions from last month (or the month of since, if
+-- earlier) through months_ahead months ahead, on UTC boundaries. Rows already
+-- sitting in the DEFAULT partition for a new month are moved into it, so a
+-- missed maintenance run never blocks partition creation. Returns the number
+-- of partitions created.
+CREATE OR REPLACE FUNCTION create_log_partitions(
+    parent REGCLASS,
+    months_ahead INTEGER DEFAULT 3,
+    since TIMESTAMPTZ DEFAULT NULL
+) RETURNS INTEGER AS $$
+DECLARE
+    parent_name TEXT := (SELECT relname FROM pg_class WHERE oid = parent);
+    key_column TEXT;
+    default_part REGCLASS;
+    month_start TIMESTAMPTZ;
+    month_end TIMESTAMPTZ;
+    last_end TIMESTAMPTZ;
+    part_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    SELECT a.attname INTO key_column
+    FROM pg_partitioned_table pt
+    JOIN pg_attribute a ON a.attrelid = pt.partrelid AND a.attnum = pt.partattrs[0]
+    WHERE pt.partrelid = parent;
+    IF key_column IS NULL THEN
+        RAISE EXCEPTION '% is not a partitioned table', parent;
+    END IF;
+
+    SELECT inhrelid::regclass INTO default_part
+    FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = parent AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT';
+
+    month_start := date_trunc('month', LEAST(now() - INTERVAL '1 month', since) AT TIME ZONE 'UTC') AT TIME ZONE 'UTC';
+    last_end := (date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => months_ahead + 1)) AT TIME ZONE 'UTC';
+
+    WHILE month_start < last_end LOOP
+        month_end := ((month_start AT TIME ZONE 'UTC') + INTERVAL '1 month') AT TIME ZONE 'UTC';
+        part_name := parent_name || to_char(month_start AT TIME ZONE 'UTC', '"_y"YYYY"m"MM');
+        IF to_regclass(part_name) IS NOT NULL THEN
+            month_start := month_end;
+            CONTINUE;
+        END IF;
+
+        EXECUTE format('CREATE TABLE %I (LIKE %s INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', part_name, parent);
+        IF default_part IS NOT NULL THEN
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM %s WHERE %I >= %L AND %I < %L RETURNING *) INSERT INTO %I SELECT * FROM moved',
+                default_part, key_column, month_start, key_column, month_end, part_name
+            );
+        END IF;
+        EXECUTE format('ALTER TABLE %s ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                       parent, part_name, month_start, month_end);
+        created := created + 1;
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drop monthly partitions whose whole range is older than retention.
+-- keep_until_column names a per-row "keep until" timestamp (system_logs.
+-- retention_until): rows still inside it are moved to the DEFAULT partition
+-- before the drop and expire from there on a later run. Returns the names of
+-- the dropped partitions.
+CREATE OR REPLACE FUNCTION drop_log_partitions(
+    parent REGCLASS,
+    retention INTERVAL,
+    keep_until_column TEXT DEFAULT NULL
+) RETURNS TEXT[] AS $$
+DECLARE
+    cutoff TIMESTAMPTZ := now() - retention;
+    key_column TEXT;
+    default_part REGCLASS;
+    part RECORD;
+    dropped TEXT[] := '{}';
+BEGIN
+    SELECT a.attname INTO key_column
+    FROM pg_partitioned_table pt
+    JOIN pg_attribute a ON a.attrelid = pt.partrelid AND a.attnum = pt.partattrs[0]
+    WHERE pt.partrelid = parent;
+    IF key_column IS NULL THEN
+        RAISE EXCEPTION '% is not a partitioned table', parent;
+    END IF;
+
+    FOR part IN
+        SELECT c.oid::regclass AS child, c.relname,
+               pg_get_expr(c.relpartbound, c.oid) AS bound
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = parent
+        ORDER BY c.relname
+    LOOP
+        IF part.bound = 'DEFAULT' THEN
+            default_part := part.child;
+            CONTINUE;
+        END IF;
+        CONTINUE WHEN substring(part.bound FROM 'TO \(''([^'']+)''\)')::timestamptz > cutoff;
+
+        EXECUTE format('ALTER TABLE %s DETACH PARTITION %s', parent, part.child);
+        IF keep_until_column IS NOT NULL THEN
+            EXECUTE format('INSERT INTO %s SELECT * FROM %s WHERE %I > now()', parent, part.child, keep_until_column);
+        END IF;
+        EXECUTE format('DROP TABLE %s', part.child);
+        dropped := dropped || part.relname::text;
+    END LOOP;
+
+    -- Rows kept past their partition, or written before their month existed
+    IF default_part IS NOT NULL THEN
+        IF keep_until_column IS NOT NULL THEN
+            EXECUTE format('DELETE FROM %s WHERE %I < %L AND (%I IS NULL OR %I <= now())',
+                           default_part, key_column, cutoff, keep_until_column, keep_until_column);
+        ELSE
+            EXECUTE format('DELETE FROM %s WHERE %I < %L', default_part, key_column, cutoff);
+        END IF;
+    END IF;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+-- One-call log maintenance for the cleanup workflow: create upcoming
+-- partitions and drop expired ones for both log tables.
+CREATE OR REPLACE FUNCTION maintain_log_partitions(
+    retention INTERVAL DEFAULT INTERVAL '90 days',
+    months_ahead INTEGER DEFAULT 3
+) RETURNS JSONB AS $$
+BEGIN
+    RETURN jsonb_build_object(
+        'partitions_created',
+            create_log_partitions('system_logs', months_ahead) + create_log_partitions('unified_logs', months_ahead),
+        'system_logs_dropped', to_jsonb(drop_log_partitions('system_logs', retention, 'retention_until')),
+        'unified_logs_dropped', to_jsonb(drop_log_partitions('unified_logs', retention))
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT create_log_partitions('system_logs');
+SELECT create_log_partitions('unified_logs');
 
 CREATE TABLE IF NOT EXISTS events (
     id SERIAL PRIMARY KEY,
@@ -410,11 +558,67 @@ CREATE TABLE IF NOT EXISTS custom_rewards (
 -- TRIGGERS FOR EVENT-DRIVEN ARCHITECTURE
 -- ============================================================
 
+-- Compact NOTIFY payload: table, op, primary key, changed columns and a
+-- whitelisted field set (passed as trigger arguments). Consumers fetch full
+-- rows by id when they need them, which keeps payloads well below the
+-- 8000-byte NOTIFY limit regardless of metadata size.
+CREATE OR REPLACE FUNCTION build_notify_payload(
+    table_name TEXT,
+    op TEXT,
+    new_row JSONB,
+    old_row JSONB,
+    fields TEXT[]
+) RETURNS JSONB AS $$
+DECLARE
+    changed TEXT[];
+    payload JSONB;
+BEGIN
+    IF op = 'UPDATE' THEN
+        SELECT coalesce(array_agg(n.key ORDER BY n.key), '{}')
+        INTO changed
+        FROM jsonb_each(new_row) n
+        WHERE n.value IS DISTINCT FROM old_row -> n.key;
+    END IF;
+
+    SELECT coalesce(jsonb_object_agg(f.key, f.value), '{}'::jsonb)
+    INTO payload
+    FROM jsonb_each(new_row) f
+    WHERE f.key = ANY(fields);
+
+    payload := payload || jsonb_build_object(
+        'table', table_name,
+        'op', op,
+        'id', new_row -> 'id',
+        'changed', to_jsonb(changed)
+    );
+
+    -- Whitelisted text columns can still be long; fall back to the key alone
+    IF octet_length(payload::text) > 7500 THEN
+        payload := jsonb_build_object(
+            'table', table_name,
+            'op', op,
+            'id', new_row -> 'id',
+            'changed', to_jsonb(changed),
+            'truncated', true
+        );
+    END IF;
+
+    RETURN payload;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
 -- System Update Trigger
 CREATE OR REPLACE FUNCTION notify_system_update()
 RETURNS trigger AS $$
+DECLARE
+    payload jsonb;
 BEGIN
-    PERFORM pg_notify('system_update', row_to_json(NEW)::text);
+    payload := build_notify_payload(TG_TABLE_NAME, TG_OP, to_jsonb(NEW), to_jsonb(OLD), TG_ARGV);
+    -- Skip no-op updates
+    IF payload -> 'changed' = '[]'::jsonb THEN
+        RETURN NEW;
+    END IF;
+    PERFORM pg_notify('system_update', payload::text);
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
@@ -422,15 +626,20 @@ $$ LANGUAGE plpgsql;
 DROP TRIGGER IF EXISTS systems_notify_trigger ON systems;
 CREATE TRIGGER systems_notify_trigger
 AFTER INSERT OR UPDATE ON systems
-FOR EACH ROW EXECUTE FUNCTION notify_system_update();
+FOR EACH ROW EXECUTE FUNCTION notify_system_update(
+    'name', 'category', 'current_stage', 'target_stage', 'owner_type', 'owner_id', 'created_at', 'updated_at'
+);
 
 -- Unified Event Trigger
 CREATE OR REPLACE FUNCTION notify_unified_event()
 RETURNS trigger AS $$
 DECLARE
-    payload json;
+    payload jsonb;
 BEGIN
-    payload := row_to_json(NEW);
+    payload := build_notify_payload(TG_TABLE_NAME, TG_OP, to_jsonb(NEW), to_jsonb(OLD), TG_ARGV);
+    IF payload -> 'changed' = '[]'::jsonb THEN
+        RETURN NEW;
+    END IF;
     PERFORM pg_notify('unified_event', payload::text);
     RETURN NEW;
 END;
@@ -439,12 +648,509 @@ $$ LANGUAGE plpgsql;
 DROP TRIGGER IF EXISTS habits_notify_trigger ON habits;
 CREATE TRIGGER habits_notify_trigger
 AFTER INSERT OR UPDATE ON habits
-FOR EACH ROW EXECUTE FUNCTION notify_unified_event();
+FOR EACH ROW EXECUTE FUNCTION notify_unified_event(
+    'character_id', 'skill_id', 'type', 'xp_value', 'hp_value', 'streak', 'last_completed'
+);
 
 DROP TRIGGER IF EXISTS tasks_notify_trigger ON tasks;
 CREATE TRIGGER tasks_notify_trigger
 AFTER INSERT OR UPDATE ON tasks
-FOR EACH ROW EXECUTE FUNCTION notify_unified_event();
+FOR EACH ROW EXECUTE FUNCTION notify_unified_event(
+    'project_id', 'completed', 'xp', 'coins', 'difficulty', 'deadline'
+);
+
+-- Character state changes only invalidate pg-listener's character cache
+-- (FORWARD_IGNORE_TABLES keeps them out of the n8n forwarder)
+DROP TRIGGER IF EXISTS characters_notify_trigger ON characters;
+CREATE TRIGGER characters_notify_trigger
+AFTER INSERT OR UPDATE ON characters
+FOR EACH ROW EXECUTE FUNCTION notify_unified_event(
+    'user_id', 'level', 'xp', 'hp', 'coins', 'prestige_level'
+);
+
+DROP TRIGGER IF EXISTS skills_notify_trigger ON skills;
+CREATE TRIGGER skills_notify_trigger
+AFTER INSERT OR UPDATE ON skills
+FOR EACH ROW EXECUTE FUNCTION notify_unified_event(
+    'character_id', 'level', 'xp'
+);
+
+DROP TRIGGER IF EXISTS users_notify_trigger ON users;
+CREATE TRIGGER users_notify_trigger
+AFTER UPDATE ON users
+FOR EACH ROW EXECUTE FUNCTION notify_unified_event(
+    'username'
+);
+
+-- ============================================================
+-- DAILY MAINTENANCE
+-- ============================================================
+
+-- Midnight tick for cron_manager.json: HP penalties and bonuses, streak
+-- resets and daily random events for every active character, as a handful
+-- of set-based statements in one transaction instead of one UPDATE/INSERT
+-- round trip per character.
+--
+-- Rules (per character active in the last 30 days):
+--   -2 HP per good habit not completed for 2+ days (max -20)
+--   -5 HP per overdue open task (max -25)
+--   -10% of a negative coin balance (max -15)
+--   +5 HP for level 10+ characters with no penalty
+--   HP is clamped to 0..100; one daily_maintenance event per changed character
+--
+-- A transaction-level advisory lock makes an overlapping run a no-op.
+CREATE OR REPLACE FUNCTION run_daily_maintenance(
+    run_date DATE DEFAULT CURRENT_DATE,
+    active_window INTERVAL DEFAULT INTERVAL '30 days'
+) RETURNS JSONB AS $$
+DECLARE
+    started TIMESTAMPTZ := clock_timestamp();
+    active_count INTEGER;
+    changed INTEGER;
+    hp_changed INTEGER;
+    penalized INTEGER;
+    streaks_reset INTEGER;
+    random_events INTEGER;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('run_daily_maintenance')) THEN
+        RETURN jsonb_build_object('skipped', true, 'reason', 'another run is in progress');
+    END IF;
+
+    WITH active AS (
+        SELECT id, hp, coins, level
+        FROM characters
+        WHERE last_login > now() - active_window
+    ), overdue_habits AS (
+        SELECT h.character_id, count(*) AS overdue
+        FROM habits h
+        WHERE h.type = 'good' AND h.last_completed < run_date - 2
+        GROUP BY h.character_id
+    ), overdue_tasks AS (
+        SELECT p.character_id, count(*) AS overdue
+        FROM projects p
+        JOIN tasks t ON t.project_id = p.id
+        WHERE NOT t.completed AND t.deadline < run_date
+        GROUP BY p.character_id
+    ), scored AS (
+        SELECT a.id, a.hp, a.level,
+               COALESCE(oh.overdue, 0) AS overdue_habits,
+               LEAST(COALESCE(oh.overdue, 0) * 2, 20) AS habit_penalty,
+               COALESCE(ot.overdue, 0) AS overdue_tasks,
+               LEAST(COALESCE(ot.overdue, 0) * 5, 25) AS task_penalty,
+               CASE WHEN a.coins < 0 THEN floor(LEAST(abs(a.coins) * 0.1, 15))::int ELSE 0 END AS overdraft_penalty
+        FROM active a
+        LEFT JOIN overdue_habits oh ON oh.character_id = a.id
+        LEFT JOIN overdue_tasks ot ON ot.character_id = a.id
+    ), changes AS (
+        SELECT id, hp,
+               habit_penalty + task_penalty + overdraft_penalty AS penalty,
+               CASE WHEN level >= 10 AND habit_penalty + task_penalty + overdraft_penalty = 0 THEN 5 ELSE 0 END AS bonus,
+               concat_ws(', ',
+                   CASE WHEN overdue_habits > 0 THEN format('%s overdue habits (-%s HP)', overdue_habits, habit_penalty) END,
+                   CASE WHEN overdue_tasks > 0 THEN format('%s overdue tasks (-%s HP)', overdue_tasks, task_penalty) END,
+                   CASE WHEN overdraft_penalty > 0 THEN format('Overdraft penalty (-%s HP)', overdraft_penalty) END,
+                   CASE WHEN level >= 10 AND habit_penalty + task_penalty + overdraft_penalty = 0
+                        THEN 'Daily wellness bonus (+5 HP)' END
+               ) AS reason
+        FROM scored
+        WHERE habit_penalty + task_penalty + overdraft_penalty > 0 OR level >= 10
+    ), updated AS (
+        UPDATE characters c
+        SET hp = GREATEST(0, LEAST(100, ch.hp + ch.bonus - ch.penalty)),
+            updated_at = now()
+        FROM changes ch
+        WHERE c.id = ch.id AND c.hp IS DISTINCT FROM GREATEST(0, LEAST(100, ch.hp + ch.bonus - ch.penalty))
+        RETURNING c.id
+    ), logged AS (
+        INSERT INTO events (character_id, event_type, hp_change, description)
+        SELECT id, 'daily_maintenance', bonus - penalty, reason
+        FROM changes
+        RETURNING character_id
+    )
+    SELECT (SELECT count(*) FROM active),
+           (SELECT count(*) FROM logged),
+           (SELECT count(*) FROM changes WHERE penalty > 0),
+           (SELECT count(*) FROM updated)
+    INTO active_count, changed, penalized, hp_changed;
+
+    -- Only streaks that are still running break; already-reset habits stay quiet
+    WITH broken AS (
+        UPDATE habits
+        SET streak = 0, updated_at = now()
+        WHERE type = 'good' AND last_completed < run_date - 2 AND streak > 0
+        RETURNING character_id, name
+    )
+    INSERT INTO events (character_id, event_type, description)
+    SELECT character_id, 'streak_broken', 'Streak broken for habit: ' || name
+    FROM broken;
+    GET DIAGNOSTICS streaks_reset = ROW_COUNT;
+
+    -- 1-3 random events per active character, drawn from a pool of 10
+    WITH pool AS (
+        SELECT row_number() OVER () AS slot, description
+        FROM (SELECT description FROM rng_events WHERE available ORDER BY random() LIMIT 10) picked
+    ), draws AS (
+        SELECT a.id AS character_id,
+               1 + floor(random() * (SELECT count(*) FROM pool))::int AS slot
+        FROM (
+            SELECT id, 1 + floor(random() * 3)::int AS event_count
+            FROM characters
+            WHERE last_login > now() - active_window
+        ) a
+        CROSS JOIN LATERAL generate_series(1, a.event_count)
+    )
+    INSERT INTO events (character_id, event_type, description)
+    SELECT d.character_id, 'daily_random', p.description
+    FROM draws d
+    JOIN pool p ON p.slot = d.slot;
+    GET DIAGNOSTICS random_events = ROW_COUNT;
+
+    RETURN jsonb_build_object(
+        'run_date', run_date,
+        'active_characters', active_count,
+        'characters_changed', changed,
+        'characters_penalized', penalized,
+        'hp_updated', hp_changed,
+        'streaks_reset', streaks_reset,
+        'random_events', random_events,
+        'duration_ms', round(extract(epoch FROM clock_timestamp() - started) * 1000)
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================
+-- HABIT CHECK-IN
+-- ============================================================
+
+-- Habit check-in for habit_checkin.json, ported from its Calculate Rewards
+-- node and subflow-character-progression.
+--
+-- Rules:
+--   base XP is the habit's xp_value (10 when unset), base coins half of it
+--   streak multiplier x1.5 from a 7-day streak, x2 from 30, x3 from 90
+--   the habit's skill gets 40% of the habit XP and levels up at level * 100 XP
+--   character XP is scaled by xp_multiplier and +5% per prestige level
+--   level N -> N+1 costs 100 + 50 * N of total_xp; each level gained adds
+--   50 coins and 10 HP / max HP
+--   one habit_completed event, a level_up event when a level is gained, and
+--   one habit_checkin row in system_logs
+--
+-- The character row is locked before the habit, in the same order as
+-- run_daily_maintenance(), so concurrent check-ins and the midnight tick
+-- queue instead of deadlocking. A second check-in for the same date changes
+-- nothing and returns already_completed.
+CREATE OR REPLACE FUNCTION habit_checkin(
+    target_habit_id INTEGER,
+    checkin_date DATE DEFAULT CURRENT_DATE
+) RETURNS JSONB AS $$
+DECLARE
+    c RECORD;
+    h RECORD;
+    skill_name TEXT;
+    skill_level INTEGER;
+    skill_total_xp BIGINT;
+    skill_level_up BOOLEAN;
+    new_streak INTEGER;
+    multiplier NUMERIC;
+    base_xp INTEGER;
+    habit_xp INTEGER;
+    habit_coins INTEGER;
+    skill_xp INTEGER;
+    xp_gained INTEGER;
+    new_total BIGINT;
+    new_level INTEGER := 1;
+    level_floor BIGINT := 0;
+    levels_gained INTEGER;
+BEGIN
+    SELECT ch.id, ch.level, ch.total_xp, ch.coins, ch.hp, ch.max_hp, ch.xp_multiplier, ch.prestige_level
+    INTO c
+    FROM characters ch
+    WHERE ch.id = (SELECT character_id FROM habits WHERE id = target_habit_id)
+    FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('success', false, 'habit_id', target_habit_id,
+                                  'message', 'Habit or character not found');
+    END IF;
+
+    SELECT id, skill_id, name, type, xp_value, streak, last_completed
+    INTO h
+    FROM habits
+    WHERE id = target_habit_id
+    FOR UPDATE;
+    IF h.last_completed >= checkin_date THEN
+        RETURN jsonb_build_object('success', false, 'already_completed', true, 'habit_id', h.id,
+                                  'message', 'Habit already completed today');
+    END IF;
+
+    new_streak := COALESCE(h.streak, 0) + 1;
+    multiplier := CASE WHEN new_streak >= 90 THEN 3.0
+                       WHEN new_streak >= 30 THEN 2.0
+                       WHEN new_streak >= 7 THEN 1.5
+                       ELSE 1.0 END;
+    base_xp := COALESCE(NULLIF(h.xp_value, 0), 10);
+    habit_xp := floor(base_xp * multiplier);
+    habit_coins := floor(floor(base_xp * 0.5) * multiplier);
+    skill_xp := floor(habit_xp * 0.4);
+    xp_gained := floor(habit_xp * COALESCE(c.xp_multiplier, 1) * (1 + COALESCE(c.prestige_level, 0) * 0.05));
+
+    new_total := COALESCE(c.total_xp, 0) + xp_gained;
+    WHILE level_floor + 100 + new_level * 50 <= new_total LOOP
+        level_floor := level_floor + 100 + new_level * 50;
+        new_level := new_level + 1;
+    END LOOP;
+    levels_gained := GREATEST(new_level - COALESCE(c.level, 1), 0);
+
+    UPDATE habits
+    SET streak = new_streak, last_completed = checkin_date, updated_at = now()
+    WHERE id = h.id;
+
+    IF h.skill_id IS NOT NULL THEN
+        UPDATE skills s
+        SET xp = s.xp + skill_xp,
+            level = CASE WHEN s.xp + skill_xp >= s.level * 100 THEN s.level + 1 ELSE s.level END,
+            updated_at = now()
+        FROM (SELECT id, level FROM skills WHERE id = h.skill_id) old
+        WHERE s.id = old.id
+        RETURNING s.name, s.xp, s.level, s.level > old.level
+        INTO skill_name, skill_total_xp, skill_level, skill_level_up;
+    END IF;
+
+    UPDATE characters
+    SET level = GREATEST(level, new_level),  -- a level ahead of total_xp (admin override) is kept
+        xp = new_total - level_floor,
+        total_xp = new_total,
+        coins = coins + habit_coins + levels_gained * 50,
+        max_hp = max_hp + levels_gained * 10,
+        hp = LEAST(hp + levels_gained * 10, max_hp + levels_gained * 10),
+        updated_at = now()
+    WHERE id = c.id
+    RETURNING level, coins, hp, max_hp INTO c.level, c.coins, c.hp, c.max_hp;
+
+    INSERT INTO events (character_id, event_type, xp_change, coins_change, description)
+    VALUES (c.id, 'habit_completed', xp_gained, habit_coins,
+            format('Habit completed: %s (streak: %s)', h.name, new_streak));
+    IF levels_gained > 0 THEN
+        INSERT INTO events (character_id, event_type, xp_change, coins_change, hp_change, description)
+        VALUES (c.id, 'level_up', xp_gained, levels_gained * 50, levels_gained * 10,
+                format('Level up! Reached level %s (gained %s levels)', new_level, levels_gained));
+    END IF;
+
+    INSERT INTO system_logs (id, character_id, event_type, log_level, event_category, event_details, source)
+    VALUES ('habit_checkin_' || gen_random_uuid(), c.id, 'habit_checkin', 'info', 'habit',
+            jsonb_build_object('habit_id', h.id, 'streak_count', new_streak, 'xp_gained', xp_gained,
+                               'coins_gained', habit_coins, 'skill_level', skill_level),
+            'habit_checkin_workflow');
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'habit_id', h.id,
+        'habit_name', h.name,
+        'habit_type', COALESCE(h.type, 'good'),
+        'character_id', c.id,
+        'xp_earned', xp_gained,
+        'coins_earned', habit_coins,
+        'skill_xp_earned', CASE WHEN skill_name IS NOT NULL THEN skill_xp ELSE 0 END,
+        'new_streak', new_streak,
+        'streak_multiplier', multiplier,
+        'level', c.level,
+        'levels_gained', levels_gained,
+        'level_up', levels_gained > 0,
+        'xp_to_next_level', 100 + new_level * 50 - (new_total - level_floor),
+        'coins', c.coins,
+        'hp', c.hp,
+        'max_hp', c.max_hp,
+        'skill', CASE WHEN skill_name IS NOT NULL
+                      THEN jsonb_build_object('id', h.skill_id, 'name', skill_name, 'xp', skill_total_xp,
+                                              'level', skill_level, 'level_up', skill_level_up)
+                 END,
+        'prestige_eligible', levels_gained > 0 AND c.level >= 50
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================
+-- ROLLUPS (MATERIALIZED VIEWS)
+-- ============================================================
+
+-- Leaderboard, per-character totals and guild XP, precomputed for the hot
+-- read paths. refresh_rollups() (run every minute by rollup_refresher.json)
+-- refreshes a view concurrently once it has been marked dirty by a write to
+-- one of its source tables, and at least every max_age regardless. Reads may
+-- lag writes by about a minute.
+CREATE TABLE IF NOT EXISTS rollup_refresh_log (
+    view_name TEXT PRIMARY KEY,
+    refreshed_at TIMESTAMP WITH TIME ZONE,
+    refresh_ms INTEGER,
+    row_count BIGINT,
+    dirty_since TIMESTAMP WITH TIME ZONE
+);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS leaderboard_mv AS
+SELECT c.id AS character_id,
+       c.user_id,
+       u.username,
+       c.class,
+       c.level,
+       c.total_xp,
+       c.prestige_level,
+       COALESCE(w.weekly_xp, 0) AS weekly_xp,
+       rank() OVER (ORDER BY c.total_xp DESC NULLS LAST, c.level DESC NULLS LAST) AS rank,
+       rank() OVER (ORDER BY COALESCE(w.weekly_xp, 0) DESC) AS weekly_rank
+FROM characters c
+LEFT JOIN users u ON u.id::text = c.user_id::text
+LEFT JOIN (
+    SELECT character_id, sum(xp_change) AS weekly_xp
+    FROM events
+    WHERE event_date >= now() - INTERVAL '7 days'
+    GROUP BY character_id
+) w ON w.character_id = c.id;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS character_summary_mv AS
+SELECT c.id AS character_id,
+       c.level,
+       c.xp,
+       c.total_xp,
+       c.coins,
+       c.hp,
+       COALESCE(s.skill_count, 0) AS skill_count,
+       COALESCE(s.skill_xp, 0) AS skill_xp,
+       s.max_skill_level,
+       COALESCE(a.achievement_count, 0) AS achievement_count,
+       a.last_achievement_at,
+       COALESCE(e.events_30d, 0) AS events_30d,
+       COALESCE(e.xp_30d, 0) AS xp_30d,
+       COALESCE(e.coins_30d, 0) AS coins_30d,
+       e.last_event_at
+FROM characters c
+LEFT JOIN (
+    SELECT character_id, count(*) AS skill_count, sum(xp) AS skill_xp, max(level) AS max_skill_level
+    FROM skills GROUP BY character_id
+) s ON s.character_id = c.id
+LEFT JOIN (
+    SELECT character_id, count(*) AS achievement_count, max(unlocked_at) AS last_achievement_at
+    FROM achievements GROUP BY character_id
+) a ON a.character_id = c.id
+LEFT JOIN (
+    SELECT character_id, count(*) AS events_30d, sum(xp_change) AS xp_30d,
+           sum(coins_change) AS coins_30d, max(event_date) AS last_event_at
+    FROM events
+    WHERE event_date >= now() - INTERVAL '30 days'
+    GROUP BY character_id
+) e ON e.character_id = c.id;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS guild_xp_mv AS
+SELECT g.id AS guild_id,
+       g.name,
+       count(gm.user_id) AS member_count,
+       COALESCE(sum(c.total_xp), 0) AS member_xp,
+       COALESCE(sum(c.total_xp), 0) + COALESCE(g.xp_pool, 0) AS total_xp,
+       round(avg(c.level), 2) AS avg_level,
+       rank() OVER (ORDER BY COALESCE(sum(c.total_xp), 0) + COALESCE(g.xp_pool, 0) DESC) AS rank
+FROM guilds g
+LEFT JOIN guild_members gm ON gm.guild_id = g.id
+LEFT JOIN characters c ON c.user_id::text = gm.user_id::text
+GROUP BY g.id, g.name, g.xp_pool;
+
+INSERT INTO rollup_refresh_log (view_name, refreshed_at)
+VALUES ('leaderboard_mv', now()), ('character_summary_mv', now()), ('guild_xp_mv', now())
+ON CONFLICT (view_name) DO NOTHING;
+
+-- Statement-level, and a no-op once the view is already dirty, so bulk
+-- writes and busy tables cost one indexed lookup per statement
+CREATE OR REPLACE FUNCTION mark_rollups_dirty() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE rollup_refresh_log
+    SET dirty_since = now()
+    WHERE view_name = ANY(TG_ARGV) AND dirty_since IS NULL;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS characters_rollup_trigger ON characters;
+CREATE TRIGGER characters_rollup_trigger
+AFTER INSERT OR UPDATE OR DELETE ON characters
+FOR EACH STATEMENT EXECUTE FUNCTION mark_rollups_dirty('leaderboard_mv', 'character_summary_mv', 'guild_xp_mv');
+
+DROP TRIGGER IF EXISTS users_rollup_trigger ON users;
+CREATE TRIGGER users_rollup_trigger
+AFTER INSERT OR UPDATE OF username OR DELETE ON users
+FOR EACH STATEMENT EXECUTE FUNCTION mark_rollups_dirty('leaderboard_mv');
+
+DROP TRIGGER IF EXISTS skills_rollup_trigger ON skills;
+CREATE TRIGGER skills_rollup_trigger
+AFTER INSERT OR UPDATE OR DELETE ON skills
+FOR EACH STATEMENT EXECUTE FUNCTION mark_rollups_dirty('character_summary_mv');
+
+DROP TRIGGER IF EXISTS achievements_rollup_trigger ON achievements;
+CREATE TRIGGER achievements_rollup_trigger
+AFTER INSERT OR UPDATE OR DELETE ON achievements
+FOR EACH STATEMENT EXECUTE FUNCTION mark_rollups_dirty('character_summary_mv');
+
+DROP TRIGGER IF EXISTS events_rollup_trigger ON events;
+CREATE TRIGGER events_rollup_trigger
+AFTER INSERT OR UPDATE OR DELETE ON events
+FOR EACH STATEMENT EXECUTE FUNCTION mark_rollups_dirty('leaderboard_mv', 'character_summary_mv');
+
+DROP TRIGGER IF EXISTS guilds_rollup_trigger ON guilds;
+CREATE TRIGGER guilds_rollup_trigger
+AFTER INSERT OR UPDATE OR DELETE ON guilds
+FOR EACH STATEMENT EXECUTE FUNCTION mark_rollups_dirty('guild_xp_mv');
+
+DROP TRIGGER IF EXISTS guild_members_rollup_trigger ON guild_members;
+CREATE TRIGGER guild_members_rollup_trigger
+AFTER INSERT OR UPDATE OR DELETE ON guild_members
+FOR EACH STATEMENT EXECUTE FUNCTION mark_rollups_dirty('guild_xp_mv');
+
+-- Refresh every rollup that is dirty and was last refreshed more than
+-- min_interval ago, or that is older than max_age. Dirty marks written while
+-- a refresh runs can be cleared by it, which max_age bounds. Returns
+-- {view: {refresh_ms, row_count}} for the views refreshed, or skipped:true
+-- when another refresh is already running.
+CREATE OR REPLACE FUNCTION refresh_rollups(
+    min_interval INTERVAL DEFAULT INTERVAL '1 minute',
+    max_age INTERVAL DEFAULT INTERVAL '15 minutes',
+    force BOOLEAN DEFAULT FALSE
+) RETURNS JSONB AS $$
+DECLARE
+    rollup RECORD;
+    started TIMESTAMPTZ;
+    elapsed_ms INTEGER;
+    rows_now BIGINT;
+    refreshed JSONB := '{}';
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('refresh_rollups')) THEN
+        RETURN jsonb_build_object('skipped', true, 'reason', 'another refresh is in progress');
+    END IF;
+
+    FOR rollup IN
+        SELECT l.view_name, c.relispopulated
+        FROM rollup_refresh_log l
+        JOIN pg_class c ON c.oid = to_regclass(l.view_name)
+        WHERE force
+           OR l.refreshed_at IS NULL
+           OR l.refreshed_at <= now() - max_age
+           OR (l.dirty_since IS NOT NULL AND l.refreshed_at <= now() - min_interval)
+        ORDER BY l.view_name
+    LOOP
+        started := clock_timestamp();
+        -- CONCURRENTLY keeps the view readable during the refresh, but needs it populated
+        IF rollup.relispopulated THEN
+            EXECUTE format('REFRESH MATERIALIZED VIEW CONCURRENTLY %I', rollup.view_name);
+        ELSE
+            EXECUTE format('REFRESH MATERIALIZED VIEW %I', rollup.view_name);
+        END IF;
+        EXECUTE format('SELECT count(*) FROM %I', rollup.view_name) INTO rows_now;
+        elapsed_ms := round(extract(epoch FROM clock_timestamp() - started) * 1000);
+
+        UPDATE rollup_refresh_log
+        SET refreshed_at = started, refresh_ms = elapsed_ms, row_count = rows_now, dirty_since = NULL
+        WHERE view_name = rollup.view_name;
+        refreshed := refreshed || jsonb_build_object(rollup.view_name,
+            jsonb_build_object('refresh_ms', elapsed_ms, 'row_count', rows_now));
+    END LOOP;
+    RETURN refreshed;
+END;
+$$ LANGUAGE plpgsql;
 
 -- ============================================================
 -- INDEXES FOR PERFORMANCE
@@ -453,12 +1159,14 @@ FOR EACH ROW EXECUTE FUNCTION notify_unified_event();
 -- Core entity indexes
 CREATE INDEX IF NOT EXISTS idx_users_telegram ON users(telegram_user_id);
 CREATE INDEX IF NOT EXISTS idx_characters_user_id ON characters(user_id);
+CREATE INDEX IF NOT EXISTS idx_characters_last_login ON characters(last_login);
 CREATE INDEX IF NOT EXISTS idx_skills_character_id ON skills(character_id);
 CREATE INDEX IF NOT EXISTS idx_habits_character_id ON habits(character_id);
 CREATE INDEX IF NOT EXISTS idx_habits_type ON habits(type);
 CREATE INDEX IF NOT EXISTS idx_projects_character_id ON projects(character_id);
 CREATE INDEX IF NOT EXISTS idx_tasks_project_id ON tasks(project_id);
 CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks(completed);
+CREATE INDEX IF NOT EXISTS idx_tasks_deadline_where_not_completed ON tasks(deadline) WHERE NOT completed;
 
 -- SBS system indexes
 CREATE INDEX IF NOT EXISTS idx_systems_owner ON systems(owner_type, owner_id);
@@ -500,6 +1208,13 @@ CREATE INDEX IF NOT EXISTS idx_custom_rewards_character_id ON custom_rewards(cha
 CREATE INDEX IF NOT EXISTS idx_rng_events_available ON rng_events(available);
 CREATE INDEX IF NOT EXISTS idx_rng_events_rarity ON rng_events(rarity);
 
+-- Rollup indexes (a unique index is required for REFRESH ... CONCURRENTLY)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_leaderboard_mv_character_id ON leaderboard_mv(character_id);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_mv_rank ON leaderboard_mv(rank);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_mv_weekly_rank ON leaderboard_mv(weekly_rank);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_character_summary_mv_character_id ON character_summary_mv(character_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_guild_xp_mv_guild_id ON guild_xp_mv(guild_id);
+
 -- ============================================================
 -- FINAL STATISTICS & VALIDATION
 -- ============================================================
@@ -23,9 +23,15 @@ Options:
     --full          : Run comprehensive checks (default)
     --api-only      : Check APIs and webhooks only
     --docker-only   : Check Docker services only
+    --db-perf       : Add the database performance report (pg_stat_statements)
     --export-json   : Export results to JSON file
+    --record        : Append results to the SQLite history store
+    --trend         : Show latency percentiles from the history store
     --silent        : Suppress console output
     --config FILE   : Use custom config file
+    --parallel      : Run check families concurrently
+    --daemon        : Keep running and re-check each family on its own interval
+    --exporter      : Daemon mode plus a Prometheus /metrics endpoint
 
 Requirements:
     pip install requests psycopg2-binary python-dotenv colorama docker
@@ -36,31 +42,47 @@ Last Updated: October 29, 2025
 """
 
 import os
+import re
+import abc
 import sys
 import json
 import time
+import uuid
+import sqlite3
+import asyncio
 import requests
 import psycopg2
 import platform
+import threading
 import subprocess
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from requests.adapters import HTTPAdapter
 
 try:
     import docker
     DOCKER_AVAILABLE = True
 except ImportError:
     DOCKER_AVAILABLE = False
-    print("⚠️  Docker library not available. Install with: pip install docker")
+    print("⚠️  Docker library not available. Install with: pip install docker", file=sys.stderr)
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
 
 try:
     from dotenv import load_dotenv
     DOTENV_AVAILABLE = True
 except ImportError:
     DOTENV_AVAILABLE = False
-    print("⚠️  python-dotenv not available. Install with: pip install python-dotenv")
+    print("⚠️  python-dotenv not available. Install with: pip install python-dotenv", file=sys.stderr)
 
 try:
     from colorama import init, Fore, Back, Style
@@ -76,6 +98,9 @@ except ImportError:
     class Style:
         BRIGHT = DIM = NORMAL = RESET_ALL = ""
 
+# Check families run when none are requested explicitly
+DEFAULT_CHECK_TYPES = ["docker", "database", "n8n", "apis", "pg_listener", "cache", "resources"]
+
 # Configuration
 @dataclass
 class HealthCheckConfig:
@@ -88,6 +113,63 @@ class HealthCheckConfig:
     db_timeout: int = 5
     docker_timeout: int = 30
     
+    # Parallel Execution
+    parallel: bool = False
+    max_workers: int = 4
+    check_deadline: int = 30  # seconds per check family, measured from its start
+    
+    # Database Performance (--db-perf)
+    db_perf_top_n: int = 10
+    slow_query_mean_ms: float = 500.0  # warn when a statement's mean time exceeds this
+    seq_scan_min_rows: int = 10000  # ignore seq scans on tables smaller than this
+    dead_tuple_ratio_warn: float = 0.2  # warn when dead / (live + dead) tuples exceeds this
+    index_bloat_ratio_warn: float = 0.3  # warn when estimated index bloat exceeds this
+    bloat_min_bytes: int = 1024 * 1024  # ignore bloat on relations smaller than this
+    
+    # HTTP Probe Backend
+    http_backend: str = "session"  # "session" (pooled requests) or "aiohttp"
+    http_pool_size: int = 10
+    http_concurrency: int = 8
+    
+    # Daemon Mode
+    daemon_interval: int = 60  # default seconds between runs of a check family
+    daemon_intervals: Dict[str, int] = None  # per-family overrides
+    history_size: int = 100  # CheckResults kept per check name
+    reuse_connections: bool = False  # keep the DB connection open between runs
+    
+    # History Store
+    history_db: str = "sbs_health_history.sqlite"
+    baseline_hours: int = 168  # window used as the latency baseline
+    regression_factor: float = 1.5  # flag when duration exceeds baseline p95 by this factor
+    regression_min_delta_ms: int = 50  # ...and exceeds baseline p50 by at least this much
+    regression_min_samples: int = 10
+    
+    # Streaming Output
+    stream_path: str = None  # write each result as an NDJSON line as it completes; "-" for stdout
+    stream_keep_results: bool = False  # also hold streamed results in memory (for the report, --record, export)
+    
+    # Prometheus Exporter
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 9108
+    latency_buckets: List[float] = None  # histogram upper bounds in seconds
+    
+    # pg-listener Forwarding
+    listener_lag_warn_ms: int = 30000  # warn when the oldest unforwarded event is older than this
+    listener_queue_warn: int = 1000  # warn when buffered + retrying events exceed this
+    
+    # Log Sink
+    log_lag_warn_ms: int = 10000  # warn when the oldest unwritten log row is older than this
+    log_queue_warn: int = 10000  # warn when more log rows than this are waiting to be written
+    
+    # Character Cache
+    cache_hit_rate_warn: float = 0.5  # warn when the hit rate falls below this...
+    cache_min_lookups: int = 100  # ...once at least this many lookups were served
+    cache_hit_p95_warn_ms: float = 20.0  # warn when a cache hit takes longer than this at p95
+    
+    # Rollups
+    rollup_dirty_warn_s: int = 300  # warn when a rollup has had unrefreshed writes for longer than this
+    rollup_age_warn_s: int = 3600  # warn when a rollup has not been refreshed for longer than this
+    
     # n8n Configuration
     n8n_base_url: str = "http://localhost:5678"
     n8n_webhook_path: str = "/webhook"
@@ -97,6 +179,7 @@ class HealthCheckConfig:
     
     # Database Configuration
     db_required_tables: List[str] = None
+    schema_file: str = None  # expected schema; defaults to schema.sql next to this script
     
     # API Endpoints to Test
     test_endpoints: List[str] = None
@@ -115,6 +198,16 @@ class HealthCheckConfig:
             self.test_endpoints = [
                 "/healthz", "/metrics", "/webhook/health-check"
             ]
+        
+        if self.latency_buckets is None:
+            self.latency_buckets = [
+                0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+            ]
+        
+        if self.daemon_intervals is None:
+            self.daemon_intervals = {
+                "n8n": 30, "pg_listener": 30, "cache": 30, "resources": 30, "apis": 300, "db_perf": 600
+            }
 
 @dataclass
 class CheckResult:
@@ -132,6 +225,642 @@ class CheckResult:
         if self.details is None:
             self.details = {}
 
+SCHEMA_FILE_CANDIDATES = ["schema.sql", "database/schema.sql", "../schema.sql", "../database/schema.sql"]
+
+def find_schema_file() -> Optional[Path]:
+    """Locate schema.sql relative to this script (repo root or maintenance/)"""
+    script_dir = Path(__file__).resolve().parent
+    for candidate in SCHEMA_FILE_CANDIDATES:
+        path = script_dir / candidate
+        if path.exists():
+            return path
+    return None
+
+def parse_schema_file(path) -> Dict[str, Dict[str, Any]]:
+    """Extract tables/columns, indexes and triggers from a schema.sql file.
+
+    Returns {"tables": {table: [columns]}, "indexes": {name: table},
+    "triggers": {name: table}}.
+    """
+    sql = Path(path).read_text(encoding="utf-8-sig")
+    sql = re.sub(r"--[^\n]*", "", sql)
+    
+    tables = {}
+    for match in re.finditer(r"CREATE TABLE IF NOT EXISTS (\w+)\s*\((.*?)\n\)[^;]*;", sql, re.S | re.I):
+        columns = []
+        for line in match.group(2).split("\n"):
+            line = line.strip().rstrip(",")
+            if not line:
+                continue
+            first = line.split()[0].upper()
+            if first in ("PRIMARY", "UNIQUE", "CHECK", "FOREIGN", "CONSTRAINT", "EXCLUDE") or first.startswith("PRIMARY"):
+                continue
+            columns.append(line.split()[0].strip('"'))
+        tables[match.group(1)] = columns
+    
+    indexes = {
+        match.group(1): match.group(2)
+        for match in re.finditer(r"CREATE (?:UNIQUE )?INDEX (?:IF NOT EXISTS )?(\w+)\s+ON\s+(\w+)", sql, re.I)
+    }
+    triggers = {
+        match.group(1): match.group(2)
+        for match in re.finditer(r"CREATE TRIGGER (\w+)\s.*?\bON\s+(\w+)", sql, re.S | re.I)
+    }
+    return {"tables": tables, "indexes": indexes, "triggers": triggers}
+
+# Schema drift, size and connection stats in a single catalog round trip
+SCHEMA_VALIDATION_QUERY = """
+    WITH expected_tables AS (
+        SELECT unnest(%(tables)s::text[]) AS table_name
+    ), expected_columns AS (
+        SELECT * FROM unnest(%(column_tables)s::text[], %(columns)s::text[]) AS c(table_name, column_name)
+    ), expected_indexes AS (
+        SELECT * FROM unnest(%(index_names)s::text[], %(index_tables)s::text[]) AS i(index_name, table_name)
+    ), expected_triggers AS (
+        SELECT * FROM unnest(%(trigger_names)s::text[], %(trigger_tables)s::text[]) AS t(trigger_name, table_name)
+    ), existing_tables AS (
+        SELECT tablename AS table_name FROM pg_tables WHERE schemaname = 'public'
+    ), existing_columns AS (
+        SELECT table_name, column_name FROM information_schema.columns WHERE table_schema = 'public'
+    ), existing_indexes AS (
+        SELECT indexname AS index_name, tablename AS table_name FROM pg_indexes WHERE schemaname = 'public'
+    ), existing_triggers AS (
+        SELECT tg.tgname AS trigger_name, c.relname AS table_name
+        FROM pg_trigger tg
+        JOIN pg_class c ON c.oid = tg.tgrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE NOT tg.tgisinternal AND n.nspname = 'public'
+    )
+    SELECT json_build_object(
+        'version', version(),
+        'database_size', pg_size_pretty(pg_database_size(current_database())),
+        'active_connections', (SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()),
+        'notify_triggers', (SELECT count(*) FROM existing_triggers WHERE trigger_name LIKE '%%notify%%'),
+        'missing_tables', COALESCE((
+            SELECT json_agg(table_name ORDER BY table_name) FROM expected_tables
+            WHERE table_name NOT IN (SELECT table_name FROM existing_tables)
+        ), '[]'::json),
+        'missing_columns', COALESCE((
+            SELECT json_object_agg(table_name, columns) FROM (
+                SELECT ec.table_name, json_agg(ec.column_name ORDER BY ec.column_name) AS columns
+                FROM expected_columns ec
+                WHERE ec.table_name IN (SELECT table_name FROM existing_tables)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM existing_columns x
+                      WHERE x.table_name = ec.table_name AND x.column_name = ec.column_name
+                  )
+                GROUP BY ec.table_name
+            ) missing
+        ), '{}'::json),
+        'missing_indexes', COALESCE((
+            SELECT json_agg(ei.index_name ORDER BY ei.index_name) FROM expected_indexes ei
+            WHERE NOT EXISTS (
+                SELECT 1 FROM existing_indexes x
+                WHERE x.index_name = ei.index_name AND x.table_name = ei.table_name
+            )
+        ), '[]'::json),
+        'missing_triggers', COALESCE((
+            SELECT json_agg(et.trigger_name ORDER BY et.trigger_name) FROM expected_triggers et
+            WHERE NOT EXISTS (
+                SELECT 1 FROM existing_triggers x
+                WHERE x.trigger_name = et.trigger_name AND x.table_name = et.table_name
+            )
+        ), '[]'::json),
+        'unexpected_indexes', COALESCE((
+            SELECT json_agg(index_name ORDER BY index_name) FROM existing_indexes
+            WHERE index_name LIKE 'idx\\_%%'
+              AND index_name NOT IN (SELECT index_name FROM expected_indexes)
+        ), '[]'::json),
+        'unexpected_triggers', COALESCE((
+            SELECT json_agg(trigger_name ORDER BY trigger_name) FROM existing_triggers
+            WHERE trigger_name LIKE '%%\\_notify\\_trigger'
+              AND trigger_name NOT IN (SELECT trigger_name FROM expected_triggers)
+        ), '[]'::json),
+        'unpartitioned_next_month', COALESCE((
+            SELECT json_agg(c.relname ORDER BY c.relname) FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relkind = 'p' AND n.nspname = 'public'
+              AND to_regclass(c.relname || to_char(now() AT TIME ZONE 'UTC' + interval '1 month', '"_y"YYYY"m"MM')) IS NULL
+        ), '[]'::json)
+    )
+"""
+
+# Database performance queries (pg_stat_statements, pg_stat_user_* and bloat estimates)
+TOP_QUERIES_SQL = """
+    SELECT queryid, left(regexp_replace(query, '\\s+', ' ', 'g'), 200) AS query, calls, rows,
+           round(total_exec_time::numeric, 2)::float8 AS total_ms,
+           round(mean_exec_time::numeric, 2)::float8 AS mean_ms,
+           round(100.0 * shared_blks_hit / nullif(shared_blks_hit + shared_blks_read, 0), 1)::float8 AS cache_hit_pct
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+    ORDER BY {order_by} DESC
+    LIMIT %s
+"""
+
+UNUSED_INDEXES_SQL = """
+    SELECT s.relname AS table_name, s.indexrelname AS index_name, s.idx_scan,
+           pg_relation_size(s.indexrelid) AS size_bytes
+    FROM pg_stat_user_indexes s
+    JOIN pg_index i ON i.indexrelid = s.indexrelid
+    WHERE s.idx_scan = 0 AND NOT i.indisunique AND NOT i.indisprimary
+    ORDER BY pg_relation_size(s.indexrelid) DESC, s.indexrelname
+"""
+
+TABLE_SCANS_SQL = """
+    SELECT relname AS table_name, seq_scan, seq_tup_read, coalesce(idx_scan, 0) AS idx_scan,
+           n_live_tup, n_dead_tup,
+           round(n_dead_tup::numeric / nullif(n_live_tup + n_dead_tup, 0), 3)::float8 AS dead_tuple_ratio,
+           pg_table_size(relid) AS size_bytes, last_autovacuum, last_vacuum
+    FROM pg_stat_user_tables
+    ORDER BY seq_tup_read DESC, relname
+"""
+
+# Rough btree size estimate from pg_stats widths: (key + tuple header + line pointer)
+# per row at 90% fill, plus the metapage. Close enough to rank candidates for REINDEX.
+INDEX_BLOAT_SQL = """
+    WITH index_columns AS (
+        SELECT i.indexrelid, i.indrelid, unnest(i.indkey) AS attnum
+        FROM pg_index i
+        JOIN pg_class ic ON ic.oid = i.indexrelid
+        JOIN pg_namespace n ON n.oid = ic.relnamespace
+        JOIN pg_am am ON am.oid = ic.relam
+        WHERE n.nspname = 'public' AND am.amname = 'btree'
+    ), key_widths AS (
+        SELECT c.indexrelid, c.indrelid, sum(coalesce(st.avg_width, 8)) AS key_width
+        FROM index_columns c
+        JOIN pg_class tc ON tc.oid = c.indrelid
+        JOIN pg_attribute a ON a.attrelid = c.indrelid AND a.attnum = c.attnum
+        LEFT JOIN pg_stats st ON st.schemaname = 'public' AND st.tablename = tc.relname AND st.attname = a.attname
+        GROUP BY c.indexrelid, c.indrelid
+    )
+    SELECT tc.relname AS table_name, ic.relname AS index_name,
+           pg_relation_size(ic.oid) AS size_bytes,
+           (ceil(ic.reltuples * (k.key_width + 12) / (8192 * 0.9)) * 8192 + 8192)::bigint AS expected_bytes
+    FROM key_widths k
+    JOIN pg_class ic ON ic.oid = k.indexrelid
+    JOIN pg_class tc ON tc.oid = k.indrelid
+    WHERE pg_relation_size(ic.oid) >= %s AND ic.reltuples > 0
+"""
+
+class ResultHistory:
+    """Fixed-size ring buffer of the most recent CheckResults for each check name"""
+    
+    def __init__(self, size: int = 100):
+        self.size = size
+        self._buffers: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+    
+    def add(self, result: CheckResult):
+        with self._lock:
+            if result.name not in self._buffers:
+                self._buffers[result.name] = deque(maxlen=self.size)
+            self._buffers[result.name].append(result)
+    
+    def extend(self, results: List[CheckResult]):
+        for result in results:
+            self.add(result)
+    
+    def get(self, name: str) -> List[CheckResult]:
+        with self._lock:
+            return list(self._buffers.get(name, ()))
+    
+    def latest(self, name: str) -> Optional[CheckResult]:
+        with self._lock:
+            buffer = self._buffers.get(name)
+            return buffer[-1] if buffer else None
+    
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._buffers)
+    
+    def snapshot(self) -> Dict[str, List[CheckResult]]:
+        with self._lock:
+            return {name: list(buffer) for name, buffer in self._buffers.items()}
+
+class MetricsRegistry:
+    """Prometheus metrics accumulated from CheckResults.
+
+    Latencies (duration_ms and the connection_time_ms / response_time_ms
+    details) are recorded as cumulative histograms in seconds, so percentiles
+    can be computed server-side with histogram_quantile().
+    """
+    STATUSES = ("pass", "fail", "warning", "skip")
+    LATENCY_METRICS = {
+        "duration": ("sbs_health_check_duration_seconds", "Time taken by each health check"),
+        "connection_time_ms": ("sbs_health_check_connection_seconds", "Time to establish the checked connection"),
+        "response_time_ms": ("sbs_health_check_response_seconds", "Response time reported by the checked endpoint"),
+    }
+    
+    def __init__(self, buckets: List[float] = None):
+        self.buckets = sorted(buckets or HealthCheckConfig().latency_buckets)
+        self._lock = threading.Lock()
+        self._last_status: Dict[str, str] = {}
+        self._last_timestamp: Dict[str, float] = {}
+        self._runs: Dict[Tuple[str, str], int] = {}
+        # metric key -> check name -> [bucket counts..., +Inf count, sum]
+        self._histograms: Dict[str, Dict[str, List[float]]] = {key: {} for key in self.LATENCY_METRICS}
+    
+    def observe(self, result: CheckResult):
+        with self._lock:
+            self._last_status[result.name] = result.status
+            self._last_timestamp[result.name] = time.time()
+            run_key = (result.name, result.status)
+            self._runs[run_key] = self._runs.get(run_key, 0) + 1
+            
+            # A duration of 0 means the check was not timed (skips, early failures)
+            if result.duration_ms > 0:
+                self._observe_latency("duration", result.name, result.duration_ms)
+            for key in ("connection_time_ms", "response_time_ms"):
+                value = result.details.get(key) if result.details else None
+                if isinstance(value, (int, float)):
+                    self._observe_latency(key, result.name, value)
+    
+    def observe_many(self, results: List[CheckResult]):
+        for result in results:
+            self.observe(result)
+    
+    def _observe_latency(self, key: str, check: str, value_ms: float):
+        series = self._histograms[key].setdefault(check, [0] * (len(self.buckets) + 2))
+        seconds = value_ms / 1000.0
+        for index, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                series[index] += 1
+        series[len(self.buckets)] += 1
+        series[-1] += seconds
+    
+    @staticmethod
+    def _label(value: str) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            lines = [
+                "# HELP sbs_health_check_status Latest status of each health check (1 for the current status)",
+                "# TYPE sbs_health_check_status gauge",
+            ]
+            for check, current in sorted(self._last_status.items()):
+                for status in self.STATUSES:
+                    lines.append(f'sbs_health_check_status{{check="{self._label(check)}",status="{status}"}} '
+                                 f'{1 if status == current else 0}')
+            
+            lines += [
+                "# HELP sbs_health_check_last_run_timestamp_seconds Unix time of the latest result for each check",
+                "# TYPE sbs_health_check_last_run_timestamp_seconds gauge",
+            ]
+            for check, timestamp in sorted(self._last_timestamp.items()):
+                lines.append(f'sbs_health_check_last_run_timestamp_seconds{{check="{self._label(check)}"}} '
+                             f'{timestamp:.3f}')
+            
+            lines += [
+                "# HELP sbs_health_check_runs_total Health check results by status",
+                "# TYPE sbs_health_check_runs_total counter",
+            ]
+            for (check, status), count in sorted(self._runs.items()):
+                lines.append(f'sbs_health_check_runs_total{{check="{self._label(check)}",status="{status}"}} {count}')
+            
+            for key, (metric, help_text) in self.LATENCY_METRICS.items():
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for check, series in sorted(self._histograms[key].items()):
+                    label = f'check="{self._label(check)}"'
+                    for index, bound in enumerate(self.buckets):
+                        lines.append(f'{metric}_bucket{{{label},le="{bound:g}"}} {series[index]}')
+                    lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {series[len(self.buckets)]}')
+                    lines.append(f"{metric}_sum{{{label}}} {series[-1]:.6f}")
+                    lines.append(f"{metric}_count{{{label}}} {series[len(self.buckets)]}")
+        
+        return "\n".join(lines) + "\n"
+
+class MetricsExporter:
+    """Serves a MetricsRegistry on /metrics from a background thread"""
+    
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9108):
+        self.registry = registry
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split("?")[0] != "/metrics":
+                    handler.send_error(404, "Only /metrics is served")
+                    return
+                body = registry.render().encode("utf-8")
+                handler.send_response(200)
+                handler.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+            
+            def log_message(handler, format, *args):
+                pass  # Scrapes every few seconds would flood the daemon output
+        
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True, name="metrics-exporter")
+    
+    @property
+    def address(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(-(-pct * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class HistoryStore:
+    """Append-only SQLite store of CheckResults for trend and regression analysis"""
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS check_results (
+            id INTEGER PRIMARY KEY,
+            run_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            duration_ms INTEGER NOT NULL DEFAULT 0,
+            ts REAL NOT NULL,
+            message TEXT,
+            details TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_check_results_name_ts ON check_results(name, ts);
+        CREATE INDEX IF NOT EXISTS idx_check_results_run_id ON check_results(run_id);
+    """
+    
+    def __init__(self, path: str = "sbs_health_history.sqlite"):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(self.SCHEMA)
+    
+    def append(self, results: List[CheckResult], run_id: str = None) -> str:
+        """Store one run's results; returns the run id"""
+        run_id = run_id or uuid.uuid4().hex
+        rows = [
+            (run_id, r.name, r.status, r.duration_ms, datetime.fromisoformat(r.timestamp).timestamp(),
+             r.message, json.dumps(r.details, default=str))
+            for r in results
+        ]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO check_results (run_id, name, status, duration_ms, ts, message, details) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return run_id
+    
+    def durations(self, name: str, since: float, until: float = None) -> List[int]:
+        """Sorted timed durations for one check in [since, until)"""
+        rows = self.connection.execute(
+            "SELECT duration_ms FROM check_results WHERE name = ? AND ts >= ? AND ts < ? AND duration_ms > 0 "
+            "ORDER BY duration_ms", (name, since, until or float("inf"))).fetchall()
+        return [row[0] for row in rows]
+    
+    def latency_summary(self, window_hours: float = 24, names: List[str] = None) -> List[Dict[str, Any]]:
+        """p50/p95/p99 duration and status counts per check over the last window_hours"""
+        since = time.time() - window_hours * 3600
+        query = ("SELECT name, count(*), sum(status = 'fail'), sum(status = 'warning'), max(ts) "
+                 "FROM check_results WHERE ts >= ?")
+        params: List[Any] = [since]
+        if names:
+            query += f" AND name IN ({', '.join('?' * len(names))})"
+            params += names
+        query += " GROUP BY name ORDER BY name"
+        
+        summary = []
+        for name, runs, failures, warnings, last_ts in self.connection.execute(query, params).fetchall():
+            durations = self.durations(name, since)
+            summary.append({
+                "name": name,
+                "runs": runs,
+                "failures": failures,
+                "warnings": warnings,
+                "timed_runs": len(durations),
+                "p50_ms": percentile(durations, 50),
+                "p95_ms": percentile(durations, 95),
+                "p99_ms": percentile(durations, 99),
+                "last_run": datetime.fromtimestamp(last_ts).isoformat(),
+            })
+        return summary
+    
+    def detect_regressions(self, results: List[CheckResult], baseline_hours: float = 168,
+                           factor: float = 1.5, min_delta_ms: int = 50,
+                           min_samples: int = 10) -> List[Dict[str, Any]]:
+        """Compare each result's duration against the stored baseline for that check.
+
+        A result regresses when it exceeds the baseline p95 by `factor` and the
+        baseline p50 by at least `min_delta_ms`. Call before appending the
+        results so they are not part of their own baseline.
+        """
+        regressions = []
+        since = time.time() - baseline_hours * 3600
+        for result in results:
+            if result.duration_ms <= 0:
+                continue
+            baseline = self.durations(result.name, since)
+            if len(baseline) < min_samples:
+                continue
+            p50, p95 = percentile(baseline, 50), percentile(baseline, 95)
+            if result.duration_ms > p95 * factor and result.duration_ms - p50 >= min_delta_ms:
+                regressions.append({
+                    "name": result.name,
+                    "duration_ms": result.duration_ms,
+                    "baseline_p50_ms": p50,
+                    "baseline_p95_ms": p95,
+                    "baseline_samples": len(baseline),
+                })
+        return regressions
+    
+    def close(self):
+        self.connection.close()
+
+class ResultStream:
+    """Writes each CheckResult as one NDJSON line the moment it is added.
+
+    Lines are flushed as they are written, so a consumer tailing the file (or
+    stdout) sees every finished check even if a later one hangs. Only a count
+    per status is kept in memory.
+    """
+    
+    def __init__(self, path: str = "-"):
+        self.path = path
+        self.file = sys.stdout if path == "-" else open(path, "a", encoding="utf-8")
+        self.lock = threading.Lock()
+        self.written = 0
+        self.counts: Dict[str, int] = {}
+    
+    @property
+    def to_stdout(self) -> bool:
+        return self.file is sys.stdout
+    
+    def write(self, result: CheckResult):
+        line = json.dumps(asdict(result), default=str)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+            self.written += 1
+            self.counts[result.status] = self.counts.get(result.status, 0) + 1
+    
+    def close(self):
+        if not self.to_stdout:
+            self.file.close()
+
+@dataclass
+class ProbeRequest:
+    """A single HTTP probe to send through an HttpProbe backend"""
+    method: str
+    url: str
+    kwargs: Dict[str, Any] = None
+    
+    def __post_init__(self):
+        if self.kwargs is None:
+            self.kwargs = {}
+
+@dataclass
+class ProbeOutcome:
+    """Response (or error) and timing for a ProbeRequest"""
+    request: ProbeRequest
+    response: Any = None
+    duration_ms: int = 0
+    error: Optional[Exception] = None
+
+@dataclass
+class ProbeResponse:
+    """Backend-neutral response exposing the parts of requests.Response the checks use"""
+    status_code: int
+    text: str
+    url: str = ""
+    
+    def json(self):
+        return json.loads(self.text)
+
+class HttpProbe(abc.ABC):
+    """Base class for pluggable HTTP probe backends; a backend must implement request()"""
+    name = "base"
+    
+    def __init__(self, pool_size: int = 10, max_concurrency: int = 8):
+        self.pool_size = pool_size
+        self.max_concurrency = max(1, max_concurrency)
+    
+    @abc.abstractmethod
+    def request(self, method: str, url: str, **kwargs):
+        """Send one request and return a ProbeResponse"""
+    
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+    
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+    
+    def _timed(self, probe: ProbeRequest) -> ProbeOutcome:
+        start_time = time.time()
+        try:
+            response = self.request(probe.method, probe.url, **probe.kwargs)
+            return ProbeOutcome(probe, response, int((time.time() - start_time) * 1000))
+        except Exception as e:
+            return ProbeOutcome(probe, None, int((time.time() - start_time) * 1000), e)
+    
+    def request_many(self, probes: List[ProbeRequest]) -> List[ProbeOutcome]:
+        """Send probes concurrently and return outcomes in the order given"""
+        if not probes:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(probes))) as pool:
+            return list(pool.map(self._timed, probes))
+    
+    def close(self):
+        pass
+
+class SessionProbe(HttpProbe):
+    """Keep-alive probes over one pooled requests.Session"""
+    name = "session"
+    
+    def __init__(self, pool_size: int = 10, max_concurrency: int = 8):
+        super().__init__(pool_size, max_concurrency)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=max(pool_size, self.max_concurrency))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+    
+    def request(self, method: str, url: str, **kwargs):
+        return self.session.request(method, url, **kwargs)
+    
+    def close(self):
+        self.session.close()
+
+class AiohttpProbe(HttpProbe):
+    """Probes on a background asyncio loop sharing one aiohttp ClientSession.
+
+    Connection errors and timeouts are re-raised as their requests.exceptions
+    equivalents so the checks handle both backends the same way.
+    """
+    name = "aiohttp"
+    
+    def __init__(self, pool_size: int = 10, max_concurrency: int = 8):
+        if not AIOHTTP_AVAILABLE:
+            raise RuntimeError("aiohttp not available (pip install aiohttp)")
+        super().__init__(pool_size, max_concurrency)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name="http-probe-loop")
+        self._thread.start()
+        self._session = self._submit(self._open_session())
+    
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+    
+    async def _open_session(self):
+        connector = aiohttp.TCPConnector(limit=max(self.pool_size, self.max_concurrency))
+        return aiohttp.ClientSession(connector=connector)
+    
+    async def _fetch(self, method: str, url: str, timeout: float = None, **kwargs) -> ProbeResponse:
+        try:
+            async with self._session.request(method, url, timeout=aiohttp.ClientTimeout(total=timeout),
+                                             **kwargs) as response:
+                text = await response.text()
+                return ProbeResponse(response.status, text, str(response.url))
+        except asyncio.TimeoutError as e:
+            raise requests.exceptions.Timeout(f"Request to {url} timed out") from e
+        except aiohttp.ClientConnectionError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+    
+    def request(self, method: str, url: str, **kwargs):
+        return self._submit(self._fetch(method, url, **kwargs))
+    
+    def request_many(self, probes: List[ProbeRequest]) -> List[ProbeOutcome]:
+        async def run_all():
+            limit = asyncio.Semaphore(self.max_concurrency)
+            
+            async def run_one(probe: ProbeRequest) -> ProbeOutcome:
+                async with limit:
+                    start_time = time.time()
+                    try:
+                        response = await self._fetch(probe.method, probe.url, **probe.kwargs)
+                        return ProbeOutcome(probe, response, int((time.time() - start_time) * 1000))
+                    except Exception as e:
+                        return ProbeOutcome(probe, None, int((time.time() - start_time) * 1000), e)
+            
+            return await asyncio.gather(*(run_one(probe) for probe in probes))
+        
+        return self._submit(run_all()) if probes else []
+    
+    def close(self):
+        self._submit(self._session.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+HTTP_PROBE_BACKENDS = {
+    SessionProbe.name: SessionProbe,
+    AiohttpProbe.name: AiohttpProbe,
+}
+
+def create_http_probe(backend: str = "session", pool_size: int = 10, max_concurrency: int = 8) -> HttpProbe:
+    """Build the named HTTP probe backend"""
+    if backend not in HTTP_PROBE_BACKENDS:
+        raise ValueError(f"Unknown HTTP backend '{backend}' (choose from: {', '.join(HTTP_PROBE_BACKENDS)})")
+    return HTTP_PROBE_BACKENDS[backend](pool_size, max_concurrency)
+
 class HealthChecker:
     """Main health check orchestrator"""
     
@@ -140,6 +869,17 @@ class HealthChecker:
         self.results: List[CheckResult] = []
         self.env_vars = {}
         self.docker_client = None
+        self._db_connections: Dict[str, Any] = {}  # cache slot (check family) -> reused connection
+        self._db_lock = threading.Lock()
+        self._local = threading.local()
+        self.history = ResultHistory(self.config.history_size)
+        self.metrics: Optional[MetricsRegistry] = None
+        self.store: Optional[HistoryStore] = None
+        self.stream: Optional[ResultStream] = None
+        if self.config.stream_path:
+            self.stream = ResultStream(self.config.stream_path)
+        # Streamed results are not held unless asked for, so memory does not grow with the run
+        self.keep_results = self.stream is None or self.config.stream_keep_results
         
         # Load environment variables
         self._load_environment()
@@ -150,6 +890,99 @@ class HealthChecker:
                 self.docker_client = docker.from_env()
             except Exception as e:
                 self._add_result("docker_init", "warning", f"Docker client initialization failed: {e}")
+        
+        # Shared HTTP probe backend for every HTTP-based check
+        try:
+            self.http = create_http_probe(self.config.http_backend, self.config.http_pool_size,
+                                          self.config.http_concurrency)
+        except (RuntimeError, ValueError) as e:
+            self._add_result("http_backend", "warning", f"{e} - falling back to pooled session")
+            self.http = SessionProbe(self.config.http_pool_size, self.config.http_concurrency)
+
+    def close(self):
+        """Release pooled clients held by the checker"""
+        self.http.close()
+        with self._db_lock:
+            connections = list(self._db_connections.values())
+            self._db_connections.clear()
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        if self.docker_client is not None:
+            self.docker_client.close()
+        if self.store is not None:
+            self.store.close()
+        if self.stream is not None:
+            self.stream.close()
+
+    def _db_slot(self) -> Optional[str]:
+        """Cache slot of the calling check, or None when its connection is not cached.
+
+        Under --parallel every check family has its own slot, so one family's
+        error cannot close a connection another family is querying on. A family
+        abandoned at its deadline gets no slot and reconnects per check.
+        Call with _db_lock held.
+        """
+        if not self.config.reuse_connections:
+            return None
+        job = getattr(self._local, 'job', None)
+        if job is None:
+            return ""
+        return None if job["timed_out"] else job["check_type"]
+
+    def _get_db_connection(self) -> Tuple[Any, int]:
+        """Return a database connection and the time spent connecting in ms.
+
+        With reuse_connections the connection is cached per check family and
+        handed out again on later runs, in which case the connect time is 0.
+        """
+        with self._db_lock:
+            slot = self._db_slot()
+            cached = self._db_connections.get(slot) if slot is not None else None
+        if cached is not None and not cached.closed:
+            return cached, 0
+        
+        conn_start = time.time()
+        connection = psycopg2.connect(
+            host=self.env_vars['DB_HOST'],
+            port=self.env_vars['DB_PORT'],
+            database=self.env_vars['DB_NAME'],
+            user=self.env_vars['DB_USER'],
+            password=self.env_vars['DB_PASSWORD'],
+            connect_timeout=self.config.db_timeout
+        )
+        # Read-only checks; avoid leaving a long-lived connection idle in transaction
+        connection.autocommit = True
+        conn_duration = int((time.time() - conn_start) * 1000)
+        
+        with self._db_lock:
+            slot = self._db_slot()
+            if slot is not None:
+                self._db_connections[slot] = connection
+        return connection, conn_duration
+
+    def _db_connection_cached(self, connection) -> bool:
+        """Whether connection is held in a cache slot for reuse"""
+        with self._db_lock:
+            return any(cached is connection for cached in self._db_connections.values())
+
+    def _release_db_connection(self, connection):
+        """Close a connection from _get_db_connection unless it is being reused"""
+        if not self._db_connection_cached(connection):
+            connection.close()
+
+    def _discard_db_connection(self):
+        """Drop the calling check family's cached connection so its next run reconnects"""
+        with self._db_lock:
+            slot = self._db_slot()
+            connection = self._db_connections.pop(slot, None) if slot is not None else None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
 
     def _load_environment(self):
         """Load environment variables from .env file"""
@@ -178,6 +1011,9 @@ class HealthChecker:
             'DB_USER': os.getenv('DB_USER', 'lifeos_app'),
             'DB_PASSWORD': os.getenv('DB_PASSWORD'),
             'N8N_WEBHOOK_BASE_URL': os.getenv('N8N_WEBHOOK_BASE_URL', 'http://localhost:5678'),
+            'PG_LISTENER_STATS_URL': os.getenv('PG_LISTENER_STATS_URL', 'http://localhost:18787/stats'),
+            'CHARACTER_CACHE_STATS_URL': os.getenv('CHARACTER_CACHE_STATS_URL', 'http://localhost:18787/cache/stats'),
+            'LOG_SINK_STATS_URL': os.getenv('LOG_SINK_STATS_URL', 'http://localhost:18787/log/stats'),
             'OPENAI_API_KEY': os.getenv('OPENAI_API_KEY'),
             'TELEGRAM_BOT_TOKEN': os.getenv('TELEGRAM_BOT_TOKEN'),
         }
@@ -191,7 +1027,18 @@ class HealthChecker:
             details=details or {},
             duration_ms=duration_ms
         )
-        self.results.append(result)
+        # Checks running on a worker thread collect into their own buffer so
+        # parallel runs can be merged back into self.results in a stable order
+        if self.keep_results:
+            target = getattr(self._local, 'results', None)
+            if target is None:
+                target = self.results
+            target.append(result)
+        
+        # Stream in completion order, except results a family produces after its deadline
+        job = getattr(self._local, 'job', None)
+        if self.stream is not None and not (job and job["timed_out"]):
+            self.stream.write(result)
 
     def _time_check(self, func, *args, **kwargs) -> Tuple[Any, int]:
         """Time a function execution and return result + duration in ms"""
@@ -258,6 +1105,24 @@ class HealthChecker:
                 self._add_result(f"docker_{service_name}", "fail", 
                                f"Error checking {service_name}: {e}")
 
+    def _expected_schema(self) -> Dict[str, Any]:
+        """Expected tables/columns, indexes and triggers for schema validation.
+
+        Parsed from schema.sql when available (cached), otherwise only the
+        configured db_required_tables are checked.
+        """
+        if getattr(self, "_schema_cache", None) is None:
+            path = Path(self.config.schema_file) if self.config.schema_file else find_schema_file()
+            if path is not None and path.exists():
+                expected = parse_schema_file(path)
+                expected["source"] = str(path)
+            else:
+                expected = {"tables": {}, "indexes": {}, "triggers": {}, "source": "db_required_tables"}
+            for table in self.config.db_required_tables:
+                expected["tables"].setdefault(table, [])
+            self._schema_cache = expected
+        return self._schema_cache
+
     def check_database_connectivity(self) -> CheckResult:
         """Check PostgreSQL database connectivity and basic schema"""
         if not self.env_vars['DB_PASSWORD']:
@@ -266,79 +1131,261 @@ class HealthChecker:
 
         try:
             # Test database connection
-            conn_start = time.time()
-            connection = psycopg2.connect(
-                host=self.env_vars['DB_HOST'],
-                port=self.env_vars['DB_PORT'],
-                database=self.env_vars['DB_NAME'],
-                user=self.env_vars['DB_USER'],
-                password=self.env_vars['DB_PASSWORD'],
-                connect_timeout=self.config.db_timeout
-            )
-            conn_duration = int((time.time() - conn_start) * 1000)
+            check_start = time.time()
+            connection, conn_duration = self._get_db_connection()
+            connection_reused = conn_duration == 0 and self._db_connection_cached(connection)
             
             cursor = connection.cursor()
             
-            # Check PostgreSQL version
-            cursor.execute("SELECT version();")
-            pg_version = cursor.fetchone()[0].split()[1]
+            # Validate tables, columns, indexes and triggers in one round trip
+            expected = self._expected_schema()
+            column_pairs = [(table, column) for table, columns in expected["tables"].items() for column in columns]
+            cursor.execute(SCHEMA_VALIDATION_QUERY, {
+                "tables": list(expected["tables"]),
+                "column_tables": [table for table, _ in column_pairs],
+                "columns": [column for _, column in column_pairs],
+                "index_names": list(expected["indexes"]),
+                "index_tables": list(expected["indexes"].values()),
+                "trigger_names": list(expected["triggers"]),
+                "trigger_tables": list(expected["triggers"].values()),
+            })
+            report = cursor.fetchone()[0]
+            pg_version = report["version"].split()[1]
+            missing_tables = report["missing_tables"]
             
-            # Check required tables
-            missing_tables = []
-            for table in self.config.db_required_tables:
-                cursor.execute("""
-                    SELECT EXISTS (
-                        SELECT FROM information_schema.tables 
-                        WHERE table_schema = 'public' AND table_name = %s
-                    );
-                """, (table,))
-                
-                if not cursor.fetchone()[0]:
-                    missing_tables.append(table)
-            
-            # Check database size and connection count
-            cursor.execute("""
-                SELECT 
-                    pg_size_pretty(pg_database_size(current_database())) as db_size,
-                    (SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()) as connections
-            """)
-            db_stats = cursor.fetchone()
-            
-            # Check for database triggers (pg-listener integration)
-            cursor.execute("""
-                SELECT count(*) FROM pg_trigger 
-                WHERE tgname LIKE '%notify%'
-            """)
-            trigger_count = cursor.fetchone()[0]
+            schema_drift = {
+                key: report[key] for key in (
+                    "missing_tables", "missing_columns", "missing_indexes",
+                    "missing_triggers", "unexpected_indexes", "unexpected_triggers",
+                    "unpartitioned_next_month"
+                )
+            }
             
             details = {
                 "postgresql_version": pg_version,
                 "connection_time_ms": conn_duration,
-                "database_size": db_stats[0],
-                "active_connections": db_stats[1],
+                "connection_reused": connection_reused,
+                "database_size": report["database_size"],
+                "active_connections": report["active_connections"],
                 "missing_tables": missing_tables,
-                "notify_triggers": trigger_count,
-                "required_tables_found": len(self.config.db_required_tables) - len(missing_tables),
-                "total_required_tables": len(self.config.db_required_tables)
+                "notify_triggers": report["notify_triggers"],
+                "required_tables_found": len(expected["tables"]) - len(missing_tables),
+                "total_required_tables": len(expected["tables"]),
+                "schema_source": expected["source"],
+                "schema_drift": schema_drift
             }
             
             cursor.close()
-            connection.close()
+            self._release_db_connection(connection)
+            
+            if connection_reused:
+                conn_duration = int((time.time() - check_start) * 1000)
             
+            drift = []
             if missing_tables:
+                drift.append(f"missing tables: {', '.join(missing_tables)}")
+            if schema_drift["missing_columns"]:
+                drift.append(f"{sum(len(c) for c in schema_drift['missing_columns'].values())} missing columns")
+            if schema_drift["missing_indexes"]:
+                drift.append(f"{len(schema_drift['missing_indexes'])} missing indexes")
+            if schema_drift["missing_triggers"]:
+                drift.append(f"missing triggers: {', '.join(schema_drift['missing_triggers'])}")
+            if schema_drift["unpartitioned_next_month"]:
+                drift.append(f"no partition for next month: {', '.join(schema_drift['unpartitioned_next_month'])} "
+                             f"(run SELECT maintain_log_partitions())")
+            
+            if drift:
                 self._add_result("database", "warning", 
-                               f"Database connected but missing tables: {', '.join(missing_tables)}", 
+                               f"Database connected but schema drifted - {'; '.join(drift)}", 
                                details, conn_duration)
             else:
                 self._add_result("database", "pass", 
                                f"Database healthy - PostgreSQL {pg_version}", 
                                details, conn_duration)
                 
+            self._check_rollups()
+                
         except psycopg2.OperationalError as e:
+            self._discard_db_connection()
             self._add_result("database", "fail", f"Database connection failed: {e}")
         except Exception as e:
+            self._discard_db_connection()
             self._add_result("database", "fail", f"Database check error: {e}")
 
+    def _check_rollups(self):
+        """Check how stale the materialized rollups behind the leaderboard are"""
+        try:
+            check_start = time.time()
+            connection, _ = self._get_db_connection()
+            cursor = connection.cursor()
+            cursor.execute("SELECT to_regclass('rollup_refresh_log') IS NOT NULL")
+            if not cursor.fetchone()[0]:
+                cursor.close()
+                self._release_db_connection(connection)
+                self._add_result("rollups", "skip",
+                               "rollup_refresh_log not found (apply database/migrations/004_rollup_views.sql)")
+                return
+            cursor.execute("""
+                SELECT view_name,
+                       EXTRACT(EPOCH FROM now() - refreshed_at)::int AS age_s,
+                       EXTRACT(EPOCH FROM now() - dirty_since)::int AS dirty_s,
+                       refresh_ms, row_count
+                FROM rollup_refresh_log
+                ORDER BY view_name
+            """)
+            views = {row.pop("view_name"): row for row in self._fetch_dicts(cursor)}
+            cursor.close()
+            self._release_db_connection(connection)
+        except Exception as e:
+            self._discard_db_connection()
+            self._add_result("rollups", "warning", f"Rollup check error: {e}")
+            return
+        duration = int((time.time() - check_start) * 1000)
+        
+        issues = []
+        for name, view in views.items():
+            if view["age_s"] is None:
+                issues.append(f"{name} never refreshed")
+            elif view["age_s"] > self.config.rollup_age_warn_s:
+                issues.append(f"{name} not refreshed for {view['age_s'] // 60}m")
+            elif (view["dirty_s"] or 0) > self.config.rollup_dirty_warn_s:
+                issues.append(f"{name} has {view['dirty_s']}s of unrefreshed writes")
+        
+        if issues:
+            self._add_result("rollups", "warning",
+                           f"Rollups stale: {', '.join(issues)} (is rollup_refresher.json active?)",
+                           views, duration)
+        else:
+            oldest = max((view["age_s"] for view in views.values()), default=0)
+            self._add_result("rollups", "pass", f"{len(views)} rollups fresh (oldest refresh {oldest}s ago)",
+                           views, duration)
+
+    @staticmethod
+    def _fetch_dicts(cursor) -> List[Dict[str, Any]]:
+        """Fetch all rows from a cursor as dicts keyed by column name"""
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def check_database_performance(self) -> CheckResult:
+        """Report hot queries, index usage and bloat from pg_stat_statements / pg_stat_user_*"""
+        if not self.env_vars['DB_PASSWORD']:
+            self._add_result("db_perf", "skip", "Database password not configured")
+            return
+
+        try:
+            check_start = time.time()
+            connection, _ = self._get_db_connection()
+            cursor = connection.cursor()
+            top_n = self.config.db_perf_top_n
+            issues = []
+            
+            # Hot queries - pg_stat_statements is preloaded by docker-compose but the
+            # extension still has to be created in the database
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+            top_by_total, top_by_mean = [], []
+            if cursor.fetchone() is None:
+                statements_status = "extension not installed (CREATE EXTENSION pg_stat_statements)"
+            else:
+                try:
+                    cursor.execute(TOP_QUERIES_SQL.format(order_by="total_exec_time"), (top_n,))
+                    top_by_total = self._fetch_dicts(cursor)
+                    cursor.execute(TOP_QUERIES_SQL.format(order_by="mean_exec_time"), (top_n,))
+                    top_by_mean = self._fetch_dicts(cursor)
+                    statements_status = "enabled"
+                except psycopg2.Error as e:
+                    statements_status = f"unavailable: {str(e).strip()}"
+            
+            slow_queries = [q for q in top_by_mean if q["mean_ms"] > self.config.slow_query_mean_ms]
+            if slow_queries:
+                issues.append(f"{len(slow_queries)} queries with mean time over {self.config.slow_query_mean_ms:g}ms")
+            
+            # Index usage
+            cursor.execute(UNUSED_INDEXES_SQL)
+            unused_indexes = self._fetch_dicts(cursor)
+            
+            cursor.execute(TABLE_SCANS_SQL)
+            table_stats = self._fetch_dicts(cursor)
+            for table in table_stats:
+                for key in ("last_autovacuum", "last_vacuum"):
+                    if table[key] is not None:
+                        table[key] = table[key].isoformat()
+            
+            missing_index_candidates = [
+                {key: t[key] for key in ("table_name", "seq_scan", "seq_tup_read", "idx_scan", "n_live_tup")}
+                for t in table_stats
+                if t["seq_scan"] > t["idx_scan"] and t["n_live_tup"] >= self.config.seq_scan_min_rows
+            ]
+            if missing_index_candidates:
+                issues.append(f"{len(missing_index_candidates)} tables mostly seq-scanned: "
+                              f"{', '.join(t['table_name'] for t in missing_index_candidates[:5])}")
+            
+            # Bloat estimates
+            table_bloat = [
+                {key: t[key] for key in ("table_name", "n_live_tup", "n_dead_tup", "dead_tuple_ratio",
+                                         "size_bytes", "last_autovacuum")}
+                for t in table_stats
+                if (t["dead_tuple_ratio"] or 0) > self.config.dead_tuple_ratio_warn
+                and t["size_bytes"] >= self.config.bloat_min_bytes
+            ]
+            if table_bloat:
+                issues.append(f"{len(table_bloat)} tables over {self.config.dead_tuple_ratio_warn:.0%} dead tuples")
+            
+            cursor.execute(INDEX_BLOAT_SQL, (self.config.bloat_min_bytes,))
+            index_bloat = []
+            for index in self._fetch_dicts(cursor):
+                ratio = 1 - index["expected_bytes"] / index["size_bytes"] if index["size_bytes"] else 0
+                if ratio > self.config.index_bloat_ratio_warn:
+                    index["bloat_ratio"] = round(ratio, 3)
+                    index_bloat.append(index)
+            index_bloat.sort(key=lambda index: index["size_bytes"] - index["expected_bytes"], reverse=True)
+            if index_bloat:
+                issues.append(f"{len(index_bloat)} indexes over {self.config.index_bloat_ratio_warn:.0%} estimated bloat")
+            
+            cursor.close()
+            self._release_db_connection(connection)
+            
+            details = {
+                "pg_stat_statements": statements_status,
+                "top_queries_by_total_time": top_by_total,
+                "top_queries_by_mean_time": top_by_mean,
+                "slow_queries": len(slow_queries),
+                "unused_index_count": len(unused_indexes),
+                "unused_indexes": unused_indexes[:top_n],
+                "missing_index_candidates": missing_index_candidates,
+                "table_scans": [
+                    {key: t[key] for key in ("table_name", "seq_scan", "seq_tup_read", "idx_scan", "n_live_tup")}
+                    for t in table_stats[:top_n]
+                ],
+                "table_bloat": table_bloat,
+                "index_bloat": index_bloat[:top_n],
+                "thresholds": {
+                    "slow_query_mean_ms": self.config.slow_query_mean_ms,
+                    "seq_scan_min_rows": self.config.seq_scan_min_rows,
+                    "dead_tuple_ratio_warn": self.config.dead_tuple_ratio_warn,
+                    "index_bloat_ratio_warn": self.config.index_bloat_ratio_warn,
+                    "bloat_min_bytes": self.config.bloat_min_bytes
+                }
+            }
+            duration = int((time.time() - check_start) * 1000)
+            
+            if statements_status != "enabled":
+                issues.append(f"pg_stat_statements {statements_status}")
+            
+            if issues:
+                self._add_result("db_perf", "warning", f"Database performance issues: {'; '.join(issues)}",
+                               details, duration)
+            else:
+                self._add_result("db_perf", "pass",
+                               f"No slow queries, seq-scan hot spots or bloat over thresholds "
+                               f"({len(unused_indexes)} unused indexes)", details, duration)
+                
+        except psycopg2.OperationalError as e:
+            self._discard_db_connection()
+            self._add_result("db_perf", "fail", f"Database connection failed: {e}")
+        except Exception as e:
+            self._discard_db_connection()
+            self._add_result("db_perf", "fail", f"Database performance check error: {e}")
+
     def check_n8n_api(self) -> CheckResult:
         """Check n8n API and workflow status"""
         base_url = self.env_vars['N8N_WEBHOOK_BASE_URL'] or self.config.n8n_base_url
@@ -346,7 +1393,7 @@ class HealthChecker:
         # Test basic n8n health endpoint
         try:
             response, duration = self._time_check(
-                requests.get, 
+                self.http.get, 
                 f"{base_url}/healthz", 
                 timeout=self.config.http_timeout
             )
@@ -366,35 +1413,38 @@ class HealthChecker:
         except Exception as e:
             self._add_result("n8n_health", "fail", f"n8n health check error: {e}")
 
-        # Test webhook endpoints
-        for endpoint in self.config.test_endpoints:
-            if endpoint == "/healthz":
-                continue  # Already tested above
-                
-            try:
-                test_url = f"{base_url}{endpoint}"
-                response, duration = self._time_check(
-                    requests.post, 
-                    test_url,
-                    json={"test": True, "timestamp": datetime.now().isoformat()},
-                    timeout=self.config.http_timeout
-                )
-                
-                # Most webhook endpoints will return 404 if no workflow is listening
-                # This is actually expected behavior
-                if response.status_code in [200, 404]:
-                    status = "pass" if response.status_code == 200 else "warning"
-                    message = f"Webhook {endpoint} accessible" if response.status_code == 200 else f"Webhook {endpoint} not configured (404 expected)"
-                    self._add_result(f"webhook_{endpoint.replace('/', '_')}", status, message,
-                                   {"status_code": response.status_code, "url": test_url}, duration)
-                else:
-                    self._add_result(f"webhook_{endpoint.replace('/', '_')}", "fail",
-                                   f"Webhook {endpoint} returned {response.status_code}",
-                                   {"status_code": response.status_code, "url": test_url}, duration)
-                    
-            except Exception as e:
-                self._add_result(f"webhook_{endpoint.replace('/', '_')}", "fail", 
-                               f"Webhook {endpoint} error: {e}")
+        # Test webhook endpoints concurrently over the shared connection pool
+        probes = [
+            ProbeRequest("POST", f"{base_url}{endpoint}", {
+                "json": {"test": True, "timestamp": datetime.now().isoformat()},
+                "timeout": self.config.http_timeout
+            })
+            for endpoint in self.config.test_endpoints
+            if endpoint != "/healthz"  # Already tested above
+        ]
+        
+        for outcome in self.http.request_many(probes):
+            test_url = outcome.request.url
+            endpoint = test_url[len(base_url):]
+            name = f"webhook_{endpoint.replace('/', '_')}"
+            
+            if outcome.error is not None:
+                self._add_result(name, "fail", f"Webhook {endpoint} error: {outcome.error}")
+                continue
+            
+            response, duration = outcome.response, outcome.duration_ms
+            
+            # Most webhook endpoints will return 404 if no workflow is listening
+            # This is actually expected behavior
+            if response.status_code in [200, 404]:
+                status = "pass" if response.status_code == 200 else "warning"
+                message = f"Webhook {endpoint} accessible" if response.status_code == 200 else f"Webhook {endpoint} not configured (404 expected)"
+                self._add_result(name, status, message,
+                               {"status_code": response.status_code, "url": test_url}, duration)
+            else:
+                self._add_result(name, "fail",
+                               f"Webhook {endpoint} returned {response.status_code}",
+                               {"status_code": response.status_code, "url": test_url}, duration)
 
     def check_external_apis(self) -> CheckResult:
         """Check external API connectivity"""
@@ -408,7 +1458,7 @@ class HealthChecker:
                 }
                 
                 response, duration = self._time_check(
-                    requests.get,
+                    self.http.get,
                     "https://api.openai.com/v1/models",
                     headers=headers,
                     timeout=self.config.http_timeout
@@ -432,7 +1482,7 @@ class HealthChecker:
         if self.env_vars['TELEGRAM_BOT_TOKEN']:
             try:
                 response, duration = self._time_check(
-                    requests.get,
+                    self.http.get,
                     f"https://api.telegram.org/bot{self.env_vars['TELEGRAM_BOT_TOKEN']}/getMe",
                     timeout=self.config.http_timeout
                 )
@@ -470,7 +1520,7 @@ class HealthChecker:
             }
             
             response, duration = self._time_check(
-                requests.post,
+                self.http.post,
                 webhook_url,
                 json=test_payload,
                 timeout=self.config.http_timeout
@@ -489,6 +1539,134 @@ class HealthChecker:
                 
         except Exception as e:
             self._add_result("pg_listener_webhook", "fail", f"pg-listener webhook error: {e}")
+        
+        self._check_pg_listener_queue()
+        self._check_log_sink()
+
+    def _check_pg_listener_queue(self):
+        """Check forwarding lag and queue depth reported by pg-listener's /stats endpoint"""
+        stats_url = self.env_vars['PG_LISTENER_STATS_URL']
+        
+        try:
+            response, duration = self._time_check(self.http.get, stats_url, timeout=self.config.http_timeout)
+            if response.status_code != 200:
+                self._add_result("pg_listener_queue", "warning",
+                               f"pg-listener stats returned {response.status_code}",
+                               {"stats_url": stats_url, "status_code": response.status_code}, duration)
+                return
+            stats = response.json()
+        except Exception as e:
+            self._add_result("pg_listener_queue", "warning", f"pg-listener stats unavailable: {e}",
+                           {"stats_url": stats_url})
+            return
+        
+        queued = stats.get("buffer_depth", 0) + stats.get("retry_depth", 0)
+        details = {key: stats.get(key) for key in (
+            "received", "forwarded", "buffer_depth", "retry_depth", "spool_depth", "in_flight",
+            "lag_ms", "dropped_events", "failed_requests", "last_success_at", "last_error")}
+        
+        issues = []
+        if stats.get("lag_ms", 0) > self.config.listener_lag_warn_ms:
+            issues.append(f"forwarding lag {stats['lag_ms'] / 1000:.1f}s")
+        if queued > self.config.listener_queue_warn:
+            issues.append(f"{queued} events queued in memory")
+        if stats.get("spool_depth", 0):
+            issues.append(f"{stats['spool_depth']} events spooled to disk")
+        if stats.get("dropped_events", 0):
+            issues.append(f"{stats['dropped_events']} events rejected by n8n")
+        
+        if issues:
+            self._add_result("pg_listener_queue", "warning", f"pg-listener backlog: {', '.join(issues)}",
+                           details, duration)
+        else:
+            self._add_result("pg_listener_queue", "pass",
+                           f"pg-listener forwarding healthy (lag {stats.get('lag_ms', 0)}ms, {queued} queued)",
+                           details, duration)
+
+    def _check_log_sink(self):
+        """Check write lag, queue depth and lost rows of pg-listener's batched log sink"""
+        stats_url = self.env_vars['LOG_SINK_STATS_URL']
+        
+        try:
+            response, duration = self._time_check(self.http.get, stats_url, timeout=self.config.http_timeout)
+            if response.status_code != 200:
+                self._add_result("log_sink", "warning",
+                               f"Log sink stats returned {response.status_code}",
+                               {"stats_url": stats_url, "status_code": response.status_code}, duration)
+                return
+            stats = response.json()
+        except Exception as e:
+            self._add_result("log_sink", "warning", f"Log sink stats unavailable: {e}", {"stats_url": stats_url})
+            return
+        
+        details = {key: stats.get(key) for key in (
+            "received", "written", "queue_depth", "queued", "lag_ms", "flush_lag_ms", "dropped", "rejected",
+            "failed_flushes", "last_flush_at", "last_error")}
+        
+        issues = []
+        if stats.get("queue_depth", 0) and stats.get("lag_ms", 0) > self.config.log_lag_warn_ms:
+            issues.append(f"write lag {stats['lag_ms'] / 1000:.1f}s")
+        if stats.get("queue_depth", 0) > self.config.log_queue_warn:
+            issues.append(f"{stats['queue_depth']} rows queued")
+        if stats.get("dropped", 0):
+            issues.append(f"{stats['dropped']} rows dropped")
+        if stats.get("rejected", 0):
+            issues.append(f"{stats['rejected']} rows rejected")
+        
+        flush_p95 = (stats.get("flush_lag_ms") or {}).get("p95")
+        if issues:
+            self._add_result("log_sink", "warning", f"Log sink degraded: {', '.join(issues)}", details, duration)
+        else:
+            lag = f", flush lag p95 {flush_p95}ms" if flush_p95 is not None else ""
+            self._add_result("log_sink", "pass",
+                           f"Log sink healthy ({stats.get('written', 0)} rows written, "
+                           f"{stats.get('queue_depth', 0)} queued{lag})", details, duration)
+
+    def check_character_cache(self) -> CheckResult:
+        """Check hit rate and latency of pg-listener's character state cache"""
+        stats_url = self.env_vars['CHARACTER_CACHE_STATS_URL']
+        
+        try:
+            response, duration = self._time_check(self.http.get, stats_url, timeout=self.config.http_timeout)
+            if response.status_code != 200:
+                self._add_result("character_cache", "warning",
+                               f"Character cache stats returned {response.status_code}",
+                               {"stats_url": stats_url, "status_code": response.status_code}, duration)
+                return
+            stats = response.json()
+        except Exception as e:
+            self._add_result("character_cache", "warning", f"Character cache stats unavailable: {e}",
+                           {"stats_url": stats_url})
+            return
+        
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        hit_rate = stats.get("hit_rate")
+        hit_p95 = (stats.get("hit_latency_ms") or {}).get("p95")
+        details = {key: stats.get(key) for key in (
+            "store", "store_connected", "hits", "misses", "hit_rate", "hit_latency_ms", "miss_latency_ms",
+            "invalidations", "keys_invalidated", "loads_discarded", "store_errors", "db_errors", "last_error")}
+        
+        issues = []
+        if stats.get("store") == "redis" and not stats.get("store_connected"):
+            issues.append("Redis disconnected, reads falling through to PostgreSQL")
+        if hit_rate is not None and lookups >= self.config.cache_min_lookups \
+                and hit_rate < self.config.cache_hit_rate_warn:
+            issues.append(f"hit rate {hit_rate:.0%}")
+        if hit_p95 is not None and hit_p95 > self.config.cache_hit_p95_warn_ms:
+            issues.append(f"hit p95 {hit_p95}ms")
+        if stats.get("db_errors", 0):
+            issues.append(f"{stats['db_errors']} database errors")
+        
+        if issues:
+            self._add_result("character_cache", "warning", f"Character cache degraded: {', '.join(issues)}",
+                           details, duration)
+        elif not lookups:
+            self._add_result("character_cache", "pass",
+                           f"Character cache up ({stats.get('store')}), no lookups yet", details, duration)
+        else:
+            self._add_result("character_cache", "pass",
+                           f"Character cache healthy ({stats.get('store')}, {hit_rate:.0%} hits over "
+                           f"{lookups} lookups, hit p95 {hit_p95}ms)", details, duration)
 
     def check_system_resources(self) -> CheckResult:
         """Check system resources and performance"""
@@ -532,41 +1710,213 @@ class HealthChecker:
         except Exception as e:
             self._add_result("system_resources", "fail", f"System resource check error: {e}")
 
-    def run_all_checks(self, check_types: List[str] = None) -> List[CheckResult]:
+    # Check families in the order their results are reported
+    CHECK_FAMILIES = [
+        ("docker", "🐳 Checking Docker services...", "check_docker_services"),
+        ("database", "🗄️  Checking database connectivity...", "check_database_connectivity"),
+        ("n8n", "⚡ Checking n8n API and webhooks...", "check_n8n_api"),
+        ("apis", "🌐 Checking external APIs...", "check_external_apis"),
+        ("pg_listener", "📡 Checking pg-listener integration...", "check_pg_listener"),
+        ("cache", "🧠 Checking character cache...", "check_character_cache"),
+        ("resources", "💻 Checking system resources...", "check_system_resources"),
+        ("db_perf", "📊 Checking database performance...", "check_database_performance"),
+    ]
+
+    def run_all_checks(self, check_types: List[str] = None, silent: bool = False) -> List[CheckResult]:
         """Run all health checks"""
         if check_types is None:
-            check_types = ["docker", "database", "n8n", "apis", "pg_listener", "resources"]
+            check_types = list(DEFAULT_CHECK_TYPES)
         
-        print(f"{Fore.CYAN}🔍 Starting SBS n8n Ecosystem Health Check{Style.RESET_ALL}")
-        print(f"{Fore.BLUE}Platform: {platform.system()} {platform.release()}{Style.RESET_ALL}")
-        print(f"{Fore.BLUE}Python: {platform.python_version()}{Style.RESET_ALL}")
-        print(f"{Fore.BLUE}Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}{Style.RESET_ALL}\n")
+        if not silent:
+            print(f"{Fore.CYAN}🔍 Starting SBS n8n Ecosystem Health Check{Style.RESET_ALL}")
+            print(f"{Fore.BLUE}Platform: {platform.system()} {platform.release()}{Style.RESET_ALL}")
+            print(f"{Fore.BLUE}Python: {platform.python_version()}{Style.RESET_ALL}")
+            print(f"{Fore.BLUE}Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}{Style.RESET_ALL}\n")
         
-        if "docker" in check_types:
-            print(f"{Fore.YELLOW}🐳 Checking Docker services...{Style.RESET_ALL}")
-            self.check_docker_services()
+        self._run_families(check_types, announce=not silent)
+        return self.results
+
+    def _run_families(self, check_types: List[str], announce: bool = True):
+        """Run the named check families, sequentially or in parallel per config"""
+        families = [family for family in self.CHECK_FAMILIES if family[0] in check_types]
         
-        if "database" in check_types:
-            print(f"{Fore.YELLOW}🗄️  Checking database connectivity...{Style.RESET_ALL}")
-            self.check_database_connectivity()
+        if self.config.parallel:
+            self._run_checks_parallel(families, announce)
+        else:
+            for check_type, label, method_name in families:
+                if announce:
+                    print(f"{Fore.YELLOW}{label}{Style.RESET_ALL}")
+                getattr(self, method_name)()
+
+    def run_daemon(self, check_types: List[str] = None, silent: bool = False,
+                   max_cycles: int = None) -> ResultHistory:
+        """Keep running check families on their own intervals until interrupted.
+
+        Docker, database and HTTP clients are created once and reused across
+        cycles. Each cycle's results are pushed into self.history; self.results
+        only holds the most recent cycle.
+        """
+        if check_types is None:
+            check_types = list(DEFAULT_CHECK_TYPES)
         
-        if "n8n" in check_types:
-            print(f"{Fore.YELLOW}⚡ Checking n8n API and webhooks...{Style.RESET_ALL}")
-            self.check_n8n_api()
+        self.config.reuse_connections = True
+        # Each cycle replaces self.results, so holding them stays bounded
+        self.keep_results = True
+        intervals = {
+            check_type: self.config.daemon_intervals.get(check_type, self.config.daemon_interval)
+            for check_type in check_types
+        }
+        next_due = {check_type: 0.0 for check_type in check_types}
         
-        if "apis" in check_types:
-            print(f"{Fore.YELLOW}🌐 Checking external APIs...{Style.RESET_ALL}")
-            self.check_external_apis()
+        # Keep startup results (env_load, docker_init, ...) in the history too
+        self.history.extend(self.results)
+        if self.metrics is not None:
+            self.metrics.observe_many(self.results)
         
-        if "pg_listener" in check_types:
-            print(f"{Fore.YELLOW}📡 Checking pg-listener integration...{Style.RESET_ALL}")
-            self.check_pg_listener()
+        if not silent:
+            schedule = ", ".join(f"{name}={seconds}s" for name, seconds in intervals.items())
+            print(f"{Fore.CYAN}🔁 SBS health check daemon started ({schedule}){Style.RESET_ALL}")
         
-        if "resources" in check_types:
-            print(f"{Fore.YELLOW}💻 Checking system resources...{Style.RESET_ALL}")
-            self.check_system_resources()
+        cycles = 0
+        try:
+            while max_cycles is None or cycles < max_cycles:
+                now = time.monotonic()
+                due = [check_type for check_type in check_types if next_due[check_type] <= now]
+                
+                if due:
+                    self.results = []
+                    self._run_families(due, announce=False)
+                    if self.store is not None:
+                        self.record_results()
+                    self.history.extend(self.results)
+                    if self.metrics is not None:
+                        self.metrics.observe_many(self.results)
+                    for check_type in due:
+                        next_due[check_type] = now + intervals[check_type]
+                    if not silent:
+                        self._print_cycle(due)
+                    cycles += 1
+                
+                time.sleep(max(0.0, min(next_due.values()) - time.monotonic()))
+        except KeyboardInterrupt:
+            if not silent:
+                print(f"\n{Fore.YELLOW}⏹️  Health check daemon stopped{Style.RESET_ALL}")
         
-        return self.results
+        return self.history
+
+    def record_results(self) -> List[Dict[str, Any]]:
+        """Flag latency regressions against the history store, then append this run"""
+        regressions = self.store.detect_regressions(
+            self.results, self.config.baseline_hours, self.config.regression_factor,
+            self.config.regression_min_delta_ms, self.config.regression_min_samples)
+        self.store.append(self.results)
+        
+        if regressions:
+            names = ", ".join(f"{r['name']} ({r['duration_ms']}ms vs p95 {r['baseline_p95_ms']}ms)"
+                              for r in regressions)
+            self._add_result("latency_regression", "warning", f"Latency regressions: {names}",
+                           {"regressions": regressions, "baseline_hours": self.config.baseline_hours})
+        else:
+            self._add_result("latency_regression", "pass", "No latency regressions against baseline",
+                           {"baseline_hours": self.config.baseline_hours})
+        return regressions
+
+    def _print_cycle(self, check_types: List[str]):
+        """Print a one-line summary of the latest daemon cycle"""
+        failed = [r.name for r in self.results if r.status == "fail"]
+        warnings = len([r for r in self.results if r.status == "warning"])
+        passed = len([r for r in self.results if r.status == "pass"])
+        color = Fore.RED if failed else Fore.YELLOW if warnings else Fore.GREEN
+        line = (f"[{datetime.now().strftime('%H:%M:%S')}] {', '.join(check_types)}: "
+                f"{passed} passed, {len(failed)} failed, {warnings} warnings")
+        if failed:
+            line += f" ({', '.join(failed)})"
+        print(f"{color}{line}{Style.RESET_ALL}")
+
+    def _run_checks_parallel(self, families: List[Tuple[str, str, str]], announce: bool = True):
+        """Run check families concurrently, bounded by max_workers and check_deadline.
+
+        Workers are daemon threads so a check that overruns its deadline cannot
+        keep the process alive; its slot is handed back to the queue when the
+        deadline passes and any late results it produces are discarded.
+        """
+        slots = threading.Semaphore(max(1, self.config.max_workers))
+        jobs = []
+        
+        for check_type, label, method_name in families:
+            if announce:
+                print(f"{Fore.YELLOW}{label}{Style.RESET_ALL}")
+            job = {
+                "check_type": check_type,
+                "method": getattr(self, method_name),
+                "results": [],
+                "started": None,
+                "error": None,
+                "done": threading.Event(),
+                "lock": threading.Lock(),
+                "released": False,
+                "timed_out": False,
+            }
+            jobs.append(job)
+        
+        def release(job):
+            with job["lock"]:
+                if not job["released"]:
+                    job["released"] = True
+                    slots.release()
+        
+        def worker(job):
+            slots.acquire()
+            job["started"] = time.monotonic()
+            self._local.results = job["results"]
+            self._local.job = job
+            try:
+                job["method"]()
+            except Exception as e:
+                job["error"] = e
+            finally:
+                self._local.results = None
+                self._local.job = None
+                job["done"].set()
+                release(job)
+        
+        for job in jobs:
+            threading.Thread(target=worker, args=(job,), daemon=True,
+                             name=f"health-check-{job['check_type']}").start()
+        
+        # Collect in declaration order so self.results is stable across runs
+        for job in jobs:
+            timed_out = False
+            while not job["done"].wait(0.05):
+                started = job["started"]
+                if started is not None and time.monotonic() - started > self.config.check_deadline:
+                    timed_out = True
+                    # The abandoned thread keeps its connection; later cycles of the family reconnect
+                    with self._db_lock:
+                        job["timed_out"] = True
+                        self._db_connections.pop(job["check_type"], None)
+                    break
+            
+            self.results.extend(list(job["results"]))
+            
+            if timed_out:
+                release(job)
+                self._add_result(f"{job['check_type']}_deadline", "fail",
+                               f"{job['check_type']} checks exceeded {self.config.check_deadline}s deadline",
+                               {"deadline_s": self.config.check_deadline},
+                               int((time.monotonic() - job["started"]) * 1000))
+            elif job["error"] is not None:
+                self._add_result(f"{job['check_type']}_error", "fail",
+                               f"{job['check_type']} checks raised: {job['error']}")
+
+    def status_counts(self) -> Dict[str, int]:
+        """Results per status, from the stream's counters when results are not held"""
+        if not self.keep_results:
+            return dict(self.stream.counts)
+        counts: Dict[str, int] = {}
+        for result in self.results:
+            counts[result.status] = counts.get(result.status, 0) + 1
+        return counts
 
     def print_results(self, detailed: bool = True):
         """Print formatted results"""
@@ -575,11 +1925,12 @@ class HealthChecker:
         print(f"{'='*60}{Style.RESET_ALL}\n")
         
         # Summary statistics
-        total_checks = len(self.results)
-        passed = len([r for r in self.results if r.status == "pass"])
-        failed = len([r for r in self.results if r.status == "fail"])
-        warnings = len([r for r in self.results if r.status == "warning"])
-        skipped = len([r for r in self.results if r.status == "skip"])
+        counts = self.status_counts()
+        total_checks = sum(counts.values())
+        passed = counts.get("pass", 0)
+        failed = counts.get("fail", 0)
+        warnings = counts.get("warning", 0)
+        skipped = counts.get("skip", 0)
         
         print(f"{Fore.WHITE}📊 Summary:{Style.RESET_ALL}")
         print(f"  {Fore.GREEN}✅ Passed: {passed}{Style.RESET_ALL}")
@@ -589,7 +1940,10 @@ class HealthChecker:
         print(f"  {Fore.WHITE}📈 Total: {total_checks}{Style.RESET_ALL}\n")
         
         # Detailed results
-        if detailed:
+        if detailed and not self.keep_results:
+            print(f"{Fore.BLUE}Results were streamed to {self.stream.path} "
+                  f"(--keep-results lists them here too){Style.RESET_ALL}\n")
+        elif detailed:
             for result in self.results:
                 status_icon = {
                     "pass": f"{Fore.GREEN}✅",
@@ -644,6 +1998,22 @@ class HealthChecker:
         print(f"{Fore.GREEN}📄 Results exported to: {filename}{Style.RESET_ALL}")
         return filename
 
+def print_trend(store: HistoryStore, window_hours: float, names: List[str] = None):
+    """Print p50/p95/p99 latency per check from the history store"""
+    summary = store.latency_summary(window_hours, names)
+    print(f"{Fore.CYAN}📈 Latency over the last {window_hours:g}h ({store.path}){Style.RESET_ALL}")
+    if not summary:
+        print(f"{Fore.YELLOW}No results recorded in this window{Style.RESET_ALL}")
+        return
+    
+    fmt = lambda value: "-" if value is None else f"{value}ms"
+    width = max(len(row["name"]) for row in summary)
+    print(f"{'check':<{width}}  {'runs':>6}  {'fail':>5}  {'p50':>8}  {'p95':>8}  {'p99':>8}")
+    for row in summary:
+        color = Fore.RED if row["failures"] else Fore.WHITE
+        print(f"{color}{row['name']:<{width}}  {row['runs']:>6}  {row['failures']:>5}  "
+              f"{fmt(row['p50_ms']):>8}  {fmt(row['p95_ms']):>8}  {fmt(row['p99_ms']):>8}{Style.RESET_ALL}")
+
 def main():
     """Main entry point"""
     import argparse
@@ -657,8 +2027,17 @@ Examples:
     python health_check.py --quick            # Run basic checks only
     python health_check.py --docker-only      # Check Docker services only
     python health_check.py --api-only         # Check APIs and webhooks only
+    python health_check.py --docker-only --db-perf  # Docker plus query/index/bloat report
     python health_check.py --export-json      # Export results to JSON
+    python health_check.py --stream           # One NDJSON line per result on stdout
+    python health_check.py --daemon --stream checks.ndjson
     python health_check.py --config custom.env # Use custom environment file
+    python health_check.py --parallel --max-workers 6 --check-deadline 20
+    python health_check.py --http-backend aiohttp --http-concurrency 16
+    python health_check.py --daemon --interval 60 --family-interval n8n=15
+    python health_check.py --exporter --metrics-port 9108
+    python health_check.py --record           # Append to history, flag regressions
+    python health_check.py --trend --window 24 # p50/p95/p99 per check
         """
     )
     
@@ -670,17 +2049,62 @@ Examples:
                        help="Check Docker services only")
     parser.add_argument("--api-only", action="store_true",
                        help="Check APIs and webhooks only")
+    parser.add_argument("--db-perf", action="store_true",
+                       help="Also report hot queries, index usage and bloat (pg_stat_statements)")
     parser.add_argument("--export-json", action="store_true",
                        help="Export results to JSON file")
+    parser.add_argument("--stream", nargs="?", const="-", default=None, metavar="FILE",
+                       help="Write each result as an NDJSON line as soon as it completes, "
+                            "appending to FILE or to stdout (implies --silent)")
+    parser.add_argument("--keep-results", action="store_true",
+                       help="With --stream, also hold results in memory for the final report")
     parser.add_argument("--silent", action="store_true",
                        help="Suppress console output")
     parser.add_argument("--config", type=str, default=".env",
                        help="Path to environment configuration file")
     parser.add_argument("--timeout", type=int, default=10,
                        help="HTTP timeout in seconds (default: 10)")
+    parser.add_argument("--parallel", action="store_true",
+                       help="Run check families concurrently")
+    parser.add_argument("--max-workers", type=int, default=4,
+                       help="Maximum concurrent check families with --parallel (default: 4)")
+    parser.add_argument("--check-deadline", type=int, default=30,
+                       help="Seconds each check family may run with --parallel (default: 30)")
+    parser.add_argument("--http-backend", choices=sorted(HTTP_PROBE_BACKENDS), default="session",
+                       help="HTTP probe backend (default: session)")
+    parser.add_argument("--http-concurrency", type=int, default=8,
+                       help="Maximum concurrent HTTP probes (default: 8)")
+    parser.add_argument("--daemon", action="store_true",
+                       help="Keep running and re-check each family on its own interval")
+    parser.add_argument("--interval", type=int, default=60,
+                       help="Default seconds between daemon runs of a check family (default: 60)")
+    parser.add_argument("--family-interval", action="append", default=[], metavar="FAMILY=SECONDS",
+                       help="Per-family daemon interval, e.g. --family-interval n8n=15 (repeatable)")
+    parser.add_argument("--history-size", type=int, default=100,
+                       help="Results kept per check in the daemon ring buffer (default: 100)")
+    parser.add_argument("--record", action="store_true",
+                       help="Append results to the history store and flag latency regressions")
+    parser.add_argument("--history-db", type=str, default="sbs_health_history.sqlite",
+                       help="SQLite history store path (default: sbs_health_history.sqlite)")
+    parser.add_argument("--trend", action="store_true",
+                       help="Print p50/p95/p99 latency per check from the history store and exit")
+    parser.add_argument("--window", type=float, default=24,
+                       help="Hours of history for --trend (default: 24)")
+    parser.add_argument("--baseline-hours", type=float, default=168,
+                       help="Hours of history used as the regression baseline (default: 168)")
+    parser.add_argument("--exporter", action="store_true",
+                       help="Run as a daemon and serve Prometheus metrics on /metrics")
+    parser.add_argument("--metrics-host", type=str, default="127.0.0.1",
+                       help="Address for the metrics endpoint (default: 127.0.0.1)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                       help="Port for the metrics endpoint (default: $METRICS_PORT or 9108)")
     
     args = parser.parse_args()
     
+    # NDJSON on stdout must not be mixed with the console report
+    if args.stream == "-":
+        args.silent = True
+    
     # Determine check types
     if args.quick:
         check_types = ["docker", "database", "n8n"]
@@ -689,19 +2113,74 @@ Examples:
     elif args.api_only:
         check_types = ["n8n", "apis"]
     else:
-        check_types = ["docker", "database", "n8n", "apis", "pg_listener", "resources"]
+        check_types = list(DEFAULT_CHECK_TYPES)
+    
+    if args.db_perf:
+        check_types.append("db_perf")
+    
+    # Per-family daemon intervals
+    daemon_intervals = HealthCheckConfig().daemon_intervals
+    for item in args.family_interval:
+        family, _, seconds = item.partition("=")
+        if not seconds.isdigit():
+            parser.error(f"--family-interval expects FAMILY=SECONDS, got '{item}'")
+        daemon_intervals[family] = int(seconds)
     
     # Configure health checker
     config = HealthCheckConfig(
         env_file=args.config,
-        http_timeout=args.timeout
+        http_timeout=args.timeout,
+        parallel=args.parallel,
+        max_workers=args.max_workers,
+        check_deadline=args.check_deadline,
+        http_backend=args.http_backend,
+        http_concurrency=args.http_concurrency,
+        daemon_interval=args.interval,
+        daemon_intervals=daemon_intervals,
+        history_size=args.history_size,
+        metrics_host=args.metrics_host,
+        metrics_port=args.metrics_port or 9108,
+        history_db=args.history_db,
+        baseline_hours=args.baseline_hours,
+        stream_path=args.stream,
+        # --record and --export-json need the whole run; plain streaming keeps only counts
+        stream_keep_results=args.keep_results or args.record or args.export_json
     )
     
+    if args.trend:
+        store = HistoryStore(config.history_db)
+        print_trend(store, args.window)
+        store.close()
+        sys.exit(0)
+    
     checker = HealthChecker(config)
+    if args.record:
+        checker.store = HistoryStore(config.history_db)
     
     try:
+        if args.exporter:
+            if args.metrics_port is None and os.getenv('METRICS_PORT', '').isdigit():
+                config.metrics_port = int(os.getenv('METRICS_PORT'))
+            checker.metrics = MetricsRegistry(config.latency_buckets)
+            exporter = MetricsExporter(checker.metrics, config.metrics_host, config.metrics_port)
+            exporter.start()
+            if not args.silent:
+                print(f"{Fore.CYAN}📈 Serving Prometheus metrics at {exporter.address}{Style.RESET_ALL}")
+            try:
+                checker.run_daemon(check_types, silent=args.silent)
+            finally:
+                exporter.stop()
+            sys.exit(0)
+        
+        if args.daemon:
+            checker.run_daemon(check_types, silent=args.silent)
+            sys.exit(0)
+        
         # Run checks
-        results = checker.run_all_checks(check_types)
+        checker.run_all_checks(check_types, silent=args.silent)
+        
+        if checker.store is not None:
+            checker.record_results()
         
         # Print results unless silent
         if not args.silent:
@@ -712,15 +2191,17 @@ Examples:
             checker.export_results()
         
         # Exit with appropriate code
-        failed_count = len([r for r in results if r.status == "fail"])
+        failed_count = checker.status_counts().get("fail", 0)
         sys.exit(1 if failed_count > 0 else 0)
         
     except KeyboardInterrupt:
-        print(f"\n{Fore.YELLOW}⏹️  Health check interrupted by user{Style.RESET_ALL}")
+        print(f"\n{Fore.YELLOW}⏹️  Health check interrupted by user{Style.RESET_ALL}", file=sys.stderr)
         sys.exit(130)
     except Exception as e:
-        print(f"{Fore.RED}💥 Health check failed with error: {e}{Style.RESET_ALL}")
+        print(f"{Fore.RED}💥 Health check failed with error: {e}{Style.RESET_ALL}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        checker.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
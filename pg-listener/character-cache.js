@@ -0,0 +1,267 @@
+const { SampleRing, elapsedMs } = require('./stats');
+
+// Character state as one row: the character, its user's public fields and its skills
+const STATE_QUERY = `
+  SELECT to_jsonb(c) || jsonb_build_object(
+           'username', u.username,
+           'avatar', u.avatar,
+           'telegram_user_id', u.telegram_user_id,
+           'skills', COALESCE((
+             SELECT jsonb_agg(to_jsonb(s) ORDER BY s.level DESC, s.xp DESC)
+             FROM skills s WHERE s.character_id = c.id
+           ), '[]'::jsonb)
+         ) AS state
+  FROM characters c
+  LEFT JOIN users u ON u.id::text = c.user_id::text
+  WHERE c.id = $1`;
+
+/**
+ * In-process stand-in for Redis, used when REDIS_URL is unset (local runs,
+ * benchmarks). Evicts the least recently used key past `maxKeys`, like the
+ * allkeys-lru policy the Redis service runs with.
+ */
+class MemoryStore {
+  constructor(maxKeys = 10000) {
+    this.name = 'memory';
+    this.maxKeys = maxKeys;
+    this.entries = new Map();  // key -> { value, expiresAt }, oldest first
+  }
+
+  async get(key) {
+    const entry = this.entries.get(key);
+    if (!entry) return null;
+    this.entries.delete(key);
+    if (entry.expiresAt <= Date.now()) return null;
+    this.entries.set(key, entry);
+    return entry.value;
+  }
+
+  async set(key, value, ttlSeconds) {
+    this.entries.delete(key);
+    this.entries.set(key, { value, expiresAt: Date.now() + ttlSeconds * 1000 });
+    if (this.entries.size > this.maxKeys) {
+      this.entries.delete(this.entries.keys().next().value);
+    }
+  }
+
+  async del(keys) {
+    keys.forEach((key) => this.entries.delete(key));
+  }
+
+  connected() {
+    return true;
+  }
+
+  async close() {}
+}
+
+class RedisStore {
+  constructor(url, log = console) {
+    const { createClient } = require('redis');
+    this.name = 'redis';
+    // Fail fast while disconnected so reads fall through to PostgreSQL instead of queueing
+    this.client = createClient({ url, disableOfflineQueue: true });
+    this.client.on('error', (error) => log.error('❌ Redis error:', error.message));
+    this.ready = this.client.connect().catch((error) => log.error('❌ Redis connect failed:', error.message));
+  }
+
+  async get(key) {
+    return this.client.get(key);
+  }
+
+  async set(key, value, ttlSeconds) {
+    await this.client.set(key, value, { EX: ttlSeconds });
+  }
+
+  async del(keys) {
+    if (keys.length) await this.client.del(keys);
+  }
+
+  connected() {
+    return this.client.isReady;
+  }
+
+  async close() {
+    if (this.client.isOpen) await this.client.quit();
+  }
+}
+
+/**
+ * Read-through cache of character state, one key per character.
+ *
+ * - `get(id)` serves the key when present, otherwise loads the state from
+ *   PostgreSQL and stores it for `ttlSeconds`. Concurrent misses for the same
+ *   character share one query.
+ * - `invalidate(channel, payload)` deletes the keys a `unified_event` or
+ *   `system_update` notification makes stale. A load that was in flight when
+ *   its character was invalidated returns its result but does not store it.
+ * - Store errors never fail a read; they fall through to PostgreSQL.
+ */
+class CharacterCache {
+  constructor(options = {}) {
+    this.pool = options.pool;
+    this.store = options.store || new MemoryStore();
+    this.ttlSeconds = options.ttlSeconds || 300;
+    this.keyPrefix = options.keyPrefix || 'sbs:character:';
+    this.log = options.log || console;
+
+    this.pending = new Map();  // character id -> { promise, stale }
+    this.latency = { hit: new SampleRing(), miss: new SampleRing() };
+    this.counters = {
+      hits: 0,
+      misses: 0,
+      not_found: 0,
+      loads_discarded: 0,
+      invalidations: 0,
+      keys_invalidated: 0,
+      store_errors: 0,
+      db_errors: 0
+    };
+    this.lastError = null;
+  }
+
+  key(id) {
+    return `${this.keyPrefix}${id}`;
+  }
+
+  // Returns the character state or null when the character does not exist
+  async get(id) {
+    const started = process.hrtime.bigint();
+    let cached = null;
+    try {
+      cached = await this.store.get(this.key(id));
+    } catch (error) {
+      this._storeError(error);
+    }
+
+    if (cached !== null) {
+      this.counters.hits += 1;
+      this._sample('hit', started);
+      return JSON.parse(cached);
+    }
+
+    this.counters.misses += 1;
+    let entry = this.pending.get(id);
+    if (!entry) {
+      entry = { stale: false };
+      entry.promise = this._load(id, entry).finally(() => {
+        if (this.pending.get(id) === entry) this.pending.delete(id);
+      });
+      this.pending.set(id, entry);
+    }
+    const state = await entry.promise;
+    this._sample('miss', started);
+    return state;
+  }
+
+  async _load(id, entry) {
+    let rows;
+    try {
+      ({ rows } = await this.pool.query(STATE_QUERY, [id]));
+    } catch (error) {
+      this.counters.db_errors += 1;
+      this.lastError = { message: error.message, at: new Date().toISOString() };
+      throw error;
+    }
+    if (!rows.length) {
+      this.counters.not_found += 1;
+      return null;
+    }
+
+    const state = rows[0].state;
+    if (entry.stale) {
+      this.counters.loads_discarded += 1;
+    } else {
+      try {
+        await this.store.set(this.key(id), JSON.stringify(state), this.ttlSeconds);
+      } catch (error) {
+        this._storeError(error);
+      }
+    }
+    return state;
+  }
+
+  async invalidate(channel, payload) {
+    if (!payload || typeof payload !== 'object') return;
+    let ids = [];
+    try {
+      ids = await this._affectedCharacters(payload);
+    } catch (error) {
+      this.counters.db_errors += 1;
+      this.lastError = { message: error.message, at: new Date().toISOString() };
+      return;
+    }
+    if (!ids.length) return;
+
+    this.counters.invalidations += 1;
+    for (const id of ids) {
+      const entry = this.pending.get(id);
+      if (entry) {
+        entry.stale = true;
+        this.pending.delete(id);
+      }
+    }
+    try {
+      await this.store.del(ids.map((id) => this.key(id)));
+      this.counters.keys_invalidated += ids.length;
+    } catch (error) {
+      // The TTL still bounds how long the stale keys can be served
+      this._storeError(error);
+    }
+  }
+
+  // Character ids whose cached state a notification changes
+  async _affectedCharacters(payload) {
+    const id = Number(payload.id);
+    switch (payload.table) {
+      case 'characters':
+        return Number.isInteger(id) ? [id] : [];
+      case 'skills': {
+        if (payload.character_id != null) return [Number(payload.character_id)];
+        // Truncated payloads only carry the key
+        const { rows } = await this.pool.query('SELECT character_id FROM skills WHERE id = $1', [id]);
+        return rows.map((row) => Number(row.character_id));
+      }
+      case 'users': {
+        const { rows } = await this.pool.query(
+          'SELECT id FROM characters WHERE user_id::text = $1::text', [payload.id]);
+        return rows.map((row) => Number(row.id));
+      }
+      default:
+        return [];
+    }
+  }
+
+  stats() {
+    const lookups = this.counters.hits + this.counters.misses;
+    return {
+      ...this.counters,
+      hit_rate: lookups ? Number((this.counters.hits / lookups).toFixed(4)) : null,
+      hit_latency_ms: this.latency.hit.percentiles(),
+      miss_latency_ms: this.latency.miss.percentiles(),
+      pending_loads: this.pending.size,
+      store: this.store.name,
+      store_connected: this.store.connected(),
+      last_error: this.lastError,
+      config: {
+        ttl_seconds: this.ttlSeconds,
+        key_prefix: this.keyPrefix
+      }
+    };
+  }
+
+  async close() {
+    await this.store.close();
+  }
+
+  _storeError(error) {
+    this.counters.store_errors += 1;
+    this.lastError = { message: error.message, at: new Date().toISOString() };
+  }
+
+  _sample(kind, started) {
+    this.latency[kind].push(elapsedMs(started));
+  }
+}
+
+module.exports = { CharacterCache, MemoryStore, RedisStore };
@@ -0,0 +1,248 @@
+const fetch = require('node-fetch');
+const { QueryError } = require('./query-service');
+const { SampleRing } = require('./stats');
+
+const KINDS = ['webhook', 'url', 'query', 'batch', 'log'];
+
+class CallTimeout extends Error {}
+
+// Rejects with CallTimeout after ms; the promise itself keeps running (statement_timeout bounds queries)
+const withTimeout = (promise, ms) => {
+  let timer;
+  const expired = new Promise((resolve, reject) => {
+    timer = setTimeout(() => reject(new CallTimeout(`timeout after ${ms}ms`)), ms);
+  });
+  return Promise.race([promise, expired]).finally(() => clearTimeout(timer));
+};
+
+/**
+ * Runs the independent side effects of an n8n flow concurrently, so a webhook
+ * answers after the slowest of them instead of after all of them in a row.
+ *
+ * A run is a list of named calls, each one of:
+ * - `{ webhook: 'subflow-achievement-check', body }`: POST to an n8n webhook
+ * - `{ url, body }`: POST to an absolute URL whose origin is in `allowedOrigins`
+ * - `{ query: 'project_complete', params }` / `{ batch: [...], transaction }`: the query service
+ * - `{ log: 'events', records }`: queued on the log sink
+ *
+ * Every call has a timeout (`timeout_ms`, else `timeoutMs`) that includes any
+ * wait for one of the `concurrency` slots shared by all runs. A call with
+ * `when: false` is skipped; one with `async: true` is started but not
+ * waited for, and only its outcome in `stats()` tells how it went. A failed
+ * call never fails the others: each gets its own `{ status, duration_ms,
+ * data | error }` in the result.
+ */
+class FanOut {
+  constructor(options = {}) {
+    this.queries = options.queries;
+    this.logSink = options.logSink;
+    this.webhookBase = (options.webhookBase || '').replace(/\/$/, '');
+    this.allowedOrigins = new Set(options.allowedOrigins || []);
+    this.concurrency = options.concurrency || 16;
+    this.timeoutMs = options.timeoutMs || 5000;
+    this.maxTimeoutMs = options.maxTimeoutMs || 30000;
+    this.maxCalls = options.maxCalls || 32;
+    this.log = options.log || console;
+
+    this.active = 0;
+    this.waiting = [];
+    this.counters = { runs: 0, ok: 0, error: 0, timeout: 0, skipped: 0, async: 0, max_in_flight: 0 };
+    this.targets = new Map();
+    this.runLatency = new SampleRing();
+  }
+
+  async run(calls) {
+    this._validate(calls);
+    const started = Date.now();
+    this.counters.runs += 1;
+
+    const settled = await Promise.all(calls.map(async (call) => {
+      if (call.when !== undefined && !call.when) {
+        this.counters.skipped += 1;
+        return [call.name, { status: 'skipped' }];
+      }
+      const execution = this._execute(call, Math.min(Number(call.timeout_ms) || this.timeoutMs, this.maxTimeoutMs));
+      if (call.async) {
+        this.counters.async += 1;
+        execution.then((result) => {
+          if (result.status !== 'ok') this.log.error(`❌ Async fan-out call ${call.name} ${result.status}: ${result.error}`);
+        });
+        return [call.name, { status: 'async' }];
+      }
+      return [call.name, await execution];
+    }));
+    const results = Object.fromEntries(settled);
+
+    const duration = Date.now() - started;
+    this.runLatency.push(duration);
+    const failed = Object.values(results).some((result) => result.status === 'error' || result.status === 'timeout');
+    return { success: !failed, duration_ms: duration, results };
+  }
+
+  stats() {
+    const targets = {};
+    for (const [target, entry] of this.targets) {
+      targets[target] = {
+        calls: entry.calls, errors: entry.errors, timeouts: entry.timeouts, latency_ms: entry.latency.percentiles()
+      };
+    }
+    return {
+      ...this.counters,
+      in_flight: this.active,
+      queued: this.waiting.length,
+      run_latency_ms: this.runLatency.percentiles(),
+      targets,
+      config: {
+        concurrency: this.concurrency,
+        timeout_ms: this.timeoutMs,
+        max_timeout_ms: this.maxTimeoutMs,
+        max_calls: this.maxCalls,
+        webhook_base: this.webhookBase,
+        allowed_origins: [...this.allowedOrigins]
+      }
+    };
+  }
+
+  _validate(calls) {
+    if (!Array.isArray(calls) || !calls.length) {
+      throw new QueryError(400, 'Invalid request', 'calls must be a non-empty array');
+    }
+    if (calls.length > this.maxCalls) {
+      throw new QueryError(400, 'Invalid request', `At most ${this.maxCalls} calls per request`);
+    }
+    const names = new Set();
+    for (const call of calls) {
+      if (!call || typeof call.name !== 'string' || !call.name) {
+        throw new QueryError(400, 'Invalid request', 'Every call needs a name');
+      }
+      if (names.has(call.name)) throw new QueryError(400, 'Invalid request', `Duplicate call name ${call.name}`);
+      names.add(call.name);
+
+      const kinds = KINDS.filter((kind) => call[kind] !== undefined);
+      if (kinds.length !== 1) {
+        throw new QueryError(400, 'Invalid request', `Call ${call.name} needs exactly one of ${KINDS.join(', ')}`);
+      }
+      if (call.webhook !== undefined && !/^[\w-]+(\/[\w-]+)*$/.test(call.webhook)) {
+        throw new QueryError(400, 'Invalid request', `Call ${call.name}: invalid webhook path ${call.webhook}`);
+      }
+      if (call.url !== undefined && !this._allowed(call.url)) {
+        throw new QueryError(403, 'Forbidden', `Call ${call.name}: ${call.url} is not in FANOUT_ALLOWED_ORIGINS`);
+      }
+      if (call.log !== undefined && !this.logSink.tables.includes(call.log)) {
+        throw new QueryError(400, 'Invalid request', `Call ${call.name}: unknown log table ${call.log}`);
+      }
+    }
+  }
+
+  _allowed(url) {
+    try {
+      return this.allowedOrigins.has(new URL(url).origin);
+    } catch (error) {
+      return false;
+    }
+  }
+
+  _target(call) {
+    if (call.webhook !== undefined) return `webhook:${call.webhook}`;
+    if (call.url !== undefined) return `url:${new URL(call.url).host}`;
+    if (call.query !== undefined) return `query:${call.query}`;
+    if (call.log !== undefined) return `log:${call.log}`;
+    return 'batch';
+  }
+
+  async _execute(call, timeoutMs) {
+    const started = Date.now();
+    let result;
+    if (call.log !== undefined) {
+      // Queued in memory, so it needs no slot and cannot time out
+      const records = Array.isArray(call.records) ? call.records : [call.record || call.body || {}];
+      result = { status: 'ok', data: this.logSink.accept(call.log, records) };
+    } else if (!(await this._acquire(timeoutMs))) {
+      result = { status: 'timeout', error: `no free slot within ${timeoutMs}ms` };
+    } else {
+      try {
+        const data = await this._dispatch(call, Math.max(1, started + timeoutMs - Date.now()));
+        result = { status: 'ok', data };
+      } catch (error) {
+        result = error instanceof CallTimeout
+          ? { status: 'timeout', error: `timeout after ${timeoutMs}ms` }
+          : { status: 'error', error: error.message };
+      } finally {
+        this._release();
+      }
+    }
+    result.duration_ms = Date.now() - started;
+    this._record(this._target(call), result);
+    return result;
+  }
+
+  async _dispatch(call, timeoutMs) {
+    if (call.query !== undefined) return withTimeout(this.queries.run(call.query, call.params || []), timeoutMs);
+    if (call.batch !== undefined) {
+      return withTimeout(this.queries.batch(call.batch, { transaction: Boolean(call.transaction) }), timeoutMs);
+    }
+
+    const url = call.url !== undefined ? call.url : `${this.webhookBase}/webhook/${call.webhook}`;
+    const controller = new AbortController();
+    const timeout = setTimeout(() => controller.abort(), timeoutMs);
+    try {
+      const response = await fetch(url, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(call.body || {}),
+        signal: controller.signal
+      });
+      const text = await response.text();
+      if (!response.ok) throw new Error(`HTTP ${response.status}: ${text.slice(0, 200)}`);
+      try {
+        return text ? JSON.parse(text) : null;
+      } catch (error) {
+        return text;
+      }
+    } catch (error) {
+      throw error.name === 'AbortError' ? new CallTimeout(`timeout after ${timeoutMs}ms`) : error;
+    } finally {
+      clearTimeout(timeout);
+    }
+  }
+
+  // Resolves true once a slot is held, or false if none frees up within timeoutMs
+  _acquire(timeoutMs) {
+    if (this.active < this.concurrency) {
+      this.active += 1;
+      this.counters.max_in_flight = Math.max(this.counters.max_in_flight, this.active);
+      return Promise.resolve(true);
+    }
+    return new Promise((resolve) => {
+      const waiter = { resolve };
+      waiter.timer = setTimeout(() => {
+        this.waiting.splice(this.waiting.indexOf(waiter), 1);
+        resolve(false);
+      }, timeoutMs);
+      this.waiting.push(waiter);
+    });
+  }
+
+  // Hands the slot straight to the oldest waiter, if any
+  _release() {
+    const next = this.waiting.shift();
+    if (next) {
+      clearTimeout(next.timer);
+      next.resolve(true);
+    } else {
+      this.active -= 1;
+    }
+  }
+
+  _record(target, result) {
+    if (!this.targets.has(target)) this.targets.set(target, { calls: 0, errors: 0, timeouts: 0, latency: new SampleRing() });
+    const entry = this.targets.get(target);
+    entry.calls += 1;
+    if (result.status === 'error') entry.errors += 1;
+    if (result.status === 'timeout') entry.timeouts += 1;
+    entry.latency.push(result.duration_ms);
+    this.counters[result.status] += 1;
+  }
+}
+
+module.exports = { FanOut };
@@ -0,0 +1,291 @@
+const fs = require('fs');
+const path = require('path');
+const http = require('http');
+const https = require('https');
+const fetch = require('node-fetch');
+
+// Statuses worth retrying: n8n restarting (404 until workflows re-register), overloaded or down
+const RETRYABLE_STATUS = new Set([404, 408, 429, 500, 502, 503, 504]);
+
+/**
+ * Buffers notifications and forwards them to n8n as batched POSTs.
+ *
+ * - A batch is flushed when it reaches `batchSize` events or `flushMs` after
+ *   its first event arrived, whichever comes first.
+ * - At most `maxInFlight` requests are outstanding; the rest wait in the buffer.
+ * - Failed batches are retried with exponential backoff. Batches that exhaust
+ *   `maxAttempts`, or that overflow `maxQueued` events in memory, are spilled
+ *   to NDJSON files in `spoolDir` and replayed after the next successful send.
+ */
+class EventForwarder {
+  constructor(options = {}) {
+    this.url = options.url;
+    this.batchSize = options.batchSize || 50;
+    this.flushMs = options.flushMs || 250;
+    this.maxInFlight = options.maxInFlight || 4;
+    this.maxQueued = options.maxQueued || 10000;
+    this.maxAttempts = options.maxAttempts || 8;
+    this.retryBaseMs = options.retryBaseMs || 1000;
+    this.retryMaxMs = options.retryMaxMs || 30000;
+    this.timeoutMs = options.timeoutMs || 10000;
+    this.spoolDir = options.spoolDir || path.join(__dirname, 'logs', 'spool');
+    this.log = options.log || console;
+
+    const Agent = this.url && this.url.startsWith('https:') ? https.Agent : http.Agent;
+    this.agent = new Agent({ keepAlive: true, maxSockets: this.maxInFlight });
+
+    this.buffer = [];      // events waiting for a batch
+    this.retryQueue = [];  // { events, attempts, notBefore, spoolFile }
+    this.inFlight = 0;
+    this.flushTimer = null;
+    this.retryTimer = null;
+    this.replayTimer = null;
+    this.spoolFiles = new Map();  // spool file -> batches not yet delivered
+    this.replaying = false;
+    this.stopped = false;
+
+    this.counters = {
+      received: 0,
+      forwarded: 0,
+      batches_sent: 0,
+      failed_requests: 0,
+      retried_batches: 0,
+      spilled_events: 0,
+      replayed_events: 0,
+      dropped_events: 0
+    };
+    this.lastSuccessAt = null;
+    this.lastError = null;
+
+    fs.mkdirSync(this.spoolDir, { recursive: true });
+    this.spoolDepth = this._countSpooled();
+    if (this.spoolDepth > 0) {
+      this._scheduleReplay(0);
+    }
+  }
+
+  enqueue(channel, payload) {
+    this.counters.received += 1;
+    this.buffer.push({ channel, payload, received_at: Date.now() });
+
+    if (this.queuedEvents() > this.maxQueued) {
+      // n8n is not keeping up; move the oldest buffered events to disk
+      this._spill(this.buffer.splice(0, this.buffer.length - this.batchSize));
+    }
+
+    if (this.buffer.length >= this.batchSize) {
+      this._pump();
+    } else if (!this.flushTimer) {
+      this.flushTimer = setTimeout(() => {
+        this.flushTimer = null;
+        this._pump(true);
+      }, this.flushMs);
+    }
+  }
+
+  queuedEvents() {
+    return this.buffer.length + this.retryQueue.reduce((sum, batch) => sum + batch.events.length, 0);
+  }
+
+  stats() {
+    const oldest = [
+      ...this.buffer.slice(0, 1),
+      ...this.retryQueue.map((batch) => batch.events[0])
+    ].reduce((min, event) => (event && event.received_at < min ? event.received_at : min), Date.now());
+
+    return {
+      ...this.counters,
+      buffer_depth: this.buffer.length,
+      retry_depth: this.retryQueue.reduce((sum, batch) => sum + batch.events.length, 0),
+      spool_depth: this.spoolDepth,
+      in_flight: this.inFlight,
+      lag_ms: Date.now() - oldest,
+      last_success_at: this.lastSuccessAt,
+      last_error: this.lastError,
+      config: {
+        batch_size: this.batchSize,
+        flush_ms: this.flushMs,
+        max_in_flight: this.maxInFlight,
+        max_queued: this.maxQueued
+      }
+    };
+  }
+
+  // Send ready batches while there is in-flight capacity
+  _pump(flushPartial = false) {
+    if (this.stopped) return;
+
+    while (this.inFlight < this.maxInFlight) {
+      const now = Date.now();
+      const retryIndex = this.retryQueue.findIndex((batch) => batch.notBefore <= now);
+
+      if (retryIndex !== -1) {
+        this._send(this.retryQueue.splice(retryIndex, 1)[0]);
+      } else if (this.buffer.length >= this.batchSize || (flushPartial && this.buffer.length > 0)) {
+        this._send({ events: this.buffer.splice(0, this.batchSize), attempts: 0 });
+      } else {
+        break;
+      }
+    }
+
+    this._scheduleRetry();
+  }
+
+  _scheduleRetry() {
+    if (this.retryTimer || this.retryQueue.length === 0) return;
+    const next = Math.min(...this.retryQueue.map((batch) => batch.notBefore));
+    this.retryTimer = setTimeout(() => {
+      this.retryTimer = null;
+      this._pump(true);
+    }, Math.max(0, next - Date.now()));
+  }
+
+  async _send(batch) {
+    this.inFlight += 1;
+    const controller = new AbortController();
+    const timeout = setTimeout(() => controller.abort(), this.timeoutMs);
+
+    try {
+      const response = await fetch(this.url, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          events: batch.events.map(({ channel, payload }) => ({ channel, payload }))
+        }),
+        agent: this.agent,
+        signal: controller.signal
+      });
+
+      if (response.ok) {
+        this._onSuccess(batch);
+      } else if (RETRYABLE_STATUS.has(response.status)) {
+        this._onFailure(batch, `HTTP ${response.status} ${response.statusText}`);
+      } else {
+        // Retrying a 400/401/413 will not help; count and report it
+        this.counters.failed_requests += 1;
+        this.counters.dropped_events += batch.events.length;
+        this.lastError = `HTTP ${response.status} ${response.statusText} (dropped ${batch.events.length} events)`;
+        this.log.error(`❌ n8n rejected batch: ${this.lastError}`);
+        this._finishSpooled(batch);
+      }
+    } catch (error) {
+      this._onFailure(batch, error.name === 'AbortError' ? `timeout after ${this.timeoutMs}ms` : error.message);
+    } finally {
+      clearTimeout(timeout);
+      this.inFlight -= 1;
+      this._pump(this.buffer.length > 0 && !this.flushTimer);
+    }
+  }
+
+  _onSuccess(batch) {
+    this.counters.forwarded += batch.events.length;
+    this.counters.batches_sent += 1;
+    this.lastSuccessAt = new Date().toISOString();
+    this._finishSpooled(batch);
+    if (this.spoolDepth > 0) {
+      this._replaySpool();
+    }
+  }
+
+  _onFailure(batch, reason) {
+    this.counters.failed_requests += 1;
+    this.lastError = reason;
+    batch.attempts += 1;
+
+    // Replayed batches are already on disk, so they keep retrying at the capped backoff
+    if (!batch.spoolFile && (batch.attempts >= this.maxAttempts || this.queuedEvents() + batch.events.length > this.maxQueued)) {
+      this.log.error(`❌ Forwarding failed ${batch.attempts}x (${reason}); spooling ${batch.events.length} events`);
+      this._spill(batch.events);
+      return;
+    }
+
+    const delay = Math.min(this.retryMaxMs, this.retryBaseMs * 2 ** (batch.attempts - 1));
+    batch.notBefore = Date.now() + delay;
+    this.counters.retried_batches += 1;
+    this.retryQueue.push(batch);
+    this.log.warn(`⚠️  Forwarding failed (${reason}); retry ${batch.attempts}/${this.maxAttempts} in ${delay}ms`);
+  }
+
+  _spill(events) {
+    if (events.length === 0) return;
+    const file = path.join(this.spoolDir, `spool-${Date.now()}-${process.pid}-${Math.random().toString(36).slice(2, 8)}.ndjson`);
+    fs.writeFileSync(file, events.map((event) => JSON.stringify(event)).join('\n') + '\n');
+    this.counters.spilled_events += events.length;
+    this.spoolDepth += events.length;
+    this._scheduleReplay(this.retryMaxMs);
+  }
+
+  // Without new traffic there is no success to trigger a replay, so probe on a timer
+  _scheduleReplay(delay) {
+    if (this.replayTimer || this.stopped) return;
+    this.replayTimer = setTimeout(() => {
+      this.replayTimer = null;
+      this._replaySpool();
+      this._pump();
+    }, delay);
+  }
+
+  _countSpooled() {
+    return this._spoolFileNames().reduce((sum, name) => sum + this._readSpool(path.join(this.spoolDir, name)).length, 0);
+  }
+
+  _spoolFileNames() {
+    return fs.readdirSync(this.spoolDir).filter((name) => name.endsWith('.ndjson')).sort();
+  }
+
+  _readSpool(file) {
+    return fs.readFileSync(file, 'utf8').split('\n').filter(Boolean).map((line) => JSON.parse(line));
+  }
+
+  // Re-queue one spool file at a time; the file is deleted once all its batches are delivered
+  _replaySpool() {
+    if (this.replaying) return;
+    const name = this._spoolFileNames().find((candidate) => !this.spoolFiles.has(path.join(this.spoolDir, candidate)));
+    if (!name) return;
+
+    const file = path.join(this.spoolDir, name);
+    const events = this._readSpool(file);
+    const batches = [];
+    for (let i = 0; i < events.length; i += this.batchSize) {
+      batches.push({ events: events.slice(i, i + this.batchSize), attempts: 0, notBefore: 0, spoolFile: file });
+    }
+
+    this.replaying = true;
+    this.spoolFiles.set(file, batches.length);
+    this.retryQueue.push(...batches);
+    this.log.log(`♻️  Replaying ${events.length} spooled events from ${name}`);
+  }
+
+  _finishSpooled(batch) {
+    if (!batch.spoolFile || !this.spoolFiles.has(batch.spoolFile)) return;
+    this.counters.replayed_events += batch.events.length;
+    this.spoolDepth = Math.max(0, this.spoolDepth - batch.events.length);
+
+    const remaining = this.spoolFiles.get(batch.spoolFile) - 1;
+    if (remaining > 0) {
+      this.spoolFiles.set(batch.spoolFile, remaining);
+      return;
+    }
+    this.spoolFiles.delete(batch.spoolFile);
+    fs.unlinkSync(batch.spoolFile);
+    this.replaying = false;
+    if (this.spoolDepth > 0) {
+      this._replaySpool();
+    }
+  }
+
+  // Persist everything still in memory so a restart does not lose it. A spool
+  // file that was only partly replayed is sent again in full (at-least-once).
+  stop() {
+    this.stopped = true;
+    clearTimeout(this.flushTimer);
+    clearTimeout(this.retryTimer);
+    clearTimeout(this.replayTimer);
+    this._spill(this.buffer.splice(0));
+    this._spill(this.retryQueue.filter((batch) => !batch.spoolFile).flatMap((batch) => batch.events));
+    this.retryQueue = [];
+    this.agent.destroy();
+  }
+}
+
+module.exports = { EventForwarder };
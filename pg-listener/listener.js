@@ -1,45 +1,308 @@
-const { Client } = require('pg');
-const fetch = require('node-fetch');
+const crypto = require('crypto');
+const http = require('http');
+const { Client, Pool } = require('pg');
+const { EventForwarder } = require('./forwarder');
+const { CharacterCache, MemoryStore, RedisStore } = require('./character-cache');
+const { QueryService, QueryError } = require('./query-service');
+const statements = require('./statements');
+const { LogSink } = require('./log-sink');
+const { MissionWorker } = require('./mission-worker');
+const { FanOut } = require('./fan-out');
 
-const client = new Client({
+const env = (name, fallback) => Number(process.env[name] || fallback);
+
+const dbConfig = {
   host: process.env.DB_HOST,
   port: process.env.DB_PORT,
   user: process.env.DB_USER,
   password: process.env.DB_PASSWORD,
   database: process.env.DB_NAME
+};
+const client = new Client(dbConfig);
+// Cache misses query through their own pool; the LISTEN connection stays dedicated to notifications
+const readPool = new Pool({ ...dbConfig, max: env('CACHE_DB_POOL_SIZE', 5) });
+// Named statements for n8n flows get a pool of their own so a burst cannot starve cache misses
+const queryPool = new Pool({
+  ...dbConfig,
+  max: env('QUERY_DB_POOL_SIZE', 10),
+  statement_timeout: env('QUERY_STATEMENT_TIMEOUT_MS', 10000)
+});
+// Log batches are written in the background on a small pool of their own
+const logPool = new Pool({ ...dbConfig, max: env('LOG_DB_POOL_SIZE', 2) });
+
+let connected = false;
+
+// Notifications from these tables only invalidate the character cache; n8n has no use for them
+const cacheOnlyTables = new Set((process.env.FORWARD_IGNORE_TABLES ?? 'characters,skills,users')
+  .split(',').map((table) => table.trim()).filter(Boolean));
+
+const forwarder = new EventForwarder({
+  url: `${process.env.N8N_WEBHOOK_BASE_URL}/webhook/pg-notify`,
+  batchSize: env('FORWARD_BATCH_SIZE', 50),
+  flushMs: env('FORWARD_FLUSH_MS', 250),
+  maxInFlight: env('FORWARD_MAX_IN_FLIGHT', 4),
+  maxQueued: env('FORWARD_MAX_QUEUED', 10000),
+  maxAttempts: env('FORWARD_MAX_ATTEMPTS', 8),
+  retryBaseMs: env('FORWARD_RETRY_BASE_MS', 1000),
+  retryMaxMs: env('FORWARD_RETRY_MAX_MS', 30000),
+  timeoutMs: env('FORWARD_TIMEOUT_MS', 10000),
+  spoolDir: process.env.SPOOL_DIR || '/app/logs/spool'
+});
+
+const cache = new CharacterCache({
+  pool: readPool,
+  store: process.env.REDIS_URL ? new RedisStore(process.env.REDIS_URL) : new MemoryStore(env('CACHE_MAX_KEYS', 10000)),
+  ttlSeconds: env('CACHE_TTL_SECONDS', 300)
+});
+
+const queries = new QueryService({
+  pool: queryPool,
+  statements,
+  maxBatch: env('QUERY_MAX_BATCH', 100)
+});
+
+const logSink = new LogSink({
+  pool: logPool,
+  batchSize: env('LOG_BATCH_SIZE', 200),
+  flushMs: env('LOG_FLUSH_MS', 1000),
+  maxQueued: env('LOG_MAX_QUEUED', 50000),
+  retryMs: env('LOG_RETRY_MS', 5000)
+});
+
+const missions = new MissionWorker({
+  queries,
+  logSink,
+  llmUrl: process.env.MISSION_LLM_URL || 'https://api.openai.com/v1',
+  apiKey: process.env.OPENAI_API_KEY,
+  model: process.env.MISSION_MODEL || 'gpt-4',
+  concurrency: env('MISSION_CONCURRENCY', 4),
+  pageSize: env('MISSION_PAGE_SIZE', 500),
+  maxAttempts: env('MISSION_MAX_ATTEMPTS', 4),
+  timeoutMs: env('MISSION_LLM_TIMEOUT_MS', 60000)
+});
+
+const fanOut = new FanOut({
+  queries,
+  logSink,
+  webhookBase: process.env.FANOUT_WEBHOOK_BASE_URL || process.env.N8N_WEBHOOK_BASE_URL,
+  allowedOrigins: (process.env.FANOUT_ALLOWED_ORIGINS ?? 'https://api.telegram.org').split(',').map((o) => o.trim()).filter(Boolean),
+  concurrency: env('FANOUT_CONCURRENCY', 16),
+  timeoutMs: env('FANOUT_TIMEOUT_MS', 5000),
+  maxTimeoutMs: env('FANOUT_MAX_TIMEOUT_MS', 30000),
+  maxCalls: env('FANOUT_MAX_CALLS', 32)
+});
+
+const sendJson = (res, status, body) => {
+  res.writeHead(status, { 'Content-Type': 'application/json' });
+  res.end(JSON.stringify(body));
+};
+
+const MAX_BODY_BYTES = 1024 * 1024;
+
+// Every non-GET route writes to PostgreSQL or calls out, so it needs the shared secret in X-Listener-Token;
+// without PG_LISTENER_TOKEN they stay closed rather than open
+const listenerToken = Buffer.from(process.env.PG_LISTENER_TOKEN || '');
+
+const authorize = (req, res) => {
+  if (!listenerToken.length) {
+    sendJson(res, 503, { success: false, error: 'Not configured', message: 'PG_LISTENER_TOKEN is not set' });
+    return false;
+  }
+  const token = Buffer.from(req.headers['x-listener-token'] || '');
+  if (token.length !== listenerToken.length || !crypto.timingSafeEqual(token, listenerToken)) {
+    sendJson(res, 401, { success: false, error: 'Unauthorized', message: 'Missing or invalid X-Listener-Token' });
+    return false;
+  }
+  return true;
+};
+
+const readJson = (req) => new Promise((resolve, reject) => {
+  const chunks = [];
+  let size = 0;
+  req.on('data', (chunk) => {
+    size += chunk.length;
+    if (size > MAX_BODY_BYTES) {
+      reject(new QueryError(413, 'Invalid request', 'Request body too large'));
+      req.destroy();
+    } else {
+      chunks.push(chunk);
+    }
+  });
+  req.on('end', () => {
+    try {
+      resolve(chunks.length ? JSON.parse(Buffer.concat(chunks).toString()) : {});
+    } catch (error) {
+      reject(new QueryError(400, 'Invalid request', `Body is not valid JSON: ${error.message}`));
+    }
+  });
+  req.on('error', reject);
+});
+
+// POST /query/:name runs one named statement, POST /query/batch several on one connection
+async function handleQuery(req, res, name) {
+  try {
+    const body = await readJson(req);
+    const result = name === 'batch'
+      ? await queries.batch(body.statements, { transaction: Boolean(body.transaction) })
+      : await queries.run(name, body.params || []);
+    sendJson(res, 200, result);
+  } catch (error) {
+    if (error instanceof QueryError) {
+      sendJson(res, error.status, { success: false, error: error.error, message: error.message });
+    } else {
+      sendJson(res, 500, { success: false, error: 'Database query failed', message: error.message });
+    }
+  }
+}
+
+// POST /log/:table queues one record, or { records: [...] }, and answers 202 before anything is written
+async function handleLog(req, res, table) {
+  if (!logSink.tables.includes(table)) {
+    sendJson(res, 404, { success: false, error: 'Unknown log table', message: `Log tables: ${logSink.tables.join(', ')}` });
+    return;
+  }
+  try {
+    const body = await readJson(req);
+    const records = Array.isArray(body.records) ? body.records : [body];
+    sendJson(res, 202, { success: true, ...logSink.accept(table, records) });
+  } catch (error) {
+    sendJson(res, error.status || 400, { success: false, error: error.error || 'Invalid request', message: error.message });
+  }
+}
+
+// POST /missions/run starts a mission run ({ dry_run, limit, concurrency } optional) and answers 202 at once
+async function handleMissionRun(req, res) {
+  try {
+    const body = await readJson(req);
+    const run = missions.start(body);
+    if (run) {
+      sendJson(res, 202, { success: true, run });
+    } else {
+      sendJson(res, 409, { success: false, error: 'Run in progress', run: missions.stats().current });
+    }
+  } catch (error) {
+    sendJson(res, error.status || 400, { success: false, error: error.error || 'Invalid request', message: error.message });
+  }
+}
+
+// POST /fanout runs a flow's independent side effects ({ calls: [...] }) concurrently and answers with each result
+async function handleFanOut(req, res) {
+  try {
+    const body = await readJson(req);
+    sendJson(res, 200, await fanOut.run(body.calls));
+  } catch (error) {
+    sendJson(res, error.status || 400, { success: false, error: error.error || 'Invalid request', message: error.message });
+  }
+}
+
+// Queue depth and lag for the health checker (GET /stats), container probes (GET /healthz),
+// cached character state for n8n flows (GET /character/:id) and its hit rate (GET /cache/stats),
+// named statements (POST /query/:name, POST /query/batch) with their list and latency (GET /query, /query/stats),
+// batched log writes (POST /log/:table) with their queue depth and flush lag (GET /log/stats),
+// the daily mission run (POST /missions/run) and its progress (GET /missions/stats),
+// concurrent side effects for n8n flows (POST /fanout) with their latency and timeouts (GET /fanout/stats).
+// POST routes need X-Listener-Token.
+const statsServer = http.createServer(async (req, res) => {
+  if (req.method !== 'GET' && !authorize(req, res)) return;
+  const characterMatch = req.method === 'GET' && req.url.match(/^\/character\/(\d+)$/);
+  const queryMatch = req.method === 'POST' && req.url.match(/^\/query\/(\w+)$/);
+  const logMatch = req.method === 'POST' && req.url.match(/^\/log\/(\w+)$/);
+  if (req.url === '/stats' || req.url === '/healthz') {
+    sendJson(res, 200, req.url === '/stats' ? forwarder.stats() : { status: 'ok', connected });
+  } else if (req.url === '/cache/stats') {
+    sendJson(res, 200, cache.stats());
+  } else if (req.method === 'GET' && req.url === '/query') {
+    sendJson(res, 200, queries.list());
+  } else if (req.method === 'GET' && req.url === '/query/stats') {
+    sendJson(res, 200, queries.stats());
+  } else if (queryMatch) {
+    await handleQuery(req, res, queryMatch[1]);
+  } else if (req.method === 'GET' && req.url === '/log/stats') {
+    sendJson(res, 200, logSink.stats());
+  } else if (logMatch) {
+    await handleLog(req, res, logMatch[1]);
+  } else if (req.method === 'POST' && req.url === '/missions/run') {
+    await handleMissionRun(req, res);
+  } else if (req.method === 'GET' && req.url === '/missions/stats') {
+    sendJson(res, 200, missions.stats());
+  } else if (req.method === 'POST' && req.url === '/fanout') {
+    await handleFanOut(req, res);
+  } else if (req.method === 'GET' && req.url === '/fanout/stats') {
+    sendJson(res, 200, fanOut.stats());
+  } else if (characterMatch) {
+    try {
+      const state = await cache.get(Number(characterMatch[1]));
+      if (state) {
+        sendJson(res, 200, state);
+      } else {
+        sendJson(res, 404, { error: 'Character not found' });
+      }
+    } catch (error) {
+      sendJson(res, 503, { error: error.message });
+    }
+  } else {
+    res.writeHead(404);
+    res.end();
+  }
 });
 
 async function main() {
   await client.connect();
+  connected = true;
   console.log('✅ Connected to PostgreSQL');
 
-  client.on('notification', async (msg) => {
+  client.on('notification', (msg) => {
     const channel = msg.channel;
-    const payload = JSON.parse(msg.payload);
-    
-    console.log(`📢 Notification received: ${channel}`);
-    
+    let payload;
     try {
-      const response = await fetch(`${process.env.N8N_WEBHOOK_BASE_URL}/webhook/pg-notify`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ channel, payload })
-      });
-      
-      if (response.ok) {
-        console.log(`✅ Forwarded to n8n: ${channel}`);
-      } else {
-        console.error(`❌ Failed to forward: ${response.statusText}`);
-      }
+      payload = JSON.parse(msg.payload);
     } catch (error) {
-      console.error(`❌ Error forwarding notification:`, error);
+      payload = msg.payload;
+    }
+
+    if (process.env.LOG_LEVEL === 'debug') {
+      console.log(`📢 Notification received: ${channel}`);
+    }
+    cache.invalidate(channel, payload);
+    if (!(payload && cacheOnlyTables.has(payload.table))) {
+      forwarder.enqueue(channel, payload);
     }
   });
 
   await client.query('LISTEN system_update');
   await client.query('LISTEN unified_event');
-  
+
   console.log('👂 Listening to: system_update, unified_event');
+
+  const { verified, failed } = await queries.verify();
+  console.log(`🗂️  Query service: ${verified} statements prepared`);
+  failed.forEach(({ name, error }) => console.error(`❌ Statement ${name} disabled: ${error}`));
+
+  const statsPort = env('STATS_PORT', 8787);
+  statsServer.listen(statsPort, () => console.log(`📊 Stats on :${statsPort}/stats`));
+}
+
+function shutdown(signal) {
+  console.log(`🛑 ${signal} received, spooling pending events and flushing logs`);
+  forwarder.stop();
+  missions.stop();
+  statsServer.close();
+  Promise.allSettled([
+    client.end(), readPool.end(), queryPool.end(), cache.close(),
+    logSink.close().finally(() => logPool.end())
+  ]).finally(() => process.exit(0));
 }
 
-main().catch(console.error);
\ No newline at end of file
+process.on('SIGTERM', () => shutdown('SIGTERM'));
+process.on('SIGINT', () => shutdown('SIGINT'));
+
+client.on('error', (error) => {
+  connected = false;
+  console.error('❌ PostgreSQL connection error:', error.message);
+});
+
+readPool.on('error', (error) => console.error('❌ PostgreSQL pool error:', error.message));
+queryPool.on('error', (error) => console.error('❌ PostgreSQL query pool error:', error.message));
+logPool.on('error', (error) => console.error('❌ PostgreSQL log pool error:', error.message));
+
+main().catch(console.error);
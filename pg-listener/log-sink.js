@@ -0,0 +1,258 @@
+const { randomUUID } = require('crypto');
+const { SampleRing } = require('./stats');
+
+const LOG_LEVELS = new Set(['debug', 'info', 'warning', 'error', 'critical']);
+// Invalid input (class 22) and constraint violations (class 23): retrying the same row cannot succeed
+const DATA_ERROR = /^2[23]/;
+
+const ACTOR_COLUMNS = { system: 'system_id', character: 'character_id', user: 'user_id' };
+
+// JSONB parameter; older flows send details already JSON.stringify'd, which is stored as the object it encodes
+const json = (value) => {
+  if (value === undefined || value === null) return null;
+  if (typeof value === 'string') {
+    try {
+      JSON.parse(value);
+      return value;
+    } catch (error) {
+      return JSON.stringify(value);
+    }
+  }
+  return JSON.stringify(value);
+};
+
+// How a posted record becomes a row of each table. Rows are stamped when they
+// are accepted, so flush lag never shifts the time a log was written for.
+const TABLES = {
+  // subflow-log-event
+  events: {
+    columns: ['character_id', 'event_type', 'xp_change', 'hp_change', 'coins_change', 'description', 'event_date'],
+    invalid: (r) => (!r.character_id || !r.event_type ? 'character_id and event_type are required' : null),
+    row: (r, at) => [r.character_id, r.event_type, r.xp_change || 0, r.hp_change || 0, r.coins_change || 0,
+      r.description || '', at]
+  },
+  // subflow-log-system-event with { system_id, event, details } bodies
+  system_logs: {
+    columns: ['id', 'system_id', 'character_id', 'user_id', 'event_type', 'log_level', 'event_category',
+      'event_details', 'tags', 'source', 'correlation_id', 'session_id', 'created_at'],
+    invalid: (r) => (!r.event_type && !r.event ? 'event_type (or event) is required' : null),
+    row: (r, at) => [`log_${randomUUID()}`, r.system_id || null, r.character_id || null, r.user_id || null,
+      r.event_type || r.event, LOG_LEVELS.has(r.log_level) ? r.log_level : 'info', r.event_category || r.category || null,
+      json(r.event_details || r.details), json(r.tags), r.source || 'n8n', r.correlation_id || null,
+      r.session_id || null, at]
+  },
+  // subflow-log-system-event with { actor_type, actor_id, target_type, target_id, action, detail } bodies.
+  // Actors and targets that are users, characters or systems fill those columns; any other target is kept in detail.
+  unified_logs: {
+    columns: ['timestamp', 'source', 'system_id', 'character_id', 'user_id', 'action', 'detail', 'outcome', 'severity'],
+    invalid: (r) => (!r.action ? 'action is required' : null),
+    row: (r, at) => {
+      const ids = { system_id: r.system_id, character_id: r.character_id, user_id: r.user_id };
+      const setId = (type, id) => {
+        if (ACTOR_COLUMNS[type]) ids[ACTOR_COLUMNS[type]] = ids[ACTOR_COLUMNS[type]] || id;
+      };
+      setId(r.target_type, r.target_id);
+      setId(r.actor_type, r.actor_id);
+      const detail = r.target_type && !ACTOR_COLUMNS[r.target_type]
+        ? { ...r.detail, target_type: r.target_type, target_id: r.target_id }
+        : r.detail;
+      return [at, r.source || 'n8n', ids.system_id || null, ids.character_id || null, ids.user_id || null,
+        r.action, json(detail), r.outcome || null, r.severity || 'info'];
+    }
+  }
+};
+
+/**
+ * Fire-and-forget sink for log rows that n8n flows used to insert through a
+ * blocking subflow call, one row and one transaction at a time.
+ *
+ * - `accept(table, records)` validates and queues rows and returns at once.
+ *   A record that is missing required fields is rejected; once `maxQueued`
+ *   rows are waiting, new rows are dropped. Both are counted, never thrown.
+ * - Each table's queue is written as one multi-row INSERT when it reaches
+ *   `batchSize` rows or `flushMs` after its first row, whichever comes first.
+ * - A batch that fails on bad data is retried row by row so one bad row only
+ *   costs itself; a batch that fails because PostgreSQL is unavailable goes
+ *   back to the front of its queue and is retried after `retryMs`.
+ *
+ * Logs are at-most-once: rows still queued when `close()` runs out of time,
+ * or when the process dies, are lost.
+ */
+class LogSink {
+  constructor(options = {}) {
+    this.pool = options.pool;
+    this.batchSize = options.batchSize || 200;
+    this.flushMs = options.flushMs || 1000;
+    this.maxQueued = options.maxQueued || 50000;
+    this.retryMs = options.retryMs || 5000;
+    this.log = options.log || console;
+
+    this.queues = {};
+    for (const table of Object.keys(TABLES)) {
+      this.queues[table] = { rows: [], timer: null, flushing: false };
+    }
+    this.counters = { received: 0, written: 0, rejected: 0, dropped: 0, flushes: 0, failed_flushes: 0 };
+    this.flushLag = new SampleRing();
+    this.lastFlushAt = null;
+    this.lastError = null;
+    this.closed = false;
+  }
+
+  get tables() {
+    return Object.keys(TABLES);
+  }
+
+  accept(table, records) {
+    const spec = TABLES[table];
+    const queue = this.queues[table];
+    const result = { accepted: 0, rejected: 0, dropped: 0 };
+    const receivedAt = Date.now();
+    const at = new Date(receivedAt).toISOString();
+
+    for (const record of records) {
+      this.counters.received += 1;
+      const reason = record && typeof record === 'object' ? spec.invalid(record) : 'record must be an object';
+      if (reason) {
+        result.rejected += 1;
+        this.counters.rejected += 1;
+        this.lastError = { table, message: `Rejected record: ${reason}`, at };
+      } else if (this.closed || this.queuedRows() >= this.maxQueued) {
+        result.dropped += 1;
+        this.counters.dropped += 1;
+      } else {
+        queue.rows.push({ values: spec.row(record, at), received_at: receivedAt });
+        result.accepted += 1;
+      }
+    }
+
+    if (queue.rows.length >= this.batchSize) {
+      this._flush(table);
+    } else {
+      this._schedule(table);
+    }
+    return result;
+  }
+
+  queuedRows() {
+    return Object.values(this.queues).reduce((sum, queue) => sum + queue.rows.length, 0);
+  }
+
+  stats() {
+    const queued = {};
+    let oldest = Date.now();
+    for (const [table, queue] of Object.entries(this.queues)) {
+      queued[table] = queue.rows.length;
+      if (queue.rows.length && queue.rows[0].received_at < oldest) oldest = queue.rows[0].received_at;
+    }
+    return {
+      ...this.counters,
+      queue_depth: this.queuedRows(),
+      queued,
+      lag_ms: Date.now() - oldest,
+      flush_lag_ms: this.flushLag.percentiles(),
+      last_flush_at: this.lastFlushAt,
+      last_error: this.lastError,
+      config: {
+        batch_size: this.batchSize,
+        flush_ms: this.flushMs,
+        max_queued: this.maxQueued
+      }
+    };
+  }
+
+  // Write what is queued, for up to timeoutMs; anything left after that is dropped
+  async close(timeoutMs = 5000) {
+    this.closed = true;
+    const deadline = Date.now() + timeoutMs;
+    for (const queue of Object.values(this.queues)) clearTimeout(queue.timer);
+
+    while (this.queuedRows() > 0 && Date.now() < deadline) {
+      const before = this.queuedRows();
+      await Promise.all(this.tables.map((table) => this._flush(table)));
+      if (this.queuedRows() >= before) await new Promise((resolve) => setTimeout(resolve, 100));
+    }
+    const lost = this.queuedRows();
+    if (lost) {
+      this.counters.dropped += lost;
+      this.log.error(`❌ Log sink closed with ${lost} rows unwritten`);
+    }
+  }
+
+  _schedule(table, delay = null) {
+    const queue = this.queues[table];
+    if (this.closed || queue.timer || queue.flushing || !queue.rows.length) return;
+    const wait = delay !== null ? delay : (queue.rows.length >= this.batchSize ? 0 : this.flushMs);
+    queue.timer = setTimeout(() => {
+      queue.timer = null;
+      this._flush(table);
+    }, wait);
+  }
+
+  async _flush(table) {
+    const queue = this.queues[table];
+    if (queue.flushing || !queue.rows.length) return;
+    clearTimeout(queue.timer);
+    queue.timer = null;
+    queue.flushing = true;
+
+    const batch = queue.rows.splice(0, this.batchSize);
+    let retry = null;
+    try {
+      await this._insert(table, batch);
+      this.counters.flushes += 1;
+      this._onWritten(batch);
+    } catch (error) {
+      this.counters.failed_flushes += 1;
+      this.lastError = { table, message: error.message, at: new Date().toISOString() };
+      if (DATA_ERROR.test(error.code || '')) {
+        retry = await this._insertEach(table, batch);
+      } else {
+        retry = batch;
+      }
+      if (retry.length) {
+        this.log.error(`❌ Log flush to ${table} failed (${error.message}); retrying ${retry.length} rows in ${this.retryMs}ms`);
+        queue.rows.unshift(...retry);
+      }
+    } finally {
+      queue.flushing = false;
+    }
+    this._schedule(table, retry && retry.length ? this.retryMs : null);
+  }
+
+  async _insert(table, batch) {
+    const { columns } = TABLES[table];
+    const values = [];
+    const rows = batch.map((row) => {
+      const placeholders = row.values.map((value) => {
+        values.push(value);
+        return `$${values.length}`;
+      });
+      return `(${placeholders.join(', ')})`;
+    });
+    await this.pool.query(`INSERT INTO ${table} (${columns.join(', ')}) VALUES ${rows.join(', ')}`, values);
+  }
+
+  // Isolate the rows that poisoned a batch; returns the rows to retry if PostgreSQL went away meanwhile
+  async _insertEach(table, batch) {
+    for (let index = 0; index < batch.length; index += 1) {
+      try {
+        await this._insert(table, [batch[index]]);
+        this._onWritten([batch[index]]);
+      } catch (error) {
+        if (!DATA_ERROR.test(error.code || '')) return batch.slice(index);
+        this.counters.rejected += 1;
+        this.lastError = { table, message: `Rejected row: ${error.message}`, at: new Date().toISOString() };
+      }
+    }
+    return [];
+  }
+
+  _onWritten(batch) {
+    const now = Date.now();
+    this.counters.written += batch.length;
+    this.lastFlushAt = new Date(now).toISOString();
+    this.flushLag.push(now - batch[0].received_at);
+  }
+}
+
+module.exports = { LogSink };
@@ -0,0 +1,374 @@
+const crypto = require('crypto');
+const fetch = require('node-fetch');
+const { SampleRing, elapsedMs } = require('./stats');
+
+const MISSION_TYPES = ['sbs_system_advancement', 'sbs_routine_creation', 'sbs_system_optimization'];
+
+const SYSTEM_MESSAGE = 'You are a coach for the System for Building Systems (SBS). You write short, concrete missions '
+  + 'that move a player\'s systems through their stages (define → design → build → automate → review).';
+
+const INSTRUCTIONS = 'Generate 3 SBS-focused missions for this player that help them advance their systems, create '
+  + 'routines, or progress through system stages. Suggest system modifications, routine optimization or stage '
+  + 'advancement rather than generic tasks. Return ONLY a JSON array: [{"type": "sbs_system_advancement"|'
+  + '"sbs_routine_creation"|"sbs_system_optimization", "title": "Mission title", "description": "SBS-specific action", '
+  + '"target_system_id": system_id_or_null, "suggested_routine": "routine_description", "system_category": "category", '
+  + '"stage_focus": "define|design|build|automate|review", "xp": 30, "coins": 15}]';
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+const clamp = (value, min, max, fallback) => Math.min(Math.max(Number(value) || fallback, min), max);
+const text = (value, max) => (value === undefined || value === null || value === '' ? null : String(value).slice(0, max));
+
+// The player context sent to the model. It leaves out anything that identifies the
+// player (username, ids other than system ids), so players in the same situation
+// share a prompt and a cached answer.
+function buildPrompt(context) {
+  const player = {
+    level: context.level,
+    class: context.class,
+    goals: context.goals || 'Not specified',
+    top_skills: context.skills.map((s) => `${s.name} (Lv${s.level})`),
+    habit_streaks: context.habits.map((h) => `${h.name} (${h.streak || 0} days)`),
+    sbs_systems: context.systems.map((s) => ({
+      id: s.id, name: s.name, category: s.category, stage: s.current_stage, next_step: s.next_step || 'complete'
+    })),
+    active_routines: context.routines.map((r) => `${r.name} (system: ${r.system_name}, stage: ${r.current_stage})`),
+    active_projects: context.projects.map((p) => `${p.title} (${p.completed_tasks}/${p.total_tasks} tasks)`),
+    recent_activity: context.activity.map((a) => `${a.event_type} x${a.count}`)
+  };
+  return `${INSTRUCTIONS}\n\nPlayer:\n${JSON.stringify(player)}`;
+}
+
+// Missions used when the model fails or answers with something unparseable (same as ai_missions.json had)
+function fallbackMissions(context) {
+  const system = context.systems[0];
+  return [
+    {
+      type: 'sbs_system_advancement',
+      title: system ? `Advance ${system.name} System` : 'Create New SBS System',
+      description: system
+        ? `Move your ${system.name} system from ${system.current_stage} to the next stage`
+        : 'Design and create a new automated system for an area of your life',
+      target_system_id: system ? system.id : null,
+      system_category: system ? system.category : 'mindset',
+      stage_focus: system ? (system.current_stage === 'define' ? 'design' : 'build') : 'define',
+      xp: 40,
+      coins: 20
+    },
+    {
+      type: 'sbs_routine_creation',
+      title: 'Optimize SBS Routine',
+      description: 'Review and improve one of your system routines for better automation',
+      system_category: 'health',
+      suggested_routine: 'Daily system review and optimization check',
+      xp: 30,
+      coins: 15
+    },
+    {
+      type: 'sbs_system_optimization',
+      title: 'SBS Infrastructure Review',
+      description: 'Analyze your current systems for integration opportunities and efficiency gains',
+      system_category: 'purpose',
+      stage_focus: 'review',
+      xp: 35,
+      coins: 18
+    }
+  ];
+}
+
+// The JSON array in a model answer: bare, in a ```json block, or embedded in prose
+function parseAnswer(answer) {
+  if (typeof answer !== 'string') return null;
+  const candidates = [answer, (answer.match(/```json\s*([\s\S]*?)```/) || [])[1], (answer.match(/\[\s*\{[\s\S]*\}\s*\]/) || [])[0]];
+  for (const candidate of candidates.filter(Boolean)) {
+    try {
+      const parsed = JSON.parse(candidate);
+      const missions = Array.isArray(parsed) ? parsed : [parsed];
+      if (missions.length && missions.every((m) => m && typeof m === 'object')) return missions;
+    } catch (error) {
+      // try the next form
+    }
+  }
+  return null;
+}
+
+// Rows for missions_insert_bulk, clamped to the column sizes and reward ranges. A
+// target_system_id the player does not own is dropped rather than failing the insert.
+function toRows(context, missions) {
+  const systemIds = new Set(context.systems.map((s) => s.id));
+  return missions.slice(0, 3).map((mission, index) => {
+    const target = Number(mission.target_system_id || mission.targetSystemId);
+    return {
+      character_id: context.character_id,
+      type: text(MISSION_TYPES.includes(mission.type) ? mission.type : 'sbs_system_advancement', 30),
+      title: text(mission.title || `SBS Mission ${index + 1}`, 120),
+      description: text(mission.description || 'Work on your System for Building Systems', 2000),
+      target_system_id: systemIds.has(target) ? target : null,
+      suggested_routine: text(mission.suggested_routine || mission.suggestedRoutine, 500),
+      system_category: text(mission.system_category || mission.systemCategory || 'general', 50),
+      stage_focus: text(mission.stage_focus || mission.stageFocus || 'design', 30),
+      xp: Math.round(clamp(mission.xp, 20, 60, 30)),
+      coins: Math.round(clamp(mission.coins, 10, 30, 15))
+    };
+  });
+}
+
+// Retry-After is seconds or an HTTP date; x-ratelimit-reset-* look like "1s", "6m0s" or "250ms"
+function delayFromHeaders(headers, name) {
+  const value = headers.get(name);
+  if (!value) return null;
+  if (/^\d+(\.\d+)?$/.test(value)) return Number(value) * 1000;
+  let ms = 0;
+  let matched = false;
+  for (const [, amount, unit] of value.matchAll(/(\d+(?:\.\d+)?)(ms|h|m|s)/g)) {
+    matched = true;
+    ms += Number(amount) * { ms: 1, s: 1000, m: 60000, h: 3600000 }[unit];
+  }
+  if (matched) return ms;
+  const date = Date.parse(value);
+  return Number.isNaN(date) ? null : Math.max(0, date - Date.now());
+}
+
+/**
+ * Daily mission generation for active characters, replacing the per-user
+ * splitInBatches loop in ai_missions.json.
+ *
+ * - Contexts come from one set-based statement (mission_contexts) a page of
+ *   characters at a time instead of five lookups per user.
+ * - Up to `concurrency` chat completions run at once. A 429 pauses every
+ *   worker until the provider's Retry-After or rate-limit reset has passed,
+ *   and a response reporting no remaining requests pauses them pre-emptively.
+ *   Timeouts and 5xx are retried with exponential backoff.
+ * - Within a run, players whose prompt is identical share one completion
+ *   (identical requests in flight are made once).
+ * - Each page of missions is written with one INSERT (missions_insert_bulk)
+ *   and one unified_logs record per character is queued on the log sink.
+ *
+ * A player whose completion fails or cannot be parsed gets the fallback
+ * missions and is counted in `fallbacks`.
+ */
+class MissionWorker {
+  constructor(options = {}) {
+    this.queries = options.queries;
+    this.logSink = options.logSink || null;
+    this.llmUrl = (options.llmUrl || 'https://api.openai.com/v1').replace(/\/$/, '');
+    this.apiKey = options.apiKey;
+    this.model = options.model || 'gpt-4';
+    this.concurrency = options.concurrency || 4;
+    this.pageSize = options.pageSize || 500;
+    this.maxAttempts = options.maxAttempts || 4;
+    this.retryBaseMs = options.retryBaseMs || 1000;
+    this.timeoutMs = options.timeoutMs || 60000;
+    this.log = options.log || console;
+
+    this.current = null;
+    this.lastRun = null;
+    this.runs = 0;
+    this.pausedUntil = 0;
+    this.stopping = false;
+    this.latency = new SampleRing();
+  }
+
+  // Starts a run unless one is in progress; returns the run, or null when busy
+  start(options = {}) {
+    if (this.current) return null;
+    this.runs += 1;
+    const run = {
+      id: this.runs,
+      status: 'running',
+      started_at: new Date().toISOString(),
+      finished_at: null,
+      dry_run: Boolean(options.dry_run),
+      concurrency: Number(options.concurrency) || this.concurrency,
+      limit: Number(options.limit) || null,
+      characters: 0,
+      pages: 0,
+      llm_requests: 0,
+      llm_retries: 0,
+      rate_limited: 0,
+      cache_hits: 0,
+      fallbacks: 0,
+      missions: 0,
+      missions_written: 0,
+      duration_ms: null,
+      error: null,
+      last_llm_error: null
+    };
+    this.current = run;
+    this.stopping = false;
+    const started = Date.now();
+    this._run(run)
+      .then(() => {
+        run.status = this.stopping ? 'stopped' : 'completed';
+      })
+      .catch((error) => {
+        run.status = 'failed';
+        run.error = error.message;
+        this.log.error(`❌ Mission run ${run.id} failed: ${error.message}`);
+      })
+      .finally(() => {
+        run.finished_at = new Date().toISOString();
+        run.duration_ms = Date.now() - started;
+        this.lastRun = run;
+        this.current = null;
+        this.log.log(`🎯 Mission run ${run.id} ${run.status}: ${run.characters} characters, `
+          + `${run.missions_written} missions written in ${run.duration_ms}ms`);
+      });
+    return run;
+  }
+
+  // Finish the page in progress and stop
+  stop() {
+    this.stopping = true;
+  }
+
+  stats() {
+    return {
+      running: Boolean(this.current),
+      current: this.current,
+      last_run: this.lastRun,
+      rate_limited_until: this.pausedUntil > Date.now() ? new Date(this.pausedUntil).toISOString() : null,
+      llm_latency_ms: this.latency.percentiles(),
+      config: {
+        llm_url: this.llmUrl,
+        model: this.model,
+        concurrency: this.concurrency,
+        page_size: this.pageSize,
+        max_attempts: this.maxAttempts
+      }
+    };
+  }
+
+  async _run(run) {
+    const answers = new Map();
+    let after = 0;
+    while (!this.stopping) {
+      const pageSize = run.limit ? Math.min(this.pageSize, run.limit - run.characters) : this.pageSize;
+      if (pageSize <= 0) break;
+      const { data: contexts } = await this.queries.run('mission_contexts', [after, pageSize]);
+      if (!contexts.length) break;
+      after = contexts[contexts.length - 1].character_id;
+      run.pages += 1;
+      run.characters += contexts.length;
+
+      const generated = new Array(contexts.length);
+      let next = 0;
+      const worker = async () => {
+        while (next < contexts.length) {
+          const index = next;
+          next += 1;
+          generated[index] = await this._generate(contexts[index], answers, run);
+        }
+      };
+      await Promise.all(Array.from({ length: Math.min(run.concurrency, contexts.length) }, worker));
+
+      const rows = generated.flatMap(({ rows }) => rows);
+      run.missions += rows.length;
+      if (!run.dry_run) {
+        await this._store(rows, run);
+        this._logGenerated(contexts, generated);
+      }
+    }
+  }
+
+  async _generate(context, answers, run) {
+    const prompt = buildPrompt(context);
+    const key = crypto.createHash('sha1').update(`${this.model}\n${prompt}`).digest('hex');
+    let answer = answers.get(key);
+    if (answer) {
+      run.cache_hits += 1;
+    } else {
+      answer = this._complete(prompt, run).catch((error) => {
+        run.last_llm_error = error.message;
+        return null;
+      });
+      answers.set(key, answer);
+    }
+    const missions = parseAnswer(await answer);
+    if (!missions) run.fallbacks += 1;
+    return { rows: toRows(context, missions || fallbackMissions(context)), ai: Boolean(missions) };
+  }
+
+  async _complete(prompt, run) {
+    let lastError = null;
+    for (let attempt = 1; attempt <= this.maxAttempts; attempt += 1) {
+      if (attempt > 1) run.llm_retries += 1;
+      while (this.pausedUntil > Date.now()) await sleep(this.pausedUntil - Date.now());
+
+      const controller = new AbortController();
+      const timeout = setTimeout(() => controller.abort(), this.timeoutMs);
+      const started = process.hrtime.bigint();
+      let backoff = this.retryBaseMs * 2 ** (attempt - 1);
+      try {
+        run.llm_requests += 1;
+        const response = await fetch(`${this.llmUrl}/chat/completions`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json', Authorization: `Bearer ${this.apiKey}` },
+          body: JSON.stringify({
+            model: this.model,
+            messages: [{ role: 'system', content: SYSTEM_MESSAGE }, { role: 'user', content: prompt }],
+            max_tokens: 800,
+            temperature: 0.8
+          }),
+          signal: controller.signal
+        });
+        if (response.headers.get('x-ratelimit-remaining-requests') === '0') {
+          this._pause(delayFromHeaders(response.headers, 'x-ratelimit-reset-requests') || backoff);
+        }
+        if (response.ok) {
+          const body = await response.json();
+          this.latency.push(elapsedMs(started));
+          return body.choices?.[0]?.message?.content;
+        }
+        lastError = new Error(`LLM returned HTTP ${response.status}`);
+        if (response.status === 429) {
+          run.rate_limited += 1;
+          backoff = delayFromHeaders(response.headers, 'retry-after')
+            ?? delayFromHeaders(response.headers, 'x-ratelimit-reset-requests') ?? backoff;
+          this._pause(backoff);
+          continue;
+        }
+        if (response.status < 500) throw lastError;
+      } catch (error) {
+        if (error === lastError) throw error;
+        lastError = error.name === 'AbortError' ? new Error(`LLM timeout after ${this.timeoutMs}ms`) : error;
+      } finally {
+        clearTimeout(timeout);
+      }
+      if (attempt < this.maxAttempts) await sleep(backoff);
+    }
+    throw lastError;
+  }
+
+  _pause(ms) {
+    this.pausedUntil = Math.max(this.pausedUntil, Date.now() + ms);
+  }
+
+  async _store(rows, run) {
+    if (!rows.length) return;
+    const columns = ['character_id', 'type', 'title', 'description', 'target_system_id', 'suggested_routine',
+      'system_category', 'stage_focus', 'xp', 'coins'];
+    const { count } = await this.queries.run('missions_insert_bulk', columns.map((column) => rows.map((row) => row[column])));
+    run.missions_written += count;
+  }
+
+  _logGenerated(contexts, generated) {
+    if (!this.logSink) return;
+    this.logSink.accept('unified_logs', contexts.map((context, index) => ({
+      actor_type: 'system',
+      actor_id: 0,
+      target_type: 'character',
+      target_id: context.character_id,
+      action: 'missions_generated',
+      detail: {
+        mission_count: generated[index].rows.length,
+        mission_types: generated[index].rows.map((row) => row.type),
+        ai_enhanced: generated[index].ai
+      },
+      outcome: 'success',
+      severity: 'info',
+      source: 'mission_worker'
+    })));
+  }
+}
+
+module.exports = { MissionWorker, buildPrompt, parseAnswer, toRows, delayFromHeaders };
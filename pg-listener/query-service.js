@@ -0,0 +1,181 @@
+const { SampleRing, elapsedMs } = require('./stats');
+
+class QueryError extends Error {
+  constructor(status, error, message) {
+    super(message);
+    this.status = status;
+    this.error = error;
+  }
+}
+
+// Highest $n placeholder in a statement
+const parameterCount = (text) => Math.max(0, ...[...text.matchAll(/\$(\d+)/g)].map((match) => Number(match[1])));
+
+/**
+ * Runs named, pre-registered statements over a connection pool, replacing
+ * raw SQL sent to subflow-database-query.
+ *
+ * - `run(name, params)` executes one statement as a named prepared statement,
+ *   so PostgreSQL parses and plans it once per pooled connection.
+ * - `batch(items, { transaction })` runs several statements on one connection
+ *   in a single request; with `transaction` they commit or roll back together.
+ * - `verify()` prepares every statement once at startup. Statements that no
+ *   longer match the schema are disabled and answer 503 instead of failing
+ *   on each call.
+ *
+ * Results have the subflow's response shape: `{ success, data, count }`.
+ */
+class QueryService {
+  constructor(options = {}) {
+    this.pool = options.pool;
+    this.maxBatch = options.maxBatch || 100;
+    this.log = options.log || console;
+
+    this.statements = new Map();
+    for (const [name, statement] of Object.entries(options.statements || {})) {
+      this.statements.set(name, {
+        name,
+        text: statement.text,
+        single: Boolean(statement.single),
+        params: parameterCount(statement.text),
+        disabled: null,
+        calls: 0,
+        errors: 0,
+        latency: new SampleRing()
+      });
+    }
+    this.counters = { requests: 0, batches: 0, batch_statements: 0, rolled_back: 0, rejected: 0 };
+    this.lastError = null;
+  }
+
+  list() {
+    return [...this.statements.values()].map(({ name, params, single, disabled }) => ({
+      name, params, single, disabled
+    }));
+  }
+
+  async verify() {
+    const client = await this.pool.connect();
+    const failed = [];
+    try {
+      for (const statement of this.statements.values()) {
+        try {
+          await client.query(`PREPARE sbs_verify AS ${statement.text}`);
+          await client.query('DEALLOCATE sbs_verify');
+          statement.disabled = null;
+        } catch (error) {
+          statement.disabled = error.message;
+          failed.push({ name: statement.name, error: error.message });
+        }
+      }
+    } finally {
+      client.release();
+    }
+    return { verified: this.statements.size - failed.length, failed };
+  }
+
+  async run(name, params = []) {
+    this.counters.requests += 1;
+    return this._execute(this.pool, this._resolve(name, params), params);
+  }
+
+  async batch(items, options = {}) {
+    this.counters.requests += 1;
+    if (!Array.isArray(items) || !items.length) {
+      throw this._reject(400, 'Invalid request', 'statements must be a non-empty array');
+    }
+    if (items.length > this.maxBatch) {
+      throw this._reject(400, 'Invalid request', `batch of ${items.length} exceeds the limit of ${this.maxBatch}`);
+    }
+    // Resolve everything first so a bad entry rejects the batch before any statement runs
+    const resolved = items.map((item) => this._resolve(item && item.name, (item && item.params) || []));
+
+    this.counters.batches += 1;
+    this.counters.batch_statements += items.length;
+    const client = await this.pool.connect();
+    const results = [];
+    try {
+      if (options.transaction) await client.query('BEGIN');
+      for (let index = 0; index < resolved.length; index += 1) {
+        try {
+          results.push(await this._execute(client, resolved[index], items[index].params || []));
+        } catch (error) {
+          if (!options.transaction) {
+            results.push({ success: false, error: 'Database query failed', message: error.message });
+            continue;
+          }
+          await client.query('ROLLBACK');
+          this.counters.rolled_back += 1;
+          throw new QueryError(500, 'Transaction rolled back',
+            `statement ${index} (${resolved[index].name}) failed: ${error.message}`);
+        }
+      }
+      if (options.transaction) await client.query('COMMIT');
+    } finally {
+      client.release();
+    }
+    return { success: results.every((result) => result.success), results, count: results.length };
+  }
+
+  stats() {
+    const statements = {};
+    for (const statement of this.statements.values()) {
+      statements[statement.name] = {
+        calls: statement.calls,
+        errors: statement.errors,
+        latency_ms: statement.latency.percentiles(),
+        disabled: statement.disabled
+      };
+    }
+    return {
+      ...this.counters,
+      pool: {
+        total: this.pool.totalCount,
+        idle: this.pool.idleCount,
+        waiting: this.pool.waitingCount
+      },
+      statements,
+      last_error: this.lastError
+    };
+  }
+
+  _resolve(name, params) {
+    const statement = this.statements.get(name);
+    if (!statement) {
+      throw this._reject(404, 'Unknown statement', `No statement named '${name}'`);
+    }
+    if (statement.disabled) {
+      throw this._reject(503, 'Statement disabled', statement.disabled);
+    }
+    if (!Array.isArray(params) || params.length !== statement.params) {
+      throw this._reject(400, 'Invalid request',
+        `${name} expects ${statement.params} parameters, got ${Array.isArray(params) ? params.length : typeof params}`);
+    }
+    return statement;
+  }
+
+  async _execute(queryable, statement, params) {
+    const started = process.hrtime.bigint();
+    statement.calls += 1;
+    let rows;
+    try {
+      ({ rows } = await queryable.query({ name: `sbs_${statement.name}`, text: statement.text, values: params }));
+    } catch (error) {
+      statement.errors += 1;
+      this.lastError = { statement: statement.name, message: error.message, at: new Date().toISOString() };
+      throw error;
+    } finally {
+      statement.latency.push(elapsedMs(started));
+    }
+    return statement.single
+      ? { success: true, data: rows[0] || null, count: rows.length ? 1 : 0 }
+      : { success: true, data: rows, count: rows.length };
+  }
+
+  _reject(status, error, message) {
+    this.counters.rejected += 1;
+    return new QueryError(status, error, message);
+  }
+}
+
+module.exports = { QueryService, QueryError };
@@ -0,0 +1,109 @@
+// Named statements served by the query service (POST /query/:name). Callers send
+// only a name and its parameters; each statement is prepared once per pooled
+// connection and reused. `single` returns the first row (or null) instead of
+// an array, like return_first_only on subflow-database-query.
+module.exports = {
+  // habit_checkin.json: streak, rewards, level-up and logging in one transaction
+  // (habit_checkin() from database/migrations/007_habit_checkin.sql)
+  habit_checkin: {
+    single: true,
+    text: 'SELECT habit_checkin($1) AS result'
+  },
+
+  // quest_engine.json
+  task_complete: {
+    single: true,
+    text: 'UPDATE tasks SET completed = true WHERE id = $1 RETURNING *'
+  },
+  project_complete: {
+    single: true,
+    text: 'UPDATE projects SET completed = true WHERE id = $1 RETURNING *'
+  },
+  project_archive: {
+    single: true,
+    text: `INSERT INTO archive (character_id, project_id, completed_on, xp_earned, coins_earned)
+           VALUES ($1, $2, NOW(), $3, $4) RETURNING *`
+  },
+
+  // achievement_unlock.json
+  achievement_titles: {
+    text: 'SELECT title FROM achievements WHERE character_id = $1'
+  },
+  achievement_insert: {
+    single: true,
+    text: `INSERT INTO achievements (character_id, title, description, reward_type, bonus_value)
+           VALUES ($1, $2, $3, $4, $5) RETURNING *`
+  },
+
+  // pg-listener mission worker (mission-worker.js): mission context for a page of
+  // active characters ($1 = last character id of the previous page, $2 = page size)
+  mission_contexts: {
+    text: `SELECT c.id AS character_id, c.user_id, u.username, c.level, c.class, c.goals,
+                  COALESCE(sk.skills, '[]') AS skills, COALESCE(hb.habits, '[]') AS habits,
+                  COALESCE(sy.systems, '[]') AS systems, COALESCE(ro.routines, '[]') AS routines,
+                  COALESCE(pr.projects, '[]') AS projects, COALESCE(ev.activity, '[]') AS activity
+           FROM (SELECT id, user_id, level, class, goals FROM characters
+                 WHERE last_login > NOW() - INTERVAL '7 days' AND id > $1
+                 ORDER BY id LIMIT $2) c
+           JOIN users u ON u.id::text = c.user_id::text
+           LEFT JOIN LATERAL (
+               SELECT jsonb_agg(jsonb_build_object('name', s.name, 'level', s.level) ORDER BY s.level DESC, s.xp DESC) AS skills
+               FROM (SELECT name, level, xp FROM skills WHERE character_id = c.id ORDER BY level DESC, xp DESC LIMIT 3) s
+           ) sk ON true
+           LEFT JOIN LATERAL (
+               SELECT jsonb_agg(jsonb_build_object('name', h.name, 'streak', h.streak) ORDER BY h.streak DESC) AS habits
+               FROM (SELECT name, streak FROM habits WHERE character_id = c.id AND type = 'good'
+                     ORDER BY streak DESC NULLS LAST LIMIT 5) h
+           ) hb ON true
+           LEFT JOIN LATERAL (
+               SELECT jsonb_agg(jsonb_build_object('id', s.id, 'name', s.name, 'category', s.category,
+                                                   'current_stage', s.current_stage, 'next_step', s.next_step)) AS systems
+               FROM (SELECT s.id, s.name, s.category, s.current_stage,
+                            (SELECT ss.step FROM system_steps ss
+                             WHERE ss.system_id = s.id AND ss.status = 'pending' ORDER BY ss.id LIMIT 1) AS next_step
+                     FROM systems s
+                     WHERE s.owner_type = 'user' AND s.owner_id = u.id AND s.current_stage != 'complete'
+                     ORDER BY s.created_at DESC LIMIT 3) s
+           ) sy ON true
+           LEFT JOIN LATERAL (
+               SELECT jsonb_agg(jsonb_build_object('name', r.name, 'system_name', r.system_name,
+                                                   'current_stage', r.current_stage)) AS routines
+               FROM (SELECT r.name, s.name AS system_name, s.current_stage
+                     FROM routines r JOIN systems s ON s.id = r.system_id
+                     WHERE s.owner_type = 'user' AND s.owner_id = u.id AND r.status = 'active'
+                     ORDER BY r.created_at DESC LIMIT 3) r
+           ) ro ON true
+           LEFT JOIN LATERAL (
+               SELECT jsonb_agg(jsonb_build_object('title', p.title, 'total_tasks', p.total_tasks,
+                                                   'completed_tasks', p.completed_tasks)) AS projects
+               FROM (SELECT p.title, COUNT(t.id) AS total_tasks, COUNT(t.id) FILTER (WHERE t.completed) AS completed_tasks
+                     FROM projects p LEFT JOIN tasks t ON t.project_id = p.id
+                     WHERE p.character_id = c.id AND p.completed = false
+                     GROUP BY p.id, p.title ORDER BY MIN(p.deadline) ASC LIMIT 3) p
+           ) pr ON true
+           LEFT JOIN LATERAL (
+               SELECT jsonb_agg(jsonb_build_object('event_type', e.event_type, 'count', e.count)) AS activity
+               FROM (SELECT event_type, COUNT(*) AS count FROM events
+                     WHERE character_id = c.id AND event_date > NOW() - INTERVAL '7 days'
+                     GROUP BY event_type) e
+           ) ev ON true
+           ORDER BY c.id`
+  },
+  // every mission of a page in one INSERT, one array per column
+  missions_insert_bulk: {
+    text: `INSERT INTO missions (character_id, type, title, description, target_system_id, suggested_routine,
+                                 system_category, stage_focus, xp_reward, coin_reward, status, created_at)
+           SELECT m.*, 'active', NOW()
+           FROM unnest($1::int[], $2::text[], $3::text[], $4::text[], $5::int[], $6::text[], $7::text[],
+                       $8::text[], $9::int[], $10::int[]) AS m
+           RETURNING id`
+  },
+
+  // scripts/query_service_bench.py default
+  character_recent_activity: {
+    text: `SELECT event_type, COUNT(*) AS count, SUM(xp_change) AS total_xp
+           FROM events
+           WHERE character_id = $1 AND event_date > NOW() - INTERVAL '7 days'
+           GROUP BY event_type`
+  }
+};
@@ -0,0 +1,42 @@
+// Latency and lag samples kept for the /stats endpoints of each pg-listener component
+
+const SAMPLES = 1000;
+
+const percentiles = (samples) => {
+  if (!samples.length) return null;
+  const sorted = [...samples].sort((a, b) => a - b);
+  const round = (value) => Number(value.toFixed(2));
+  const at = (q) => round(sorted[Math.min(sorted.length - 1, Math.floor(q * sorted.length))]);
+  return { p50: at(0.5), p95: at(0.95), p99: at(0.99), max: round(sorted[sorted.length - 1]), samples: sorted.length };
+};
+
+// The most recent `size` samples; once full, each new sample overwrites the oldest
+class SampleRing {
+  constructor(size = SAMPLES) {
+    this.size = size;
+    this.values = [];
+    this.next = 0;
+  }
+
+  push(value) {
+    if (this.values.length < this.size) {
+      this.values.push(value);
+    } else {
+      this.values[this.next] = value;
+    }
+    this.next = (this.next + 1) % this.size;
+  }
+
+  get length() {
+    return this.values.length;
+  }
+
+  percentiles() {
+    return percentiles(this.values);
+  }
+}
+
+// Milliseconds since a process.hrtime.bigint() reading
+const elapsedMs = (started) => Number(process.hrtime.bigint() - started) / 1e6;
+
+module.exports = { SampleRing, percentiles, elapsedMs };
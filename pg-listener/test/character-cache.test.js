@@ -0,0 +1,202 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const { CharacterCache, MemoryStore } = require('../character-cache');
+
+const state = (id, xp = 0) => ({ id, name: `character ${id}`, xp, skills: [] });
+
+// Answers the state query from `characters`; a test can hold the next loads open with hold()
+class FakePool {
+  constructor(characters = {}) {
+    this.characters = characters;
+    this.skills = {};      // skill id -> character id
+    this.userCharacters = {};  // user id -> [character id]
+    this.stateQueries = 0;
+    this.held = [];
+    this.holding = false;
+  }
+
+  hold() {
+    this.holding = true;
+  }
+
+  release() {
+    this.holding = false;
+    this.held.splice(0).forEach((resume) => resume());
+  }
+
+  async query(text, params) {
+    if (text.includes('FROM skills WHERE id')) {
+      const characterId = this.skills[params[0]];
+      return { rows: characterId ? [{ character_id: characterId }] : [] };
+    }
+    if (text.includes('FROM characters WHERE user_id')) {
+      return { rows: (this.userCharacters[params[0]] || []).map((id) => ({ id })) };
+    }
+    this.stateQueries += 1;
+    if (this.holding) await new Promise((resume) => this.held.push(resume));
+    const character = this.characters[params[0]];
+    return { rows: character ? [{ state: character }] : [] };
+  }
+}
+
+class BrokenStore {
+  constructor() {
+    this.name = 'broken';
+  }
+
+  async get() {
+    throw new Error('connection refused');
+  }
+
+  async set() {
+    throw new Error('connection refused');
+  }
+
+  async del() {
+    throw new Error('connection refused');
+  }
+
+  connected() {
+    return false;
+  }
+
+  async close() {}
+}
+
+const silent = { error() {} };
+
+test('counts a first read as a miss and a repeat as a hit', async () => {
+  const pool = new FakePool({ 1: state(1, 50) });
+  const cache = new CharacterCache({ pool, store: new MemoryStore(), log: silent });
+
+  assert.deepEqual(await cache.get(1), state(1, 50));
+  assert.deepEqual(await cache.get(1), state(1, 50));
+
+  const stats = cache.stats();
+  assert.equal(stats.misses, 1);
+  assert.equal(stats.hits, 1);
+  assert.equal(stats.hit_rate, 0.5);
+  assert.equal(pool.stateQueries, 1);
+});
+
+test('returns null for a missing character without caching it', async () => {
+  const pool = new FakePool();
+  const cache = new CharacterCache({ pool, store: new MemoryStore(), log: silent });
+
+  assert.equal(await cache.get(9), null);
+  assert.equal(await cache.get(9), null);
+  assert.equal(cache.stats().not_found, 2);
+  assert.equal(pool.stateQueries, 2);
+});
+
+test('shares one load between concurrent misses for the same character', async () => {
+  const pool = new FakePool({ 1: state(1), 2: state(2) });
+  const cache = new CharacterCache({ pool, store: new MemoryStore(), log: silent });
+
+  pool.hold();
+  const reads = Promise.all([cache.get(1), cache.get(1), cache.get(1), cache.get(2)]);
+  await new Promise(setImmediate);
+  assert.equal(cache.stats().pending_loads, 2);
+  pool.release();
+
+  const results = await reads;
+  assert.deepEqual(results, [state(1), state(1), state(1), state(2)]);
+  assert.equal(pool.stateQueries, 2);
+  assert.equal(cache.stats().misses, 4);
+  assert.equal(cache.stats().pending_loads, 0);
+});
+
+test('invalidates on unified_event and system_update payloads', async () => {
+  const pool = new FakePool({ 1: state(1), 2: state(2), 3: state(3) });
+  pool.skills[7] = 2;
+  pool.userCharacters.u1 = [3];
+  const cache = new CharacterCache({ pool, store: new MemoryStore(), log: silent });
+  await Promise.all([cache.get(1), cache.get(2), cache.get(3)]);
+
+  await cache.invalidate('unified_event', { table: 'characters', id: 1 });
+  await cache.invalidate('system_update', { table: 'skills', id: 7 });
+  await cache.invalidate('unified_event', { table: 'users', id: 'u1' });
+  // Tables that do not feed character state leave the keys alone
+  await cache.invalidate('unified_event', { table: 'habits', id: 4, character_id: 1 });
+  await cache.invalidate('system_update', 'not json');
+
+  assert.equal(cache.stats().invalidations, 3);
+  assert.equal(cache.stats().keys_invalidated, 3);
+
+  pool.characters[1] = state(1, 99);
+  assert.deepEqual(await cache.get(1), state(1, 99));
+  await cache.get(2);
+  await cache.get(3);
+  assert.equal(pool.stateQueries, 6);
+  assert.equal(cache.stats().hits, 0);
+});
+
+test('does not store a load that overlapped an invalidation', async () => {
+  const pool = new FakePool({ 1: state(1, 10) });
+  const store = new MemoryStore();
+  const cache = new CharacterCache({ pool, store, log: silent });
+
+  pool.hold();
+  const read = cache.get(1);
+  await new Promise(setImmediate);
+  pool.characters[1] = state(1, 20);
+  await cache.invalidate('unified_event', { table: 'characters', id: 1 });
+  pool.release();
+
+  // The overlapping read still answers, but with state it cannot vouch for, so it is not stored
+  assert.ok(await read);
+  assert.equal(cache.stats().loads_discarded, 1);
+  assert.equal(await store.get(cache.key(1)), null);
+
+  assert.deepEqual(await cache.get(1), state(1, 20));
+  assert.deepEqual(await cache.get(1), state(1, 20));
+  assert.equal(cache.stats().hits, 1);
+});
+
+test('starts a fresh load for reads that arrive after an invalidation', async () => {
+  const pool = new FakePool({ 1: state(1, 10) });
+  const cache = new CharacterCache({ pool, store: new MemoryStore(), log: silent });
+
+  pool.hold();
+  const before = cache.get(1);
+  await new Promise(setImmediate);
+  await cache.invalidate('unified_event', { table: 'characters', id: 1 });
+  pool.characters[1] = state(1, 20);
+  const after = cache.get(1);
+  await new Promise(setImmediate);
+  pool.release();
+
+  await before;
+  assert.deepEqual(await after, state(1, 20));
+  assert.equal(pool.stateQueries, 2);
+});
+
+test('falls through to PostgreSQL when the store throws', async () => {
+  const pool = new FakePool({ 1: state(1) });
+  const cache = new CharacterCache({ pool, store: new BrokenStore(), log: silent });
+
+  assert.deepEqual(await cache.get(1), state(1));
+  assert.deepEqual(await cache.get(1), state(1));
+  await cache.invalidate('unified_event', { table: 'characters', id: 1 });
+
+  const stats = cache.stats();
+  assert.equal(pool.stateQueries, 2);
+  assert.equal(stats.misses, 2);
+  // get and set on each read, del on the invalidation
+  assert.equal(stats.store_errors, 5);
+  assert.equal(stats.store_connected, false);
+  assert.equal(stats.last_error.message, 'connection refused');
+});
+
+test('propagates PostgreSQL errors to every waiting read', async () => {
+  const pool = new FakePool();
+  pool.query = async () => {
+    throw new Error('too many connections');
+  };
+  const cache = new CharacterCache({ pool, store: new MemoryStore(), log: silent });
+
+  const reads = await Promise.allSettled([cache.get(1), cache.get(1)]);
+  assert.deepEqual(reads.map((read) => read.status), ['rejected', 'rejected']);
+  assert.equal(cache.stats().db_errors, 1);
+  assert.equal(cache.stats().pending_loads, 0);
+});
@@ -0,0 +1,230 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const http = require('http');
+const { MissionWorker, buildPrompt, parseAnswer, toRows, delayFromHeaders } = require('../mission-worker');
+
+const MISSIONS = [
+  { type: 'sbs_system_advancement', title: 'Automate the morning review', description: 'Move it to automate',
+    target_system_id: 11, stage_focus: 'automate', system_category: 'productivity', xp: 40, coins: 20 },
+  { type: 'sbs_routine_creation', title: 'Weekly reset', description: 'Add a Sunday routine',
+    suggested_routine: 'Sunday 15-minute review', system_category: 'purpose', xp: 30, coins: 15 },
+  { type: 'sbs_system_optimization', title: 'Remove one manual step', description: 'Automate the step you skip',
+    system_category: 'productivity', stage_focus: 'review', xp: 35, coins: 18 }
+];
+
+const context = (characterId, overrides = {}) => ({
+  character_id: characterId,
+  level: 4,
+  class: 'builder',
+  goals: 'Ship one system a month',
+  skills: [{ name: 'Focus', level: 3 }],
+  habits: [{ name: 'Journal', streak: 5 }],
+  systems: [{ id: 11, name: 'Morning', category: 'productivity', current_stage: 'build', next_step: 'automate' }],
+  routines: [],
+  projects: [],
+  activity: [],
+  ...overrides
+});
+
+// Pages through `contexts` like mission_contexts and records what missions_insert_bulk was given
+class FakeQueries {
+  constructor(contexts) {
+    this.contexts = contexts;
+    this.inserted = [];
+  }
+
+  async run(name, params) {
+    if (name === 'mission_contexts') {
+      const [after, limit] = params;
+      return { data: this.contexts.filter((c) => c.character_id > after).slice(0, limit) };
+    }
+    if (name === 'missions_insert_bulk') {
+      this.inserted.push(params);
+      return { count: params[0].length };
+    }
+    throw new Error(`unexpected statement ${name}`);
+  }
+}
+
+// An OpenAI-compatible /chat/completions endpoint; respond(n) decides the nth request's answer
+async function stubLLM(respond) {
+  const stub = { requests: [], inFlight: 0, maxInFlight: 0 };
+  stub.server = http.createServer((req, res) => {
+    let body = '';
+    req.on('data', (chunk) => { body += chunk; });
+    req.on('end', async () => {
+      const n = stub.requests.length;
+      stub.requests.push({ at: Date.now(), body: JSON.parse(body) });
+      stub.inFlight += 1;
+      stub.maxInFlight = Math.max(stub.maxInFlight, stub.inFlight);
+      const { delay = 0, status = 200, headers = {}, content = JSON.stringify(MISSIONS) } = respond(n) || {};
+      await new Promise((resolve) => setTimeout(resolve, delay));
+      stub.inFlight -= 1;
+      res.writeHead(status, { 'Content-Type': 'application/json', ...headers });
+      res.end(JSON.stringify(status === 200
+        ? { choices: [{ message: { content } }] }
+        : { error: { message: `HTTP ${status}` } }));
+    });
+  });
+  await new Promise((resolve) => stub.server.listen(0, '127.0.0.1', resolve));
+  stub.url = `http://127.0.0.1:${stub.server.address().port}/v1`;
+  stub.close = () => new Promise((resolve) => stub.server.close(resolve));
+  return stub;
+}
+
+const silent = { log() {}, error() {} };
+
+// Starts a run and resolves with it once it has finished
+async function runToEnd(worker, options) {
+  const run = worker.start(options);
+  assert.ok(run, 'a run should start');
+  while (worker.current) await new Promise((resolve) => setTimeout(resolve, 5));
+  return run;
+}
+
+test('parseAnswer reads bare, fenced and embedded JSON', () => {
+  const bare = JSON.stringify(MISSIONS);
+  assert.deepEqual(parseAnswer(bare), MISSIONS);
+  assert.deepEqual(parseAnswer(`\`\`\`json\n${bare}\n\`\`\``), MISSIONS);
+  assert.deepEqual(parseAnswer(`Here are your missions:\n${bare}\nGood luck!`), MISSIONS);
+  // A single object is one mission
+  assert.deepEqual(parseAnswer(JSON.stringify(MISSIONS[0])), [MISSIONS[0]]);
+});
+
+test('parseAnswer rejects garbage', () => {
+  assert.equal(parseAnswer('Sorry, I cannot help with that.'), null);
+  assert.equal(parseAnswer('[1, 2, 3]'), null);
+  assert.equal(parseAnswer('[]'), null);
+  assert.equal(parseAnswer('```json\n[{"title": \n```'), null);
+  assert.equal(parseAnswer(undefined), null);
+});
+
+test('toRows clamps rewards and text to the column limits', () => {
+  const rows = toRows(context(7), [
+    { type: 'unknown', title: 'x'.repeat(200), xp: 500, coins: -4 },
+    { type: 'sbs_routine_creation', xp: '45.6', coins: '12' },
+    { xp: 'lots' },
+    { title: 'a fourth mission is dropped' }
+  ]);
+
+  assert.equal(rows.length, 3);
+  assert.deepEqual(rows.map((row) => [row.xp, row.coins]), [[60, 10], [46, 12], [30, 15]]);
+  assert.equal(rows[0].type, 'sbs_system_advancement');
+  assert.equal(rows[0].title.length, 120);
+  assert.equal(rows[1].title, 'SBS Mission 2');
+  assert.ok(rows.every((row) => row.character_id === 7));
+});
+
+test('toRows drops a target_system_id the player does not own', () => {
+  const rows = toRows(context(7), [
+    { title: 'own', target_system_id: 11 },
+    { title: 'someone else\'s', target_system_id: 12 },
+    { title: 'camelCase', targetSystemId: '11' }
+  ]);
+  assert.deepEqual(rows.map((row) => row.target_system_id), [11, null, 11]);
+});
+
+test('delayFromHeaders reads seconds, durations and HTTP dates', () => {
+  const headers = new Headers({
+    'retry-after': '2',
+    'x-ratelimit-reset-requests': '1m30.5s',
+    'x-ratelimit-reset-tokens': '250ms',
+    'x-date': new Date(Date.now() + 60000).toUTCString(),
+    'x-garbage': 'soon'
+  });
+  assert.equal(delayFromHeaders(headers, 'retry-after'), 2000);
+  assert.equal(delayFromHeaders(headers, 'x-ratelimit-reset-requests'), 90500);
+  assert.equal(delayFromHeaders(headers, 'x-ratelimit-reset-tokens'), 250);
+  const untilDate = delayFromHeaders(headers, 'x-date');
+  assert.ok(untilDate > 55000 && untilDate <= 60000, `got ${untilDate}`);
+  assert.equal(delayFromHeaders(headers, 'x-garbage'), null);
+  assert.equal(delayFromHeaders(headers, 'x-missing'), null);
+});
+
+test('buildPrompt leaves out who the player is', () => {
+  const prompt = buildPrompt(context(1, { username: 'ada' }));
+  assert.equal(prompt, buildPrompt(context(2, { username: 'grace' })));
+  assert.ok(!prompt.includes('ada'));
+  assert.notEqual(prompt, buildPrompt(context(1, { level: 5 })));
+});
+
+test('players with the same prompt share one completion', async () => {
+  const stub = await stubLLM(() => ({ delay: 20 }));
+  const queries = new FakeQueries([1, 2, 3, 4, 5].map((id) => context(id)).concat(context(6, { level: 9 })));
+  const worker = new MissionWorker({ queries, llmUrl: stub.url, concurrency: 3, log: silent });
+  try {
+    const run = await runToEnd(worker, {});
+    assert.equal(run.status, 'completed');
+    assert.equal(stub.requests.length, 2);
+    assert.equal(run.llm_requests, 2);
+    assert.equal(run.cache_hits, 4);
+    assert.equal(run.missions_written, 18);
+    // Each player still gets rows of their own
+    assert.deepEqual([...new Set(queries.inserted[0][0])], [1, 2, 3, 4, 5, 6]);
+  } finally {
+    await stub.close();
+  }
+});
+
+test('keeps at most `concurrency` completions in flight', async () => {
+  const stub = await stubLLM(() => ({ delay: 30 }));
+  const contexts = Array.from({ length: 12 }, (_, i) => context(i + 1, { level: i + 1 }));
+  const worker = new MissionWorker({ queries: new FakeQueries(contexts), llmUrl: stub.url, concurrency: 4, log: silent });
+  try {
+    const run = await runToEnd(worker, { dry_run: true });
+    assert.equal(run.status, 'completed');
+    assert.equal(run.llm_requests, 12);
+    assert.equal(stub.maxInFlight, 4);
+    assert.equal(run.missions, 36);
+    assert.equal(run.missions_written, 0);
+  } finally {
+    await stub.close();
+  }
+});
+
+test('a 429 pauses every worker until the rate-limit reset has passed', async () => {
+  const pauseMs = 150;
+  const stub = await stubLLM((n) => (n === 0
+    ? { delay: 10, status: 429, headers: { 'x-ratelimit-reset-requests': `${pauseMs}ms` } }
+    : { delay: 30 }));
+  const contexts = Array.from({ length: 4 }, (_, i) => context(i + 1, { level: i + 1 }));
+  const worker = new MissionWorker({ queries: new FakeQueries(contexts), llmUrl: stub.url, concurrency: 2, log: silent });
+  try {
+    const run = await runToEnd(worker, { dry_run: true });
+    assert.equal(run.status, 'completed');
+    assert.equal(run.rate_limited, 1);
+    assert.equal(run.llm_retries, 1);
+    assert.equal(run.fallbacks, 0);
+    assert.equal(run.llm_requests, 5);
+
+    // Requests already in flight finish; nothing new is sent until the reset has passed
+    const limitedAt = stub.requests[0].at + 10;
+    const later = stub.requests.filter((request) => request.at > limitedAt);
+    assert.ok(later.length >= 2);
+    later.forEach((request) => assert.ok(request.at - limitedAt >= pauseMs - 20, `sent ${request.at - limitedAt}ms after the 429`));
+  } finally {
+    await stub.close();
+  }
+});
+
+test('retries server errors and falls back when the answer cannot be used', async () => {
+  const stub = await stubLLM((n) => [
+    { status: 500 },
+    {},
+    { content: 'I am unable to produce missions today.' }
+  ][n]);
+  const contexts = [context(1), context(2, { level: 9 })];
+  const queries = new FakeQueries(contexts);
+  const worker = new MissionWorker({ queries, llmUrl: stub.url, concurrency: 1, retryBaseMs: 10, log: silent });
+  try {
+    const run = await runToEnd(worker, {});
+    assert.equal(run.llm_retries, 1);
+    assert.equal(run.llm_requests, 3);
+    assert.equal(run.fallbacks, 1);
+    // The fallback missions are still written for the second player
+    assert.equal(run.missions_written, 6);
+    assert.equal(queries.inserted[0][2][3], 'Advance Morning System');
+  } finally {
+    await stub.close();
+  }
+});
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+SBS Daily Maintenance Benchmark
+===============================
+Compares the two ways of running the midnight tick of cron_manager.json:
+
+- legacy: what the workflow used to do. It ran three fetch queries, scored
+  characters in a Code node, then sent one UPDATE plus one INSERT per
+  character, one INSERT per broken streak and one INSERT per random event.
+- set-based: a single call to run_daily_maintenance()
+  (database/migrations/003_daily_maintenance.sql).
+
+Both paths run against identical synthetic data in a scratch schema
+(bench_daily), rebuilt from the same seed before each run, so real data is
+never touched. After each run the resulting character HP and habit streaks
+are checksummed, so the two paths can be shown to agree.
+
+n8n's Postgres node either sends each item's query separately ("independent")
+or concatenates all items of a node into one multi-statement query ("single",
+its default). --legacy-batching selects which of the two the legacy path
+reproduces.
+
+Usage:
+    python scripts/daily_maintenance_bench.py                       # 10k and 100k characters
+    python scripts/daily_maintenance_bench.py --sizes 1000,10000 --legacy-batching single
+    python scripts/daily_maintenance_bench.py --skip-legacy-above 50000 --json daily.json
+
+Requirements:
+    pip install psycopg2-binary python-dotenv colorama
+    database/migrations/003_daily_maintenance.sql applied
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import timedelta
+from typing import Dict, List, Any, Tuple
+
+from sbs_common import Fore, Style, load_env, connect_db, print_table
+
+BENCH_SCHEMA = "bench_daily"
+BENCH_TABLES = ["characters", "habits", "projects", "tasks", "events", "rng_events"]
+
+# Synthetic population: about two thirds of characters logged in within 30 days,
+# 5 habits (80% good) and one project with 3 tasks each, some coin balances negative
+SEED_SQL = """
+    SELECT setseed(%(seed)s);
+    INSERT INTO characters (id, user_id, level, hp, coins, last_login)
+    SELECT g, g, 1 + floor(random() * 20)::int, 50 + floor(random() * 51)::int,
+           floor(random() * 300)::int - 50, now() - random() * interval '45 days'
+    FROM generate_series(1, %(characters)s) g;
+    INSERT INTO habits (character_id, name, type, frequency, streak, last_completed)
+    SELECT c, 'habit ' || h, CASE WHEN random() < 0.8 THEN 'good' ELSE 'bad' END, 'daily',
+           floor(random() * 10)::int, current_date - floor(random() * 6)::int
+    FROM generate_series(1, %(characters)s) c, generate_series(1, 5) h;
+    INSERT INTO projects (id, character_id, title) SELECT g, g, 'project' FROM generate_series(1, %(characters)s) g;
+    INSERT INTO tasks (project_id, title, completed, deadline)
+    SELECT p, 'task ' || t, random() < 0.5, current_date + floor(random() * 10)::int - 5
+    FROM generate_series(1, %(characters)s) p, generate_series(1, 3) t;
+    INSERT INTO rng_events (description, effect, rarity, available)
+    SELECT 'Random event ' || g, 'none', 'common', true FROM generate_series(1, 50) g;
+    ANALYZE;
+"""
+
+CHECKSUM_SQL = """
+    SELECT (SELECT md5(string_agg(id || ':' || hp, ',' ORDER BY id)) FROM characters),
+           (SELECT md5(string_agg(id || ':' || streak, ',' ORDER BY id)) FROM habits),
+           (SELECT count(*) FROM events WHERE event_type = 'daily_random')
+"""
+
+ACTIVE_SQL = "SELECT id, hp, coins, level FROM characters WHERE last_login > now() - interval '30 days'"
+OVERDUE_HABITS_SQL = """
+    SELECT character_id, count(*) FROM habits
+    WHERE type = 'good' AND last_completed < %s GROUP BY character_id
+"""
+OVERDUE_TASKS_SQL = """
+    SELECT p.character_id, count(*) FROM projects p JOIN tasks t ON t.project_id = p.id
+    WHERE NOT t.completed AND t.deadline < %s GROUP BY p.character_id
+"""
+
+
+def build_schema(connection, characters: int, seed: int):
+    """(Re)create the scratch schema with empty copies of the tables the tick touches, then seed it"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+        for table in BENCH_TABLES:
+            cursor.execute(f"CREATE TABLE {BENCH_SCHEMA}.{table} (LIKE public.{table} INCLUDING ALL)")
+            # Own sequences, so benchmark inserts do not advance the real tables' ids
+            cursor.execute(f"CREATE SEQUENCE {BENCH_SCHEMA}.{table}_id_seq")
+            cursor.execute(f"ALTER TABLE {BENCH_SCHEMA}.{table} "
+                           f"ALTER COLUMN id SET DEFAULT nextval('{BENCH_SCHEMA}.{table}_id_seq')")
+        cursor.execute(f"SET search_path TO {BENCH_SCHEMA}, public")
+        cursor.execute(SEED_SQL, {"seed": (seed % 1000) / 1000.0, "characters": characters})
+        cursor.execute(f"SELECT setval('{BENCH_SCHEMA}.projects_id_seq', %s)", (characters,))
+
+
+class StatementRunner:
+    """Sends per-item statements the way an n8n Postgres node would, counting round trips"""
+
+    def __init__(self, cursor, batching: str):
+        self.cursor = cursor
+        self.batching = batching
+        self.round_trips = 0
+        self.statements = 0
+
+    def query(self, sql: str, params=None) -> List[Tuple]:
+        self.cursor.execute(sql, params)
+        self.round_trips += 1
+        self.statements += 1
+        return self.cursor.fetchall() if self.cursor.description else []
+
+    def per_item(self, sql: str, items: List[Tuple]):
+        if not items:
+            return
+        self.statements += len(items)
+        if self.batching == "single":
+            self.cursor.execute(";".join(self.cursor.mogrify(sql, item).decode() for item in items))
+            self.round_trips += 1
+        else:
+            for item in items:
+                self.cursor.execute(sql, item)
+                self.round_trips += 1
+
+
+def score(character: Tuple, overdue_habits: int, overdue_tasks: int) -> Tuple[int, int, str]:
+    """Calculate Daily Penalties, as in the workflow's Code node: (penalty, bonus, reason)"""
+    _, _, coins, level = character
+    penalty, reason = 0, []
+    if overdue_habits:
+        habit_penalty = min(overdue_habits * 2, 20)
+        penalty += habit_penalty
+        reason.append(f"{overdue_habits} overdue habits (-{habit_penalty} HP)")
+    if overdue_tasks:
+        task_penalty = min(overdue_tasks * 5, 25)
+        penalty += task_penalty
+        reason.append(f"{overdue_tasks} overdue tasks (-{task_penalty} HP)")
+    if coins < 0:
+        overdraft = min(abs(coins) // 10, 15)
+        if overdraft:
+            penalty += overdraft
+            reason.append(f"Overdraft penalty (-{overdraft} HP)")
+    bonus = 5 if level >= 10 and penalty == 0 else 0
+    if bonus:
+        reason.append(f"Daily wellness bonus (+{bonus} HP)")
+    return penalty, bonus, ", ".join(reason)
+
+
+def run_legacy(connection, batching: str, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT current_date")  # the database's date, as the function uses
+        run_date = cursor.fetchone()[0]
+        runner = StatementRunner(cursor, batching)
+        characters = runner.query(ACTIVE_SQL)
+        overdue_habits = dict(runner.query(OVERDUE_HABITS_SQL, (run_date - timedelta(days=2),)))
+        overdue_tasks = dict(runner.query(OVERDUE_TASKS_SQL, (run_date,)))
+
+        updates, logs = [], []
+        for character in characters:
+            penalty, bonus, reason = score(character, overdue_habits.get(character[0], 0),
+                                           overdue_tasks.get(character[0], 0))
+            if penalty or bonus:
+                updates.append((max(0, min(100, character[1] + bonus - penalty)), character[0]))
+                logs.append((character[0], reason, bonus - penalty))
+        runner.per_item("UPDATE characters SET hp = %s, updated_at = now() WHERE id = %s", updates)
+        runner.per_item("INSERT INTO events (character_id, event_type, description, hp_change) "
+                        "VALUES (%s, 'daily_maintenance', %s, %s)", logs)
+
+        broken = runner.query("UPDATE habits SET streak = 0, updated_at = now() "
+                              "WHERE type = 'good' AND last_completed < %s AND streak > 0 "
+                              "RETURNING character_id, name", (run_date - timedelta(days=2),))
+        runner.per_item("INSERT INTO events (character_id, event_type, description) "
+                        "VALUES (%s, 'streak_broken', %s)",
+                        [(character_id, f"Streak broken for habit: {name}") for character_id, name in broken])
+
+        pool = [row[0] for row in runner.query(
+            "SELECT description FROM rng_events WHERE available ORDER BY random() LIMIT 10")]
+        daily = [(character[0], rng.choice(pool))
+                 for character in characters for _ in range(rng.randint(1, 3))] if pool else []
+        runner.per_item("INSERT INTO events (character_id, event_type, description) "
+                        "VALUES (%s, 'daily_random', %s)", daily)
+
+    return {"active": len(characters), "round_trips": runner.round_trips, "statements": runner.statements}
+
+
+def run_set_based(connection) -> Dict[str, Any]:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT run_daily_maintenance()")
+        summary = cursor.fetchone()[0]
+    return {"active": summary["active_characters"], "round_trips": 1, "statements": 1, "summary": summary}
+
+
+def measure(env, path: str, characters: int, args) -> Dict[str, Any]:
+    connection = connect_db(env)
+    try:
+        build_schema(connection, characters, args.seed)
+        started = time.perf_counter()
+        if path == "legacy":
+            result = run_legacy(connection, args.legacy_batching, args.seed)
+        else:
+            result = run_set_based(connection)
+        seconds = time.perf_counter() - started
+        with connection.cursor() as cursor:
+            cursor.execute(CHECKSUM_SQL)
+            hp_digest, streak_digest, random_events = cursor.fetchone()
+        if not args.keep_schema:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP SCHEMA {BENCH_SCHEMA} CASCADE")
+    finally:
+        connection.close()
+
+    result.update({
+        "path": path if path != "legacy" else f"legacy ({args.legacy_batching})",
+        "characters": characters,
+        "seconds": round(seconds, 3),
+        "chars_per_sec": round(result["active"] / seconds) if seconds else None,
+        "random_events": random_events,
+        "digest": (hp_digest, streak_digest),
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-character vs set-based daily maintenance")
+    parser.add_argument("--sizes", type=str, default="10000,100000", help="Comma-separated character counts")
+    parser.add_argument("--legacy-batching", choices=["independent", "single"], default="independent",
+                        help="How the legacy path sends per-item statements (default: independent)")
+    parser.add_argument("--skip-legacy-above", type=int, default=None,
+                        help="Only run the set-based path for sizes above this")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the synthetic data")
+    parser.add_argument("--keep-schema", action="store_true",
+                        help=f"Leave the last run's {BENCH_SCHEMA} schema in place for inspection")
+    parser.add_argument("--json", type=str, help="Write the results to this JSON file")
+    parser.add_argument("--config", type=str, default=None, help="Path to environment configuration file")
+    args = parser.parse_args()
+
+    env = load_env(args.config)
+    connection = connect_db(env)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regprocedure('public.run_daily_maintenance(date, interval)')")
+        installed = cursor.fetchone()[0]
+    connection.close()
+    if not installed:
+        print(f"{Fore.RED}❌ run_daily_maintenance() not found - apply "
+              f"database/migrations/003_daily_maintenance.sql first{Style.RESET_ALL}")
+        sys.exit(1)
+
+    rows, mismatched = [], []
+    try:
+        for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+            paths = ["set-based"]
+            if args.skip_legacy_above is None or size <= args.skip_legacy_above:
+                paths.insert(0, "legacy")
+            results = []
+            for path in paths:
+                print(f"{Fore.YELLOW}⏱️  {path}: {size:,} characters...{Style.RESET_ALL}")
+                results.append(measure(env, path, size, args))
+            if len(results) == 2:
+                legacy, set_based = results
+                set_based["speedup"] = round(legacy["seconds"] / set_based["seconds"], 1)
+                set_based["match"] = legacy["match"] = legacy["digest"] == set_based["digest"]
+                if not set_based["match"]:
+                    mismatched.append(size)
+            rows.extend(results)
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}⏹️  Benchmark interrupted - reporting completed runs{Style.RESET_ALL}")
+
+    print()
+    print_table(rows, ["path", "characters", "active", "seconds", "round_trips", "statements",
+                       "chars_per_sec", "random_events", "speedup", "match"])
+
+    if mismatched:
+        print(f"\n{Fore.RED}🚨 HP/streak results differ between paths at {mismatched} characters{Style.RESET_ALL}")
+    elif any("match" in row for row in rows):
+        print(f"\n{Fore.GREEN}✅ Both paths produced identical HP and streaks{Style.RESET_ALL}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([{k: v for k, v in row.items() if k != "digest"} for row in rows], f, indent=2, default=str)
+        print(f"{Fore.GREEN}📄 Results written to {args.json}{Style.RESET_ALL}")
+
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+SBS Habit Check-in Benchmark
+============================
+Compares check-in latency of the two shapes of habit_checkin.json:
+
+- multi-hop: what the workflow used to do. It fetched the habit, updated the
+  streak through the query service, then called subflow-character-progression,
+  subflow-achievement-check, subflow-log-event and subflow-log-system-event
+  before responding. Each call is a separate webhook execution that commits
+  on its own.
+- single: one query-service call to habit_checkin()
+  (database/migrations/007_habit_checkin.sql), which applies the whole
+  check-in in one transaction.
+
+A local stand-in plays n8n and pg-listener: an HTTP server that runs each
+hop's SQL against a scratch schema (bench_checkin). The schema is rebuilt from
+the same seed for each path, so real data is never touched. Both paths check
+in the same habits in the same order with the function's reward rules, and
+differ only in hops and transactions. --hop-overhead-ms adds a fixed cost to
+every n8n webhook execution (the query service has none), to model n8n's own
+per-execution overhead on top of the round trips.
+
+After each run the characters' level, XP, coins and HP are compared with the
+single-transaction path. Characters that differ lost an update when two of
+their habits were checked in concurrently.
+
+Usage:
+    python scripts/habit_checkin_bench.py                                # 1k characters, 5k check-ins, 8 workers
+    python scripts/habit_checkin_bench.py --concurrency 32 --hop-overhead-ms 10
+    python scripts/habit_checkin_bench.py --characters 5000 --checkins 20000 --json checkin.json
+
+Requirements:
+    pip install requests psycopg2-binary python-dotenv colorama
+    database/migrations/007_habit_checkin.sql applied
+"""
+
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+import requests
+
+from sbs_common import Fore, Style, load_env, connect_db, percentile, print_table
+
+BENCH_SCHEMA = "bench_checkin"
+BENCH_TABLES = ["characters", "skills", "habits", "events", "system_logs", "achievements"]
+PATHS = ["multi-hop", "single"]
+
+# Synthetic population: 3 skills and 5 habits per character (80% good, the fifth
+# without a skill), streaks up to 100 days, every habit last completed yesterday
+SEED_SQL = """
+    SELECT setseed(%(seed)s);
+    INSERT INTO characters (id, user_id, level, xp, total_xp, hp, max_hp, coins, xp_multiplier, prestige_level)
+    SELECT g, g, 1, 0, 0, 100, 100, 100, CASE WHEN random() < 0.2 THEN 1.10 ELSE 1.00 END, 0
+    FROM generate_series(1, %(characters)s) g;
+    INSERT INTO skills (id, character_id, name, xp, level)
+    SELECT (c - 1) * 3 + s, c, 'skill ' || s, floor(random() * 200)::int, 1 + floor(random() * 3)::int
+    FROM generate_series(1, %(characters)s) c, generate_series(1, 3) s;
+    INSERT INTO habits (id, character_id, skill_id, name, type, frequency, xp_value, streak, last_completed)
+    SELECT (c - 1) * 5 + h, c, CASE WHEN h < 5 THEN (c - 1) * 3 + 1 + h %% 3 END, 'habit ' || h,
+           CASE WHEN random() < 0.8 THEN 'good' ELSE 'bad' END, 'daily',
+           (ARRAY[0, 10, 15, 25])[1 + floor(random() * 4)::int], floor(random() * 100)::int, current_date - 1
+    FROM generate_series(1, %(characters)s) c, generate_series(1, 5) h;
+    ANALYZE;
+"""
+
+STATE_SQL = "SELECT id, level, total_xp, coins, hp, max_hp FROM characters"
+COUNTS_SQL = """
+    SELECT (SELECT count(*) FROM events), (SELECT count(*) FROM system_logs),
+           (SELECT md5(string_agg(id || ':' || xp || ':' || level, ',' ORDER BY id)) FROM skills)
+"""
+
+
+def build_schema(connection, characters: int, seed: int):
+    """(Re)create the scratch schema with empty copies of the tables a check-in touches, then seed it"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+        for table in BENCH_TABLES:
+            cursor.execute(f"CREATE TABLE {BENCH_SCHEMA}.{table} (LIKE public.{table} INCLUDING ALL)")
+            if table != "system_logs":
+                # Own sequences, so benchmark inserts do not advance the real tables' ids
+                cursor.execute(f"CREATE SEQUENCE {BENCH_SCHEMA}.{table}_id_seq")
+                cursor.execute(f"ALTER TABLE {BENCH_SCHEMA}.{table} "
+                               f"ALTER COLUMN id SET DEFAULT nextval('{BENCH_SCHEMA}.{table}_id_seq')")
+        cursor.execute(f"SET search_path TO {BENCH_SCHEMA}, public")
+        cursor.execute(SEED_SQL, {"seed": (seed % 1000) / 1000.0, "characters": characters})
+        for table, rows in (("characters", characters), ("skills", characters * 3), ("habits", characters * 5)):
+            cursor.execute(f"SELECT setval('{BENCH_SCHEMA}.{table}_id_seq', %s)", (rows,))
+
+
+def calculate_rewards(habit: Dict[str, Any], character: Dict[str, Any]) -> Dict[str, Any]:
+    """habit_checkin()'s reward rules: streak multiplier, habit coins, skill XP and scaled character XP"""
+    new_streak = (habit["streak"] or 0) + 1
+    multiplier = 3.0 if new_streak >= 90 else 2.0 if new_streak >= 30 else 1.5 if new_streak >= 7 else 1.0
+    base_xp = habit["xp_value"] or 10
+    habit_xp = int(base_xp * multiplier)
+    return {
+        "new_streak": new_streak,
+        "coins": int((base_xp // 2) * multiplier),
+        "skill_xp": int(habit_xp * 0.4),
+        "xp": int(habit_xp * float(character["xp_multiplier"] or 1) * (1 + (character["prestige_level"] or 0) * 0.05)),
+    }
+
+
+def level_for(total_xp: int) -> Tuple[int, int]:
+    """(level, XP into that level): level N -> N+1 costs 100 + 50 * N"""
+    level, floor = 1, 0
+    while floor + 100 + level * 50 <= total_xp:
+        floor += 100 + level * 50
+        level += 1
+    return level, total_xp - floor
+
+
+class StandIn:
+    """n8n webhooks and the pg-listener query service, backed by the scratch schema"""
+
+    def __init__(self, env, hop_overhead_ms: float):
+        self.env = env
+        self.hop_overhead = hop_overhead_ms / 1000.0
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.connections = []
+        self.hops = 0
+        self.statements = 0
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+            def do_POST(handler):
+                length = int(handler.headers.get("Content-Length", 0))
+                route = stand_in.routes.get(handler.path)
+                try:
+                    body = json.loads(handler.rfile.read(length) or b"{}")
+                    status, result = (200, route(body)) if route else (404, {"error": "Unknown webhook"})
+                except Exception as e:
+                    status, result = 500, {"error": str(e).splitlines()[0]}
+                payload = json.dumps(result, default=str).encode()
+                handler.send_response(status)
+                handler.send_header("Content-Type", "application/json")
+                handler.send_header("Content-Length", str(len(payload)))
+                handler.end_headers()
+                handler.wfile.write(payload)
+
+            def log_message(handler, format, *args):
+                pass
+
+        self.routes = {
+            "/webhook/habit-checkin-multi-hop": self.checkin_multi_hop,
+            "/webhook/habit-checkin": self.checkin_single,
+            "/webhook/subflow-character-progression": self.character_progression,
+            "/webhook/subflow-achievement-check": self.achievement_check,
+            "/webhook/subflow-log-event": self.log_event,
+            "/webhook/subflow-log-system-event": self.log_system_event,
+            "/query/habit_streak_update": self.habit_streak_update,
+            "/query/habit_checkin": self.habit_checkin,
+        }
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        for connection in self.connections:
+            connection.close()
+
+    def _cursor(self):
+        # One autocommit connection per handler thread, like one n8n Postgres credential per execution
+        if not hasattr(self.local, "connection"):
+            self.local.connection = connect_db(self.env)
+            self.local.connection.cursor().execute(f"SET search_path TO {BENCH_SCHEMA}, public")
+            with self.lock:
+                self.connections.append(self.local.connection)
+        return self.local.connection.cursor()
+
+    def _query(self, sql: str, params=()) -> List[Dict[str, Any]]:
+        with self.lock:
+            self.statements += 1
+        with self._cursor() as cursor:
+            cursor.execute(sql, params)
+            if not cursor.description:
+                return []
+            columns = [column.name for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def _call(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        with self.lock:
+            self.hops += 1
+        response = self.local.session.post(f"{self.url}{path}", json=body, timeout=30)
+        response.raise_for_status()
+        return response.json()
+
+    def _webhook(self):
+        if self.hop_overhead:
+            time.sleep(self.hop_overhead)
+
+    # -- multi-hop flow --------------------------------------------------------------
+
+    def checkin_multi_hop(self, body):
+        self._webhook()
+        rows = self._query("SELECT h.*, c.xp_multiplier, c.prestige_level FROM habits h "
+                           "JOIN characters c ON c.id = h.character_id WHERE h.id = %s", (body["habit_id"],))
+        if not rows:
+            return {"success": False, "message": "Habit not found"}
+        habit = rows[0]
+        if habit["last_completed"] and habit["last_completed"].isoformat() >= body["date"]:
+            return {"success": False, "message": "Habit already completed today"}
+        rewards = calculate_rewards(habit, habit)
+
+        self._call("/query/habit_streak_update", {"params": [rewards["new_streak"], body["date"], habit["id"]]})
+        progression = self._call("/webhook/subflow-character-progression", {
+            "character_id": habit["character_id"], "skill_id": habit["skill_id"], "xp_gained": rewards["xp"],
+            "coins_gained": rewards["coins"], "skill_xp_gained": rewards["skill_xp"],
+        })
+        self._call("/webhook/subflow-achievement-check", {"character_id": habit["character_id"]})
+        self._call("/webhook/subflow-log-event", {
+            "character_id": habit["character_id"], "event_type": "habit_completed", "xp_change": rewards["xp"],
+            "coins_change": rewards["coins"],
+            "description": f"Habit completed: {habit['name']} (streak: {rewards['new_streak']})",
+        })
+        self._call("/webhook/subflow-log-system-event", {
+            "character_id": habit["character_id"],
+            "detail": {"habit_id": habit["id"], "streak_count": rewards["new_streak"], "xp_gained": rewards["xp"],
+                       "coins_gained": rewards["coins"]},
+        })
+        return {"success": True, "xpEarned": rewards["xp"], "newStreak": rewards["new_streak"],
+                "level": progression["level"]}
+
+    def habit_streak_update(self, body):
+        return self._query("UPDATE habits SET streak = %s, last_completed = %s WHERE id = %s RETURNING *",
+                           body["params"])[0]
+
+    def character_progression(self, body):
+        self._webhook()
+        character = self._query("SELECT level, total_xp FROM characters WHERE id = %s", (body["character_id"],))[0]
+        total_xp = character["total_xp"] + body["xp_gained"]
+        level, xp = level_for(total_xp)
+        levels_gained = max(level - character["level"], 0)
+        if body["skill_id"]:
+            self._query("UPDATE skills SET xp = xp + %(gain)s, "
+                        "level = CASE WHEN xp + %(gain)s >= level * 100 THEN level + 1 ELSE level END, "
+                        "updated_at = now() WHERE id = %(id)s", {"gain": body["skill_xp_gained"], "id": body["skill_id"]})
+        # The subflow writes the level and XP it computed from its own read, as absolute values
+        self._query("UPDATE characters SET level = GREATEST(level, %s), xp = %s, total_xp = %s, "
+                    "coins = coins + %s, max_hp = max_hp + %s, hp = LEAST(hp + %s, max_hp + %s), updated_at = now() "
+                    "WHERE id = %s", (level, xp, total_xp, body["coins_gained"] + levels_gained * 50,
+                                      levels_gained * 10, levels_gained * 10, levels_gained * 10, body["character_id"]))
+        if levels_gained:
+            self._call("/webhook/subflow-log-event", {
+                "character_id": body["character_id"], "event_type": "level_up", "xp_change": body["xp_gained"],
+                "coins_change": levels_gained * 50, "hp_change": levels_gained * 10,
+                "description": f"Level up! Reached level {level} (gained {levels_gained} levels)",
+            })
+        return {"character_id": body["character_id"], "level": level}
+
+    def achievement_check(self, body):
+        self._webhook()
+        return {"titles": [row["title"] for row in self._query(
+            "SELECT title FROM achievements WHERE character_id = %s", (body["character_id"],))]}
+
+    def log_event(self, body):
+        self._webhook()
+        self._query("INSERT INTO events (character_id, event_type, xp_change, coins_change, hp_change, description) "
+                    "VALUES (%s, %s, %s, %s, %s, %s)",
+                    (body["character_id"], body["event_type"], body.get("xp_change", 0),
+                     body.get("coins_change", 0), body.get("hp_change", 0), body["description"]))
+        return {"success": True}
+
+    def log_system_event(self, body):
+        self._webhook()
+        self._query("INSERT INTO system_logs (id, character_id, event_type, log_level, event_category, "
+                    "event_details, source) VALUES (%s, %s, 'habit_checkin', 'info', 'habit', %s, "
+                    "'habit_checkin_workflow')",
+                    (f"habit_checkin_{uuid.uuid4()}", body["character_id"], json.dumps(body["detail"])))
+        return {"success": True}
+
+    # -- single-transaction flow -----------------------------------------------------
+
+    def checkin_single(self, body):
+        self._webhook()
+        result = self._call("/query/habit_checkin", {"params": [body["habit_id"], body["date"]]})["data"]["result"]
+        if not result["success"]:
+            return {"success": False, "message": result["message"]}
+        return {"success": True, "xpEarned": result["xp_earned"], "newStreak": result["new_streak"],
+                "level": result["level"]}
+
+    def habit_checkin(self, body):
+        rows = self._query("SELECT habit_checkin(%s, %s) AS result", body["params"])
+        return {"success": True, "data": rows[0], "count": 1}
+
+
+def run_path(env, path: str, plan: List[Tuple[int, str]], args) -> Dict[str, Any]:
+    connection = connect_db(env)
+    try:
+        build_schema(connection, args.characters, args.seed)
+    finally:
+        connection.close()
+
+    stand_in = StandIn(env, args.hop_overhead_ms)
+    stand_in.start()
+    endpoint = f"{stand_in.url}/webhook/habit-checkin" + ("-multi-hop" if path == "multi-hop" else "")
+    latencies: List[float] = []
+    counts = {"applied": 0, "already_done": 0, "errors": 0}
+    errors: List[str] = []
+    lock = threading.Lock()
+    next_index = iter(range(len(plan)))
+
+    def worker():
+        session = requests.Session()
+        while True:
+            with lock:
+                index = next(next_index, None)
+            if index is None:
+                break
+            habit_id, checkin_date = plan[index]
+            started = time.perf_counter()
+            try:
+                response = session.post(endpoint, json={"habit_id": habit_id, "date": checkin_date}, timeout=30)
+                response.raise_for_status()
+                outcome = "applied" if response.json()["success"] else "already_done"
+            except Exception as e:
+                outcome = "errors"
+                if len(errors) < 3:
+                    errors.append(str(e).splitlines()[0][:160])
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with lock:
+                counts[outcome] += 1
+                if outcome != "errors":
+                    latencies.append(elapsed_ms)
+        session.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+    stand_in.stop()
+
+    connection = connect_db(env)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SET search_path TO {BENCH_SCHEMA}, public")
+            cursor.execute(STATE_SQL)
+            state = {row[0]: row[1:] for row in cursor.fetchall()}
+            cursor.execute(COUNTS_SQL)
+            events, logs, skills_digest = cursor.fetchone()
+            if not args.keep_schema:
+                cursor.execute(f"DROP SCHEMA {BENCH_SCHEMA} CASCADE")
+    finally:
+        connection.close()
+
+    latencies.sort()
+    done = counts["applied"] + counts["already_done"]
+    return {
+        "path": path,
+        "checkins": len(plan),
+        **counts,
+        "per_sec": round(done / seconds, 1) if seconds else None,
+        "hops": round(stand_in.hops / done, 1) if done else None,
+        "statements": round(stand_in.statements / done, 1) if done else None,
+        "p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+        "events": events,
+        "system_logs": logs,
+        "sample_errors": errors,
+        "state": state,
+        "skills_digest": skills_digest,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the multi-hop habit check-in against habit_checkin()")
+    parser.add_argument("--characters", type=int, default=1000, help="Characters to seed, 5 habits each (default: 1000)")
+    parser.add_argument("--checkins", type=int, default=5000, help="Check-ins per path (default: 5000)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients (default: 8)")
+    parser.add_argument("--hop-overhead-ms", type=float, default=0,
+                        help="Fixed cost added to every n8n webhook execution (default: 0)")
+    parser.add_argument("--paths", type=str, default=",".join(PATHS), help=f"Comma-separated subset of {PATHS}")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the synthetic data and check-in order")
+    parser.add_argument("--keep-schema", action="store_true",
+                        help=f"Leave the last run's {BENCH_SCHEMA} schema in place for inspection")
+    parser.add_argument("--json", type=str, help="Write the results to this JSON file")
+    parser.add_argument("--config", type=str, default=None, help="Path to environment configuration file")
+    args = parser.parse_args()
+
+    paths = [p.strip() for p in args.paths.split(",") if p.strip()]
+    unknown = set(paths) - set(PATHS)
+    if unknown:
+        parser.error(f"unknown path(s) {', '.join(sorted(unknown))} (choose from {', '.join(PATHS)})")
+
+    env = load_env(args.config)
+    connection = connect_db(env)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regprocedure('public.habit_checkin(integer, date)')")
+        installed = cursor.fetchone()[0]
+    connection.close()
+    if not installed:
+        print(f"{Fore.RED}❌ habit_checkin() not found - apply "
+              f"database/migrations/007_habit_checkin.sql first{Style.RESET_ALL}")
+        sys.exit(1)
+
+    # Every habit once per pass in a shuffled order, each pass one day later
+    rng = random.Random(args.seed)
+    habits = list(range(1, args.characters * 5 + 1))
+    rng.shuffle(habits)
+    today = date.today()
+    plan = [(habits[i % len(habits)], (today + timedelta(days=i // len(habits))).isoformat())
+            for i in range(args.checkins)]
+
+    rows = []
+    try:
+        for path in paths:
+            print(f"{Fore.YELLOW}⏱️  {path}: {args.checkins:,} check-ins, {args.concurrency} clients...{Style.RESET_ALL}")
+            rows.append(run_path(env, path, plan, args))
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}⏹️  Benchmark interrupted - reporting completed runs{Style.RESET_ALL}")
+
+    if not rows:
+        sys.exit(1)
+    reference = next((row for row in rows if row["path"] == "single"), None)
+    if reference:
+        for row in rows:
+            row["diverged"] = sum(1 for cid, values in row["state"].items() if reference["state"].get(cid) != values)
+            row["skills_match"] = row["skills_digest"] == reference["skills_digest"]
+
+    print()
+    print_table(rows, ["path", "checkins", "applied", "already_done", "errors", "per_sec", "hops", "statements",
+                       "p50_ms", "p95_ms", "p99_ms", "events", "system_logs", "diverged"])
+    for row in rows:
+        for error in row["sample_errors"]:
+            print(f"{Fore.RED}  {row['path']}: {error}{Style.RESET_ALL}")
+
+    multi_hop = next((row for row in rows if row["path"] == "multi-hop"), None)
+    if multi_hop and reference and multi_hop["p99_ms"] and reference["p99_ms"]:
+        print(f"\n{Fore.GREEN}⚡ single: p50 {multi_hop['p50_ms'] / reference['p50_ms']:.1f}x and "
+              f"p99 {multi_hop['p99_ms'] / reference['p99_ms']:.1f}x faster than multi-hop{Style.RESET_ALL}")
+    diverged = [row for row in rows if row.get("diverged")]
+    for row in diverged:
+        print(f"{Fore.YELLOW}⚠️  {row['path']}: {row['diverged']} characters differ from the single-transaction "
+              f"result (updates lost between hops){Style.RESET_ALL}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([{k: v for k, v in row.items() if k not in ("state", "skills_digest")} for row in rows],
+                      f, indent=2, default=str)
+        print(f"{Fore.GREEN}📄 Results written to {args.json}{Style.RESET_ALL}")
+
+    sys.exit(1 if any(row["errors"] for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,751 @@
+#!/usr/bin/env python3
+"""
+SBS Index Advisor
+=================
+Proposes composite, partial and covering indexes for the SQL the n8n
+workflows actually run.
+
+1. Extracts every statement from the Postgres nodes under n8n/, the
+   queries those workflows send to the subflow-database-query webhook, the
+   named statements of pg-listener's query service and the statements inside
+   the database's PL/pgSQL functions (run_daily_maintenance(), ...).
+   n8n expressions ({{ ... }}) and function arguments and variables become
+   bind parameters, so each statement is planned as a generic plan, the way
+   a prepared statement would be.
+2. Copies every table and index of the database into a scratch schema
+   (index_advisor) and fills it with synthetic rows: values follow each
+   column's type, foreign keys point at existing rows and CHECK (... IN ...)
+   columns only take their allowed values.
+3. EXPLAINs each statement and collects sequential scans, and index scans
+   that still filter rows, that cost more than --min-cost. Their
+   conditions are split into equality, range and
+   constant predicates. Low-cardinality constants (type = 'good',
+   NOT completed) become a partial index predicate, equality columns lead
+   the key and the first range column ends it. Hash joins that scan a large
+   table to match a few rows from the other side get an index on the join
+   key. Narrow scans also get an INCLUDE variant, so they can become
+   index-only scans.
+4. Creates each candidate in a rolled-back transaction, re-plans the
+   statement and keeps the candidate only if the cost dropped by
+   --min-improvement.
+
+The report also lists existing single-column indexes on columns with a few
+distinct values that no plan used. --write-migration writes the kept indexes
+as a migration.
+
+Usage:
+    python scripts/index_advisor.py                                   # report only
+    python scripts/index_advisor.py --rows 100000 --min-cost 2000
+    python scripts/index_advisor.py --write-migration database/migrations/006_workflow_indexes.sql
+    python scripts/index_advisor.py --show-failed --json advisor.json
+
+Requirements:
+    pip install psycopg2-binary python-dotenv colorama
+    A database with schema.sql applied (real rows are never read or written)
+"""
+
+import re
+import json
+import argparse
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from sbs_common import (Fore, Style, PROJECT_ROOT, WORKFLOW_DIR, QUERY_STATEMENTS_FILE, load_env, connect_db,
+                        iter_workflows, print_table, query_service_statements)
+
+SCRATCH_SCHEMA = "index_advisor"
+SQL_KEYWORDS = ("select", "with", "insert", "update", "delete")
+EXPRESSION = re.compile(r"\{\{.*?\}\}", re.S)
+PARAM = re.compile(r"\$(\d+)\b")
+# "query": "..." inside the JSON body an httpRequest node posts to subflow-database-query
+SUBFLOW_QUERY = re.compile(r'"query"\s*:\s*"((?:[^"\\]|\\.)*)"', re.S)
+# A column reference in VERBOSE plan output: alias.column, optionally parenthesized and cast
+COLUMN_REF = r"\(*(?P<alias>\w+)\.(?P<column>\w+)\)*(?:::[\w ]+(?:\(\d+\))?(?:\[\])?)?"
+COMPARISON = re.compile(rf"^{COLUMN_REF}\s*(?P<op>=|<>|<=|>=|<|>|~~\*?|!~~)\s*(?P<value>.+)$", re.S)
+NULL_TEST = re.compile(rf"^{COLUMN_REF}\s+(?P<op>IS NULL|IS NOT NULL)$")
+BOOL_TEST = re.compile(rf"^(?P<negated>NOT\s+)?{COLUMN_REF}$")
+# Scans whose filters can suggest an index; index and bitmap scans only when rows are filtered after the index
+SCAN_NODES = ("Seq Scan", "Bitmap Heap Scan", "Index Scan")
+CONSTANT = re.compile(r"^\(*('(?:[^']|'')*'|-?\d+(?:\.\d+)?|true|false)\)*(?:::[\w ]+(?:\(\d+\))?(?:\[\])?)?\)*$")
+
+
+# ---------------------------------------------------------------------------
+# Statement extraction
+# ---------------------------------------------------------------------------
+
+def to_bind_parameters(sql: str) -> str:
+    """Replace n8n expressions with $n parameters (or a literal inside quoted strings)"""
+    next_param = max([int(n) for n in PARAM.findall(sql)] + [0])
+    out, position, quoted = [], 0, False
+    for match in EXPRESSION.finditer(sql):
+        quoted ^= sql.count("'", position, match.start()) % 2 == 1
+        out.append(sql[position:match.start()])
+        if quoted:
+            out.append("1")
+        else:
+            next_param += 1
+            out.append(f"${next_param}")
+        position = match.end()
+    out.append(sql[position:])
+    return "".join(out)
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split on semicolons outside quoted strings"""
+    statements, current, quoted = [], [], False
+    for char in sql:
+        if char == "'":
+            quoted = not quoted
+        if char == ";" and not quoted:
+            statements.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    statements.append("".join(current).strip())
+    return [s for s in statements if s]
+
+
+def display_path(path: Path) -> str:
+    for base in (WORKFLOW_DIR, PROJECT_ROOT):
+        if path.is_relative_to(base):
+            return path.relative_to(base).as_posix()
+    return str(path)
+
+
+def extract_statements(root: Path) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """All plannable statements in a workflow file or directory as {source, sql}, plus unreadable files"""
+    statements, unreadable = [], []
+    for path, workflow, error in iter_workflows(root) if root.is_dir() else iter_workflows(root.parent):
+        if not root.is_dir() and path != root:
+            continue
+        if workflow is None:
+            unreadable.append(f"{display_path(path)}: {error}")
+            continue
+        for node in workflow.get("nodes", []):
+            parameters = node.get("parameters", {})
+            raw = []
+            if node.get("type") == "n8n-nodes-base.postgres" and isinstance(parameters.get("query"), str):
+                raw.append(parameters["query"])
+            elif node.get("type") == "n8n-nodes-base.httpRequest" \
+                    and "subflow-database-query" in str(parameters.get("url", "")):
+                body = str(parameters.get("jsonBody", ""))
+                raw.extend(json.loads(f'"{m}"') for m in SUBFLOW_QUERY.findall(body))
+            for text in raw:
+                sql = to_bind_parameters(text.lstrip("=").strip())
+                parts = split_statements(sql)
+                for index, statement in enumerate(parts):
+                    if not statement.lower().startswith(SQL_KEYWORDS):
+                        continue
+                    suffix = f" #{index + 1}" if len(parts) > 1 else ""
+                    statements.append({
+                        "source": f"{display_path(path)} :: {node.get('name')}{suffix}",
+                        "sql": statement,
+                    })
+    return statements, unreadable
+
+
+FUNCTIONS_SQL = """
+    SELECT p.proname, p.prosrc, COALESCE(p.proargnames, '{}'),
+           ARRAY(SELECT format_type(t, NULL) FROM unnest(p.proargtypes) t)
+    FROM pg_proc p
+    JOIN pg_namespace n ON n.oid = p.pronamespace
+    JOIN pg_language l ON l.oid = p.prolang
+    WHERE n.nspname = 'public' AND l.lanname = 'plpgsql' AND p.prorettype <> 'trigger'::regtype
+    ORDER BY p.proname
+"""
+# name [CONSTANT] type [:= ...]; in a DECLARE section
+DECLARATION = re.compile(r"^\s*(\w+)\s+(?:CONSTANT\s+)?([\w ]+?(?:\(\d+(?:,\s*\d+)?\))?(?:\[\])?)\s*(?:(?::=|=|DEFAULT)\s.*)?$",
+                         re.S | re.I)
+# Control-flow prefixes in front of a statement: IF ... THEN, ELSE, LOOP, BEGIN
+CONTROL_PREFIX = re.compile(r"^(?:(?:ELS)?IF\b.*?\bTHEN\b|ELSE\b|LOOP\b|BEGIN\b|END\s+(?:IF|LOOP)\b)\s*", re.S | re.I)
+FOR_QUERY = re.compile(r"^FOR\s+\w+\s+IN\s+(.*?)\s+LOOP\b", re.S | re.I)
+
+
+def function_body_statements(body: str, variables: Dict[str, str]) -> List[str]:
+    """The SQL statements of a PL/pgSQL body, with its arguments and variables as typed $n parameters"""
+    body = re.sub(r"--[^\n]*", "", body)
+    declare, code = re.split(r"\bBEGIN\b", body, maxsplit=1, flags=re.I) if re.match(r"\s*DECLARE\b", body, re.I) \
+        else ("", body)
+    for line in split_statements(re.sub(r"^\s*DECLARE\b", "", declare, flags=re.I)):
+        match = DECLARATION.match(line)
+        if match:
+            variables.setdefault(match.group(1), match.group(2).strip())
+
+    statements = []
+    for statement in split_statements(code):
+        previous = None
+        while previous != statement:
+            previous, statement = statement, CONTROL_PREFIX.sub("", statement).strip()
+        loop = FOR_QUERY.match(statement)
+        if loop:
+            statement = loop.group(1)
+        statement = re.sub(r"^(?:RETURN\s+QUERY|PERFORM)\b", lambda m: "" if "QUERY" in m.group(0).upper() else "SELECT",
+                           statement, flags=re.I).strip()
+        if not statement.lower().startswith(SQL_KEYWORDS):
+            continue
+        if variables:
+            names = "|".join(map(re.escape, variables))
+            target = rf"(?:{names})(?:\.\w+)?"
+            statement = re.sub(rf"\bINTO\s+(?:STRICT\s+)?{target}(?:\s*,\s*{target})*\b", "", statement, flags=re.I)
+            # Bare identifiers only: not qualified columns, output names or anything inside quotes
+            used: Dict[str, str] = {}
+
+            def parameter(match):
+                used.setdefault(match.group(1), f"${len(used) + 1}::{variables[match.group(1)]}")
+                return used[match.group(1)]
+
+            parts = re.split(r"('(?:[^']|'')*')", statement)
+            statement = "".join(part if part.startswith("'") else re.sub(
+                rf"(?<![.\w])(?<!AS )({names})\b(?!\s*\.)", parameter, part) for part in parts)
+        statements.append(statement)
+    return statements
+
+
+def extract_function_statements(connection) -> List[Dict[str, Any]]:
+    """Statements inside the PL/pgSQL functions of the database (run_daily_maintenance(), habit_checkin(), ...)"""
+    statements = []
+    with connection.cursor() as cursor:
+        cursor.execute(FUNCTIONS_SQL)
+        functions = cursor.fetchall()
+    connection.rollback()
+    for name, body, argument_names, argument_types in functions:
+        variables = {arg: sql_type for arg, sql_type in zip(argument_names, argument_types) if arg}
+        parts = function_body_statements(body, variables)
+        for index, statement in enumerate(parts):
+            suffix = f" #{index + 1}" if len(parts) > 1 else ""
+            statements.append({"source": f"function {name}(){suffix}", "sql": statement})
+    return statements
+
+
+def extract_service_statements() -> List[Dict[str, Any]]:
+    """Named statements the query service runs for the workflows (POST /query/:name)"""
+    return [
+        {"source": f"{display_path(QUERY_STATEMENTS_FILE)} :: {name}", "sql": statement["sql"]}
+        for name, statement in query_service_statements().items()
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Scratch schema with synthetic data
+# ---------------------------------------------------------------------------
+
+TABLES_SQL = """
+    SELECT c.relname
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p') AND NOT c.relispartition
+    ORDER BY c.relname
+"""
+
+COLUMNS_SQL = """
+    SELECT a.attname, format_type(a.atttypid, a.atttypmod), t.typcategory, a.attnotnull,
+           a.atttypmod - 4 AS max_length
+    FROM pg_attribute a
+    JOIN pg_type t ON t.oid = a.atttypid
+    WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped AND a.attgenerated = ''
+    ORDER BY a.attnum
+"""
+
+CONSTRAINTS_SQL = """
+    SELECT con.contype, pg_get_constraintdef(con.oid),
+           ARRAY(SELECT a.attname FROM unnest(con.conkey) k JOIN pg_attribute a
+                 ON a.attrelid = con.conrelid AND a.attnum = k ORDER BY a.attnum),
+           con.confrelid::regclass::text
+    FROM pg_constraint con
+    WHERE con.conrelid = %s::regclass AND con.contype IN ('p', 'u', 'f', 'c')
+"""
+
+INDEXES_SQL = """
+    SELECT i.relname, pg_get_indexdef(i.oid)
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    JOIN pg_class t ON t.oid = x.indrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    WHERE n.nspname = 'public' AND t.relname = ANY(%s) AND NOT t.relispartition
+"""
+
+
+def column_expression(column: Dict[str, Any], table: str, foreign: Dict[str, str],
+                      allowed: Dict[str, List[str]], unique: set, rows: Dict[str, int]) -> str:
+    """SQL producing a synthetic value for one column of row g"""
+    name, sql_type, category = column["name"], column["type"], column["category"]
+    if name in foreign:
+        target_rows = rows.get(foreign[name].split(".")[-1], 1)
+        value = f"(1 + floor(random() * {target_rows}))::int"
+    elif name in allowed:
+        choices = ", ".join(allowed[name])
+        value = f"(ARRAY[{choices}])[1 + floor(random() * {len(allowed[name])})::int]"
+    elif name in unique and category in ("N", "S", "D"):
+        value = {"N": "g", "S": f"'{name}-' || g", "D": "now() - g * interval '1 second'"}[category]
+    elif category == "N":
+        precision = re.match(r"numeric\((\d+),(\d+)\)", sql_type)
+        if precision:
+            digits, scale = int(precision.group(1)), int(precision.group(2))
+            value = f"round((random() * {10 ** (digits - scale) - 1})::numeric, {scale})"
+        else:
+            value = "floor(random() * 100)"
+    elif category == "B":
+        value = "random() < 0.5"
+    elif category == "D":
+        value = "now() - random() * interval '365 days'"
+    elif category == "S":
+        value = f"'{name} ' || floor(random() * 50)::int"
+    elif sql_type in ("json", "jsonb"):
+        value = "'{}'"
+    elif category == "A":
+        value = "'{}'"
+    elif category == "T":
+        value = "interval '1 day'"
+    elif sql_type == "uuid":
+        value = "md5(g::text)::uuid"
+    else:
+        value = "NULL"
+
+    if category == "S" and column["max_length"] > 0 and name not in allowed:
+        value = f"left({value}, {column['max_length']})"
+    value = f"({value})::{sql_type}"
+    # Some NULLs in optional, non-key columns so IS NULL predicates have something to find
+    if not column["not_null"] and name not in foreign and name not in unique:
+        value = f"CASE WHEN random() < 0.1 THEN NULL ELSE {value} END"
+    return value
+
+
+def build_scratch_schema(connection, rows: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    """Copy public's tables and indexes into the scratch schema and fill them; returns table metadata"""
+    tables: Dict[str, Dict[str, Any]] = {}
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCRATCH_SCHEMA} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {SCRATCH_SCHEMA}")
+        cursor.execute(TABLES_SQL)
+        for (table,) in cursor.fetchall():
+            cursor.execute(COLUMNS_SQL, (f"public.{table}",))
+            columns = [{"name": r[0], "type": r[1], "category": r[2], "not_null": r[3], "max_length": r[4]}
+                       for r in cursor.fetchall()]
+            cursor.execute(CONSTRAINTS_SQL, (f"public.{table}",))
+            allowed, unique = {}, set()
+            constraints = cursor.fetchall()
+            foreign = {keys[0]: target for kind, _, keys, target in constraints if kind == "f" and len(keys) == 1}
+            for kind, definition, keys, target in constraints:
+                if kind in ("p", "u"):
+                    # One distinct column per key keeps rows unique; ON CONFLICT drops the rest
+                    unique.update([column for column in keys if column not in foreign][:1] or keys[:1])
+                elif kind == "c" and len(keys) == 1:
+                    literals = re.findall(r"'((?:[^']|'')*)'", definition)
+                    if literals and (" IN " in definition.upper() or "ANY" in definition.upper()):
+                        allowed[keys[0]] = [f"'{value}'" for value in dict.fromkeys(literals)]
+            # Defaults only: CHECK constraints spanning several columns would reject random rows
+            cursor.execute(f"CREATE TABLE {SCRATCH_SCHEMA}.{table} (LIKE public.{table} INCLUDING DEFAULTS)")
+            tables[table] = {"columns": columns, "foreign": foreign, "allowed": allowed, "unique": unique}
+
+        cursor.execute(INDEXES_SQL, (list(tables),))
+        indexes = cursor.fetchall()
+
+        cursor.execute("SELECT setseed(%s)", ((seed % 1000) / 1000.0,))
+        counts = {table: rows for table in tables}
+        for table, meta in tables.items():
+            names = ", ".join(c["name"] for c in meta["columns"])
+            values = ", ".join(column_expression(c, table, meta["foreign"], meta["allowed"], meta["unique"], counts)
+                               for c in meta["columns"])
+            cursor.execute(f"INSERT INTO {SCRATCH_SCHEMA}.{table} ({names}) "
+                           f"SELECT {values} FROM generate_series(1, %s) g ON CONFLICT DO NOTHING", (rows,))
+
+        # Same index names as public, so the report can name the real indexes
+        existing = {}
+        for name, definition in indexes:
+            definition = re.sub(r" ON (ONLY )?public\.", f" ON {SCRATCH_SCHEMA}.", definition, count=1)
+            try:
+                cursor.execute("SAVEPOINT copy_index")
+                cursor.execute(definition)
+                cursor.execute("RELEASE SAVEPOINT copy_index")
+                existing[name] = definition
+            except Exception:
+                cursor.execute("ROLLBACK TO SAVEPOINT copy_index")
+    connection.commit()
+
+    # VACUUM (not just ANALYZE) sets the visibility map, which index-only scan costs depend on
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute(f"VACUUM ANALYZE {SCRATCH_SCHEMA}.{table}")
+        cursor.execute("""
+            SELECT tablename, attname, n_distinct FROM pg_stats WHERE schemaname = %s
+        """, (SCRATCH_SCHEMA,))
+        for table, column, n_distinct in cursor.fetchall():
+            tables[table].setdefault("n_distinct", {})[column] = n_distinct
+    connection.autocommit = False
+    for table in tables:
+        tables[table]["indexes"] = {name: d for name, d in existing.items()
+                                    if re.search(rf" ON {SCRATCH_SCHEMA}\.{table} ", d)}
+    return tables
+
+
+# ---------------------------------------------------------------------------
+# Planning
+# ---------------------------------------------------------------------------
+
+def explain(cursor, sql: str) -> Dict[str, Any]:
+    """Generic plan of a statement with $n parameters"""
+    params = max([int(n) for n in PARAM.findall(sql)] + [0])
+    cursor.execute("DEALLOCATE ALL")
+    cursor.execute(f"PREPARE advisor_statement AS {sql}")
+    arguments = f"({', '.join(['NULL'] * params)})" if params else ""
+    cursor.execute(f"EXPLAIN (VERBOSE, FORMAT JSON) EXECUTE advisor_statement{arguments}")
+    return cursor.fetchone()[0][0]["Plan"]
+
+
+def walk(plan: Dict[str, Any], parent: Optional[Dict[str, Any]] = None):
+    yield plan, parent
+    for child in plan.get("Plans", []):
+        yield from walk(child, plan)
+
+
+def split_conjuncts(condition: str) -> List[str]:
+    """Top-level AND terms of a plan filter"""
+    condition = condition.strip()
+    while condition.startswith("(") and condition.endswith(")") and _balanced(condition[1:-1]):
+        condition = condition[1:-1].strip()
+    terms, depth, start, quoted = [], 0, 0, False
+    i = 0
+    while i < len(condition):
+        char = condition[i]
+        if char == "'":
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and condition.startswith(" AND ", i):
+            terms.append(condition[start:i])
+            start = i + 5
+            i += 4
+        i += 1
+    terms.append(condition[start:])
+    return [_strip_parens(t) for t in terms if t.strip()]
+
+
+def _balanced(text: str) -> bool:
+    depth, quoted = 0, False
+    for char in text:
+        if char == "'":
+            quoted = not quoted
+        elif not quoted:
+            depth += (char == "(") - (char == ")")
+            if depth < 0:
+                return False
+    return depth == 0
+
+
+def _strip_parens(text: str) -> str:
+    text = text.strip()
+    while text.startswith("(") and text.endswith(")") and _balanced(text[1:-1]):
+        text = text[1:-1].strip()
+    return text
+
+
+def classify(term: str, alias: str, n_distinct: Dict[str, float], low_cardinality: int):
+    """(kind, column, predicate) for one filter term on the scanned relation, or None"""
+    match = NULL_TEST.match(term)
+    if match and match["alias"] == alias:
+        return "partial", match["column"], f"{match['column']} {match['op']}"
+    match = BOOL_TEST.match(term)
+    if match and match["alias"] == alias:
+        return "partial", match["column"], f"{'NOT ' if match['negated'] else ''}{match['column']}"
+    match = COMPARISON.match(term)
+    if not match or match["alias"] != alias:
+        return None
+    column, op, value = match["column"], match["op"], match["value"].strip()
+    if re.search(r"\b\w+\.\w+\b", re.sub(r"'(?:[^']|'')*'", "", value)):
+        return None  # compares against another relation: a join condition
+    if op.endswith("~~") or op.endswith("~~*"):
+        return ("equality", column, None) if not value.startswith("'%") else None
+    if op in ("<", ">", "<=", ">="):
+        return "range", column, None
+    if op == "=":
+        distinct = n_distinct.get(column, 0)
+        few_values = 0 < distinct <= low_cardinality
+        if CONSTANT.match(value) and few_values:
+            return "partial", column, f"{column} = {CONSTANT.match(value).group(1)}"
+        return "equality", column, None
+    return None
+
+
+def candidates_for(plan: Dict[str, Any], tables: Dict[str, Dict[str, Any]], args) -> List[Dict[str, Any]]:
+    """Index candidates for the expensive sequential scans of one plan"""
+    candidates = []
+    for node, parent in walk(plan):
+        if node.get("Node Type") not in SCAN_NODES or node.get("Schema") != SCRATCH_SCHEMA:
+            continue
+        if node.get("Total Cost", 0) < args.min_cost:
+            continue
+        # An index scan is only a candidate when its index leaves rows to filter out
+        if node["Node Type"] != "Seq Scan" and not node.get("Filter"):
+            continue
+        table, alias = node["Relation Name"], node.get("Alias", node["Relation Name"])
+        meta = tables.get(table, {})
+        n_distinct = meta.get("n_distinct", {})
+        equality, ranges, predicates = [], [], []
+
+        conditions = [node[key] for key in ("Index Cond", "Recheck Cond", "Filter") if node.get(key)]
+        for term in [t for condition in conditions for t in split_conjuncts(condition)]:
+            kind_column = classify(term, alias, n_distinct, args.low_cardinality)
+            if not kind_column:
+                continue
+            kind, column, predicate = kind_column
+            if kind == "partial":
+                predicates.append(predicate)
+            elif kind == "equality" and column not in equality:
+                equality.append(column)
+            elif kind == "range" and column not in ranges:
+                ranges.append(column)
+
+        # Hashed side of a join that matches only a few rows from the probe side
+        if not equality and parent and parent.get("Node Type") == "Hash":
+            join = next((p for p, _ in walk(plan) if parent in p.get("Plans", [])), None)
+            probe = next((p for p in (join or {}).get("Plans", []) if p is not parent), None)
+            if join and probe and probe.get("Plan Rows", 0) * args.join_ratio <= node.get("Plan Rows", 0):
+                for term in split_conjuncts(join.get("Hash Cond", "")):
+                    for side in term.split(" = "):
+                        match = re.match(COLUMN_REF + r"$", _strip_parens(side))
+                        if match and match["alias"] == alias and match["column"] not in equality:
+                            equality.append(match["column"])
+
+        keys = equality + ranges[:1]
+        if not keys and predicates:
+            primary = [c["name"] for c in meta.get("columns", []) if c["name"] in meta.get("unique", set())]
+            keys = primary[:1]
+        if not keys:
+            continue
+
+        output = [col.split(".", 1)[1] for col in node.get("Output", [])
+                  if col.startswith(f"{alias}.") and re.fullmatch(r"\w+\.\w+", col)]
+        include = [col for col in dict.fromkeys(output) if col not in keys]
+        candidates.append({
+            "table": table,
+            "keys": keys,
+            "predicate": " AND ".join(dict.fromkeys(predicates)) or None,
+            "include": include if 0 < len(include) <= args.max_include else [],
+            "scan_cost": node["Total Cost"],
+        })
+    return candidates
+
+
+def index_name(candidate: Dict[str, Any]) -> str:
+    name = f"idx_{candidate['table']}_{'_'.join(candidate['keys'])}"
+    if candidate["predicate"]:
+        # One word per term, keeping negations and NULL tests: NOT completed -> not_completed
+        terms = []
+        for term in candidate["predicate"].split(" AND "):
+            term = re.sub(r"'[^']*'", "", term).replace("IS NOT NULL", "not null").replace("IS NULL", "null")
+            terms.append("_".join(re.findall(r"[a-z_]+", term.replace("NOT ", "not "))))
+        name += "_where_" + "_".join(dict.fromkeys(terms))
+    if candidate.get("covering"):
+        name += "_covering"
+    return name[:63]
+
+
+def index_ddl(candidate: Dict[str, Any], schema: str = "public") -> str:
+    qualifier = f"{schema}." if schema != "public" else ""
+    ddl = (f"CREATE INDEX IF NOT EXISTS {index_name(candidate)} "
+           f"ON {qualifier}{candidate['table']}({', '.join(candidate['keys'])})")
+    if candidate.get("covering"):
+        ddl += f" INCLUDE ({', '.join(candidate['include'])})"
+    if candidate["predicate"]:
+        ddl += f" WHERE {candidate['predicate']}"
+    return ddl
+
+
+def plan_cost_with(cursor, sql: str, candidate: Dict[str, Any]) -> Optional[float]:
+    """Plan cost of the statement with the candidate index present (created and rolled back)"""
+    cursor.execute("SAVEPOINT candidate")
+    try:
+        cursor.execute(index_ddl(candidate, SCRATCH_SCHEMA))
+        return explain(cursor, sql)["Total Cost"]
+    except Exception:
+        return None
+    finally:
+        cursor.execute("ROLLBACK TO SAVEPOINT candidate")
+
+
+def used_indexes(plan: Dict[str, Any]) -> set:
+    return {node["Index Name"] for node, _ in walk(plan) if "Index Name" in node}
+
+
+def advise(connection, statements: List[Dict[str, Any]], tables: Dict[str, Dict[str, Any]], args):
+    accepted: Dict[str, Dict[str, Any]] = {}
+    planned, failed, used = 0, [], set()
+    with connection.cursor() as cursor:
+        cursor.execute(f"SET search_path TO {SCRATCH_SCHEMA}, public")
+        cursor.execute("SET plan_cache_mode = force_generic_plan")
+        for statement in statements:
+            cursor.execute("SAVEPOINT statement")
+            try:
+                plan = explain(cursor, statement["sql"])
+            except Exception as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT statement")
+                failed.append({"source": statement["source"], "error": str(e).strip().splitlines()[0]})
+                continue
+            planned += 1
+            used |= used_indexes(plan)
+            before = plan["Total Cost"]
+
+            for candidate in candidates_for(plan, tables, args):
+                after = plan_cost_with(cursor, statement["sql"], candidate)
+                if after is None or after > before * (1 - args.min_improvement):
+                    continue
+                if candidate["include"]:
+                    covering = dict(candidate, covering=True)
+                    covering_after = plan_cost_with(cursor, statement["sql"], covering)
+                    if covering_after is not None and covering_after <= after * 0.9:
+                        candidate, after = covering, covering_after
+                entry = accepted.setdefault(index_ddl(candidate), {
+                    "table": candidate["table"], "index": index_name(candidate), "ddl": index_ddl(candidate),
+                    "statements": [], "cost_before": 0.0, "cost_after": 0.0,
+                })
+                entry["statements"].append(statement["source"])
+                entry["cost_before"] += before
+                entry["cost_after"] += after
+            cursor.execute("RELEASE SAVEPOINT statement")
+    connection.rollback()
+
+    for entry in accepted.values():
+        entry["improvement"] = f"{1 - entry['cost_after'] / entry['cost_before']:.0%}"
+        entry["cost_before"], entry["cost_after"] = round(entry["cost_before"]), round(entry["cost_after"])
+    return sorted(accepted.values(), key=lambda e: e["cost_after"] - e["cost_before"]), planned, failed, used
+
+
+def low_selectivity_indexes(tables: Dict[str, Dict[str, Any]], used: set, low_cardinality: int):
+    """Single-column, non-unique, non-partial indexes on columns with few distinct values that no plan used"""
+    unused = []
+    for table, meta in tables.items():
+        for name, definition in meta["indexes"].items():
+            match = re.search(r"USING btree \((\w+)\)$", definition)
+            if not match or "UNIQUE" in definition or name in used:
+                continue
+            distinct = meta.get("n_distinct", {}).get(match.group(1))
+            if distinct is not None and 0 < distinct <= low_cardinality:
+                unused.append({"table": table, "index": name, "column": match.group(1),
+                               "distinct_values": int(distinct)})
+    return unused
+
+
+def write_migration(path: Path, proposals: List[Dict[str, Any]], unused: List[Dict[str, Any]], args):
+    number = re.match(r"(\d+)", path.name)
+    lines = [
+        "-- ============================================================",
+        f"-- Migration {number.group(1) if number else ''}: indexes for workflow query shapes".replace("  ", " "),
+        "-- ============================================================",
+        "-- Generated by scripts/index_advisor.py from the SQL in n8n/**/*.json,",
+        f"-- planned against {args.rows:,} synthetic rows per table (seed {args.seed}).",
+        "-- Each index lowered the estimated cost of the listed statements by at",
+        f"-- least {args.min_improvement:.0%}.",
+        "--",
+        "-- Apply with:",
+        f"--   psql -U lifeos_app -d lifeos_db -f {path.relative_to(PROJECT_ROOT).as_posix() if path.is_relative_to(PROJECT_ROOT) else path}",
+        "-- Safe to re-run.",
+        "",
+        "BEGIN;",
+        "",
+    ]
+    for proposal in proposals:
+        lines.append(f"-- {proposal['improvement']} cheaper ({proposal['cost_before']} -> {proposal['cost_after']}):")
+        lines.extend(f"--   {source}" for source in proposal["statements"])
+        lines.append(f"{proposal['ddl']};")
+        lines.append("")
+    if unused:
+        lines.append("-- Low-selectivity indexes no workflow plan used. Review before dropping:")
+        lines.append("-- they still cost a write on every INSERT/UPDATE.")
+        lines.extend(f"-- DROP INDEX IF EXISTS {u['index']};  -- {u['table']}.{u['column']}, "
+                     f"{u['distinct_values']} distinct values" for u in unused)
+        lines.append("")
+    lines.append("COMMIT;")
+    path.write_text("\n".join(lines) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Propose indexes for the SQL in the n8n workflows")
+    parser.add_argument("paths", nargs="*", help="Workflow files or directories (default: n8n/)")
+    parser.add_argument("--rows", type=int, default=50000, help="Synthetic rows per table (default: 50000)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the synthetic data")
+    parser.add_argument("--min-cost", type=float, default=1000,
+                        help="Ignore sequential scans cheaper than this (default: 1000)")
+    parser.add_argument("--min-improvement", type=float, default=0.2,
+                        help="Keep an index only if it cuts the statement's cost by this fraction (default: 0.2)")
+    parser.add_argument("--low-cardinality", type=int, default=10,
+                        help="Columns with at most this many distinct values go into partial predicates")
+    parser.add_argument("--max-include", type=int, default=3,
+                        help="Try a covering index when a scan outputs at most this many extra columns")
+    parser.add_argument("--join-ratio", type=int, default=100,
+                        help="Index a hash join's scanned side when it has this many times the probe side's rows")
+    parser.add_argument("--write-migration", type=str, help="Write the proposed indexes as a migration file")
+    parser.add_argument("--show-failed", action="store_true", help="List statements that could not be planned")
+    parser.add_argument("--keep-schema", action="store_true",
+                        help=f"Leave the {SCRATCH_SCHEMA} schema in place for inspection")
+    parser.add_argument("--json", type=str, help="Write the report to this JSON file")
+    parser.add_argument("--config", type=str, default=None, help="Path to environment configuration file")
+    args = parser.parse_args()
+
+    statements, unreadable = [], []
+    for root in [Path(p).resolve() for p in args.paths] or [WORKFLOW_DIR]:
+        found, bad = extract_statements(root)
+        statements.extend(found)
+        unreadable.extend(bad)
+    if not args.paths:
+        statements.extend(extract_service_statements())
+
+    env = load_env(args.config)
+    connection = connect_db(env, autocommit=False)
+    try:
+        if not args.paths:
+            statements.extend(extract_function_statements(connection))
+        print(f"{Fore.CYAN}🔎 {len(statements)} statements extracted from workflow Postgres nodes, "
+              f"the query service and the database's PL/pgSQL functions{Style.RESET_ALL}")
+        print(f"{Fore.YELLOW}🌱 Seeding {SCRATCH_SCHEMA} with {args.rows:,} rows per table...{Style.RESET_ALL}")
+        tables = build_scratch_schema(connection, args.rows, args.seed)
+        proposals, planned, failed, used = advise(connection, statements, tables, args)
+        unused = low_selectivity_indexes(tables, used, args.low_cardinality)
+    finally:
+        connection.rollback()
+        if not args.keep_schema:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP SCHEMA IF EXISTS {SCRATCH_SCHEMA} CASCADE")
+        connection.close()
+
+    print(f"📊 {planned} planned, {len(failed)} could not be planned (missing columns, dynamic SQL, "
+          f"untyped parameters){'' if args.show_failed else ' - see --show-failed'}")
+    if args.show_failed:
+        for item in failed:
+            print(f"  {Fore.RED}✗{Style.RESET_ALL} {item['source']}: {item['error']}")
+    for item in unreadable:
+        print(f"  {Fore.RED}✗ invalid JSON{Style.RESET_ALL} {item}")
+
+    print()
+    if proposals:
+        print_table(proposals, ["table", "index", "cost_before", "cost_after", "improvement"])
+        print()
+        for proposal in proposals:
+            print(f"{Fore.GREEN}{proposal['ddl']};{Style.RESET_ALL}")
+            for source in proposal["statements"]:
+                print(f"    {source}")
+    else:
+        print(f"{Fore.GREEN}✅ No sequential scan above cost {args.min_cost:g} that an index improves{Style.RESET_ALL}")
+
+    if unused:
+        print(f"\n{Fore.YELLOW}⚠️  Low-selectivity indexes no workflow plan used:{Style.RESET_ALL}")
+        print_table(unused, ["table", "index", "column", "distinct_values"])
+
+    if args.write_migration:
+        path = Path(args.write_migration).resolve()
+        write_migration(path, proposals, unused, args)
+        print(f"\n{Fore.GREEN}📄 Migration written to {args.write_migration}{Style.RESET_ALL}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"generated": date.today().isoformat(), "planned": planned, "failed": failed,
+                       "proposals": proposals, "low_selectivity_unused": unused}, f, indent=2)
+        print(f"{Fore.GREEN}📄 Report written to {args.json}{Style.RESET_ALL}")
+
+
+if __name__ == "__main__":
+    main()
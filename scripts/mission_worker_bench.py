@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+SBS Mission Worker Benchmark
+============================
+Runs pg-listener's mission worker (POST /missions/run) against a local stub of
+the OpenAI chat completions API, so a full daily run can be timed and checked
+without spending tokens.
+
+The stub answers every completion with three valid missions built from the
+player context in the prompt, after --stub-latency-ms (with +/-25% seeded
+jitter). --stub-rpm enforces a requests-per-minute limit the way the API does
+(429 with Retry-After and x-ratelimit-* headers), and --stub-error-rate
+answers a share of requests with a 500, to check that the worker backs off and
+retries instead of falling back.
+
+pg-listener has to send its completions to the stub: start it with
+MISSION_LLM_URL pointing at --stub-host/--stub-port (e.g.
+http://host.docker.internal:8089/v1 when pg-listener runs in Docker). The
+benchmark warns when the worker made requests the stub never saw.
+
+Each value of --concurrency is one run over the first --limit active
+characters. Runs are dry (nothing is written to missions) unless --write is
+given. Reported per run: characters per second, completions requested and
+answered, cache hits, 429s and retries seen by the worker, fallbacks, and the
+peak number of completions the stub had in flight.
+
+Usage:
+    python scripts/mission_worker_bench.py --stub-only --stub-host 0.0.0.0 --stub-port 8089   # just the stub
+    python scripts/mission_worker_bench.py --stub-port 8089 --concurrency 1,4,8 --limit 200
+    python scripts/mission_worker_bench.py --stub-port 8089 --stub-rpm 300 --stub-error-rate 0.05
+
+Requirements:
+    pip install requests python-dotenv colorama
+    pg-listener running with MISSION_LLM_URL pointing at the stub
+"""
+
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+import requests
+
+from sbs_common import Fore, Style, load_env, print_table
+
+
+class StubLLM:
+    """OpenAI-compatible POST /v1/chat/completions with latency, a rate limit and injected errors"""
+
+    def __init__(self, host: str, port: int, latency_ms: float, rpm: int, error_rate: float, seed: int):
+        self.latency = latency_ms / 1000.0
+        self.rpm = rpm
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window = deque()
+        self.counters = {"requests": 0, "answered": 0, "rate_limited": 0, "errors": 0, "peak_in_flight": 0}
+        self.in_flight = 0
+        self.prompts = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(handler):
+                length = int(handler.headers.get("Content-Length", 0))
+                body = json.loads(handler.rfile.read(length) or b"{}")
+                if not handler.path.endswith("/chat/completions"):
+                    status, headers, result = 404, {}, {"error": {"message": "Unknown endpoint"}}
+                else:
+                    status, headers, result = stub.complete(body)
+                payload = json.dumps(result).encode()
+                handler.send_response(status)
+                for name, value in {"Content-Type": "application/json", **headers}.items():
+                    handler.send_header(name, value)
+                handler.send_header("Content-Length", str(len(payload)))
+                handler.end_headers()
+                handler.wfile.write(payload)
+
+            def log_message(handler, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}/v1"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return {**self.counters, "distinct_prompts": len(self.prompts)}
+
+    def complete(self, body: Dict[str, Any]):
+        now = time.monotonic()
+        with self.lock:
+            self.counters["requests"] += 1
+            while self.window and now - self.window[0] >= 60:
+                self.window.popleft()
+            if self.rpm and len(self.window) >= self.rpm:
+                self.counters["rate_limited"] += 1
+                reset = 60 - (now - self.window[0])
+                return 429, {"Retry-After": str(max(1, round(reset))), "x-ratelimit-remaining-requests": "0",
+                             "x-ratelimit-reset-requests": f"{reset:.3f}s"}, \
+                    {"error": {"message": "Rate limit reached for requests", "type": "requests"}}
+            self.window.append(now)
+            remaining = self.rpm - len(self.window) if self.rpm else None
+            failed = self.rng.random() < self.error_rate
+            delay = self.latency * self.rng.uniform(0.75, 1.25)
+            self.in_flight += 1
+            self.counters["peak_in_flight"] = max(self.counters["peak_in_flight"], self.in_flight)
+
+        time.sleep(delay)
+        prompt = next((m["content"] for m in body.get("messages", []) if m.get("role") == "user"), "")
+        with self.lock:
+            self.in_flight -= 1
+            self.prompts.add(hashlib.sha1(prompt.encode()).hexdigest())
+            if failed:
+                self.counters["errors"] += 1
+            else:
+                self.counters["answered"] += 1
+        headers = {"x-ratelimit-remaining-requests": str(remaining)} if remaining is not None else {}
+        if failed:
+            return 500, headers, {"error": {"message": "The server had an error while processing your request"}}
+        return 200, headers, {
+            "object": "chat.completion",
+            "model": body.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": json.dumps(self.missions(prompt))}}],
+        }
+
+    @staticmethod
+    def missions(prompt: str) -> List[Dict[str, Any]]:
+        """Three missions for the player JSON at the end of the prompt, aimed at its first system"""
+        try:
+            player = json.loads(prompt.split("Player:\n", 1)[1])
+        except (IndexError, ValueError):
+            player = {}
+        system = (player.get("sbs_systems") or [None])[0]
+        name = system["name"] if system else "a new system"
+        return [
+            {"type": "sbs_system_advancement", "title": f"Advance {name}"[:120],
+             "description": f"Finish the {system['next_step'] if system else 'define'} step of {name}",
+             "target_system_id": system["id"] if system else None, "system_category": system["category"] if system else "mindset",
+             "stage_focus": system["stage"] if system else "define", "xp": 40, "coins": 20},
+            {"type": "sbs_routine_creation", "title": "Add a weekly review routine",
+             "description": "Schedule 15 minutes to review what your systems produced",
+             "suggested_routine": "Sunday 15-minute system review", "system_category": "purpose",
+             "stage_focus": "automate", "xp": 30, "coins": 15},
+            {"type": "sbs_system_optimization", "title": "Remove one manual step",
+             "description": "Automate the step you skipped most often this week",
+             "system_category": "productivity", "stage_focus": "review", "xp": 35, "coins": 18},
+        ]
+
+
+def run_once(base_url: str, headers: Dict[str, str], stub: StubLLM, concurrency: int, args) -> Dict[str, Any]:
+    before = stub.snapshot()
+    started = time.monotonic()
+    response = requests.post(f"{base_url}/missions/run", headers=headers, timeout=10,
+                             json={"dry_run": not args.write, "limit": args.limit, "concurrency": concurrency})
+    if response.status_code == 409:
+        raise RuntimeError("a mission run is already in progress")
+    response.raise_for_status()
+    run_id = response.json()["run"]["id"]
+
+    deadline = started + args.timeout
+    while True:
+        time.sleep(0.5)
+        stats = requests.get(f"{base_url}/missions/stats", timeout=10).json()
+        last = stats.get("last_run") or {}
+        if not stats.get("running") and last.get("id") == run_id:
+            break
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"run {run_id} still running after {args.timeout:g}s")
+
+    after = stub.snapshot()
+    seen = {key: after[key] - before[key] for key in ("requests", "answered", "rate_limited", "errors")}
+    seconds = last["duration_ms"] / 1000.0
+    return {
+        "concurrency": concurrency,
+        "status": last["status"],
+        "characters": last["characters"],
+        "seconds": round(seconds, 2),
+        "chars_per_sec": round(last["characters"] / seconds, 1) if seconds else None,
+        "llm_requests": last["llm_requests"],
+        "stub_answered": seen["answered"],
+        "cache_hits": last["cache_hits"],
+        "rate_limited": last["rate_limited"],
+        "retries": last["llm_retries"],
+        "fallbacks": last["fallbacks"],
+        "missions": last["missions"],
+        "written": last["missions_written"],
+        "peak_in_flight": after["peak_in_flight"],
+        "stub_requests": seen["requests"],
+        "error": last.get("error") or last.get("last_llm_error"),
+        "llm_url": stats["config"]["llm_url"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pg-listener's mission worker against a stub LLM")
+    parser.add_argument("--concurrency", type=str, default="1,4,8",
+                        help="Comma-separated worker concurrency, one run each (default: 1,4,8)")
+    parser.add_argument("--limit", type=int, default=200, help="Active characters per run (default: 200)")
+    parser.add_argument("--write", action="store_true", help="Insert the generated missions (default: dry run)")
+    parser.add_argument("--stub-host", type=str, default="127.0.0.1", help="Interface for the stub (default: 127.0.0.1)")
+    parser.add_argument("--stub-port", type=int, default=8089, help="Port for the stub (default: 8089)")
+    parser.add_argument("--stub-latency-ms", type=float, default=400, help="Completion latency (default: 400)")
+    parser.add_argument("--stub-rpm", type=int, default=0, help="Requests per minute before 429s (default: no limit)")
+    parser.add_argument("--stub-error-rate", type=float, default=0, help="Share of completions answered with a 500")
+    parser.add_argument("--stub-only", action="store_true", help="Only run the stub until interrupted")
+    parser.add_argument("--timeout", type=float, default=900, help="Longest a run may take in seconds (default: 900)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the stub's latency jitter and errors")
+    parser.add_argument("--url", type=str, default=None, help="pg-listener URL (default: $QUERY_SERVICE_URL)")
+    parser.add_argument("--json", type=str, help="Write the results to this JSON file")
+    parser.add_argument("--config", type=str, default=None, help="Path to environment configuration file")
+    args = parser.parse_args()
+
+    stub = StubLLM(args.stub_host, args.stub_port, args.stub_latency_ms, args.stub_rpm, args.stub_error_rate, args.seed)
+    stub.start()
+    print(f"{Fore.CYAN}🤖 Stub LLM on {stub.url} ({args.stub_latency_ms:g}ms"
+          f"{f', {args.stub_rpm} rpm' if args.stub_rpm else ''}){Style.RESET_ALL}")
+    if args.stub_only:
+        try:
+            while True:
+                time.sleep(60)
+                print(f"   {stub.snapshot()}")
+        except KeyboardInterrupt:
+            print(f"\n{Fore.YELLOW}⏹️  Stub stopped: {stub.snapshot()}{Style.RESET_ALL}")
+            return
+
+    env = load_env(args.config)
+    base_url = (args.url or env['QUERY_SERVICE_URL']).rstrip('/')
+    headers = {"X-Listener-Token": env['PG_LISTENER_TOKEN']} if env['PG_LISTENER_TOKEN'] else {}
+    rows = []
+    try:
+        for concurrency in [int(c) for c in args.concurrency.split(",") if c.strip()]:
+            print(f"{Fore.YELLOW}⏱️  concurrency {concurrency}: up to {args.limit} characters"
+                  f"{'' if args.write else ' (dry run)'}...{Style.RESET_ALL}")
+            rows.append(run_once(base_url, headers, stub, concurrency, args))
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}⏹️  Benchmark interrupted - reporting completed runs{Style.RESET_ALL}")
+    except (requests.RequestException, RuntimeError) as e:
+        print(f"{Fore.RED}❌ {e}{Style.RESET_ALL}")
+    finally:
+        stub.stop()
+
+    if not rows:
+        sys.exit(1)
+
+    print()
+    print_table(rows, ["concurrency", "status", "characters", "seconds", "chars_per_sec", "llm_requests",
+                       "cache_hits", "rate_limited", "retries", "fallbacks", "missions", "written", "peak_in_flight"])
+    for row in rows:
+        if row["llm_requests"] and not row["stub_requests"]:
+            print(f"{Fore.YELLOW}⚠️  The worker sent its completions to {row['llm_url']}, not the stub - "
+                  f"set MISSION_LLM_URL to {stub.url}{Style.RESET_ALL}")
+            break
+    for row in rows:
+        if row["error"]:
+            print(f"{Fore.RED}  concurrency {row['concurrency']}: {row['error']}{Style.RESET_ALL}")
+    baseline = rows[0]
+    for row in rows[1:]:
+        if baseline["chars_per_sec"] and row["chars_per_sec"]:
+            print(f"{Fore.GREEN}⚡ concurrency {row['concurrency']}: "
+                  f"{row['chars_per_sec'] / baseline['chars_per_sec']:.1f}x the throughput of "
+                  f"concurrency {baseline['concurrency']}{Style.RESET_ALL}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"{Fore.GREEN}📄 Results written to {args.json}{Style.RESET_ALL}")
+
+    sys.exit(1 if any(row["status"] != "completed" for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+SBS n8n Call Graph Analyzer
+===========================
+Statically analyzes the workflow exports under n8n/ and builds the
+cross-workflow call graph: every `httpRequest` node whose URL points at
+`/webhook/<path>` is an edge to the workflow that defines that webhook.
+
+For each entrypoint (webhook or other trigger) it reports:
+    calls          HTTP calls made directly by the entry workflow
+    targets        distinct webhooks those calls hit
+    total_calls    HTTP calls per invocation including nested subflows
+                   (every branch counted, so an upper bound)
+    depth          deepest chain of nested workflow calls
+    critical_path  longest chain of sequential HTTP round trips the caller
+                   waits on. A call into a webhook that responds before its
+                   workflow finishes (responseMode onReceived) costs one hop;
+                   one that waits (responseNode / lastNode) also costs the
+                   callee's own critical path. A call to pg-listener's
+                   POST /fanout costs one hop plus the slowest of the
+                   webhooks it runs concurrently; async ones add nothing.
+
+It also flags URLs that hardcode http://localhost:5678 instead of using
+SUBFLOW_BASE_URL, calls to webhooks no workflow defines, connections that
+reference missing nodes (or nodes by id / truncated name), call cycles and
+files that do not parse.
+
+Usage:
+    python scripts/n8n_callgraph.py
+    python scripts/n8n_callgraph.py --entry habit-checkin
+    python scripts/n8n_callgraph.py --json callgraph.json --dot callgraph.dot
+    python scripts/n8n_callgraph.py --fail-on-hardcoded
+
+Requirements:
+    pip install colorama
+"""
+
+import re
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from sbs_common import Fore, Style, PROJECT_ROOT, WORKFLOW_DIR, load_workflow, print_table
+
+HTTP_NODE_TYPES = {"n8n-nodes-base.httpRequest", "@n8n/n8n-nodes-langchain.toolHttpRequest"}
+WEBHOOK_NODE_TYPE = "n8n-nodes-base.webhook"
+SYNC_RESPONSE_MODES = {"responseNode", "lastNode"}
+
+# /webhook/<path> in a literal URL, or <base expression ending in .../webhook>}}/<path>
+WEBHOOK_URL_PATTERNS = [
+    re.compile(r"/webhook(?:-test)?/([\w\-/]+)"),
+    re.compile(r"webhook'?\s*\}\}/([\w\-/]+)"),
+]
+# A pg-listener /fanout node, and the webhook calls listed in its body
+FANOUT_URL = re.compile(r"/fanout/?$")
+FANOUT_WEBHOOK = re.compile(r'"webhook"\s*:\s*"([\w\-/]+)"')
+FANOUT_ASYNC = re.compile(r'"async"\s*:\s*true')
+HARDCODED_BASE = re.compile(r"https?://(?:localhost|127\.0\.0\.1):5678")
+FALLBACK_BASE = re.compile(r"\|\|\s*['\"]https?://(?:localhost|127\.0\.0\.1):5678")
+
+
+def load_lenient(path: Path) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Parse a workflow; on trailing garbage keep the first JSON object and report it"""
+    try:
+        return load_workflow(path), None
+    except (ValueError, UnicodeDecodeError) as e:
+        error = str(e)
+    try:
+        text = path.read_text(encoding="utf-8-sig")
+        workflow, end = json.JSONDecoder().raw_decode(text.lstrip())
+        return workflow, f"{error} (analyzed the first {end} characters)"
+    except ValueError:
+        return None, error
+
+
+def webhook_target(url: str) -> Optional[str]:
+    for pattern in WEBHOOK_URL_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1).strip("/")
+    return None
+
+
+def fanout_targets(body: str) -> List[Tuple[str, bool]]:
+    """(webhook path, async) for each webhook call in a /fanout request body. Calls are split on their
+    "name" key, which every call has, so a flag belongs to the call it is written in."""
+    targets = []
+    for segment in re.split(r'"name"\s*:', body)[1:]:
+        match = FANOUT_WEBHOOK.search(segment)
+        if match:
+            targets.append((match.group(1).strip("/"), bool(FANOUT_ASYNC.search(segment))))
+    return targets
+
+
+class Workflow:
+    """Nodes and main-connection edges of one workflow export"""
+
+    def __init__(self, path: Path, data: Dict[str, Any]):
+        self.path = path
+        self.relpath = path.relative_to(PROJECT_ROOT).as_posix() if path.is_relative_to(PROJECT_ROOT) else str(path)
+        self.name = data.get("name") or path.stem
+        self.nodes = {node["name"]: node for node in data.get("nodes", []) if not node.get("disabled")}
+        self.edges: Dict[str, List[str]] = {}
+        self.dangling: List[Tuple[str, str]] = []
+        self.loose: List[Tuple[str, str]] = []  # connection name -> node it was matched to
+        for source, outputs in (data.get("connections") or {}).items():
+            for output_type, branches in outputs.items():
+                # "error" outputs still run downstream nodes; AI sub-node links point the other way
+                if output_type not in ("main", "error"):
+                    continue
+                for branch in branches or []:
+                    for link in branch or []:
+                        tail, head = self._resolve(source), self._resolve(link["node"])
+                        if tail and head:
+                            self.edges.setdefault(tail, []).append(head)
+                        else:
+                            self.dangling.append((source, link["node"]))
+
+    def _resolve(self, name: str) -> Optional[str]:
+        """Node a connection refers to. Hand-edited exports often reference a node by its id or by
+        its name without a " (Subflow)"-style suffix; n8n drops those links on import, so they are
+        followed here for the analysis but reported."""
+        if name in self.nodes:
+            return name
+        matches = [n for n, node in self.nodes.items() if node.get("id") == name] or \
+                  [n for n in self.nodes if n.startswith(name + " (")]
+        if len(matches) == 1:
+            if (name, matches[0]) not in self.loose:
+                self.loose.append((name, matches[0]))
+            return matches[0]
+        return None
+
+    def triggers(self) -> List[Dict[str, Any]]:
+        return [node for node in self.nodes.values()
+                if node["type"] == WEBHOOK_NODE_TYPE or node["type"].lower().endswith("trigger")]
+
+    def reachable(self, start: str) -> List[str]:
+        """Nodes reachable from start, in discovery order"""
+        seen, order, stack = {start}, [], [start]
+        while stack:
+            name = stack.pop()
+            order.append(name)
+            for child in reversed(self.edges.get(name, [])):
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        return order
+
+
+class CallGraph:
+    """Cross-workflow call graph with per-entrypoint fan-out, depth and critical path"""
+
+    def __init__(self, root: Path = WORKFLOW_DIR):
+        self.workflows: List[Workflow] = []
+        self.parse_errors: List[Dict[str, str]] = []
+        self.webhooks: Dict[str, Tuple[Workflow, Dict[str, Any]]] = {}
+        self.duplicate_webhooks: List[Dict[str, str]] = []
+        self.cycles: Set[Tuple[str, ...]] = set()
+        self._entry_cache: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+        for path in sorted(Path(root).rglob("*.json")):
+            data, error = load_lenient(path)
+            if error:
+                self.parse_errors.append({"file": path.relative_to(PROJECT_ROOT).as_posix(), "error": error})
+            if not isinstance(data, dict) or "nodes" not in data:
+                continue
+            workflow = Workflow(path, data)
+            self.workflows.append(workflow)
+            for node in workflow.triggers():
+                if node["type"] != WEBHOOK_NODE_TYPE:
+                    continue
+                hook = node.get("parameters", {}).get("path", "").strip("/")
+                if hook in self.webhooks:
+                    self.duplicate_webhooks.append({"path": hook, "file": workflow.relpath,
+                                                    "first": self.webhooks[hook][0].relpath})
+                    continue
+                self.webhooks[hook] = (workflow, node)
+
+    # ---- call sites -------------------------------------------------
+
+    def call_sites(self, workflow: Workflow, names: List[str]) -> List[Dict[str, Any]]:
+        calls = []
+        for name in names:
+            node = workflow.nodes[name]
+            if node["type"] not in HTTP_NODE_TYPES:
+                continue
+            url = str(node.get("parameters", {}).get("url", ""))
+            target = webhook_target(url)
+            calls.append({
+                "node": name,
+                "url": url,
+                "target": target,
+                "resolved": target in self.webhooks if target else False,
+                "external": target is None,
+            })
+            if FANOUT_URL.search(url.rstrip("}")):
+                body = str(node.get("parameters", {}).get("jsonBody", ""))
+                for hook, is_async in fanout_targets(body):
+                    calls.append({
+                        "node": name,
+                        "url": url,
+                        "target": hook,
+                        "resolved": hook in self.webhooks,
+                        "external": False,
+                        "fanout": True,
+                        "async": is_async,
+                    })
+        return calls
+
+    def hardcoded_urls(self) -> List[Dict[str, str]]:
+        findings = []
+        for workflow in self.workflows:
+            for name, node in workflow.nodes.items():
+                if node["type"] not in HTTP_NODE_TYPES:
+                    continue
+                url = str(node.get("parameters", {}).get("url", ""))
+                if HARDCODED_BASE.search(url):
+                    findings.append({
+                        "file": workflow.relpath,
+                        "node": name,
+                        "kind": "fallback" if FALLBACK_BASE.search(url) else "hardcoded",
+                        "url": url,
+                    })
+        return findings
+
+    # ---- metrics ----------------------------------------------------
+
+    def _is_sync(self, target: str) -> bool:
+        node = self.webhooks[target][1]
+        return node.get("parameters", {}).get("responseMode", "onReceived") in SYNC_RESPONSE_MODES
+
+    def analyze_entry(self, workflow: Workflow, trigger: str, stack: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        """Metrics for one trigger node; stack holds the webhook paths currently being expanded"""
+        key = (workflow.relpath, trigger)
+        if key in self._entry_cache:
+            return self._entry_cache[key]
+
+        names = workflow.reachable(trigger)
+        calls = self.call_sites(workflow, names)
+        callee_metrics: Dict[str, Dict[str, Any]] = {}
+        partial = False  # a cycle was cut somewhere below, so the result depends on the caller
+        for call in calls:
+            target = call["target"]
+            if not call["resolved"] or target in callee_metrics:
+                continue
+            if target in stack:
+                self.cycles.add(stack[stack.index(target):] + (target,))
+                partial = True
+                continue
+            callee, node = self.webhooks[target]
+            callee_metrics[target] = self.analyze_entry(callee, node["name"], stack + (target,))
+            partial = partial or callee_metrics[target]["partial"]
+
+        def hop_cost(call: Dict[str, Any]) -> int:
+            metrics = callee_metrics.get(call["target"])
+            if call.get("async"):
+                return 1
+            if metrics and self._is_sync(call["target"]):
+                return 1 + metrics["critical_path"]
+            return 1
+
+        # A fan-out node lists several calls that run concurrently: it costs as much as the slowest
+        cost: Dict[str, int] = {}
+        slowest: Dict[str, Dict[str, Any]] = {}
+        for call in calls:
+            if hop_cost(call) > cost.get(call["node"], 0):
+                cost[call["node"]] = hop_cost(call)
+                slowest[call["node"]] = call
+        chain_cache: Dict[str, Tuple[int, List[str]]] = {}
+
+        def longest(name: str, visiting: Set[str]) -> Tuple[int, List[str]]:
+            if name in chain_cache:
+                return chain_cache[name]
+            visiting = visiting | {name}
+            best: Tuple[int, List[str]] = (0, [])
+            for child in workflow.edges.get(name, []):
+                if child in visiting:  # loop back-edge (e.g. splitInBatches)
+                    continue
+                candidate = longest(child, visiting)
+                if candidate[0] > best[0]:
+                    best = candidate
+            own = cost.get(name, 0)
+            result = (own + best[0], ([name] if own else []) + best[1])
+            chain_cache[name] = result
+            return result
+
+        critical, chain = longest(trigger, set())
+        metrics = {
+            "calls": len(calls),
+            "targets": len({call["target"] or call["url"] for call in calls}),
+            "total_calls": len(calls) + sum(
+                callee_metrics[c["target"]]["total_calls"] for c in calls if c["target"] in callee_metrics),
+            "depth": max([1 + callee_metrics[c["target"]]["depth"] if c["target"] in callee_metrics else 1
+                          for c in calls] or [0]),
+            "critical_path": critical,
+            "critical_chain": [
+                {"node": name, "target": slowest[name]["target"], "hops": cost[name]}
+                for name in chain
+            ],
+            "call_sites": calls,
+            "partial": partial,
+        }
+        if not partial:
+            self._entry_cache[key] = metrics
+        return metrics
+
+    def entrypoints(self) -> List[Dict[str, Any]]:
+        rows = []
+        for workflow in self.workflows:
+            for trigger in workflow.triggers():
+                if trigger["type"] == WEBHOOK_NODE_TYPE:
+                    path = trigger.get("parameters", {}).get("path", "").strip("/")
+                    entry, stack = path, (path,)
+                else:
+                    entry, stack = f"{trigger['type'].split('.')[-1]}:{workflow.path.stem}", ()
+                metrics = self.analyze_entry(workflow, trigger["name"], stack)
+                rows.append(dict(metrics, entry=entry, workflow=workflow.relpath, trigger=trigger["name"]))
+        return rows
+
+    def unresolved_calls(self) -> List[Dict[str, str]]:
+        missing = []
+        for workflow in self.workflows:
+            for call in self.call_sites(workflow, list(workflow.nodes)):
+                if call["target"] and not call["resolved"]:
+                    missing.append({"file": workflow.relpath, "node": call["node"], "target": call["target"]})
+        return missing
+
+    def to_dot(self) -> str:
+        lines = ["digraph n8n_calls {", "  rankdir=LR;", "  node [shape=box, fontsize=10];"]
+        for workflow in self.workflows:
+            for call in self.call_sites(workflow, list(workflow.nodes)):
+                if not call["target"]:
+                    continue
+                style = "" if call["resolved"] else ", style=dashed, color=red"
+                if call["resolved"] and not self._is_sync(call["target"]):
+                    style = ", style=dotted"
+                lines.append(f'  "{workflow.path.stem}" -> "{call["target"]}" [label="{call["node"]}"{style}];')
+        for hook, (workflow, _) in sorted(self.webhooks.items()):
+            lines.append(f'  "{hook}" -> "{workflow.path.stem}" [arrowhead=none, color=gray];')
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+
+def print_entry_detail(row: Dict[str, Any]):
+    print(f"\n{Style.BRIGHT}{row['entry']}{Style.RESET_ALL} ({row['workflow']})")
+    print(f"  {row['calls']} direct calls, {row['total_calls']} including subflows, "
+          f"depth {row['depth']}, critical path {row['critical_path']} round trips")
+    if row["critical_chain"]:
+        print("  Critical chain:")
+        for step in row["critical_chain"]:
+            print(f"    -> {step['node']} [{step['target'] or 'external'}] ({step['hops']} hops)")
+    off_path = [c for c in row["call_sites"] if c["node"] not in {s["node"] for s in row["critical_chain"]}]
+    if off_path:
+        print("  Other calls: " + ", ".join(f"{c['node']} [{c['target'] or 'external'}]" for c in off_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze cross-workflow webhook calls in the n8n exports")
+    parser.add_argument("--root", type=str, default=str(WORKFLOW_DIR), help="Directory of workflow JSON files")
+    parser.add_argument("--entry", action="append", default=[],
+                        help="Show the critical chain for this entrypoint (repeatable)")
+    parser.add_argument("--top", type=int, default=20, help="Entrypoints to list, by critical path (default: 20)")
+    parser.add_argument("--json", type=str, help="Write the full analysis to this JSON file")
+    parser.add_argument("--dot", type=str, help="Write the call graph in Graphviz DOT format")
+    parser.add_argument("--fail-on-hardcoded", action="store_true",
+                        help="Exit non-zero when any URL hardcodes localhost:5678")
+    args = parser.parse_args()
+
+    graph = CallGraph(Path(args.root))
+    rows = sorted(graph.entrypoints(), key=lambda r: (-r["critical_path"], -r["total_calls"], r["entry"]))
+    hardcoded = graph.hardcoded_urls()
+    unresolved = graph.unresolved_calls()
+    dangling = [{"file": w.relpath, "from": s, "to": t} for w in graph.workflows for s, t in w.dangling]
+    loose = [{"file": w.relpath, "reference": r, "node": n} for w in graph.workflows for r, n in w.loose]
+
+    print(f"{Fore.CYAN}🕸️  {len(graph.workflows)} workflows, {len(graph.webhooks)} webhooks, "
+          f"{len(rows)} entrypoints{Style.RESET_ALL}\n")
+    print_table([r for r in rows if r["calls"]][:args.top],
+                ["entry", "calls", "targets", "total_calls", "depth", "critical_path"])
+
+    for entry in args.entry or [r["entry"] for r in rows[:1]]:
+        match = next((r for r in rows if r["entry"] == entry.strip("/")), None)
+        if match:
+            print_entry_detail(match)
+        else:
+            print(f"{Fore.YELLOW}⚠️  No entrypoint named {entry}{Style.RESET_ALL}")
+
+    if hardcoded:
+        strict = [h for h in hardcoded if h["kind"] == "hardcoded"]
+        print(f"\n{Fore.YELLOW}⚠️  {len(strict)} URLs hardcode localhost:5678 "
+              f"(+{len(hardcoded) - len(strict)} as a SUBFLOW_BASE_URL fallback):{Style.RESET_ALL}")
+        for item in hardcoded:
+            print(f"  {item['file']} :: {item['node']} ({item['kind']})")
+    if unresolved:
+        print(f"\n{Fore.YELLOW}⚠️  Calls to webhooks no workflow defines:{Style.RESET_ALL}")
+        for item in unresolved:
+            print(f"  {item['file']} :: {item['node']} -> {item['target']}")
+    if loose:
+        files = sorted({item["file"] for item in loose})
+        print(f"\n{Fore.YELLOW}⚠️  {len(loose)} connections reference a node id or a truncated name "
+              f"(followed here, but n8n drops them on import) in {len(files)} files:{Style.RESET_ALL}")
+        for item in loose:
+            print(f"  {item['file']} :: {item['reference']} -> {item['node']}")
+    if dangling:
+        print(f"\n{Fore.YELLOW}⚠️  Connections to missing nodes:{Style.RESET_ALL}")
+        for item in dangling:
+            print(f"  {item['file']} :: {item['from']} -> {item['to']}")
+    if graph.cycles:
+        print(f"\n{Fore.RED}🔁 Call cycles:{Style.RESET_ALL}")
+        for cycle in sorted(graph.cycles):
+            print("  " + " -> ".join(cycle))
+    if graph.duplicate_webhooks:
+        print(f"\n{Fore.YELLOW}⚠️  Webhook paths defined more than once:{Style.RESET_ALL}")
+        for item in graph.duplicate_webhooks:
+            print(f"  {item['path']}: {item['file']} (already in {item['first']})")
+    if graph.parse_errors:
+        print(f"\n{Fore.RED}❌ Files with invalid JSON:{Style.RESET_ALL}")
+        for item in graph.parse_errors:
+            print(f"  {item['file']}: {item['error']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "entrypoints": rows,
+                "hardcoded_urls": hardcoded,
+                "unresolved_calls": unresolved,
+                "loose_connections": loose,
+                "dangling_connections": dangling,
+                "cycles": [list(cycle) for cycle in sorted(graph.cycles)],
+                "duplicate_webhooks": graph.duplicate_webhooks,
+                "parse_errors": graph.parse_errors,
+            }, f, indent=2)
+        print(f"\n{Fore.GREEN}📄 Analysis written to {args.json}{Style.RESET_ALL}")
+    if args.dot:
+        with open(args.dot, "w") as f:
+            f.write(graph.to_dot())
+        print(f"{Fore.GREEN}📄 Call graph written to {args.dot}{Style.RESET_ALL}")
+
+    sys.exit(1 if args.fail_on_hardcoded and any(h["kind"] == "hardcoded" for h in hardcoded) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+SBS n8n Workflow Sync
+=====================
+Pushes the workflow exports under n8n/ to n8n through the public REST API,
+uploading only the files that changed since the last sync.
+
+Each workflow is normalized (UTF-8 BOM stripped, reduced to the fields the
+API accepts, serialized with sorted keys) and hashed. A local manifest
+records the hash and n8n workflow id of every file that was synced, so
+unchanged files are skipped and changed ones update their existing
+workflow in place instead of creating duplicates. Workflows already in
+n8n but missing from the manifest are matched by name.
+
+Uploads run concurrently over one pooled HTTP session. A file that fails
+to parse or upload is reported and the rest of the batch carries on; the
+manifest is saved after every run so an interrupted sync resumes where it
+stopped.
+
+Usage:
+    python scripts/n8n_sync.py                      # sync changed workflows
+    python scripts/n8n_sync.py --dry-run            # show what would be uploaded
+    python scripts/n8n_sync.py --force              # re-upload everything
+    python scripts/n8n_sync.py n8n/game_engines     # limit to a directory or file
+
+Requirements:
+    pip install requests python-dotenv colorama
+    N8N_API_KEY in .env (Settings > n8n API in the n8n UI)
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from sbs_common import Fore, Style, PROJECT_ROOT, WORKFLOW_DIR, load_env, load_workflow, print_table
+
+DEFAULT_MANIFEST = PROJECT_ROOT / ".n8n_sync_manifest.json"
+# Fields the public API accepts on create/update; the rest of an export (id, active, tags, ...) is rejected
+API_FIELDS = ("name", "nodes", "connections", "settings", "staticData")
+
+
+def normalize(workflow: Dict[str, Any], fallback_name: str) -> Dict[str, Any]:
+    body = {field: workflow[field] for field in API_FIELDS if workflow.get(field) is not None}
+    body.setdefault("name", fallback_name)
+    body.setdefault("settings", {})
+    body.setdefault("connections", {})
+    return body
+
+
+def content_hash(body: Dict[str, Any]) -> str:
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Manifest:
+    """Local record of what n8n holds: relative path -> {hash, id, name, synced_at}"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            with open(path) as f:
+                self.entries = json.load(f).get("workflows", {})
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def record(self, key: str, digest: str, workflow_id: str, name: str):
+        with self.lock:
+            self.entries[key] = {"hash": digest, "id": workflow_id, "name": name,
+                                 "synced_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+
+    def forget(self, key: str):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def save(self):
+        with self.lock:
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump({"version": 1, "workflows": dict(sorted(self.entries.items()))}, f, indent=2)
+            os.replace(tmp, self.path)
+
+
+class N8nClient:
+    """Pooled session for the n8n public API"""
+
+    def __init__(self, base_url: str, api_key: str, pool_size: int, timeout: float):
+        self.base_url = base_url.rstrip("/") + "/api/v1"
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({"X-N8N-API-KEY": api_key, "Accept": "application/json"})
+        # Retry idempotent calls only; a retried POST could create the workflow twice
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset({"GET", "PUT"}))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def list_workflows(self) -> List[Dict[str, Any]]:
+        workflows, cursor = [], None
+        while True:
+            params = {"limit": 250, **({"cursor": cursor} if cursor else {})}
+            response = self.session.get(f"{self.base_url}/workflows", params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            workflows.extend(data.get("data", []))
+            cursor = data.get("nextCursor")
+            if not cursor:
+                return workflows
+
+    def create(self, body: Dict[str, Any]) -> str:
+        response = self.session.post(f"{self.base_url}/workflows", json=body, timeout=self.timeout)
+        response.raise_for_status()
+        return str(response.json()["id"])
+
+    def update(self, workflow_id: str, body: Dict[str, Any]) -> Optional[str]:
+        """Update in place; None when the workflow no longer exists"""
+        response = self.session.put(f"{self.base_url}/workflows/{workflow_id}", json=body, timeout=self.timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return workflow_id
+
+    def close(self):
+        self.session.close()
+
+
+def collect(paths: List[str]) -> List[Path]:
+    files = []
+    for target in paths or [str(WORKFLOW_DIR)]:
+        path = Path(target).resolve()
+        files.extend(sorted(path.rglob("*.json")) if path.is_dir() else [path])
+    return files
+
+
+def plan(files: List[Path], manifest: Manifest, remote_by_name: Dict[str, str], force: bool) -> List[Dict[str, Any]]:
+    """Decide per file: unchanged, create, update or invalid"""
+    items = []
+    for path in files:
+        key = path.relative_to(PROJECT_ROOT).as_posix() if path.is_relative_to(PROJECT_ROOT) else str(path)
+        item = {"file": key, "path": path}
+        try:
+            body = normalize(load_workflow(path), path.stem)
+        except (ValueError, UnicodeDecodeError, OSError) as e:
+            items.append(dict(item, action="invalid", error=str(e)))
+            continue
+
+        digest = content_hash(body)
+        entry = manifest.get(key)
+        workflow_id = entry["id"] if entry else remote_by_name.get(body["name"])
+        if entry and entry["hash"] == digest and not force:
+            action = "unchanged"
+        else:
+            action = "update" if workflow_id else "create"
+        items.append(dict(item, action=action, body=body, hash=digest, id=workflow_id, name=body["name"]))
+    return items
+
+
+def push(client: N8nClient, manifest: Manifest, item: Dict[str, Any]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        workflow_id = None
+        if item["action"] == "update":
+            workflow_id = client.update(item["id"], item["body"])
+            if workflow_id is None:  # deleted in n8n since the last sync
+                item["action"] = "create"
+        if workflow_id is None:
+            workflow_id = client.create(item["body"])
+        manifest.record(item["file"], item["hash"], workflow_id, item["name"])
+        return dict(item, status="ok", id=workflow_id, ms=int((time.perf_counter() - started) * 1000))
+    except requests.HTTPError as e:
+        detail = e.response.text[:200] if e.response is not None else ""
+        return dict(item, status="failed", error=f"{e} {detail}".strip())
+    except requests.RequestException as e:
+        return dict(item, status="failed", error=str(e))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload changed n8n workflow exports via the n8n API")
+    parser.add_argument("paths", nargs="*", help="Workflow files or directories (default: n8n/)")
+    parser.add_argument("--url", type=str, default=None,
+                        help="n8n base URL (default: $N8N_URL or http://localhost:15678)")
+    parser.add_argument("--manifest", type=str, default=str(DEFAULT_MANIFEST), help="Sync manifest path")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel uploads (default: 8)")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument("--force", action="store_true", help="Upload every workflow regardless of hash")
+    parser.add_argument("--dry-run", action="store_true", help="Show the plan without uploading")
+    parser.add_argument("--no-remote", action="store_true",
+                        help="Skip listing n8n's workflows (new files are always created)")
+    parser.add_argument("--config", type=str, default=None, help="Path to environment configuration file")
+    args = parser.parse_args()
+
+    load_env(args.config)
+    base_url = args.url or os.getenv("N8N_URL", "http://localhost:15678")
+    api_key = os.getenv("N8N_API_KEY")
+    if not api_key and not args.dry_run:
+        print(f"{Fore.RED}❌ N8N_API_KEY is not set (create one under Settings > n8n API){Style.RESET_ALL}")
+        sys.exit(1)
+
+    manifest = Manifest(Path(args.manifest))
+    client = N8nClient(base_url, api_key or "", args.concurrency, args.timeout)
+    started = time.perf_counter()
+
+    remote_by_name: Dict[str, str] = {}
+    if not args.no_remote and api_key:
+        try:
+            remote = client.list_workflows()
+            remote_by_name = {w["name"]: str(w["id"]) for w in remote}
+            remote_ids = {str(w["id"]) for w in remote}
+            # Drop manifest entries for workflows deleted in n8n so they get recreated
+            for key, entry in list(manifest.entries.items()):
+                if entry["id"] not in remote_ids:
+                    manifest.forget(key)
+            print(f"{Fore.CYAN}🌐 {base_url}: {len(remote)} workflows in n8n{Style.RESET_ALL}")
+        except requests.RequestException as e:
+            print(f"{Fore.YELLOW}⚠️  Could not list workflows ({e}); relying on the manifest{Style.RESET_ALL}")
+
+    items = plan(collect(args.paths), manifest, remote_by_name, args.force)
+    pending = [item for item in items if item["action"] in ("create", "update")]
+    counts = {action: sum(1 for i in items if i["action"] == action)
+              for action in ("unchanged", "create", "update", "invalid")}
+    print(f"📊 {len(items)} files: {counts['unchanged']} unchanged, {counts['update']} to update, "
+          f"{counts['create']} to create, {counts['invalid']} invalid")
+
+    if args.dry_run:
+        for item in pending:
+            print(f"  {item['action']:>6}  {item['file']}")
+        client.close()
+        return
+
+    results = []
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            futures = [executor.submit(push, client, manifest, item) for item in pending]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if result["status"] == "ok":
+                    print(f"{Fore.GREEN}✅ {result['action']:>6}  {result['file']} "
+                          f"(id {result['id']}, {result['ms']}ms){Style.RESET_ALL}")
+                else:
+                    print(f"{Fore.RED}❌ {result['action']:>6}  {result['file']}: {result['error']}{Style.RESET_ALL}")
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}⏹️  Interrupted - saving progress{Style.RESET_ALL}")
+    finally:
+        manifest.save()
+        client.close()
+
+    failed = [r for r in results if r["status"] != "ok"]
+    invalid = [i for i in items if i["action"] == "invalid"]
+    for item in invalid:
+        print(f"{Fore.RED}❌ invalid  {item['file']}: {item['error']}{Style.RESET_ALL}")
+
+    print()
+    print_table([{
+        "uploaded": len(results) - len(failed),
+        "unchanged": counts["unchanged"],
+        "failed": len(failed),
+        "invalid": len(invalid),
+        "seconds": round(time.perf_counter() - started, 2),
+    }], ["uploaded", "unchanged", "failed", "invalid", "seconds"])
+
+    sys.exit(1 if failed or invalid else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+SBS pg-listener Throughput Benchmark
+====================================
+Measures how many events/sec the notify pipeline
+(trigger -> pg_notify -> pg-listener -> webhook) sustains before it falls
+behind or drops events.
+
+The benchmark writes to `habits` or `tasks` at a stepped target rate,
+pre-allocating each row id so the send time is taken before the write. A
+local stand-in for the n8n `/webhook/pg-notify` endpoint timestamps every
+forwarded event and matches it back to its row id. Each step reports the
+achieved write rate, notify-to-webhook latency percentiles and the drop rate.
+
+Point pg-listener at the stand-in receiver, either by running it yourself with
+N8N_WEBHOOK_BASE_URL=http://<this host>:<receiver-port> or with
+--spawn-listener, which starts `node pg-listener/listener.js` with that
+environment.
+
+Usage:
+    python scripts/pg_notify_bench.py --rates 50,100,200,500 --step-seconds 10
+    python scripts/pg_notify_bench.py --spawn-listener --table tasks --json curve.json
+
+Requirements:
+    pip install psycopg2-binary python-dotenv colorama
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+import subprocess
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any
+
+from sbs_common import Fore, Style, PROJECT_ROOT, load_env, connect_db, percentile, print_table
+
+BENCH_TABLES = {
+    # table: (insert with explicit id, update, id sequence)
+    "habits": (
+        "INSERT INTO habits (id, name, type, frequency, created_by) VALUES (%s, %s, 'good', 'daily', 'pg_notify_bench')",
+        "UPDATE habits SET streak = streak + 1, updated_at = now() WHERE id = %s",
+        "habits_id_seq",
+    ),
+    "tasks": (
+        "INSERT INTO tasks (id, title) VALUES (%s, %s)",
+        "UPDATE tasks SET xp = xp + 1 WHERE id = %s",
+        "tasks_id_seq",
+    ),
+}
+CLEANUP_SQL = {
+    "habits": "DELETE FROM habits WHERE created_by = 'pg_notify_bench' AND name LIKE %s",
+    "tasks": "DELETE FROM tasks WHERE title LIKE %s",
+}
+
+
+class NotifyReceiver:
+    """Stand-in for the n8n pg-notify webhook that timestamps each forwarded event"""
+
+    def __init__(self, port: int):
+        self.lock = threading.Lock()
+        self.pending: Dict[int, deque] = defaultdict(deque)  # row id -> send times
+        self.latencies: List[tuple] = []  # (send time, latency seconds)
+        self.unmatched = 0
+        self.requests = 0
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(handler):
+                received = time.perf_counter()
+                length = int(handler.headers.get("Content-Length", 0))
+                try:
+                    body = json.loads(handler.rfile.read(length) or b"{}")
+                except ValueError:
+                    body = {}
+                receiver.receive(body, received)
+                handler.send_response(200)
+                handler.send_header("Content-Type", "application/json")
+                handler.end_headers()
+                handler.wfile.write(b'{"ok": true}')
+
+            def log_message(handler, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @staticmethod
+    def _events(body: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Accept single forwards ({channel, payload}) and batched ones ({events: [...]})
+        events = body.get("events") if isinstance(body.get("events"), list) else [body]
+        return [event.get("payload", event) for event in events if isinstance(event, dict)]
+
+    def expect(self, row_id: int, sent: float):
+        with self.lock:
+            self.pending[row_id].append(sent)
+
+    def receive(self, body: Dict[str, Any], received: float):
+        with self.lock:
+            self.requests += 1
+            for payload in self._events(body):
+                row_id = payload.get("id") if isinstance(payload, dict) else None
+                queue = self.pending.get(row_id)
+                if queue:
+                    sent = queue.popleft()
+                    self.latencies.append((sent, received - sent))
+                else:
+                    self.unmatched += 1
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class BenchWriter(threading.Thread):
+    """Open-loop writer: issues writes on a fixed schedule regardless of how slow earlier ones were"""
+
+    def __init__(self, env, table: str, run_tag: str, rate: float, duration: float,
+                 update_ratio: float, receiver: NotifyReceiver, shared_ids: List[int], seed: int):
+        super().__init__(daemon=True)
+        self.connection = connect_db(env)
+        self.insert_sql, self.update_sql, self.sequence = BENCH_TABLES[table]
+        self.run_tag = run_tag
+        self.rate = rate
+        self.duration = duration
+        self.update_ratio = update_ratio
+        self.receiver = receiver
+        self.shared_ids = shared_ids
+        self.random = random.Random(seed)
+        self.sent: List[float] = []
+        self.errors = 0
+
+    def _allocate_ids(self, count: int) -> deque:
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", (self.sequence, count))
+            return deque(row[0] for row in cursor.fetchall())
+
+    def run(self):
+        total = max(1, int(self.rate * self.duration))
+        ids = self._allocate_ids(total)
+        interval = 1.0 / self.rate
+        start = time.perf_counter()
+        with self.connection.cursor() as cursor:
+            for index in range(total):
+                delay = start + index * interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+                if self.shared_ids and self.random.random() < self.update_ratio:
+                    row_id = self.random.choice(self.shared_ids)
+                    statement, params = self.update_sql, (row_id,)
+                else:
+                    row_id = ids.popleft()
+                    statement, params = self.insert_sql, (row_id, f"{self.run_tag}-{row_id}")
+
+                sent = time.perf_counter()
+                self.receiver.expect(row_id, sent)
+                try:
+                    cursor.execute(statement, params)
+                    self.sent.append(sent)
+                    if statement is self.insert_sql:
+                        self.shared_ids.append(row_id)
+                except Exception:
+                    self.errors += 1
+                    with self.receiver.lock:
+                        queue = self.receiver.pending.get(row_id)
+                        if queue:
+                            queue.pop()
+        self.connection.close()
+
+
+def run_step(env, args, receiver: NotifyReceiver, run_tag: str, rate: float, shared_ids: List[int]) -> Dict[str, Any]:
+    per_writer = rate / args.writers
+    writers = [
+        BenchWriter(env, args.table, run_tag, per_writer, args.step_seconds, args.update_ratio,
+                    receiver, shared_ids, args.seed + i)
+        for i in range(args.writers)
+    ]
+    step_start = time.perf_counter()
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    write_seconds = time.perf_counter() - step_start
+
+    sent = sorted(t for writer in writers for t in writer.sent)
+    return {
+        "target_rate": rate,
+        "write_rate": round(len(sent) / write_seconds, 1) if write_seconds else 0,
+        "sent": len(sent),
+        "write_errors": sum(writer.errors for writer in writers),
+        "window": (sent[0], sent[-1]) if sent else (step_start, step_start),
+    }
+
+
+def summarize(step: Dict[str, Any], receiver: NotifyReceiver) -> Dict[str, Any]:
+    first, last = step.pop("window")
+    with receiver.lock:
+        latencies = sorted(latency * 1000 for sent, latency in receiver.latencies if first <= sent <= last)
+    received = len(latencies)
+    step.update({
+        "received": received,
+        "dropped": step["sent"] - received,
+        "drop_pct": round(100.0 * (step["sent"] - received) / step["sent"], 2) if step["sent"] else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else None,
+    })
+    for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms"):
+        if step[key] is not None:
+            step[key] = round(step[key], 1)
+    return step
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pg_notify -> pg-listener -> webhook throughput")
+    parser.add_argument("--rates", type=str, default="25,50,100,200,400",
+                        help="Comma-separated target write rates (events/sec) per step")
+    parser.add_argument("--step-seconds", type=float, default=10, help="Duration of each rate step")
+    parser.add_argument("--table", choices=sorted(BENCH_TABLES), default="habits", help="Table to write to")
+    parser.add_argument("--update-ratio", type=float, default=0.3,
+                        help="Fraction of writes that update an earlier benchmark row (default: 0.3)")
+    parser.add_argument("--writers", type=int, default=1, help="Concurrent writer connections")
+    parser.add_argument("--receiver-port", type=int, default=18765, help="Port of the stand-in webhook")
+    parser.add_argument("--drain-seconds", type=float, default=5,
+                        help="Time to wait for in-flight events after the last step")
+    parser.add_argument("--spawn-listener", action="store_true",
+                        help="Start pg-listener/listener.js pointed at the stand-in webhook")
+    parser.add_argument("--listener-host", type=str, default="127.0.0.1",
+                        help="Host pg-listener should use to reach this machine (default: 127.0.0.1)")
+    parser.add_argument("--latency-budget-ms", type=float, default=1000,
+                        help="p95 notify latency above which a step counts as falling behind (default: 1000)")
+    parser.add_argument("--keep-rows", action="store_true", help="Do not delete benchmark rows afterwards")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the update mix")
+    parser.add_argument("--json", type=str, help="Write the throughput/latency curve to this JSON file")
+    parser.add_argument("--config", type=str, default=None, help="Path to environment configuration file")
+    args = parser.parse_args()
+
+    env = load_env(args.config)
+    rates = [float(rate) for rate in args.rates.split(",") if rate.strip()]
+    run_tag = f"bench-{uuid.uuid4().hex[:8]}"
+
+    receiver = NotifyReceiver(args.receiver_port)
+    receiver.start()
+    receiver_url = f"http://{args.listener_host}:{args.receiver_port}"
+    print(f"{Fore.CYAN}📡 Stand-in webhook listening on {receiver_url}/webhook/pg-notify{Style.RESET_ALL}")
+
+    listener = None
+    if args.spawn_listener:
+        listener_env = dict(os.environ, N8N_WEBHOOK_BASE_URL=receiver_url,
+                            **{k: v for k, v in env.items() if k.startswith("DB_") and v})
+        listener = subprocess.Popen(["node", "listener.js"], cwd=PROJECT_ROOT / "pg-listener",
+                                    env=listener_env, stdout=subprocess.DEVNULL)
+        time.sleep(2)  # let it connect and LISTEN before the first write
+
+    steps, shared_ids = [], []
+    try:
+        for rate in rates:
+            print(f"{Fore.YELLOW}⏱️  {rate:g} events/sec for {args.step_seconds:g}s...{Style.RESET_ALL}")
+            steps.append(run_step(env, args, receiver, run_tag, rate, shared_ids))
+        time.sleep(args.drain_seconds)
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}⏹️  Benchmark interrupted - reporting completed steps{Style.RESET_ALL}")
+        time.sleep(args.drain_seconds)
+    finally:
+        if listener is not None:
+            listener.terminate()
+        receiver.stop()
+        if not args.keep_rows:
+            connection = connect_db(env)
+            with connection.cursor() as cursor:
+                cursor.execute(CLEANUP_SQL[args.table], (f"{run_tag}-%",))
+            connection.close()
+
+    curve = [summarize(step, receiver) for step in steps]
+    print()
+    print_table(curve, ["target_rate", "write_rate", "sent", "received", "drop_pct",
+                        "p50_ms", "p95_ms", "p99_ms", "max_ms", "write_errors"])
+
+    saturated = next((s for s in curve if s["drop_pct"] > 1
+                      or s["write_rate"] < 0.9 * s["target_rate"]
+                      or (s["p95_ms"] or 0) > args.latency_budget_ms), None)
+    if saturated:
+        print(f"\n{Fore.RED}🚨 Pipeline fell behind at {saturated['target_rate']:g} events/sec "
+              f"(drop {saturated['drop_pct']}%, p95 {saturated['p95_ms']}ms, "
+              f"write rate {saturated['write_rate']}/s){Style.RESET_ALL}")
+    else:
+        print(f"\n{Fore.GREEN}✅ No saturation up to {rates[-1]:g} events/sec{Style.RESET_ALL}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"table": args.table, "update_ratio": args.update_ratio, "writers": args.writers,
+                       "unmatched_events": receiver.unmatched, "webhook_requests": receiver.requests,
+                       "steps": curve}, f, indent=2)
+        print(f"{Fore.GREEN}📄 Curve written to {args.json}{Style.RESET_ALL}")
+
+    sys.exit(1 if saturated else 0)
+
+
+if __name__ == "__main__":
+    main()
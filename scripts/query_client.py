@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+SBS Query Service Client
+========================
+Client for the named-statement query service in pg-listener
+(pg-listener/query-service.js). Statements are registered in
+pg-listener/statements.js; a caller sends a name and its parameters, never
+SQL, and gets back the rows.
+
+As a library:
+    from query_client import QueryClient
+    client = QueryClient()                               # QUERY_SERVICE_URL from .env
+    titles = client.run("achievement_titles", 42)        # list of rows
+    checkin = client.run("habit_checkin", 17)["result"]  # single-row statement: a dict
+    results = client.batch([("task_complete", [3]), ("project_complete", [1])], transaction=True)
+
+Usage:
+    python scripts/query_client.py --list
+    python scripts/query_client.py achievement_titles 42
+    python scripts/query_client.py --stats
+
+Requirements:
+    pip install requests python-dotenv colorama
+"""
+
+import sys
+import json
+import argparse
+from typing import Any, Dict, List, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from sbs_common import Fore, Style, load_env, print_table
+
+
+class QueryServiceError(Exception):
+    """A statement the service rejected (4xx/503) or that failed in PostgreSQL (500)"""
+
+    def __init__(self, status: int, error: str, message: str):
+        super().__init__(f"{error}: {message}")
+        self.status = status
+        self.error = error
+        self.message = message
+
+
+class QueryClient:
+    """Pooled HTTP client for POST /query/:name and POST /query/batch"""
+
+    def __init__(self, base_url: str = None, timeout: float = 10, pool_size: int = 10, config: str = None):
+        env = load_env(config)
+        self.base_url = (base_url or env['QUERY_SERVICE_URL']).rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        if env['PG_LISTENER_TOKEN']:
+            self.session.headers["X-Listener-Token"] = env['PG_LISTENER_TOKEN']
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _post(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.session.post(f"{self.base_url}{path}", json=body, timeout=self.timeout)
+        try:
+            payload = response.json()
+        except ValueError:
+            raise QueryServiceError(response.status_code, "Invalid response", response.text[:200])
+        if response.status_code != 200:
+            raise QueryServiceError(response.status_code, payload.get("error", "Request failed"),
+                                    payload.get("message", ""))
+        return payload
+
+    def execute(self, name: str, params: Sequence[Any] = ()) -> Dict[str, Any]:
+        """Run one statement and return the full response ({success, data, count})"""
+        return self._post(f"/query/{name}", {"params": list(params)})
+
+    def run(self, name: str, *params: Any) -> Any:
+        """Run one statement and return its rows (or the row, for single-row statements)"""
+        return self.execute(name, params)["data"]
+
+    def batch(self, statements: List[Tuple[str, Sequence[Any]]], transaction: bool = False) -> List[Dict[str, Any]]:
+        """Run several statements on one connection in one request.
+
+        Returns one {success, data, count} per statement. Without
+        `transaction` a failed statement is reported in its own entry and the
+        rest still run; with it, the first failure rolls back the batch and
+        raises QueryServiceError.
+        """
+        body = {
+            "statements": [{"name": name, "params": list(params)} for name, params in statements],
+            "transaction": transaction,
+        }
+        return self._post("/query/batch", body)["results"]
+
+    def statements(self) -> List[Dict[str, Any]]:
+        response = self.session.get(f"{self.base_url}/query", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def stats(self) -> Dict[str, Any]:
+        response = self.session.get(f"{self.base_url}/query/stats", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        self.session.close()
+
+
+def parse_value(text: str) -> Any:
+    """CLI parameter: JSON when it parses (numbers, true, null, lists), else the raw string"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run named statements through pg-listener's query service")
+    parser.add_argument("name", nargs="?", help="Statement name (see --list)")
+    parser.add_argument("params", nargs="*", help="Statement parameters, parsed as JSON where possible")
+    parser.add_argument("--list", action="store_true", help="List the registered statements")
+    parser.add_argument("--stats", action="store_true", help="Print per-statement call counts and latency")
+    parser.add_argument("--url", type=str, default=None, help="Query service URL (default: $QUERY_SERVICE_URL)")
+    parser.add_argument("--config", type=str, default=None, help="Path to environment configuration file")
+    args = parser.parse_args()
+
+    client = QueryClient(args.url, config=args.config)
+    try:
+        if args.list:
+            print_table(client.statements(), ["name", "params", "single", "disabled"])
+        elif args.stats:
+            stats = client.stats()
+            rows = [
+                {"statement": name, "calls": s["calls"], "errors": s["errors"],
+                 **{f"{q}_ms": (s["latency_ms"] or {}).get(q) for q in ("p50", "p95", "p99")}}
+                for name, s in stats["statements"].items()
+            ]
+            print_table(rows, ["statement", "calls", "errors", "p50_ms", "p95_ms", "p99_ms"])
+            print(f"\npool: {stats['pool']}  batches: {stats['batches']}  rejected: {stats['rejected']}")
+        elif args.name:
+            print(json.dumps(client.run(args.name, *[parse_value(p) for p in args.params]), indent=2, default=str))
+        else:
+            parser.error("give a statement name, --list or --stats")
+    except QueryServiceError as e:
+        print(f"{Fore.RED}❌ {e.status} {e}{Style.RESET_ALL}")
+        sys.exit(1)
+    except requests.RequestException as e:
+        print(f"{Fore.RED}❌ Query service unreachable at {client.base_url}: {e}{Style.RESET_ALL}")
+        sys.exit(1)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
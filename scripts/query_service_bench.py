@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+SBS Query Service Benchmark
+===========================
+Compares the ways a workflow can run one of its statements:
+
+- subflow: POST the SQL text to the subflow-database-query webhook, as the
+  game-engine flows used to. Every call pays for an n8n execution. The
+  subflow ignores "parameters", so values are inlined and PostgreSQL parses
+  and plans every call.
+- direct:  the same inlined SQL text over a plain psycopg2 connection per
+  worker. This is the database cost of the subflow path without n8n.
+- service: POST /query/:name to pg-listener's query service, which runs the
+  registered prepared statement over its connection pool.
+- batch:   POST /query/batch with --batch-size statements per request.
+
+Each mode runs closed-loop with --concurrency workers for --seconds, and
+reports statements per second, request latency percentiles and errors.
+Modes whose endpoint cannot be reached are skipped. Parameters are taken
+from --params; "<id>" is replaced with a random id in 1..--id-max on every
+call. Use read-only statements unless the database is disposable.
+
+Usage:
+    python scripts/query_service_bench.py                                   # character_recent_activity
+    python scripts/query_service_bench.py --statement achievement_titles --concurrency 16 --seconds 20
+    python scripts/query_service_bench.py --modes service,batch --batch-size 25 --json query_bench.json
+
+Requirements:
+    pip install requests psycopg2-binary python-dotenv colorama
+    pg-listener running with the query service; n8n running for --modes subflow
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from typing import Any, Callable, Dict, List
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from sbs_common import Fore, Style, load_env, connect_db, percentile, print_table, query_service_statements
+from query_client import QueryClient
+
+MODES = ["subflow", "direct", "service", "batch"]
+PARAM = re.compile(r"\$(\d+)\b")
+
+
+def render_params(template: List[Any], rng: random.Random, id_max: int) -> List[Any]:
+    return [rng.randint(1, id_max) if value == "<id>" else value for value in template]
+
+
+def inline(sql: str, params: List[Any]) -> str:
+    """SQL text with $n replaced by quoted literals, as callers of the subflow had to send it"""
+    from psycopg2.extensions import adapt
+    return PARAM.sub(lambda m: adapt(params[int(m.group(1)) - 1]).getquoted().decode(), sql)
+
+
+def make_call(mode: str, name: str, sql: str, env: Dict[str, Any], args) -> Callable[[List[List[Any]]], int]:
+    """A per-worker callable that runs one request for the given parameter lists and returns statements run"""
+    if mode == "direct":
+        connection = connect_db(env)
+        cursor = connection.cursor()
+
+        def call(batch):
+            cursor.execute(inline(sql, batch[0]))
+            cursor.fetchall()
+            return 1
+        call.close = connection.close
+        return call
+
+    if mode == "subflow":
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(pool_maxsize=1))
+        url = f"{env['SUBFLOW_BASE_URL'].rstrip('/')}/webhook/subflow-database-query"
+
+        def call(batch):
+            response = session.post(url, json={"operation": "executeQuery", "query": inline(sql, batch[0]),
+                                               "return_first_only": False}, timeout=args.timeout)
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}")
+            return 1
+        call.close = session.close
+        return call
+
+    client = QueryClient(args.url or env['QUERY_SERVICE_URL'], timeout=args.timeout, pool_size=1)
+    if mode == "service":
+        def call(batch):
+            client.execute(name, batch[0])
+            return 1
+    else:
+        def call(batch):
+            results = client.batch([(name, params) for params in batch])
+            failed = [r for r in results if not r["success"]]
+            if failed:
+                raise RuntimeError(failed[0].get("message"))
+            return len(results)
+    call.close = client.close
+    return call
+
+
+def reachable(mode: str, env: Dict[str, Any], args) -> str:
+    """Empty string when the mode's endpoint answers, else the reason to skip it"""
+    try:
+        if mode == "direct":
+            connect_db(env).close()
+        elif mode == "subflow":
+            requests.post(f"{env['SUBFLOW_BASE_URL'].rstrip('/')}/webhook/subflow-database-query", json={},
+                          timeout=args.timeout)
+        else:
+            QueryClient(args.url or env['QUERY_SERVICE_URL'], timeout=args.timeout).statements()
+        return ""
+    except Exception as e:
+        return str(e).splitlines()[0][:120]
+
+
+def run_mode(mode: str, name: str, sql: str, template: List[Any], env: Dict[str, Any], args) -> Dict[str, Any]:
+    per_request = args.batch_size if mode == "batch" else 1
+    latencies: List[float] = []
+    counts = {"requests": 0, "statements": 0, "errors": 0}
+    lock = threading.Lock()
+    errors: List[str] = []
+    deadline = time.monotonic() + args.seconds
+
+    def worker(index: int):
+        rng = random.Random(args.seed + index)
+        call = make_call(mode, name, sql, env, args)
+        try:
+            while time.monotonic() < deadline:
+                batch = [render_params(template, rng, args.id_max) for _ in range(per_request)]
+                started = time.perf_counter()
+                try:
+                    done, failed = call(batch), False
+                except Exception as e:
+                    done, failed = 0, True
+                    if len(errors) < 3:
+                        errors.append(str(e).splitlines()[0][:160])
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                with lock:
+                    counts["requests"] += 1
+                    counts["statements"] += done
+                    counts["errors"] += failed
+                    if not failed:
+                        latencies.append(elapsed_ms)
+        finally:
+            call.close()
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(args.concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        "mode": mode if mode != "batch" else f"batch x{per_request}",
+        **counts,
+        "stmt_per_sec": round(counts["statements"] / seconds, 1),
+        "p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+        "sample_errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the query service against the SQL-over-webhook subflow")
+    parser.add_argument("--statement", type=str, default="character_recent_activity",
+                        help="Registered statement to run (default: character_recent_activity)")
+    parser.add_argument("--params", type=str, default='["<id>"]',
+                        help='JSON list of parameters; "<id>" is a random id per call (default: ["<id>"])')
+    parser.add_argument("--id-max", type=int, default=1000, help="Upper bound for random ids (default: 1000)")
+    parser.add_argument("--modes", type=str, default=",".join(MODES), help=f"Comma-separated subset of {MODES}")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent workers per mode (default: 8)")
+    parser.add_argument("--seconds", type=float, default=10, help="Duration of each mode (default: 10)")
+    parser.add_argument("--batch-size", type=int, default=10, help="Statements per request in batch mode (default: 10)")
+    parser.add_argument("--timeout", type=float, default=10, help="HTTP timeout in seconds (default: 10)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the random ids")
+    parser.add_argument("--url", type=str, default=None, help="Query service URL (default: $QUERY_SERVICE_URL)")
+    parser.add_argument("--json", type=str, help="Write the results to this JSON file")
+    parser.add_argument("--config", type=str, default=None, help="Path to environment configuration file")
+    args = parser.parse_args()
+
+    env = load_env(args.config)
+    statements = query_service_statements()
+    if args.statement not in statements:
+        print(f"{Fore.RED}❌ Unknown statement '{args.statement}' - registered: {', '.join(statements)}{Style.RESET_ALL}")
+        sys.exit(1)
+    sql = statements[args.statement]["sql"]
+    template = json.loads(args.params)
+    expected = max([int(n) for n in PARAM.findall(sql)] or [0])
+    if len(template) != expected:
+        print(f"{Fore.RED}❌ {args.statement} expects {expected} parameters, --params has {len(template)}{Style.RESET_ALL}")
+        sys.exit(1)
+
+    rows = []
+    try:
+        for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+            if mode not in MODES:
+                parser.error(f"unknown mode '{mode}' (choose from {', '.join(MODES)})")
+            reason = reachable(mode, env, args)
+            if reason:
+                print(f"{Fore.YELLOW}⏭️  {mode}: skipped ({reason}){Style.RESET_ALL}")
+                continue
+            print(f"{Fore.YELLOW}⏱️  {mode}: {args.statement}, {args.concurrency} workers, {args.seconds:g}s...{Style.RESET_ALL}")
+            rows.append(run_mode(mode, args.statement, sql, template, env, args))
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}⏹️  Benchmark interrupted - reporting completed modes{Style.RESET_ALL}")
+
+    if not rows:
+        print(f"{Fore.RED}❌ No mode could be run{Style.RESET_ALL}")
+        sys.exit(1)
+
+    print()
+    print_table(rows, ["mode", "requests", "statements", "errors", "stmt_per_sec", "p50_ms", "p95_ms", "p99_ms"])
+    for row in rows:
+        for error in row["sample_errors"]:
+            print(f"{Fore.RED}  {row['mode']}: {error}{Style.RESET_ALL}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"statement": args.statement, "concurrency": args.concurrency, "results": rows}, f, indent=2)
+        print(f"{Fore.GREEN}📄 Results written to {args.json}{Style.RESET_ALL}")
+
+
+if __name__ == "__main__":
+    main()
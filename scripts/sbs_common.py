@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+SBS Script Helpers
+==================
+Shared environment, database, workflow and output helpers for the Python
+tools in scripts/. Mirrors the .env handling of health_check.py so every tool
+reads the same DB_* / N8N_* settings.
+
+Requirements:
+    pip install psycopg2-binary python-dotenv colorama
+"""
+
+import os
+import re
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from dotenv import load_dotenv
+    DOTENV_AVAILABLE = True
+except ImportError:
+    DOTENV_AVAILABLE = False
+
+try:
+    from colorama import init, Fore, Style
+    init(autoreset=True)
+except ImportError:
+    # Fallback color definitions
+    class Fore:
+        RED = GREEN = YELLOW = BLUE = MAGENTA = CYAN = WHITE = RESET = ""
+    class Style:
+        BRIGHT = DIM = NORMAL = RESET_ALL = ""
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+WORKFLOW_DIR = PROJECT_ROOT / "n8n"
+QUERY_STATEMENTS_FILE = PROJECT_ROOT / "pg-listener" / "statements.js"
+
+# name: { single: true, text: '...' } entries of pg-listener/statements.js
+_QUERY_STATEMENT = re.compile(r"(\w+): \{\s*(single: true,\s*)?text: (['`])(.*?)\3", re.S)
+
+
+def load_env(env_file: str = None) -> Dict[str, Optional[str]]:
+    """Load .env (explicit path, then ./.env, then the project root) and return DB/n8n settings"""
+    candidates = [Path(env_file)] if env_file else [Path(".env"), PROJECT_ROOT / ".env"]
+    for path in candidates:
+        if not path.exists():
+            continue
+        if DOTENV_AVAILABLE:
+            load_dotenv(path)
+        else:
+            with open(path, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#') and '=' in line:
+                        key, value = line.split('=', 1)
+                        os.environ.setdefault(key.strip(), value.strip())
+        break
+
+    return {
+        'DB_HOST': os.getenv('DB_HOST', 'localhost'),
+        'DB_PORT': os.getenv('DB_PORT', '5432'),
+        'DB_NAME': os.getenv('DB_NAME', 'lifeos_db'),
+        'DB_USER': os.getenv('DB_USER', 'lifeos_app'),
+        'DB_PASSWORD': os.getenv('DB_PASSWORD'),
+        'N8N_WEBHOOK_BASE_URL': os.getenv('N8N_WEBHOOK_BASE_URL', 'http://localhost:5678'),
+        'SUBFLOW_BASE_URL': os.getenv('SUBFLOW_BASE_URL') or os.getenv('N8N_WEBHOOK_BASE_URL', 'http://localhost:5678'),
+        'QUERY_SERVICE_URL': os.getenv('QUERY_SERVICE_URL', 'http://localhost:18787'),
+        'PG_LISTENER_TOKEN': os.getenv('PG_LISTENER_TOKEN'),
+    }
+
+
+def db_dsn(env: Dict[str, Optional[str]]) -> str:
+    """libpq connection string for the configured database, with values quoted by make_dsn"""
+    from psycopg2.extensions import make_dsn
+    parts = {
+        'host': env['DB_HOST'],
+        'port': env['DB_PORT'],
+        'dbname': env['DB_NAME'],
+        'user': env['DB_USER'],
+        'password': env['DB_PASSWORD'],
+    }
+    return make_dsn(**{key: value for key, value in parts.items() if value})
+
+
+def connect_db(env: Dict[str, Optional[str]], autocommit: bool = True, connect_timeout: int = 5):
+    """Open a psycopg2 connection using the loaded environment"""
+    import psycopg2
+    connection = psycopg2.connect(db_dsn(env), connect_timeout=connect_timeout)
+    connection.autocommit = autocommit
+    return connection
+
+
+def load_workflow(path: Path) -> Dict[str, Any]:
+    """Parse an exported n8n workflow, tolerating the UTF-8 BOM some exports carry"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return json.load(f)
+
+
+def iter_workflows(root: Path = WORKFLOW_DIR) -> Iterator[Tuple[Path, Optional[Dict[str, Any]], Optional[str]]]:
+    """Yield (path, workflow, error) for every workflow JSON under root; workflow is None when it does not parse"""
+    for path in sorted(Path(root).rglob("*.json")):
+        try:
+            yield path, load_workflow(path), None
+        except (ValueError, UnicodeDecodeError) as e:
+            yield path, None, str(e)
+
+
+def workflow_webhooks(workflow: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Webhook trigger nodes of a workflow as {node, method, path}"""
+    return [
+        {
+            'node': node.get('name'),
+            'method': node.get('parameters', {}).get('httpMethod', 'GET'),
+            'path': node.get('parameters', {}).get('path', '').strip('/'),
+        }
+        for node in workflow.get('nodes', [])
+        if node.get('type') == 'n8n-nodes-base.webhook'
+    ]
+
+
+def query_service_statements(path: Path = QUERY_STATEMENTS_FILE) -> Dict[str, Dict[str, Any]]:
+    """Named statements registered with pg-listener's query service as {name: {sql, single}}"""
+    if not Path(path).exists():
+        return {}
+    return {
+        name: {'sql': " ".join(text.split()), 'single': bool(single)}
+        for name, single, _, text in _QUERY_STATEMENT.findall(Path(path).read_text(encoding='utf-8'))
+    }
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(-(-pct * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def print_table(rows: List[Dict], columns: List[str], formats: Dict[str, str] = None):
+    """Print rows as a fixed-width table"""
+    formats = formats or {}
+
+    def cell(row, column):
+        value = row.get(column)
+        if value is None:
+            return "-"
+        return format(value, formats.get(column, ""))
+
+    widths = {c: max([len(c)] + [len(cell(r, c)) for r in rows]) for c in columns}
+    print("  ".join(f"{c:>{widths[c]}}" for c in columns))
+    for row in rows:
+        print("  ".join(f"{cell(row, c):>{widths[c]}}" for c in columns))
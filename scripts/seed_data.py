@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+SBS Synthetic Data Generator
+============================
+Fills users, characters, skills, habits, systems, routines,
+routine_completions, events and system_logs with referentially consistent
+synthetic rows, streamed through COPY, for scale-testing the schema.
+
+--scale is the number of users (1k to 10M); every other table is sized from
+it. Each user has one character, and each character gets an activity weight
+drawn from a Pareto distribution. That weight drives the rest of the data:
+most characters are casual, and a few heavy users own most of the habits,
+routine completions, events and logs and have logged in recently. Levels,
+coins and streaks follow the same heavy tail.
+
+Output is deterministic: the same --seed, --scale and --as-of always produce
+the same rows. Each table draws from its own seeded generator, so a change
+to one table's distribution leaves the others unchanged. Times are laid out
+backwards from --as-of (default: today), so time-window queries
+("logged in within 30 days") behave the same on every run.
+
+By default the tables of the configured database are filled and must be
+empty (--truncate empties them first, CASCADE). --schema NAME loads into
+empty copies of the tables in a scratch schema instead. Row-level NOTIFY
+triggers are disabled during the load, so pg-listener does not get one event
+per generated row.
+
+Usage:
+    python scripts/seed_data.py --scale 10k                    # into an empty database
+    python scripts/seed_data.py --scale 1M --truncate --seed 7
+    python scripts/seed_data.py --scale 100k --schema synthetic --json seed.json
+
+Requirements:
+    pip install psycopg2-binary python-dotenv colorama
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from array import array
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+from sbs_common import Fore, Style, load_env, connect_db, print_table
+
+# Load order; each table only references tables before it
+TABLES = ["users", "characters", "skills", "habits", "systems", "routines",
+          "routine_completions", "events", "system_logs"]
+
+COLUMNS = {
+    "users": ["id", "email", "username", "avatar", "join_date", "theme", "total_prestiges",
+              "telegram_user_id", "created_at", "updated_at"],
+    "characters": ["id", "user_id", "class", "level", "xp", "total_xp", "hp", "max_hp", "coins",
+                   "prestige_level", "xp_multiplier", "title", "last_login", "created_at", "updated_at"],
+    "skills": ["id", "character_id", "name", "xp", "level", "unlocked", "created_at", "updated_at"],
+    "habits": ["id", "character_id", "skill_id", "name", "type", "frequency", "xp_value", "hp_value",
+               "streak", "last_completed", "created_by", "created_at", "updated_at"],
+    "systems": ["id", "name", "category", "update_frequency", "current_stage", "owner_type", "owner_id",
+                "created_at", "updated_at"],
+    "routines": ["id", "name", "system_id", "day_of_week", "status", "habit_id", "trigger_type",
+                 "active", "automated", "streak", "created_at"],
+    "routine_completions": ["id", "routine_id", "completion_date", "quality_rating", "xp_earned",
+                            "coins_earned", "streak_at_completion", "completed_at"],
+    "events": ["id", "character_id", "event_type", "xp_change", "hp_change", "coins_change",
+               "description", "event_date"],
+    "system_logs": ["id", "system_id", "character_id", "user_id", "event_type", "log_level",
+                    "event_category", "event_details", "source", "created_at"],
+}
+
+# Mean rows per parent; per-character counts are scaled by the character's activity
+SKILLS_PER_CHARACTER = 4
+HABITS_PER_CHARACTER = 5
+SYSTEMS_PER_USER = 0.8
+ROUTINES_PER_SYSTEM = 2.5
+EVENTS_PER_CHARACTER = 20
+LOGS_PER_CHARACTER = 10
+PARETO_ALPHA = 1.5          # mean alpha / (alpha - 1) = 3, so activity averages about 1
+MAX_ACTIVITY = 40.0
+HISTORY_DAYS = 90           # events and logs fall inside this window before --as-of
+
+CLASSES = [("warrior", 30), ("mage", 20), ("rogue", 15), ("scholar", 15), ("monk", 10), (None, 10)]
+SKILL_NAMES = ["Fitness", "Focus", "Reading", "Nutrition", "Sleep", "Coding", "Writing", "Meditation",
+               "Finance", "Music", "Languages", "Cooking", "Social", "Art", "Cleaning", "Gardening"]
+HABIT_NAMES = ["Drink water", "Morning run", "Read 20 pages", "Meditate", "No sugar", "Journal",
+               "Stretch", "Doom scrolling", "Late snack", "Practice guitar", "Walk 10k steps",
+               "Inbox zero", "Floss", "Skip workout", "Cold shower", "Learn a word"]
+FREQUENCIES = [("daily", 70), ("weekly", 20), ("monthly", 10)]
+SYSTEM_CATEGORIES = ["health", "work", "learning", "home", "finance", "social"]
+STAGES = ["define", "design", "build", "optimize", "automate"]
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday", None]
+ROUTINE_STATUS = [("active", 75), ("paused", 15), ("archived", 10)]
+TRIGGER_TYPES = [("scheduled", 70), ("manual", 25), ("event", 5)]
+EVENT_TYPES = [("habit_completed", 45), ("task_completed", 20), ("routine_completed", 12),
+               ("daily_event", 8), ("streak_broken", 6), ("level_up", 4), ("shop_purchase", 4),
+               ("user_login", 1)]
+LOG_LEVELS = [("info", 70), ("debug", 15), ("warning", 10), ("error", 4), ("critical", 1)]
+LOG_EVENTS = [("routine_completed", "routine"), ("routine_skipped", "routine"),
+              ("habit_checkin", "habit"), ("user_login", "auth"), ("ai_mission_created", "ai"),
+              ("workflow_error", "system")]
+LOG_SOURCES = [("system", 50), ("n8n", 30), ("telegram_bot", 15), ("user_request", 5)]
+
+NULL = "\\N"
+
+
+def parse_scale(value: str) -> int:
+    """'1000', '10k', '2.5M' -> number of users"""
+    text = value.strip().lower()
+    factor = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    number = float(text[:-1] if factor > 1 else text) * factor
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"scale must be at least 1: {value}")
+    return int(number)
+
+
+def weighted(rng: random.Random, choices: List[Tuple[Any, int]]):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def zipf_pick(rng: random.Random, items: List[str], k: int = 1) -> List[str]:
+    """Distinct items, earlier ones more likely (weights 1, 1/2, 1/3, ...)"""
+    picked = []
+    while len(picked) < min(k, len(items)):
+        item = items[int((len(items) + 1) ** rng.random()) - 1]
+        if item not in picked:
+            picked.append(item)
+    return picked
+
+
+def skewed_count(rng: random.Random, mean: float, cap: int = 255) -> int:
+    """Non-negative count with the given mean and an exponential tail"""
+    return min(cap, int(rng.expovariate(1.0 / mean) + 0.5)) if mean > 0 else 0
+
+
+def character_level(total_xp: int) -> Tuple[int, int]:
+    """Level and XP into it on the game's curve: level N -> N+1 costs 100 + 50 * N (habit_checkin)"""
+    level, floor = 1, 0
+    while level < 100 and floor + 100 + 50 * level <= total_xp:
+        floor += 100 + 50 * level
+        level += 1
+    return level, total_xp - floor
+
+
+class Timeline:
+    """Renders offsets back from --as-of as COPY timestamps"""
+
+    def __init__(self, as_of: date):
+        self.as_of = as_of
+        self.end = datetime.combine(as_of, dt_time(), tzinfo=timezone.utc)
+
+    def ago(self, days: float) -> str:
+        return (self.end - timedelta(days=days)).isoformat()
+
+    def day(self, days_back: int) -> str:
+        return (self.as_of - timedelta(days=days_back)).isoformat()
+
+
+class Population:
+    """Per-user and per-character state the child tables are generated from"""
+
+    def __init__(self, users: int):
+        self.users = users
+        self.activity = array("f", bytes(4 * (users + 1)))      # index = user id = character id
+        self.days_since_login = array("f", bytes(4 * (users + 1)))
+        self.skill_count = array("B", bytes(users + 1))
+        self.habit_count = array("B", bytes(users + 1))
+        self.habit_start = array("Q", bytes(8 * (users + 2)))   # first habit id per character
+        self.system_owner = array("L")                         # index = system id - 1
+        self.routine_system = array("L")                       # index = routine id - 1
+        self.routine_streak = array("H")
+        self.routine_status = array("B")                       # index into ROUTINE_STATUS
+
+
+class CopyStream:
+    """File-like object feeding generated rows to cursor.copy_expert"""
+
+    def __init__(self, rows: Iterator[Tuple]):
+        self.rows = rows
+        self.buffer = b""
+        self.count = 0
+
+    def read(self, size: int = 1 << 20) -> bytes:
+        lines = []
+        length = len(self.buffer)
+        for row in self.rows:
+            line = "\t".join(NULL if value is None else str(value) for value in row) + "\n"
+            lines.append(line)
+            self.count += 1
+            length += len(line)
+            if length >= size:
+                break
+        data = self.buffer + "".join(lines).encode()
+        self.buffer = data[size:]
+        return data[:size]
+
+
+def gen_users(rng: random.Random, pop: Population, clock: Timeline) -> Iterator[Tuple]:
+    for uid in range(1, pop.users + 1):
+        # Sign-ups grow over time: recent join dates are more common
+        joined = clock.ago(min(3 * 365, rng.expovariate(1 / 240.0)) + 1)
+        telegram = 5_000_000_000 + uid if rng.random() < 0.6 else None
+        prestiges = skewed_count(rng, 0.2, cap=10)
+        avatar = f"avatars/{uid % 97}.png" if rng.random() < 0.4 else None
+        theme = "dark" if rng.random() < 0.35 else "default"
+        yield (uid, f"user{uid}@example.com", f"user{uid}", avatar, joined, theme, prestiges,
+               telegram, joined, joined)
+
+
+def gen_characters(rng: random.Random, pop: Population, clock: Timeline) -> Iterator[Tuple]:
+    for cid in range(1, pop.users + 1):
+        activity = min(MAX_ACTIVITY, rng.paretovariate(PARETO_ALPHA) / 3)
+        pop.activity[cid] = activity
+        # Heavy users log in daily; casual ones drift away for weeks
+        since_login = min(365.0, rng.expovariate(activity / 21.0))
+        pop.days_since_login[cid] = since_login
+        total_xp = int(activity * rng.lognormvariate(7, 1))
+        level, xp = character_level(total_xp)
+        max_hp = 100 + 10 * (level - 1)
+        hp = max(1, min(max_hp, int(rng.gauss(0.8, 0.2) * max_hp)))
+        coins = int(activity * rng.lognormvariate(4.5, 1))
+        prestige = skewed_count(rng, 0.1 * activity, cap=10)
+        multiplier = f"{1 + 0.05 * min(prestige, 10):.2f}"
+        title = f"Level {level} {'Veteran' if level >= 20 else 'Adventurer'}" if rng.random() < 0.3 else None
+        created = clock.ago(since_login + rng.expovariate(1 / 180.0))
+        yield (cid, str(cid), weighted(rng, CLASSES), level, xp, total_xp, hp, max_hp, coins,
+               prestige, multiplier, title, clock.ago(since_login), created, clock.ago(since_login))
+
+
+def gen_skills(rng: random.Random, pop: Population, clock: Timeline) -> Iterator[Tuple]:
+    sid = 0
+    for cid in range(1, pop.users + 1):
+        activity = pop.activity[cid]
+        names = zipf_pick(rng, SKILL_NAMES, 1 + skewed_count(rng, (SKILLS_PER_CHARACTER - 1) * activity, 15))
+        pop.skill_count[cid] = len(names)
+        for name in names:
+            sid += 1
+            xp = int(activity * rng.lognormvariate(5, 1))
+            level = 1 + xp // 100       # habit_checkin levels a skill up at level * 100 XP
+            updated = clock.ago(pop.days_since_login[cid])
+            yield (sid, cid, name, xp, level, "t" if level > 1 else "f", updated, updated)
+
+
+def gen_habits(rng: random.Random, pop: Population, clock: Timeline) -> Iterator[Tuple]:
+    hid = 0
+    first_skill = 1
+    for cid in range(1, pop.users + 1):
+        activity = pop.activity[cid]
+        count = skewed_count(rng, HABITS_PER_CHARACTER * activity, 60)
+        pop.habit_count[cid] = count
+        pop.habit_start[cid] = hid + 1
+        skills = pop.skill_count[cid]
+        for name in zipf_pick(rng, HABIT_NAMES, count) + [None] * max(0, count - len(HABIT_NAMES)):
+            hid += 1
+            good = rng.random() < 0.8
+            streak = skewed_count(rng, 3 * activity, 365) if good else 0
+            # Streaks end on the last login; habits of dormant characters are overdue
+            last_done = int(pop.days_since_login[cid]) + (0 if streak else rng.randint(1, 14))
+            skill_id = first_skill + rng.randrange(skills) if skills and rng.random() < 0.7 else None
+            created = clock.ago(last_done + streak + rng.expovariate(1 / 60.0))
+            yield (hid, cid, skill_id, name or f"Habit {hid}", "good" if good else "bad",
+                   weighted(rng, FREQUENCIES), rng.choice((5, 10, 10, 15, 25)) if good else 0,
+                   0 if good else -rng.choice((2, 5, 10)), streak,
+                   clock.day(last_done) if good or rng.random() < 0.5 else None,
+                   "ai" if rng.random() < 0.2 else "user", created, clock.ago(last_done))
+        first_skill += skills
+    pop.habit_start[pop.users + 1] = hid + 1
+
+
+def gen_systems(rng: random.Random, pop: Population, clock: Timeline) -> Iterator[Tuple]:
+    sid = 0
+    for uid in range(1, pop.users + 1):
+        for _ in range(skewed_count(rng, SYSTEMS_PER_USER * pop.activity[uid], 20)):
+            sid += 1
+            pop.system_owner.append(uid)
+            category = zipf_pick(rng, SYSTEM_CATEGORIES)[0]
+            created = clock.ago(pop.days_since_login[uid] + rng.expovariate(1 / 90.0))
+            yield (sid, f"{category.title()} system {sid}", category, weighted(rng, FREQUENCIES),
+                   rng.choice(STAGES), "user", uid, created, created)
+
+
+def gen_routines(rng: random.Random, pop: Population, clock: Timeline) -> Iterator[Tuple]:
+    rid = 0
+    for index, uid in enumerate(pop.system_owner):
+        first_habit, habits = pop.habit_start[uid], pop.habit_count[uid]
+        for _ in range(1 + skewed_count(rng, ROUTINES_PER_SYSTEM - 1, 12)):
+            rid += 1
+            status = rng.choices(range(len(ROUTINE_STATUS)), [w for _, w in ROUTINE_STATUS])[0]
+            active = status == 0
+            streak = skewed_count(rng, 2 * pop.activity[uid], 365) if active else 0
+            pop.routine_system.append(index + 1)
+            pop.routine_status.append(status)
+            pop.routine_streak.append(streak)
+            habit_id = first_habit + rng.randrange(habits) if habits and rng.random() < 0.5 else None
+            created = clock.ago(pop.days_since_login[uid] + streak + rng.expovariate(1 / 60.0))
+            yield (rid, f"Routine {rid}", index + 1, rng.choice(DAYS), ROUTINE_STATUS[status][0],
+                   habit_id, weighted(rng, TRIGGER_TYPES), "t" if active else "f",
+                   "t" if rng.random() < 0.1 else "f", streak, created)
+
+
+def gen_routine_completions(rng: random.Random, pop: Population, clock: Timeline) -> Iterator[Tuple]:
+    cid = 0
+    for index, system_id in enumerate(pop.routine_system):
+        uid = pop.system_owner[system_id - 1]
+        activity = pop.activity[uid]
+        streak = pop.routine_streak[index]
+        last = int(pop.days_since_login[uid])
+        # The current streak is consecutive days up to the last login, earlier history is sporadic
+        days = [last + d for d in range(streak)]
+        day = last + streak + 1
+        for _ in range(skewed_count(rng, 3 * activity if ROUTINE_STATUS[pop.routine_status[index]][0] != "archived"
+                                    else 3, 500)):
+            day += 1 + int(rng.expovariate(activity / 2.0))
+            days.append(day)
+        for position, days_back in enumerate(days):
+            cid += 1
+            run = max(0, streak - position)
+            quality = min(5, max(1, int(rng.gauss(3.6, 1) + 0.5))) if rng.random() < 0.6 else None
+            yield (cid, index + 1, clock.day(days_back), quality, 10 + 2 * min(run, 20), 5 if run else 2,
+                   run, clock.ago(days_back - rng.uniform(0.3, 0.95)))
+
+
+def gen_events(rng: random.Random, pop: Population, clock: Timeline) -> Iterator[Tuple]:
+    eid = 0
+    for cid in range(1, pop.users + 1):
+        activity = pop.activity[cid]
+        recent = pop.days_since_login[cid]
+        if recent >= HISTORY_DAYS:
+            continue
+        for _ in range(skewed_count(rng, EVENTS_PER_CHARACTER * activity, 5000)):
+            eid += 1
+            event_type = weighted(rng, EVENT_TYPES)
+            xp = rng.choice((5, 10, 15, 25)) if event_type.endswith("completed") else 0
+            hp = -rng.choice((5, 10)) if event_type == "streak_broken" else 0
+            coins = -rng.choice((10, 25, 50)) if event_type == "shop_purchase" else xp // 5
+            yield (eid, cid, event_type, xp, hp, coins, event_type.replace("_", " ").capitalize(),
+                   clock.ago(recent + rng.expovariate(1 / 20.0) % (HISTORY_DAYS - recent)))
+
+
+def gen_system_logs(rng: random.Random, pop: Population, clock: Timeline) -> Iterator[Tuple]:
+    lid = 0
+    systems_by_owner: Dict[int, int] = {}
+    for system_id, uid in enumerate(pop.system_owner, start=1):
+        systems_by_owner.setdefault(uid, system_id)
+    for cid in range(1, pop.users + 1):
+        recent = pop.days_since_login[cid]
+        if recent >= HISTORY_DAYS:
+            continue
+        system_id = systems_by_owner.get(cid)
+        for _ in range(skewed_count(rng, LOGS_PER_CHARACTER * pop.activity[cid], 5000)):
+            lid += 1
+            event_type, category = rng.choice(LOG_EVENTS)
+            level = weighted(rng, LOG_LEVELS)
+            if event_type == "workflow_error":
+                level = "error"
+            details = f'{{"seq": {lid}, "duration_ms": {int(rng.lognormvariate(4, 1))}}}'
+            yield (f"log_{lid}", system_id if category == "routine" else None, cid, cid, event_type,
+                   level, category, details, weighted(rng, LOG_SOURCES),
+                   clock.ago(recent + rng.expovariate(1 / 20.0) % (HISTORY_DAYS - recent)))
+
+
+GENERATORS = {
+    "users": gen_users,
+    "characters": gen_characters,
+    "skills": gen_skills,
+    "habits": gen_habits,
+    "systems": gen_systems,
+    "routines": gen_routines,
+    "routine_completions": gen_routine_completions,
+    "events": gen_events,
+    "system_logs": gen_system_logs,
+}
+
+
+def prepare_target(connection, schema: Optional[str], truncate: bool):
+    """Point the session at the target tables and make sure they are empty"""
+    with connection.cursor() as cursor:
+        if schema:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+            cursor.execute(f"CREATE SCHEMA {schema}")
+            for table in TABLES:
+                cursor.execute(f"CREATE TABLE {schema}.{table} (LIKE public.{table} INCLUDING ALL)")
+                if table != "system_logs":
+                    # Own sequences, so loaded ids do not advance the real tables'
+                    cursor.execute(f"CREATE SEQUENCE {schema}.{table}_id_seq OWNED BY {schema}.{table}.id")
+                    cursor.execute(f"ALTER TABLE {schema}.{table} "
+                                   f"ALTER COLUMN id SET DEFAULT nextval('{schema}.{table}_id_seq')")
+            cursor.execute(f"SET search_path TO {schema}, public")
+            return
+
+        if truncate:
+            cursor.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE")
+            return
+        not_empty = []
+        for table in TABLES:
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table})")
+            if cursor.fetchone()[0]:
+                not_empty.append(table)
+        if not_empty:
+            raise SystemExit(f"{Fore.RED}❌ Tables already contain rows: {', '.join(not_empty)} - "
+                             f"use --truncate or --schema{Style.RESET_ALL}")
+
+
+def row_triggers(connection) -> List[Tuple[str, str]]:
+    """User-defined row-level triggers (NOTIFY per row) on the loaded tables"""
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT c.relname, t.tgname
+            FROM pg_trigger t JOIN pg_class c ON c.oid = t.tgrelid
+            WHERE NOT t.tgisinternal AND t.tgtype & 1 = 1
+              AND c.oid = ANY(%s::regclass[])
+        """, (TABLES,))
+        return cursor.fetchall()
+
+
+def create_history_partitions(connection, clock: Timeline) -> int:
+    """Monthly system_logs partitions back to the oldest generated row, so history skips the DEFAULT partition"""
+    with connection.cursor() as cursor:
+        # A --schema copy (LIKE ... INCLUDING ALL) is a plain table
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'system_logs'::regclass)")
+        if not cursor.fetchone()[0]:
+            return 0
+        cursor.execute("SELECT create_log_partitions('system_logs', 3, %s)", (clock.ago(HISTORY_DAYS),))
+        return cursor.fetchone()[0]
+
+
+def load_table(connection, table: str, rng: random.Random, pop: Population, clock: Timeline) -> Dict[str, Any]:
+    stream = CopyStream(GENERATORS[table](rng, pop, clock))
+    started = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table} ({', '.join(COLUMNS[table])}) FROM STDIN", stream, size=1 << 20)
+        if table != "system_logs":
+            cursor.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), GREATEST(%s, 1), %s)",
+                           (table, stream.count, stream.count > 0))
+    seconds = time.perf_counter() - started
+    return {"table": table, "rows": stream.count, "seconds": round(seconds, 2),
+            "rows_per_sec": round(stream.count / seconds) if seconds else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate deterministic synthetic data at a chosen scale")
+    parser.add_argument("--scale", type=parse_scale, default=parse_scale("10k"),
+                        help="Number of users, e.g. 1000, 50k, 2M (default: 10k)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the synthetic data")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today(),
+                        help="Date the generated history ends at (default: today)")
+    parser.add_argument("--schema", type=str, default=None,
+                        help="Load into copies of the tables in this scratch schema (recreated)")
+    parser.add_argument("--truncate", action="store_true",
+                        help="Empty the target tables first (TRUNCATE ... CASCADE also empties tables referencing them)")
+    parser.add_argument("--no-analyze", action="store_true", help="Skip ANALYZE after loading")
+    parser.add_argument("--json", type=str, help="Write the per-table results to this JSON file")
+    parser.add_argument("--config", type=str, default=None, help="Path to environment configuration file")
+    args = parser.parse_args()
+
+    env = load_env(args.config)
+    connection = connect_db(env, autocommit=False)
+    pop = Population(args.scale)
+    clock = Timeline(args.as_of)
+    target = args.schema or env['DB_NAME']
+    print(f"{Fore.CYAN}🌱 Generating {args.scale:,} users into {target} "
+          f"(seed {args.seed}, as of {args.as_of}){Style.RESET_ALL}")
+
+    rows = []
+    triggers: List[Tuple[str, str]] = []
+    try:
+        prepare_target(connection, args.schema, args.truncate)
+        triggers = row_triggers(connection)
+        partitions = create_history_partitions(connection, clock)
+        if partitions:
+            print(f"  {Fore.GREEN}✓{Style.RESET_ALL} system_logs: {partitions} monthly partitions created")
+        with connection.cursor() as cursor:
+            for table, trigger in triggers:
+                cursor.execute(f'ALTER TABLE {table} DISABLE TRIGGER "{trigger}"')
+        for table in TABLES:
+            result = load_table(connection, table, random.Random(f"{args.seed}:{table}"), pop, clock)
+            rows.append(result)
+            print(f"  {Fore.GREEN}✓{Style.RESET_ALL} {table}: {result['rows']:,} rows in {result['seconds']}s")
+        with connection.cursor() as cursor:
+            for table, trigger in triggers:
+                cursor.execute(f'ALTER TABLE {table} ENABLE TRIGGER "{trigger}"')
+        connection.commit()
+    except KeyboardInterrupt:
+        connection.rollback()
+        print(f"\n{Fore.YELLOW}⏹️  Interrupted - nothing was loaded{Style.RESET_ALL}")
+        sys.exit(1)
+    except Exception:
+        connection.rollback()
+        raise
+
+    if not args.no_analyze:
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            for table in TABLES:
+                cursor.execute(f"ANALYZE {table}")
+    connection.close()
+
+    total_rows = sum(row["rows"] for row in rows)
+    total_seconds = sum(row["seconds"] for row in rows)
+    print()
+    print_table(rows, ["table", "rows", "seconds", "rows_per_sec"], {"rows": ",", "rows_per_sec": ","})
+    print(f"\n{Fore.GREEN}✅ {total_rows:,} rows in {total_seconds:.1f}s"
+          f"{f' ({len(triggers)} row triggers were paused during the load)' if triggers else ''}{Style.RESET_ALL}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"scale": args.scale, "seed": args.seed, "as_of": str(args.as_of), "tables": rows}, f, indent=2)
+        print(f"{Fore.GREEN}📄 Results written to {args.json}{Style.RESET_ALL}")
+
+
+if __name__ == "__main__":
+    main()
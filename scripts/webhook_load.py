@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+SBS Webhook Load Generator
+==========================
+Drives a weighted mix of the n8n webhooks defined under n8n/ at stepped
+target rates to find where the game-engine flows saturate.
+
+Arrivals are open-loop: each request is scheduled at a fixed (or Poisson)
+offset from the start of the step and its latency is measured from that
+scheduled time, not from when a worker got round to sending it. A slow
+server therefore shows up as latency instead of silently lowering the
+request rate (coordinated omission).
+
+Latencies go into HDR-style log-linear histograms (~1.5% precision at any
+magnitude) per endpoint and per step. Each step reports achieved rate, error
+rate and p50/p90/p99/p99.9/max; the first step that exceeds the error or
+latency budget, or misses its target rate, is reported as the saturation
+point. Results can be saved as a baseline and later runs compared against it.
+
+Usage:
+    python scripts/webhook_load.py --list
+    python scripts/webhook_load.py --rates 10,50,100 --step-seconds 30
+    python scripts/webhook_load.py --mix habit-checkin=3,subflow-character-progression=1 --rates 50,500
+    python scripts/webhook_load.py --rates 50,100,200 --save-baseline load_baseline.json
+    python scripts/webhook_load.py --rates 50,100,200 --baseline load_baseline.json
+
+Requirements:
+    pip install requests python-dotenv colorama
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import defaultdict, Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from sbs_common import Fore, Style, load_env, iter_workflows, workflow_webhooks, print_table
+
+DEFAULT_MIX = "habit-checkin=5,subflow-character-progression=3,complete-task=2,check-achievements=1"
+
+# Minimal request bodies for the game-engine webhooks; "<id>" is replaced with a random id per request
+SAMPLE_PAYLOADS = {
+    "habit-checkin": {"habit_id": "<id>", "character_id": "<id>"},
+    "subflow-character-progression": {
+        "character_id": "<id>", "xp_gained": 25, "skill_name": "Fitness", "skill_xp": 25,
+        "source": "webhook_load", "trigger_achievements": False,
+    },
+    "complete-task": {"task_id": "<id>", "character_id": "<id>"},
+    "check-achievements": {"character_id": "<id>"},
+    "bad-habit-battle": {"habit_id": "<id>", "character_id": "<id>"},
+    "skill-progression": {"system_id": "<id>", "progression_type": "stage_complete"},
+    "subflow-level-calculator": {"character_id": "<id>", "xp_gained": 25},
+    "subflow-reward-calculation": {"character_id": "<id>", "difficulty": "medium"},
+    "subflow-streak-calculation": {"habit_id": "<id>", "character_id": "<id>"},
+}
+DEFAULT_PAYLOAD = {"source": "webhook_load"}
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of latencies in microseconds.
+
+    Values below SUB_BUCKETS are exact; above that every power-of-two range
+    is split into SUB_BUCKETS linear buckets, bounding relative error to
+    1/SUB_BUCKETS. Percentiles report the highest value of the bucket.
+    """
+    SUB_BUCKETS = 64
+    SUB_BITS = 6
+
+    def __init__(self):
+        self.counts: Dict[int, int] = defaultdict(int)
+        self.total = 0
+        self.sum_us = 0
+        self.max_us = 0
+
+    @classmethod
+    def _index(cls, value_us: int) -> int:
+        if value_us < cls.SUB_BUCKETS:
+            return value_us
+        shift = value_us.bit_length() - 1 - cls.SUB_BITS
+        return (shift + 1) * cls.SUB_BUCKETS + (value_us >> shift) - cls.SUB_BUCKETS
+
+    @classmethod
+    def _highest_value(cls, index: int) -> int:
+        if index < cls.SUB_BUCKETS:
+            return index
+        shift = index // cls.SUB_BUCKETS - 1
+        lowest = (cls.SUB_BUCKETS + index % cls.SUB_BUCKETS) << shift
+        return lowest + (1 << shift) - 1
+
+    def record(self, seconds: float):
+        value_us = max(0, int(seconds * 1_000_000))
+        self.counts[self._index(value_us)] += 1
+        self.total += 1
+        self.sum_us += value_us
+        self.max_us = max(self.max_us, value_us)
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in other.counts.items():
+            self.counts[index] += count
+        self.total += other.total
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency in ms at the given percentile, or None when empty"""
+        if not self.total:
+            return None
+        rank = max(1, int(-(-pct * self.total // 100)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._highest_value(index), self.max_us) / 1000.0
+        return self.max_us / 1000.0
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        values = {
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "p999_ms": self.percentile(99.9),
+            "max_ms": self.max_us / 1000.0 if self.total else None,
+            "mean_ms": self.sum_us / self.total / 1000.0 if self.total else None,
+        }
+        return {key: round(value, 1) if value is not None else None for key, value in values.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"sub_buckets": self.SUB_BUCKETS, "total": self.total, "sum_us": self.sum_us,
+                "max_us": self.max_us, "counts": {str(k): v for k, v in sorted(self.counts.items())}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.counts.update({int(k): v for k, v in data.get("counts", {}).items()})
+        histogram.total = data.get("total", sum(histogram.counts.values()))
+        histogram.sum_us = data.get("sum_us", 0)
+        histogram.max_us = data.get("max_us", 0)
+        return histogram
+
+
+class EndpointStats:
+    """Latency histogram and error counts for one endpoint within a step"""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.requests = 0
+        self.errors: Counter = Counter()
+
+    def to_row(self, name: str, seconds: float) -> Dict[str, Any]:
+        error_count = sum(self.errors.values())
+        row = {
+            "endpoint": name,
+            "requests": self.requests,
+            "rate": round(self.requests / seconds, 1) if seconds else 0,
+            "errors": error_count,
+            "error_pct": round(100.0 * error_count / self.requests, 2) if self.requests else 0.0,
+        }
+        row.update(self.histogram.summary())
+        return row
+
+
+def discover_webhooks() -> Dict[str, str]:
+    """Map webhook path -> HTTP method for every webhook node under n8n/"""
+    webhooks = {}
+    for path, workflow, error in iter_workflows():
+        if workflow is None:
+            print(f"{Fore.YELLOW}⚠️  Skipping {path.name}: {error}{Style.RESET_ALL}")
+            continue
+        for hook in workflow_webhooks(workflow):
+            webhooks.setdefault(hook["path"], hook["method"].upper())
+    return webhooks
+
+
+def parse_mix(spec: str, webhooks: Dict[str, str]) -> List[Dict[str, Any]]:
+    targets = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        path, _, weight = item.partition("=")
+        path = path.strip().strip("/")
+        if path not in webhooks:
+            print(f"{Fore.YELLOW}⚠️  {path} is not defined by any workflow under n8n/{Style.RESET_ALL}")
+        targets.append({"path": path, "method": webhooks.get(path, "POST"), "weight": float(weight or 1)})
+    if not targets:
+        raise ValueError("empty --mix")
+    return targets
+
+
+def build_payload(path: str, payloads: Dict[str, Any], rng: random.Random, id_max: int) -> Dict[str, Any]:
+    template = payloads.get(path, DEFAULT_PAYLOAD)
+    return {key: rng.randint(1, id_max) if value == "<id>" else value for key, value in template.items()}
+
+
+class LoadRunner:
+    """Open-loop request generator over a pooled requests.Session"""
+
+    def __init__(self, base_url: str, targets: List[Dict[str, Any]], args):
+        self.base_url = base_url.rstrip("/")
+        self.targets = targets
+        self.args = args
+        self.payloads = dict(SAMPLE_PAYLOADS)
+        if args.payloads:
+            with open(args.payloads) as f:
+                self.payloads.update(json.load(f))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(targets), pool_maxsize=args.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+
+    def _fire(self, target: Dict[str, Any], payload: Dict[str, Any], scheduled: float,
+              stats: Dict[str, EndpointStats], start_lag: List[float]):
+        started = time.perf_counter()
+        error = None
+        try:
+            url = f"{self.base_url}{self.args.webhook_path}/{target['path']}"
+            if target["method"] in ("GET", "DELETE"):
+                response = self.session.request(target["method"], url, params=payload, timeout=self.args.timeout)
+            else:
+                response = self.session.request(target["method"], url, json=payload, timeout=self.args.timeout)
+            if response.status_code >= 400:
+                error = f"HTTP {response.status_code}"
+        except requests.Timeout:
+            error = "timeout"
+        except requests.RequestException as e:
+            error = type(e).__name__
+        finished = time.perf_counter()
+
+        with self.lock:
+            endpoint = stats[target["path"]]
+            endpoint.requests += 1
+            endpoint.histogram.record(finished - scheduled)
+            if error:
+                endpoint.errors[error] += 1
+            start_lag.append(started - scheduled)
+
+    def run_step(self, rate: float) -> Dict[str, Any]:
+        stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+        start_lag: List[float] = []
+        weights = [target["weight"] for target in self.targets]
+        total = max(1, int(rate * self.args.step_seconds))
+
+        # Arrival offsets are fixed up front so the schedule never depends on responses
+        offsets, offset = [], 0.0
+        for _ in range(total):
+            offsets.append(offset)
+            offset += self.rng.expovariate(rate) if self.args.arrival == "poisson" else 1.0 / rate
+
+        executor = ThreadPoolExecutor(max_workers=self.args.max_concurrency)
+        futures = []
+        start = time.perf_counter()
+        for offset in offsets:
+            scheduled = start + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            target = self.rng.choices(self.targets, weights)[0]
+            payload = build_payload(target["path"], self.payloads, self.rng, self.args.id_max)
+            futures.append(executor.submit(self._fire, target, payload, scheduled, stats, start_lag))
+        send_seconds = time.perf_counter() - start
+        wait(futures, timeout=self.args.timeout + self.args.drain_seconds)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        with self.lock:
+            overall = EndpointStats()
+            for endpoint in stats.values():
+                overall.requests += endpoint.requests
+                overall.errors.update(endpoint.errors)
+                overall.histogram.merge(endpoint.histogram)
+            lag = sorted(start_lag)
+
+        step = overall.to_row("all", send_seconds)
+        step.pop("endpoint")
+        step.update({
+            "target_rate": rate,
+            "scheduled": total,
+            "unfinished": total - overall.requests,
+            "client_lag_p99_ms": round(lag[min(len(lag) - 1, int(len(lag) * 0.99))] * 1000, 1) if lag else None,
+            "error_kinds": dict(overall.errors),
+            "endpoints": [stats[path].to_row(path, send_seconds) for path in sorted(stats)],
+            "histogram": overall.histogram.to_dict(),
+            "endpoint_histograms": {path: stats[path].histogram.to_dict() for path in sorted(stats)},
+        })
+        return step
+
+    def close(self):
+        self.session.close()
+
+
+def saturation_reason(step: Dict[str, Any], args) -> Optional[str]:
+    if step["error_pct"] > args.max_error_pct:
+        return f"error rate {step['error_pct']}%"
+    if step["unfinished"] or step["rate"] < 0.9 * step["target_rate"]:
+        return f"achieved {step['rate']}/s with {step['unfinished']} unfinished"
+    if (step["p99_ms"] or 0) > args.latency_budget_ms:
+        return f"p99 {step['p99_ms']}ms"
+    return None
+
+
+def compare_baseline(steps: List[Dict[str, Any]], baseline: Dict[str, Any], args) -> List[str]:
+    """Regressions versus a saved run, matched by target rate and endpoint"""
+    regressions = []
+    base_steps = {step["target_rate"]: step for step in baseline.get("steps", [])}
+    for step in steps:
+        base = base_steps.get(step["target_rate"])
+        if not base:
+            continue
+        base_endpoints = {row["endpoint"]: row for row in base.get("endpoints", [])}
+        for row in [dict(step, endpoint="all")] + step["endpoints"]:
+            previous = base_endpoints.get(row["endpoint"]) if row["endpoint"] != "all" else dict(base, endpoint="all")
+            if not previous:
+                continue
+            label = f"{row['endpoint']} @ {step['target_rate']:g}/s"
+            old_p99, new_p99 = previous.get("p99_ms"), row.get("p99_ms")
+            if old_p99 is not None and new_p99 is not None and new_p99 > old_p99 * args.regression_factor \
+                    and new_p99 - old_p99 >= args.regression_min_delta_ms:
+                regressions.append(f"{label}: p99 {old_p99}ms -> {new_p99}ms")
+            if row["error_pct"] - previous.get("error_pct", 0) > args.max_error_pct:
+                regressions.append(f"{label}: errors {previous.get('error_pct', 0)}% -> {row['error_pct']}%")
+
+    base_saturation = baseline.get("saturation_rate")
+    run_saturation = next((s["target_rate"] for s in steps if s.get("saturated")), None)
+    if run_saturation is not None and (base_saturation is None or run_saturation < base_saturation):
+        regressions.append(f"saturates at {run_saturation:g}/s (baseline: {base_saturation or 'none'})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the n8n webhooks")
+    parser.add_argument("--list", action="store_true", help="List webhooks defined under n8n/ and exit")
+    parser.add_argument("--mix", type=str, default=DEFAULT_MIX,
+                        help="Comma-separated webhook=weight pairs (default: game-engine mix)")
+    parser.add_argument("--rates", type=str, default="10,25,50,100",
+                        help="Comma-separated target request rates (req/sec) per step")
+    parser.add_argument("--step-seconds", type=float, default=20, help="Duration of each rate step")
+    parser.add_argument("--arrival", choices=["constant", "poisson"], default="poisson",
+                        help="Inter-arrival distribution (default: poisson)")
+    parser.add_argument("--max-concurrency", type=int, default=64,
+                        help="Maximum requests in flight; arrivals beyond it queue and count as latency")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument("--drain-seconds", type=float, default=5,
+                        help="Extra time to wait for in-flight requests after a step")
+    parser.add_argument("--base-url", type=str, help="n8n base URL (default: N8N_WEBHOOK_BASE_URL)")
+    parser.add_argument("--webhook-path", type=str, default="/webhook", help="Webhook path prefix")
+    parser.add_argument("--payloads", type=str, help="JSON file mapping webhook path -> request body template")
+    parser.add_argument("--id-max", type=int, default=100, help="Upper bound for random <id> values in payloads")
+    parser.add_argument("--max-error-pct", type=float, default=1.0,
+                        help="Error rate above which a step counts as saturated (default: 1)")
+    parser.add_argument("--latency-budget-ms", type=float, default=2000,
+                        help="p99 latency above which a step counts as saturated (default: 2000)")
+    parser.add_argument("--baseline", type=str, help="Compare against a run saved with --save-baseline")
+    parser.add_argument("--save-baseline", type=str, help="Save this run as a baseline JSON file")
+    parser.add_argument("--regression-factor", type=float, default=1.25,
+                        help="Flag p99 above baseline by this factor (default: 1.25)")
+    parser.add_argument("--regression-min-delta-ms", type=float, default=20,
+                        help="...and by at least this many ms (default: 20)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for arrivals, mix and ids")
+    parser.add_argument("--json", type=str, help="Write full results (including histograms) to this file")
+    parser.add_argument("--config", type=str, default=None, help="Path to environment configuration file")
+    args = parser.parse_args()
+
+    env = load_env(args.config)
+    webhooks = discover_webhooks()
+
+    if args.list:
+        print_table([{"path": path, "method": method} for path, method in sorted(webhooks.items())],
+                    ["method", "path"])
+        return
+
+    targets = parse_mix(args.mix, webhooks)
+    rates = [float(rate) for rate in args.rates.split(",") if rate.strip()]
+    base_url = args.base_url or env["N8N_WEBHOOK_BASE_URL"]
+    mix = ", ".join(f"{t['path']}={t['weight']:g}" for t in targets)
+    print(f"{Fore.CYAN}🎯 {base_url}{args.webhook_path} - mix: {mix}{Style.RESET_ALL}")
+
+    runner = LoadRunner(base_url, targets, args)
+    steps = []
+    try:
+        for rate in rates:
+            print(f"{Fore.YELLOW}⏱️  {rate:g} req/sec for {args.step_seconds:g}s...{Style.RESET_ALL}")
+            step = runner.run_step(rate)
+            reason = saturation_reason(step, args)
+            step["saturated"] = reason
+            steps.append(step)
+            if reason and len(steps) < len(rates):
+                print(f"{Fore.RED}🚨 Saturated at {rate:g} req/sec ({reason}) - stopping{Style.RESET_ALL}")
+                break
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}⏹️  Load test interrupted - reporting completed steps{Style.RESET_ALL}")
+    finally:
+        runner.close()
+
+    if not steps:
+        sys.exit(1)
+
+    columns = ["target_rate", "rate", "requests", "error_pct", "p50_ms", "p90_ms", "p99_ms", "p999_ms", "max_ms"]
+    print()
+    print_table(steps, columns + ["client_lag_p99_ms"])
+    print(f"\n{Style.BRIGHT}Per endpoint at {steps[-1]['target_rate']:g} req/sec:{Style.RESET_ALL}")
+    print_table(steps[-1]["endpoints"], ["endpoint"] + columns[1:])
+    if steps[-1]["error_kinds"]:
+        print(f"Errors: {steps[-1]['error_kinds']}")
+
+    saturated = next((s for s in steps if s["saturated"]), None)
+    if saturated:
+        print(f"\n{Fore.RED}🚨 Saturation point: {saturated['target_rate']:g} req/sec "
+              f"({saturated['saturated']}){Style.RESET_ALL}")
+    else:
+        print(f"\n{Fore.GREEN}✅ No saturation up to {steps[-1]['target_rate']:g} req/sec{Style.RESET_ALL}")
+
+    result = {
+        "base_url": base_url,
+        "mix": {t["path"]: t["weight"] for t in targets},
+        "arrival": args.arrival,
+        "step_seconds": args.step_seconds,
+        "saturation_rate": saturated["target_rate"] if saturated else None,
+        "steps": steps,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_baseline(steps, json.load(f), args)
+        if regressions:
+            print(f"\n{Fore.RED}📉 Regressions versus {args.baseline}:{Style.RESET_ALL}")
+            for line in regressions:
+                print(f"  - {line}")
+        else:
+            print(f"\n{Fore.GREEN}✅ No regressions versus {args.baseline}{Style.RESET_ALL}")
+        result["regressions"] = regressions
+
+    for path in filter(None, (args.json, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"{Fore.GREEN}📄 Results written to {path}{Style.RESET_ALL}")
+
+    sys.exit(1 if saturated or regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
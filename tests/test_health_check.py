@@ -0,0 +1,143 @@
+"""Daemon-mode database connection handling in health_check.py"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import psycopg2
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import health_check  # noqa: E402
+from health_check import HealthCheckConfig, HealthChecker  # noqa: E402
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = []
+
+    def execute(self, query, params=None):
+        connection = self.connection
+        if connection.closed:
+            raise psycopg2.InterfaceError("connection already closed")
+        connection.queries += 1
+        if connection.on_execute is not None:
+            connection.on_execute(connection, query)
+        # Another family closing this connection mid-check would surface here
+        if connection.closed:
+            raise psycopg2.InterfaceError("connection already closed")
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, on_execute):
+        self.closed = 0
+        self.queries = 0
+        self.autocommit = False
+        self.on_execute = on_execute
+        self.thread = threading.current_thread().name
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """Patch psycopg2.connect; set connections.on_execute to script the queries"""
+    class Connections(list):
+        on_execute = None
+
+    opened = Connections()
+
+    def connect(**kwargs):
+        connection = FakeConnection(opened.on_execute)
+        opened.append(connection)
+        return connection
+
+    monkeypatch.setattr(health_check.psycopg2, "connect", connect)
+    monkeypatch.setenv("DB_PASSWORD", "secret")
+    return opened
+
+
+def make_checker(tmp_path, **overrides) -> HealthChecker:
+    config = HealthCheckConfig(env_file=str(tmp_path / "missing.env"), parallel=True,
+                               daemon_interval=0, daemon_intervals={}, **overrides)
+    checker = HealthChecker(config)
+    checker.docker_client = None
+    return checker
+
+
+def latest(checker: HealthChecker, name: str):
+    return [result for result in checker.results if result.name == name][-1]
+
+
+def test_daemon_parallel_failing_family_does_not_close_another_familys_connection(tmp_path, connections):
+    def on_execute(connection, query):
+        if "missing_tables" in query or "to_regclass" in query:
+            # database fails at once and discards its connection
+            raise psycopg2.ProgrammingError("relation does not exist")
+        # db_perf is still querying when that happens
+        time.sleep(0.05)
+
+    connections.on_execute = on_execute
+    checker = make_checker(tmp_path)
+    try:
+        checker.run_daemon(["database", "db_perf"], silent=True, max_cycles=3)
+
+        assert latest(checker, "database").status == "fail"
+        assert latest(checker, "db_perf").status == "warning"
+        assert "pg_stat_statements extension not installed" in latest(checker, "db_perf").message
+        assert not any(name.endswith("_error") for name in (r.name for r in checker.results))
+
+        perf = [c for c in connections if c.thread == "health-check-db_perf"]
+        database = [c for c in connections if c.thread == "health-check-database"]
+        # db_perf kept one connection across cycles; database reconnected after each failure
+        assert len(perf) == 1 and not perf[0].closed
+        assert len(database) == 3 and all(c.closed for c in database)
+    finally:
+        checker.close()
+    assert all(c.closed for c in connections)
+
+
+def test_daemon_parallel_does_not_reuse_a_connection_abandoned_at_the_deadline(tmp_path, connections):
+    release = threading.Event()
+
+    def on_execute(connection, query):
+        # The first db_perf connection hangs past the deadline
+        if connection is connections[0]:
+            release.wait(5)
+
+    connections.on_execute = on_execute
+    checker = make_checker(tmp_path, check_deadline=0.2)
+    try:
+        checker.run_daemon(["db_perf"], silent=True, max_cycles=1)
+        assert latest(checker, "db_perf_deadline").status == "fail"
+
+        checker.run_daemon(["db_perf"], silent=True, max_cycles=1)
+        assert latest(checker, "db_perf").status == "warning"
+        assert len(connections) == 2
+        assert connections[1].queries > 0
+
+        # The abandoned check finishes on its own connection and closes it
+        release.set()
+        deadline = time.monotonic() + 5
+        while not connections[0].closed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert connections[0].closed
+        assert not connections[1].closed
+    finally:
+        release.set()
+        checker.close()